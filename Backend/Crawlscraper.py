@@ -1,101 +1,277 @@
 import os
 import sys
-import re
-import json
+import time
+import uuid
+import socket
 import asyncio
-from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+from collections import deque
+from urllib.parse import urlparse
 from datetime import datetime
-from collections import defaultdict
+from contextlib import asynccontextmanager, AsyncExitStack
 from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
 from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
 from crawl4ai.content_filter_strategy import PruningContentFilter
-from utils import is_excluded, clean_text, log_progress
-import hashlib
+from utils import is_excluded, log_progress
+from hash_index import HashIndex
+from storage import get_store
+from link_extractor import LinkExtractor, get_link_extractor
+from offload import CPUOffloader, LoopLagMonitor, extract_links_task, summarize_task
+from rate_limiter import RateLimiter, RateLimitedCrawler
+from incremental import ValidatorIndex, ChangeDetector, response_validators
+from sitemap import DEFAULT_DISCOVERY, find_sitemaps, fetch_sitemap_entries, sitemap_page_urls
+from http_client import make_client
+from fetch_tier import TierMemory, TieredCrawler
+from output_sink import OUTPUT_FOLDER, OutputSink, merge_worker_output, worker_output_dir
+from crawl_state import CrawlState
+from url_store import URLStore, VISITED, COMPLETED
+from canonical import Canonicalizer
+from near_dup import NEAR_DUPLICATES, NearDuplicateFilter
+from progress_events import hub
+from work_queue import WorkQueue, aggregate_reports, get_work_queue
+from metrics import stage_seconds
+from job_profiler import profile_job
+from scheduler import BudgetedCrawler, PageBudget
+from retry import RetryQueue
 
 # Configuration constants
 PROGRESS_FOLDER = "progress"  # Directory for progress tracking files
 MAX_CONCURRENT = 15          # Maximum concurrent crawling operations
+PIPELINED = True             # Fetch each page once for discovery and extraction
+INCREMENTAL = False          # Skip pages that did not change since the last crawl
+HTTP_FIRST = True            # Fetch static pages over HTTP, render only JS pages
+WORKER_POLL = 1.0            # Seconds an idle distributed worker waits for more URLs
+
+
+async def fetch_page(crawler, url: str, config: CrawlerRunConfig, session_id: str):
+    """Fetch one page with the crawler, timed as the "fetch" stage (see metrics.py)"""
+    with stage_seconds.time("fetch"):
+        return await crawler.arun(url, config, session_id=session_id)
 
 
 async def collect_internal_urls(
-    crawler, start_url: str, batch_size: int, progress_file: str
+    crawler,
+    start_url: str,
+    batch_size: int,
+    progress_file: str = None,
+    crawl_config: CrawlerRunConfig = None,
+    on_page=None,
+    link_extractor: LinkExtractor = None,
+    offloader: CPUOffloader = None,
+    seeds=None,
+    should_fetch=None,
+    seed_stream=None,
+    state: CrawlState = None,
+    canonicalizer: Canonicalizer = None,
+    retries: RetryQueue = None,
 ):
     """
     Discover all internal URLs from a starting website
     
     This function performs a breadth-first crawl to find all internal links
-    within the same domain as the starting URL. It processes URLs in batches
-    for efficient concurrent processing.
+    within the same domain as the starting URL. A fixed pool of worker
+    coroutines pulls URLs from a shared queue, so a slow page only occupies
+    its own slot while the other workers keep fetching.
     
     Args:
         crawler: AsyncWebCrawler instance for making requests
         start_url: The starting URL to begin discovery from
-        batch_size: Number of URLs to process concurrently in each batch
-        progress_file: Path to file for logging progress updates
+        batch_size: Number of worker coroutines (concurrent requests)
+        progress_file: Path to file for logging progress updates (optional)
+        crawl_config: Crawler settings (default: links only, no content filter)
+        on_page: Optional coroutine function called as
+            on_page(url, result, discovered_count) for every fetched page;
+            result is the exception if the fetch failed (after its
+            retries), and None for a page whose rel=canonical URL was
+            already queued (nothing to extract). A page whose rel=canonical URL is new is passed
+            under that URL, which is then not fetched itself
+        link_extractor: Strategy for reading links (default: LINK_EXTRACTOR)
+        offloader: Pool that parses pages off the event loop (optional;
+            the extractor is then recreated by name inside the workers)
+        seeds: Extra URLs of the site to queue from the start, e.g. pages
+            known from a previous crawl or the sitemap (optional)
+        should_fetch: Optional coroutine function should_fetch(url); pages
+            for which it returns False are not fetched (and their links
+            not followed)
+        seed_stream: Async iterable of URLs queued while the crawl runs,
+            e.g. a sitemap being downloaded (optional); discovery ends
+            when it is exhausted and the frontier is empty
+        state: Checkpointed URL states of the job (optional); queued and
+            visited URLs are recorded, and a resumed state restarts from
+            its frontier instead of the start URL. Without on_page the
+            state is flushed here; otherwise on_page owns the checkpoints
+        canonicalizer: Maps URL variants to one canonical URL and caps
+            crawler traps (default: Canonicalizer(start_url)); every URL
+            is queued in its canonical form
+        retries: Delayed queue for fetches that failed for a transient
+            reason (default: a new RetryQueue); a URL waiting for its
+            next attempt holds no worker, and discovery ends when none
+            is waiting
         
     Returns:
-        set: Collection of discovered internal URLs
+        set: Collection of discovered canonical internal URLs (without the
+            completed URLs a seen filter dropped from memory, see
+            CrawlState, and without pages stored under their
+            rel=canonical URL)
     """
-    to_visit = set([start_url])  # URLs queued for visiting
-    visited = set()              # URLs already processed
-    discovered = set()           # All discovered internal URLs
+    # Queued, visited and discovered URLs share one compact store (the
+    # job's checkpointed state if given); the frontier holds its keys
+    urls = state.urls if state is not None else URLStore()
+    frontier = asyncio.Queue()   # Keys of URLs queued for visiting
+    visited = 0                  # Number of URLs taken from the frontier
+    netloc = urlparse(start_url).netloc  # Only links to this site are followed
+    if canonicalizer is None:
+        canonicalizer = Canonicalizer(start_url)
+    configured_url, start_url = start_url, canonicalizer.start
+    keep_query = bool(canonicalizer.keep_params)
+    aliases = set()              # Pages stored under their rel=canonical URL
+
+    def add(url):
+        return state.add(url) if state is not None else urls.add(url)
+
+    def enqueue(url):
+        key = add(url)
+        if key is not None:
+            frontier.put_nowait(key)
+
+    def add_seed(url):
+        url = canonicalizer.resolve(url, urls)
+        if url is not None and url not in urls and not is_excluded(url):
+            enqueue(url)
+
+    if len(urls):
+        # Resumed job: every known URL counts as seen, unfinished ones are queued again
+        for url in state.unfinished(COMPLETED if on_page else VISITED):
+            frontier.put_nowait(urls.key(url))
+    else:
+        enqueue(start_url)
+
+    for url in seeds or ():
+        add_seed(url)
     
     # Configure crawler for link discovery
-    crawl_config = CrawlerRunConfig(
-        cache_mode=CacheMode.BYPASS,  # Always fetch fresh content
-        markdown_generator=DefaultMarkdownGenerator()
-    )
-    session_id = f"discovery_{urlparse(start_url).netloc}"
-
-    # Process URLs in batches until none remain
-    while to_visit:
-        # Take a batch of URLs to process
-        batch = list(to_visit)[:batch_size]
-        to_visit.difference_update(batch)
-        visited.update(batch)
-
-        # Calculate and log progress (discovery phase: 0-80%)
-        total = len(to_visit) + len(visited)
-        progress = int((len(visited) / total) * 80) if total else 0
-        log_progress(
-            progress_file, progress, status="discovering", url=start_url
+    if crawl_config is None:
+        crawl_config = CrawlerRunConfig(
+            cache_mode=CacheMode.BYPASS,  # Always fetch fresh content
+            markdown_generator=DefaultMarkdownGenerator()
         )
+    session_id = f"discovery_{netloc}"
+    if link_extractor is None:
+        link_extractor = get_link_extractor()
+    if retries is None:
+        retries = RetryQueue()
+    # URLs whose retry is due go back into the frontier
+    retries.bind(lambda url: frontier.put_nowait(urls.key(url)))
 
-        # Crawl all URLs in the current batch concurrently
-        tasks = [
-            crawler.arun(url, crawl_config, session_id=session_id) for url in batch
-        ]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+    async def worker():
+        nonlocal visited
+        while True:
+            url = urls.url(await frontier.get())
+            try:
+                visited += 1
 
-        # Process results and extract new links
-        for url, res in zip(batch, results):
-            if isinstance(res, Exception):
-                continue
-            if res.success and res.html:
-                soup = BeautifulSoup(res.html, "html.parser")
-                # Extract all anchor tags with href attributes
-                for tag in soup.find_all("a", href=True):
-                    full = urljoin(url, tag["href"])  # Convert relative to absolute URL
-                    parsed = urlparse(full)
-                    
-                    # Only include URLs from the same domain
-                    if parsed.netloc == urlparse(start_url).netloc:
-                        # Normalize URL (remove query params and fragments)
-                        norm = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-                        if (
-                            norm not in visited
-                            and norm not in to_visit
-                            and not is_excluded(norm)  # Skip excluded file types
-                        ):
-                            to_visit.add(norm)
-                            discovered.add(norm)
+                # Calculate and log progress (discovery phase: 0-80%)
+                if progress_file:
+                    progress = int((visited / len(urls)) * 80)
+                    log_progress(
+                        progress_file, progress, status="discovering", url=start_url
+                    )
+
+                # A URL that comes back for a retry passed should_fetch before
+                retried = retries.failed_attempts(url) > 0
+                if should_fetch is not None and not retried and not await should_fetch(url):
+                    continue
+
+                try:
+                    # The start page is fetched as configured, others in canonical form
+                    fetch_url = configured_url if url == start_url else url
+                    res = await fetch_page(crawler, fetch_url, crawl_config, session_id)
+                except Exception as e:
+                    res = e
+                if retries.retry(url, res):
+                    visited -= 1  # Still queued; taken from the frontier again later
+                    continue
+                if isinstance(res, Exception):
+                    if state is not None:
+                        state.visit(url)
+                    if on_page:
+                        await on_page(url, res, len(urls) - 1)
+                    continue
+
+                # Extract new links and queue them right away
+                target = None
+                if res.success and res.html:
+                    with stage_seconds.time("links"):
+                        if offloader is not None:
+                            # Only the crawl4ai strategy reads result.links
+                            links = getattr(res, "links", None) if link_extractor.name == "crawl4ai" else None
+                            page_links = await offloader.run(
+                                extract_links_task, link_extractor.name, url, res.html, links, netloc, keep_query
+                            )
+                        else:
+                            page_links = link_extractor.internal_links(url, res, netloc, keep_query)
+                    for link in page_links:
+                        link = canonicalizer.resolve(link, urls)
+                        if link is not None:
+                            enqueue(link)
+                    target = canonicalizer.page_canonical(url, res.html)
+                if state is not None:
+                    state.visit(url)
+
+                if target is not None:
+                    # The page names another URL as its canonical version:
+                    # keep its content under that URL, once
+                    aliases.add(url)
+                    if add(target) is None:
+                        canonicalizer.duplicates += 1
+                    else:
+                        canonicalizer.aliases += 1
+                        if state is not None:
+                            state.visit(target)
+                        if on_page:
+                            await on_page(target, res, len(urls) - 1)
+                    res = None
+
+                # Hand the same result to content extraction (pipelined mode)
+                if on_page:
+                    await on_page(url, res, len(urls) - 1)
+                elif state is not None and state.flush_due():
+                    state.flush()
+            finally:
+                frontier.task_done()
+
+    async def drain():
+        # Streamed seeds may still arrive while the frontier is empty
+        if seed_stream is not None:
+            async for url in seed_stream:
+                add_seed(url)
+        await frontier.join()
+        # Failed fetches waiting for their next attempt
+        while retries:
+            await retries.wait()
+            await frontier.join()
+
+    # Run the workers until the frontier is drained
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, batch_size))]
+    drained = asyncio.create_task(drain())
+    try:
+        await asyncio.wait([drained, *workers], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in [drained, *workers]:
+            task.cancel()
+        results = await asyncio.gather(drained, *workers, return_exceptions=True)
+        retries.close()  # Interrupted: waiting URLs stay queued in the state
+
+    # A worker only stops early on an unexpected error; surface it
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
 
     # Log completion of discovery phase
-    log_progress(
-        progress_file, 80, status="discovery done", url=start_url
-    )
-    return discovered
+    if progress_file:
+        log_progress(
+            progress_file, 80, status="discovery done", url=start_url
+        )
+    return {url for url in urls if url != start_url and url not in aliases}
 
 
 def log_error(url: str, error: Exception, log_dir: str = "output/logs"):
@@ -105,7 +281,332 @@ def log_error(url: str, error: Exception, log_dir: str = "output/logs"):
         f.write(f"[{datetime.now().isoformat()}] ERROR @ {url}: {str(error)}\n")
 
 
-async def crawl_all(urls, max_concurrent, progress_file, start_url):
+def extraction_config(**overrides) -> CrawlerRunConfig:
+    """
+    Crawler settings for content extraction
+
+    Args:
+        **overrides: Extra CrawlerRunConfig arguments
+
+    Returns:
+        CrawlerRunConfig: Config that focuses on the main content of a page
+    """
+    return CrawlerRunConfig(
+        css_selector="main, article, section",  # Focus on main content areas
+        excluded_selector=".cookie, .consent, .banner",  # Skip irrelevant elements
+        markdown_generator=DefaultMarkdownGenerator(
+            content_filter=PruningContentFilter()  # Remove low-value content
+        ),
+        **overrides,
+    )
+
+
+@asynccontextmanager
+async def shared_crawler(crawler=None):
+    """
+    Use the given crawler, or start a headless browser for the duration
+
+    Args:
+        crawler: Already running AsyncWebCrawler to reuse (optional)
+    """
+    if crawler is not None:
+        yield crawler
+        return
+    async with AsyncWebCrawler(config=BrowserConfig(headless=True)) as own:
+        yield own
+
+
+class PageProcessor:
+    """
+    Turns crawl results into summaries, hashes and output files for one job
+
+    Both the two-pass flow (crawl_all) and the pipelined flow (crawl_site)
+    feed their results through the same processor, so duplicate detection,
+    counters and output files behave identically.
+    """
+
+    COUNTERS = ("done", "success", "fail", "skipped", "changed", "new", "near_duplicates")
+
+    def __init__(
+        self,
+        progress_file: str,
+        start_url: str,
+        total: int = 0,
+        offloader: CPUOffloader = None,
+        state: CrawlState = None,
+        near_duplicates: str = None,
+        worker: str = None,
+        retries: RetryQueue = None,
+    ):
+        """
+        Args:
+            progress_file: Path to file for logging progress updates
+            start_url: Original starting URL (for consistent progress logging)
+            total: Number of pages expected (may grow in pipelined mode)
+            offloader: Pool that runs clean_text and hashing off the event
+                loop (optional; inline when not given)
+            state: Checkpointed URL states of the job (optional); processed
+                pages are marked completed, and a resumed state restores
+                the counters and output of the interrupted run
+            near_duplicates: What to do with pages whose content is nearly
+                identical to a stored page of the site: "off", "skip" or
+                "cluster" (default: NEAR_DUPLICATES, see near_dup.py)
+            worker: Name of a distributed worker (see run_worker); its
+                output goes to a folder of its own until the job is merged
+            retries: Retry queue of the job, whose retried, recovered and
+                abandoned counters are reported and checkpointed with the
+                page counters (default: a new RetryQueue)
+        """
+        self.progress_file = progress_file
+        self.offloader = offloader
+        self.start_url = start_url
+        self.total = total
+        self.done = 0      # Number of URLs processed
+        self.success = 0   # Number of successful extractions
+        self.fail = 0      # Number of failed extractions
+        self.skipped = 0   # Unchanged pages (not fetched, or same content hash)
+        self.changed = 0   # Known pages with new content
+        self.new = 0       # Pages without stored content
+        self.near_duplicates = 0  # Pages skipped or clustered as near-duplicates
+        self.retries = retries if retries is not None else RetryQueue()
+
+        self.state = state
+
+        # Stream results to output files organized by date and domain
+        date = datetime.now().strftime("%Y-%m-%d")
+        self.out_dir = os.path.join(OUTPUT_FOLDER, date)
+        if worker is not None:
+            self.out_dir = worker_output_dir(self.out_dir, worker)
+        netloc = urlparse(start_url).netloc
+        if state is not None and state.out_dir:
+            # Resumed job: continue its counters and output files
+            self.out_dir = state.out_dir
+            for name in self.COUNTERS:
+                setattr(self, name, state.counters.get(name, 0))
+            self.retries.restore(state.counters)
+        self.output = OutputSink(self.out_dir)
+        if state is not None:
+            if state.out_dir:
+                self.output.restore(netloc, state.completed())
+            state.out_dir = self.out_dir
+
+        # Load the content hashes and cache validators of this site once;
+        # they are flushed at the output checkpoints (see checkpoint())
+        self.hash_index = HashIndex(flush_every=0, flush_interval=float("inf")).load(netloc)
+        self.validators = ValidatorIndex(netloc, flush_every=0, flush_interval=float("inf")).load()
+        self.near_dups = NearDuplicateFilter(near_duplicates or NEAR_DUPLICATES).load(
+            self.hash_index.data.get(netloc, {})
+        )
+        self.sitemap_lastmods = {}  # {url: lastmod} when the sitemap was read
+
+    async def summarize(self, markdown: str) -> tuple:
+        """
+        Returns:
+            tuple: (summary, content hash, SimHash) of the page markdown; the
+                SimHash is None unless near-duplicate detection is on
+        """
+        fingerprint = self.near_dups.mode != "off"
+        if self.offloader is not None:
+            result, timings = await self.offloader.run(summarize_task, markdown, fingerprint, True)
+        else:
+            result, timings = summarize_task(markdown, fingerprint, True)
+        # Measured where the work ran, so pool queueing is not counted
+        stage_seconds.observe("clean_text", timings[0])
+        stage_seconds.observe("hash", timings[1])
+        return result if fingerprint else (*result, None)
+
+    async def process(self, url: str, res):
+        """
+        Extract, deduplicate and store the content of one crawled page
+
+        Args:
+            url: Page URL
+            res: Crawl result, or the exception raised while fetching
+        """
+        try:
+            # Handle exceptions from failed requests
+            if isinstance(res, Exception):
+                raise res
+
+            # Process successful responses with content
+            if res.success and res.markdown.fit_markdown:
+                # Clean, summarize and hash the extracted content
+                summary, content_hash, fingerprint = await self.summarize(res.markdown.fit_markdown)
+                domain = urlparse(url).netloc
+
+                # Remember the cache validators for the next incremental crawl
+                self.validators.put(
+                    url,
+                    lastmod=self.sitemap_lastmods.get(url),
+                    **response_validators(getattr(res, "response_headers", None)),
+                )
+
+                # Skip if content already exists and is identical
+                if self.hash_index.is_unchanged(domain, url, content_hash):
+                    print(f"Skipping {url} - already exists")
+                    self.skipped += 1
+                else:
+                    original = self.near_dups.match(url, fingerprint)
+                    if original is not None:
+                        self.near_duplicates += 1
+                    if original is not None and self.near_dups.mode == "skip":
+                        print(f"Skipping {url} - near-duplicate of {original}")
+                    else:
+                        self.store(domain, url, summary, content_hash, fingerprint, cluster=original)
+            else:
+                self.fail += 1
+        except Exception:
+            self.fail += 1
+        # Not counted when cancelled: a resumed job fetches the page again
+        self.done += 1
+        self.completed(url)
+
+    def store(
+        self, domain: str, url: str, summary: str, content_hash: str, fingerprint: int = None, cluster: str = None
+    ):
+        """
+        Write the record of a new or changed page and remember its hash
+
+        A near-duplicate in "cluster" mode is stored with the URL of the
+        page it resembles under "cluster"; it is not indexed itself, so
+        clusters keep the page that was seen first.
+        """
+        if self.hash_index.get(domain, url) is None:
+            self.new += 1
+        else:
+            self.changed += 1
+
+        # Append extracted content to the domain's output stream
+        record = {
+            "url": url,
+            "titel": url.rstrip("/").split("/")[-1] or domain,  # Use last path segment as title
+            "samenvatting": summary,
+        }
+        if cluster is not None:
+            record["cluster"] = cluster
+        with stage_seconds.time("output"):
+            self.output.write(domain, record)
+
+        # Update hash index (flushed to the database at checkpoints)
+        self.hash_index.put(domain, url, content_hash, simhash=fingerprint)
+        if cluster is None:
+            self.near_dups.add(url, fingerprint)
+        self.success += 1
+
+    def completed(self, url: str):
+        """Mark a processed page in the crawl state and checkpoint when due"""
+        if self.state is not None:
+            self.state.complete(url)
+        if self.output.checkpoint_due() or (self.state is not None and self.state.flush_due()):
+            self.checkpoint()
+
+    def skip(self, url: str):
+        """Count a page that was not fetched because it did not change"""
+        self.skipped += 1
+        self.done += 1
+        self.completed(url)
+
+    def alias(self, url: str):
+        """Count a page whose content is stored under its rel=canonical URL"""
+        self.done += 1
+        self.completed(url)
+
+    def report(self, progress: int, status: str):
+        """Log the current counters with the given progress and status"""
+        log_progress(
+            self.progress_file,
+            progress,
+            status,
+            self.done,
+            self.total,
+            self.success,
+            self.fail,
+            url=self.start_url,
+            skipped=self.skipped,
+            changed=self.changed,
+            new=self.new,
+            **self.retries.counters(),
+        )
+
+    def checkpoint(self):
+        """
+        Make the output durable, then persist the pending hash updates
+
+        The order matters: a hash (or a completed URL in the crawl state)
+        marks a page as stored, so it may only reach the database after
+        the page's record is on disk.
+        """
+        with stage_seconds.time("output"):
+            self.output.sync()
+        self.hash_index.flush()
+        self.validators.flush()
+        if self.state is not None:
+            self.state.flush(self.counters())
+
+    def close(self):
+        """Persist output and pending hash updates (also when the crawl is interrupted)"""
+        self.output.close()
+        self.hash_index.flush()
+        self.validators.flush()
+        if self.state is not None:
+            self.state.flush(self.counters())
+
+    def counters(self) -> dict:
+        """
+        Returns:
+            dict: Page and retry counters, as stored in the crawl checkpoint
+        """
+        return {**{name: getattr(self, name) for name in self.COUNTERS}, **self.retries.counters()}
+
+    async def change_detector(self, client, rate_limiter=None, read_sitemap: bool = True):
+        """
+        Prepare an incremental crawl of the start URL's site
+
+        Reads the sitemap (if any) for lastmod values and builds the
+        detector that skips pages known to be unchanged.
+
+        Args:
+            client: httpx.AsyncClient for the sitemap and conditional requests
+            rate_limiter: RateLimiter for the conditional requests (optional)
+            read_sitemap: Download /sitemap.xml for lastmod values
+
+        Returns:
+            ChangeDetector: Detector over the stored hashes and validators
+        """
+        netloc = urlparse(self.start_url).netloc
+        if read_sitemap:
+            canonicalizer = Canonicalizer(self.start_url)
+            sitemaps = await find_sitemaps(client, self.start_url)
+            for loc, lastmod in await fetch_sitemap_entries(client, sitemaps):
+                url = canonicalizer.canonical(loc)
+                if url and lastmod:
+                    self.sitemap_lastmods[url] = lastmod
+        known = set(self.hash_index.data.get(netloc, {}))
+        return ChangeDetector(client, self.validators, known, self.sitemap_lastmods, rate_limiter)
+
+    def finish(self):
+        """Write the legacy JSON output files and log completion of the job"""
+        self.output.finalize()
+        if self.near_duplicates:
+            print(f"Near-duplicates ({self.near_dups.mode}): {self.near_duplicates}")
+
+        # Log completion of entire scraping process
+        self.report(100, "done")
+
+
+async def crawl_all(
+    urls,
+    max_concurrent,
+    progress_file,
+    start_url,
+    crawler=None,
+    offloader=None,
+    incremental: bool = False,
+    http_client=None,
+    rate_limiter: RateLimiter = None,
+    state: CrawlState = None,
+    retries: RetryQueue = None,
+):
     """
     Crawl all discovered URLs and extract content
     
@@ -117,161 +618,692 @@ async def crawl_all(urls, max_concurrent, progress_file, start_url):
         max_concurrent: Maximum number of concurrent crawling operations
         progress_file: Path to file for logging progress updates
         start_url: Original starting URL (for consistent progress logging)
+        crawler: Running AsyncWebCrawler to reuse (default: start a new browser)
+        offloader: Pool for CPU-bound post-processing (optional)
+        incremental: Skip pages that did not change since the last crawl
+            (sitemap lastmod, ETag/Last-Modified) before rendering them
+        http_client: httpx.AsyncClient for the incremental checks
+            (default: a new client)
+        rate_limiter: RateLimiter for the incremental checks (optional)
+        state: Checkpointed URL states of the job (optional); pages it
+            holds as completed are not fetched again
+        retries: Retry queue of the job (default: a new RetryQueue);
+            pages whose fetch failed for a transient reason join a later
+            batch once their backoff is over
     """
-    # Create output directory organized by date
-    date = datetime.now().strftime("%Y-%m-%d")
-    out_dir = os.path.join("output", date)
-    os.makedirs(out_dir, exist_ok=True)
-
-    # Configure browser and crawler settings
-    browser_config = BrowserConfig(headless=True)  # Run in headless mode
-    crawl_config = CrawlerRunConfig(
-        css_selector="main, article, section",  # Focus on main content areas
-        excluded_selector=".cookie, .consent, .banner",  # Skip irrelevant elements
-        markdown_generator=DefaultMarkdownGenerator(
-            content_filter=PruningContentFilter()  # Remove low-value content
-        ),
+    crawl_config = extraction_config()
+    processor = PageProcessor(
+        progress_file, start_url, total=len(urls), offloader=offloader, state=state, retries=retries
     )
+    retries = processor.retries
+    total = processor.total
+    if state is not None and state.resumed:
+        completed = state.completed()
+        urls = [url for url in urls if url not in completed]
+    pending = deque(urls)   # URLs to fetch, with the retries that are due at the end
+    retries.bind(pending.append)
+    fetched = 0             # Fetches started, for unique session IDs
+
+    try:
+        async with shared_crawler(crawler) as crawler, AsyncExitStack() as stack:
+            detector = None
+            if incremental:
+                client = http_client or await stack.enter_async_context(make_client())
+                detector = await processor.change_detector(client, rate_limiter)
+
+            # Process URLs in batches for memory efficiency
+            while pending or retries:
+                if not pending:
+                    # Only failed fetches waiting for their next attempt are left
+                    await retries.wait()
+                    continue
+                batch = [pending.popleft() for _ in range(min(max_concurrent, len(pending)))]
+
+                # Leave out pages known to be unchanged (retried pages were checked before)
+                if detector is not None:
+                    checks = [url for url in batch if not retries.failed_attempts(url)]
+                    keep = dict(zip(checks, await asyncio.gather(*(detector.should_fetch(url) for url in checks))))
+                    for url, fetch in keep.items():
+                        if not fetch:
+                            processor.skip(url)
+                    batch = [url for url in batch if keep.get(url, True)]
+
+                # Create concurrent tasks for the current batch
+                tasks = [
+                    fetch_page(crawler, url, crawl_config, f"batch_{fetched + j}")
+                    for j, url in enumerate(batch)
+                ]
+                fetched += len(batch)
+
+                # Process results as they complete
+                for url, res in zip(
+                    batch, await asyncio.gather(*tasks, return_exceptions=True)
+                ):
+                    if retries.retry(url, res):
+                        continue  # Fetched again in a later batch
+                    await processor.process(url, res)
 
-    # Initialize tracking variables
-    results_by_domain = defaultdict(list)  # Group results by domain
-    total = len(urls)
-    done = 0      # Number of URLs processed
-    success = 0   # Number of successful extractions
-    fail = 0      # Number of failed extractions
-
-    async with AsyncWebCrawler(config=browser_config) as crawler:
-        # Process URLs in batches for memory efficiency
-        for i in range(0, len(urls), max_concurrent):
-            batch = urls[i : i + max_concurrent]
-            
-            # Create concurrent tasks for the current batch
-            tasks = [
-                crawler.arun(url, crawl_config, session_id=f"batch_{i+j}")
-                for j, url in enumerate(batch)
-            ]
-
-            # Process results as they complete
-            for url, task in zip(
-                batch, await asyncio.gather(*tasks, return_exceptions=True)
-            ):
-                try:
-                    # Handle exceptions from failed requests
-                    if isinstance(task, Exception):
-                        raise task
-                    res = task
-                    
-                    # Process successful responses with content
-                    if res.success and res.markdown.fit_markdown:
-                        # Clean and summarize the extracted content
-                        summary = clean_text(res.markdown.fit_markdown)
-                        domain = urlparse(url).netloc
-
-                        # Check for duplicate content using hash comparison
-                        output_file = os.path.join("hashes.json")
-                        if os.path.exists(output_file):
-                            with open(output_file, "r", encoding="utf-8") as f:
-                                existing_data = json.load(f)
-
-                                # Skip if content already exists and is identical
-                                if domain in existing_data:
-                                    if url in existing_data[domain]:
-                                        existing_hash = existing_data[domain][url]["hash"]
-                                        current_hash = hashlib.sha256(summary.encode()).hexdigest()
-                                        if existing_hash == current_hash:
-                                            print(f"Skipping {url} - already exists")
-                                            continue
-
-                        # Store extracted content organized by domain
-                        results_by_domain[domain].append(
-                            {
-                                "url": url,
-                                "titel": url.rstrip("/").split("/")[-1] or domain,  # Use last path segment as title
-                                "samenvatting": summary,
-                            }
-                        )
-
-                        # Update hash database to track processed content
-                        with open("hashes.json", "r", encoding="utf-8") as f:
-                            existing_data = json.load(f)
-                        
-                        with open("hashes.json", "w", encoding="utf-8") as f:
-                            if domain not in existing_data:
-                                existing_data[domain] = {}
-                            
-                            # Store content hash and timestamp
-                            existing_data[domain][url] = {
-                                "hash": hashlib.sha256(summary.encode()).hexdigest(),
-                                "timestamp": datetime.now().isoformat(),
-                            }
-                            
-                            json.dump(existing_data, f, indent=2, ensure_ascii=False)
-                        success += 1
-                    else:
-                        fail += 1
-                except Exception:
-                    fail += 1
-                finally:
                     # Update progress tracking (scraping phase: 80-100%)
-                    done += 1
-                    progress = 80 + int((done / total) * 20) if total else 80
-                    log_progress(
-                        progress_file,
-                        progress,
-                        "scraping",
-                        done,
-                        total,
-                        success,
-                        fail,
-                        url=start_url,
-                    )
+                    progress = 80 + int((processor.done / total) * 20) if total else 80
+                    processor.report(progress, "scraping")
+    finally:
+        retries.close()
+        processor.close()
 
-    # Save results organized by domain
-    for domain, items in results_by_domain.items():
-        with open(os.path.join(out_dir, f"{domain}.json"), "w", encoding="utf-8") as f:
-            json.dump(items, f, indent=2, ensure_ascii=False)
+    processor.finish()
 
-    # Log completion of entire scraping process
-    log_progress(
-        progress_file, 100, "done", done, total, success, fail, url=start_url
+
+async def discover_urls(
+    crawler,
+    start_url: str,
+    max_concurrent: int,
+    progress_file: str = None,
+    offloader: CPUOffloader = None,
+    discovery: str = DEFAULT_DISCOVERY,
+    http_client=None,
+    state: CrawlState = None,
+    canonicalizer: Canonicalizer = None,
+    retries: RetryQueue = None,
+):
+    """
+    Discovery phase of the two-pass flow
+
+    With the "sitemap" strategy the URLs come from the sitemaps listed in
+    robots.txt, without rendering any page; the link crawl is only used
+    when the website has no usable sitemap.
+
+    Args:
+        crawler: AsyncWebCrawler for the link crawl
+        start_url: The starting URL to begin discovery from
+        max_concurrent: Number of concurrent page fetches
+        progress_file: Path to file for logging progress updates (optional)
+        offloader: Pool for link parsing (optional)
+        discovery: URL discovery strategy, "links" or "sitemap"
+        http_client: httpx.AsyncClient for the sitemaps (default: a new client)
+        state: Checkpointed URL states of the job (optional; see
+            collect_internal_urls)
+        canonicalizer: URL canonicalization of the job (default:
+            Canonicalizer(start_url))
+        retries: Retry queue of the job for the link crawl (optional)
+
+    Returns:
+        set: Collection of discovered canonical internal URLs
+    """
+    if canonicalizer is None:
+        canonicalizer = Canonicalizer(start_url)
+    if discovery == "sitemap" and not (state is not None and state.urls):
+        if progress_file:
+            log_progress(progress_file, 0, status="discovering", url=start_url)
+        urls = set()
+        async with AsyncExitStack() as stack:
+            client = http_client or await stack.enter_async_context(make_client())
+            async for page_url in sitemap_page_urls(client, start_url):
+                page_url = canonicalizer.resolve(page_url, urls)
+                if page_url is not None:
+                    urls.add(page_url)
+        urls.discard(canonicalizer.start)
+        if urls:
+            if progress_file:
+                log_progress(progress_file, 80, status="discovery done", url=start_url)
+            return urls
+        print(f"No sitemap found for {start_url}, following links instead")
+    return await collect_internal_urls(
+        crawler, start_url, max_concurrent, progress_file, offloader=offloader, state=state,
+        canonicalizer=canonicalizer, retries=retries,
     )
 
 
-async def run_scrape(url: str, job_id: str):
+async def crawl_site(
+    crawler,
+    start_url: str,
+    max_concurrent: int,
+    progress_file: str,
+    offloader=None,
+    incremental: bool = False,
+    http_client=None,
+    rate_limiter: RateLimiter = None,
+    discovery: str = DEFAULT_DISCOVERY,
+    state: CrawlState = None,
+    canonicalizer: Canonicalizer = None,
+    retries: RetryQueue = None,
+):
+    """
+    Discover and extract a website in a single pass
+
+    Every page is fetched once with the extraction settings; the same result
+    feeds link discovery and content extraction. Progress is reported as one
+    "scraping" phase instead of the 0-80% discovery and 80-100% extraction
+    phases: "total" is the number of URLs discovered so far, "done" the
+    number extracted, and progress is done/total (capped at 99% until the
+    frontier is empty).
+
+    In incremental mode the pages stored by the previous crawl and the
+    sitemap entries seed the frontier, and pages known to be unchanged are
+    skipped before the browser renders them. Their links are not followed;
+    the pages they lead to are seeded anyway, and new pages are found from
+    changed pages and the sitemap.
+
+    With the "sitemap" discovery strategy the sitemaps listed in robots.txt
+    are streamed into the frontier while the crawl runs. Links are still
+    read from every rendered page, so pages missing from the sitemap are
+    found without extra renders.
+
+    Args:
+        crawler: Running AsyncWebCrawler shared by discovery and extraction
+        start_url: The starting URL to begin discovery from
+        max_concurrent: Number of concurrent page fetches
+        progress_file: Path to file for logging progress updates
+        offloader: Pool for link parsing and clean_text (optional)
+        incremental: Skip unchanged pages (see above)
+        http_client: httpx.AsyncClient for the sitemap and conditional
+            requests (default: a new client)
+        rate_limiter: RateLimiter for the conditional requests (optional)
+        discovery: URL discovery strategy, "links" or "sitemap"
+        state: Checkpointed URL states of the job (optional); a resumed
+            state continues its frontier and skips completed pages
+        canonicalizer: URL canonicalization of the job (default:
+            Canonicalizer(start_url))
+        retries: Retry queue of the job (default: a new RetryQueue); pages
+            are extracted once their fetch succeeded or was given up
+
+    Returns:
+        set: Collection of discovered canonical internal URLs
+    """
+    processor = PageProcessor(progress_file, start_url, offloader=offloader, state=state, retries=retries)
+    if canonicalizer is None:
+        canonicalizer = Canonicalizer(start_url)
+    detector = None
+    from_sitemap = 0  # URLs the sitemap streamed into the frontier
+
+    async def on_page(url, res, discovered_count):
+        # The start page only seeds discovery, like in the two-pass flow
+        if url == canonicalizer.start:
+            if state is not None:
+                state.complete(url)
+            return
+        processor.total = discovered_count
+        if res is None:
+            processor.alias(url)  # Stored under its rel=canonical URL
+        else:
+            await processor.process(url, res)
+        progress = min(99, int((processor.done / processor.total) * 100))
+        processor.report(progress, "scraping")
+
+    async def should_fetch(url):
+        if url == canonicalizer.start or await detector.should_fetch(url):
+            return True
+        processor.skip(url)
+        return False
+
+    try:
+        async with AsyncExitStack() as stack:
+            seeds = seed_stream = None
+            if incremental or discovery == "sitemap":
+                client = http_client or await stack.enter_async_context(make_client())
+            if incremental:
+                # Reads the whole sitemap for its lastmod values
+                detector = await processor.change_detector(client, rate_limiter)
+                seeds = sorted(detector.known_urls | set(processor.sitemap_lastmods))
+                from_sitemap = len(processor.sitemap_lastmods)
+            elif discovery == "sitemap":
+                async def seed_stream():
+                    nonlocal from_sitemap
+                    async for page_url in sitemap_page_urls(client, start_url):
+                        from_sitemap += 1
+                        yield page_url
+                seed_stream = seed_stream()
+            links = await collect_internal_urls(
+                crawler,
+                start_url,
+                max_concurrent,
+                crawl_config=extraction_config(cache_mode=CacheMode.BYPASS),
+                on_page=on_page,
+                offloader=offloader,
+                seeds=seeds,
+                should_fetch=should_fetch if detector else None,
+                seed_stream=seed_stream,
+                state=state,
+                canonicalizer=canonicalizer,
+                retries=processor.retries,
+            )
+    finally:
+        processor.close()
+
+    if discovery == "sitemap":
+        print(f"Discovery: {from_sitemap} URLs from sitemaps, {len(links)} in total")
+
+    processor.total = len(state.urls) - 1 if state is not None else len(links)
+    processor.finish()
+    return links
+
+
+async def run_scrape(
+    url: str,
+    job_id: str,
+    pipelined: bool = PIPELINED,
+    offloader: CPUOffloader = None,
+    crawler=None,
+    max_concurrent: int = MAX_CONCURRENT,
+    rate_limiter: RateLimiter = None,
+    incremental: bool = INCREMENTAL,
+    discovery: str = None,
+    http_first: bool = HTTP_FIRST,
+    tier_memory: TierMemory = None,
+    http_client=None,
+    resume: bool = False,
+    profile: bool = False,
+    retries: RetryQueue = None,
+    page_budget: PageBudget = None,
+):
     """
     Main scraping orchestration function
     
     This function coordinates the entire scraping process for a given URL.
-    It performs both URL discovery and content extraction phases.
+    It performs both URL discovery and content extraction phases with a
+    single shared browser.
     
     Args:
         url: The starting URL to scrape
         job_id: Unique identifier for this scraping job
+        pipelined: Fetch every page once for discovery and extraction
+            (see crawl_site); otherwise discover first and crawl again
+        offloader: Pool for CPU-bound parsing (default: CPU_WORKERS processes,
+            closed when the job ends; a pool passed in is left open)
+        crawler: Running crawler to use (default: start a headless browser)
+        max_concurrent: Number of concurrent page fetches for this job
+        rate_limiter: Per-host politeness limiter used by both phases
+            (default: a new limiter for this job)
+        incremental: Only re-extract pages that changed since the last crawl
+        discovery: URL discovery strategy, "links" or "sitemap" (default:
+            the strategy stored with the website)
+        http_first: Try every page with the HTTP client before the browser
+            (see TieredCrawler)
+        tier_memory: HTTP/browser decisions per host and path prefix,
+            shared between jobs (default: a new one for this job)
+        http_client: httpx.AsyncClient for pages, sitemaps and conditional
+            requests (default: a new client, closed when the job ends)
+        resume: Continue the job from its last checkpoint, with the
+            options it was started with
+        profile: Sample the job's tasks and store the profile with the
+            job (see job_profiler.py); off by default, nothing is traced
+        retries: Retry policy for fetches that fail for a transient
+            reason, shared by both phases (default: a new RetryQueue)
+        page_budget: Global budget of pages in flight (see JobScheduler);
+            every fetch takes a slot, over HTTP or in the browser
+            (default: no budget)
         
     Raises:
+        ValueError: If resume is set but the job has no checkpoint
         Exception: If any error occurs during the scraping process
     """
     progress_file = os.path.join(PROGRESS_FOLDER, f"{job_id}.json")
+    # Frontier, visited and completed URLs are checkpointed while the job runs
+    state = CrawlState(job_id, url)
+    if resume:
+        if not state.load().resumed:
+            raise ValueError(f"No checkpoint to resume job {job_id} from")
+        pipelined = state.options.get("pipelined", pipelined)
+        incremental = state.options.get("incremental", incremental)
+        discovery = state.options.get("discovery", discovery)
+        http_first = state.options.get("http_first", http_first)
+        print(f"Resuming {url}: {len(state.completed())} of {len(state.urls)} URLs completed")
     log_progress(progress_file, 0, "starting", url=url)
+    if discovery is None:
+        website = get_store().get_website_by_url(url)
+        discovery = website["discovery"] if website else DEFAULT_DISCOVERY
+    state.options = {
+        "pipelined": pipelined, "incremental": incremental,
+        "discovery": discovery, "http_first": http_first,
+    }
 
-    async with AsyncWebCrawler(config=BrowserConfig(headless=True)) as crawler:
+    own_offloader = offloader is None
+    if own_offloader:
+        offloader = CPUOffloader()
+    rate_limiter = rate_limiter or RateLimiter()
+    # One canonical form per URL for both phases, with its own trap counters
+    canonicalizer = Canonicalizer(url)
+    # Transient fetch failures of both phases are retried (and counted) once per job
+    if retries is None:
+        retries = RetryQueue()
+    lag = LoopLagMonitor()
+    tiered = None
+    async with shared_crawler(crawler) as browser, lag, AsyncExitStack() as stack:
+        if profile:
+            stack.enter_context(profile_job(job_id))
+        http_client = http_client or await stack.enter_async_context(make_client())
+        crawler = browser
+        if http_first:
+            # Static pages skip the browser; JS pages escalate to it
+            crawler = tiered = TieredCrawler(browser, tier_memory, http_client, rate_limiter)
+        if page_budget is not None:
+            crawler = BudgetedCrawler(crawler, page_budget)
+        # Every fetch of both phases waits for a token of its host
+        crawler = RateLimitedCrawler(crawler, rate_limiter)
         try:
-            # Phase 1: Discover all internal URLs
-            links = await collect_internal_urls(
-                crawler, url, MAX_CONCURRENT, progress_file
-            )
-            # Phase 2: Extract content from all discovered URLs
-            await crawl_all(list(links), MAX_CONCURRENT, progress_file, url)
+            if pipelined:
+                # Single pass: discovery and extraction share each fetch
+                state.phase = "crawling"
+                await crawl_site(
+                    crawler, url, max_concurrent, progress_file, offloader=offloader,
+                    incremental=incremental, http_client=http_client,
+                    rate_limiter=rate_limiter, discovery=discovery, state=state,
+                    canonicalizer=canonicalizer, retries=retries,
+                )
+            else:
+                # Phase 1: Discover all internal URLs (unless done before the interruption)
+                if state.phase == "extracting":
+                    links = state.known() - {canonicalizer.start}
+                else:
+                    state.phase = "discovering"
+                    links = await discover_urls(
+                        crawler, url, max_concurrent, progress_file,
+                        offloader=offloader, discovery=discovery, http_client=http_client,
+                        state=state, canonicalizer=canonicalizer, retries=retries,
+                    )
+                    for link in links:
+                        state.queue(link)
+                    state.phase = "extracting"
+                    state.flush()
+                # Phase 2: Extract content from all discovered URLs
+                await crawl_all(
+                    list(links), max_concurrent, progress_file, url,
+                    crawler=crawler, offloader=offloader,
+                    incremental=incremental, http_client=http_client,
+                    rate_limiter=rate_limiter, state=state, retries=retries,
+                )
+            # Finished: nothing left to resume
+            state.clear()
         except Exception as e:
             # Log any errors that occur during scraping
             log_progress(
                 progress_file, 100, f"error: {str(e)}", url=url
             )
             raise
+        finally:
+            if state.pending:
+                state.flush()  # Checkpoint of an interrupted discovery phase
+            hub.flush(job_id)  # Counters published since the last progress write
+            if own_offloader:
+                offloader.close()
+            stats = lag.snapshot()
+            print(
+                f"Event loop lag: mean {stats['mean_ms']:.1f} ms, "
+                f"p99 {stats['p99_ms']:.1f} ms, max {stats['max_ms']:.1f} ms"
+            )
+            for host, counters in rate_limiter.snapshot().items():
+                print(f"{host}: {counters}")
+            if tiered is not None:
+                print(f"Fetch tiers: {tiered.snapshot()}")
+            print(f"Canonicalization: {canonicalizer.snapshot()}")
+            print(f"Retries: {retries.snapshot()}")
+
+
+def worker_name() -> str:
+    """
+    Returns:
+        str: Name of a new distributed worker, unique across hosts
+    """
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+async def run_worker(
+    job_id: str,
+    start_url: str = None,
+    queue: WorkQueue = None,
+    worker: str = None,
+    crawler=None,
+    max_concurrent: int = MAX_CONCURRENT,
+    offloader: CPUOffloader = None,
+    rate_limiter: RateLimiter = None,
+    poll_interval: float = WORKER_POLL,
+):
+    """
+    Crawl a website together with other workers through a shared work queue
+
+    Any number of workers, in this process, other processes or on other
+    hosts, can run the same job: each claims a batch of URLs from the
+    queue, fetches them once with the extraction settings (like the
+    pipelined flow), queues the links nobody has seen yet and completes
+    the batch once its records are on disk. A worker that dies loses its
+    lease, and its URLs are handed to the others. The job's progress is
+    the sum of the workers' reports.
+
+    When the queue is empty and no URL is leased, the workers stop; the
+    one that wins WorkQueue.finish waits for the others to close their
+    output, merges it (see merge_worker_output; the output folder must be
+    shared by workers on other hosts) and marks the job done.
+
+    A fetch that fails for a transient reason (see RetryQueue) is tried
+    again by the same worker after its backoff, while the URL stays
+    leased; its batch completes without it. The worker extends the
+    leases of the URLs it holds with every batch, and every third of the
+    lease while a batch or a retry takes long. A worker leaves a job that
+    was deleted or stopped (queue.open returns None) at its next batch,
+    without writing its progress again.
+
+    Incremental crawls, sitemap discovery and resuming are not supported
+    in this mode; crawler-trap caps, near-duplicate detection and retry
+    limits apply per worker.
+
+    Args:
+        job_id: Unique job identifier
+        start_url: The starting URL, when registering the job (default:
+            the start URL the job was registered with)
+        queue: Shared work queue (default: get_work_queue())
+        worker: Name of this worker (default: worker_name())
+        crawler: Running AsyncWebCrawler to reuse (default: start a new browser)
+        max_concurrent: URLs claimed and fetched at a time
+        offloader: Pool for link parsing and clean_text (default: a new pool)
+        rate_limiter: Per-host politeness limiter (default: a new one)
+        poll_interval: Seconds to wait while other workers hold all URLs
+
+    Returns:
+        dict: Page counters of this worker
+
+    Raises:
+        ValueError: If the job is unknown and no start URL is given
+    """
+    queue = queue or get_work_queue()
+    worker = worker or worker_name()
+    start_url = queue.open(job_id, start_url)
+    if start_url is None:
+        raise ValueError(f"Unknown distributed job: {job_id}")
+    progress_file = os.path.join(PROGRESS_FOLDER, f"{job_id}.json")
+    canonicalizer = Canonicalizer(start_url)
+    netloc = urlparse(start_url).netloc
+    keep_query = bool(canonicalizer.keep_params)
+    link_extractor = get_link_extractor()
+    crawl_config = extraction_config(cache_mode=CacheMode.BYPASS)
+    seen = set()   # URLs this worker queued; the shared dedupe is the queue's
+    queue.add(job_id, [canonicalizer.start])
+    counts = queue.counts(job_id)
+    if not counts["queued"] and not counts["leased"]:
+        return dict.fromkeys(PageProcessor.COUNTERS + RetryQueue.COUNTERS, 0)  # Nothing left: the job is over
+
+    own_offloader = offloader is None
+    if own_offloader:
+        offloader = CPUOffloader()
+    rate_limiter = rate_limiter or RateLimiter()
+    processor = PageProcessor(progress_file, start_url, offloader=offloader, worker=worker)
+    retries = processor.retries
+    due = []       # Leased URLs whose retry is due
+    retries.bind(due.append)
+    held = set()   # URLs leased to this worker and not completed yet
+
+    def report(state: str):
+        queue.report(job_id, worker, {**processor.counters(), "state": state})
+        if state == "closed":
+            # Once every worker is closed the finishing worker writes "done";
+            # a "scraping" record published after that would overwrite it
+            return
+        totals = aggregate_reports(queue.reports(job_id))
+        counts = queue.counts(job_id)
+        total = max(0, sum(counts.values()) - 1)  # Without the start page
+        progress = min(99, int(totals["done"] / total * 100)) if total else 0
+        log_progress(
+            progress_file, progress, "scraping", totals["done"], total, totals["success"], totals["fail"],
+            url=start_url, skipped=totals["skipped"], changed=totals["changed"], new=totals["new"],
+            retried=totals["retried"], recovered=totals["recovered"], abandoned=totals["abandoned"],
+        )
+
+    async def visit(url):
+        # The start page is fetched as configured, others in canonical form
+        fetch_url = start_url if url == canonicalizer.start else url
+        try:
+            res = await fetch_page(crawler, fetch_url, crawl_config, f"worker_{worker}")
+        except Exception as e:
+            res = e
+        if retries.retry(url, res):
+            return True  # Fetched again when its backoff is over
+        target = None
+        if not isinstance(res, Exception) and res.success and res.html:
+            links = getattr(res, "links", None) if link_extractor.name == "crawl4ai" else None
+            with stage_seconds.time("links"):
+                page_links = await offloader.run(
+                    extract_links_task, link_extractor.name, url, res.html, links, netloc, keep_query
+                )
+            new = [link for link in (canonicalizer.resolve(link, seen) for link in page_links) if link is not None]
+            seen.update(new)
+            queue.add(job_id, new)
+            target = canonicalizer.page_canonical(url, res.html)
+        if url == canonicalizer.start:
+            return  # The start page only seeds discovery
+        if target is not None:
+            # Stored once under its rel=canonical URL, by whoever sees it first
+            if queue.add(job_id, [target], completed=True):
+                canonicalizer.aliases += 1
+                await processor.process(target, res)
+            else:
+                canonicalizer.duplicates += 1
+            processor.alias(url)
+        else:
+            await processor.process(url, res)
+
+    async def heartbeat():
+        # Slow batches (crawl-delay, a throttled host) keep their leases too
+        while True:
+            await asyncio.sleep(queue.lease / 3)
+            queue.extend(job_id, worker, held)
+
+    report("running")
+    beat = asyncio.create_task(heartbeat())
+    cancelled = False
+    try:
+        async with shared_crawler(crawler) as browser:
+            crawler = RateLimitedCrawler(browser, rate_limiter)
+            while True:
+                if queue.open(job_id) is None:
+                    # Deleted or stopped through the API, which owns its record now
+                    cancelled = True
+                    break
+                urls = due[:max_concurrent]
+                del due[: len(urls)]
+                if len(urls) < max_concurrent:
+                    claimed = queue.claim(job_id, worker, max_concurrent - len(urls))
+                    held.update(claimed)
+                    urls += claimed
+                if not urls:
+                    counts = queue.counts(job_id)
+                    if not counts["queued"] and not counts["leased"]:
+                        break
+                    # Other workers hold the URLs, or this worker's retries are not due yet
+                    if held:
+                        queue.extend(job_id, worker, held)
+                    try:
+                        await asyncio.wait_for(retries.wait(), poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                queue.extend(job_id, worker, held)  # Including the retries still waiting
+                retried = await asyncio.gather(*(visit(url) for url in urls))
+                # Records on disk before the URLs leave the queue
+                processor.checkpoint()
+                completed = [url for url, again in zip(urls, retried) if not again]
+                queue.complete(job_id, worker, completed)
+                held.difference_update(completed)
+                if queue.open(job_id) is None:
+                    cancelled = True
+                    break
+                report("running")
+    finally:
+        beat.cancel()
+        retries.close()  # Their leases run out, and other workers take them
+        processor.close()
+        if cancelled:
+            hub.discard(job_id)  # A write would bring the record of a deleted job back
+        else:
+            hub.flush(job_id)  # Progress published since the last write, before closing
+            report("closed")
+        if own_offloader:
+            offloader.close()
+
+    if not cancelled and queue.finish(job_id):
+        job_dir = os.path.dirname(os.path.dirname(processor.out_dir))  # output/<date>/workers/<worker>
+        await finish_distributed_job(job_id, queue, start_url, job_dir, poll_interval)
+    return processor.counters()
+
+
+async def finish_distributed_job(job_id: str, queue: WorkQueue, start_url: str, out_dir: str, poll_interval: float = WORKER_POLL):
+    """
+    Merge the output of all workers of a job and mark it done
+
+    Waits until every worker that reported has closed its output, or
+    stopped reporting for longer than the queue's lease.
+
+    Args:
+        job_id: Unique job identifier
+        queue: Work queue of the job
+        start_url: Start URL of the job
+        out_dir: Output folder of the job (output/<date>)
+        poll_interval: Seconds between checks of the workers
+    """
+    while True:
+        reports = queue.reports(job_id)
+        now = time.time()
+        if all(r.get("state") == "closed" or now - r["timestamp"] > queue.lease for r in reports.values()):
+            break
+        await asyncio.sleep(poll_interval)
+    records = merge_worker_output(out_dir)
+    totals = aggregate_reports(reports)
+    total = max(0, sum(queue.counts(job_id).values()) - 1)
+    print(f"Distributed job {job_id}: {records} records from {totals['reported']} workers")
+    log_progress(
+        os.path.join(PROGRESS_FOLDER, f"{job_id}.json"), 100, "done", totals["done"], total,
+        totals["success"], totals["fail"], url=start_url,
+        skipped=totals["skipped"], changed=totals["changed"], new=totals["new"],
+        retried=totals["retried"], recovered=totals["recovered"], abandoned=totals["abandoned"],
+    )
+    hub.flush(job_id)
+
+
+async def serve_worker(job_id: str = None, start_url: str = None, queue: WorkQueue = None, poll_interval: float = 5.0):
+    """
+    Run distributed jobs from the work queue until interrupted
+
+    Args:
+        job_id: Only work on this job, then return (default: every open job)
+        start_url: Start URL when registering job_id
+        queue: Shared work queue (default: get_work_queue())
+        poll_interval: Seconds to wait when no job is open
+    """
+    queue = queue or get_work_queue()
+    async with shared_crawler() as crawler:
+        if job_id is not None:
+            await run_worker(job_id, start_url, queue=queue, crawler=crawler)
+            return
+        while True:
+            done = 0
+            for open_job, _ in queue.jobs():
+                done += (await run_worker(open_job, queue=queue, crawler=crawler))["done"]
+            if not done:
+                await asyncio.sleep(poll_interval)
 
 
 # Entry point for command-line execution
 if __name__ == "__main__":
-    if len(sys.argv) == 3:
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        # Distributed worker: python Crawlscraper.py --worker [job_id [start_url]]
+        asyncio.run(serve_worker(*sys.argv[2:4]))
+    elif len(sys.argv) == 3:
         # Run scraper with URL and job ID from command line arguments
         asyncio.run(run_scrape(sys.argv[1], sys.argv[2]))
@@ -0,0 +1,38 @@
+import os
+import json
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_store(tmp_path, monkeypatch):
+    """
+    Point the shared SQLite store at a fresh database for every test
+
+    This keeps tests from reading or writing the real scraper.db.
+    """
+    db_path = str(tmp_path / "scraper-test.db")
+    monkeypatch.setenv("SCRAPER_DB", db_path)
+    return db_path
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run the test inside an empty temporary directory"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def read_output():
+    """
+    Reader of the output file a crawl wrote for a mock site
+
+    Returns:
+        function: read(site) returning the records of output/<date>/<domain>.json,
+            sorted by URL
+    """
+    def read(site):
+        out_dir = os.path.join("output", os.listdir("output")[0])
+        with open(os.path.join(out_dir, f"{site.domain}.json"), "r", encoding="utf-8") as f:
+            return sorted(json.load(f), key=lambda item: item["url"])
+    return read
@@ -0,0 +1,144 @@
+import os
+import sys
+import asyncio
+import pytest
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+from browser_pool import BrowserPool
+from benchmarks.mock_site import MockSite, MockCrawler
+
+
+class FakeBrowser(MockCrawler):
+    """MockCrawler that records start/stop like AsyncWebCrawler"""
+
+    started = 0
+    closed = 0
+
+    def __init__(self, site):
+        super().__init__(site)
+        self.ready = False
+
+    async def __aenter__(self):
+        FakeBrowser.started += 1
+        self.ready = True
+        return self
+
+    async def __aexit__(self, *exc):
+        FakeBrowser.closed += 1
+        self.ready = False
+        return False
+
+
+@pytest.fixture
+def site():
+    FakeBrowser.started = FakeBrowser.closed = 0
+    return MockSite(pages=10, fast_latency=0.001, slow_latency=0.001)
+
+
+def make_pool(site, **kwargs):
+    kwargs.setdefault("rss_probe", lambda: 0.0)
+    return BrowserPool(factory=lambda: FakeBrowser(site), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_leases_reuse_running_browsers(site):
+    pool = make_pool(site, size=2)
+    for _ in range(5):
+        async with pool.lease() as browser:
+            await browser.arun(site.url(1))
+
+    stats = pool.snapshot()
+    assert FakeBrowser.started == 1
+    assert stats["misses"] == 1 and stats["hits"] == 4
+    assert stats["hit_rate"] == 0.8
+    assert stats["open"] == stats["idle"] == 1
+
+    await pool.close()
+    assert FakeBrowser.closed == 1 and pool.open == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_size_limits_open_browsers(site):
+    pool = make_pool(site, size=2)
+    peak = 0
+
+    async def job():
+        nonlocal peak
+        async with pool.lease() as browser:
+            peak = max(peak, pool.leased)
+            await browser.arun(site.url(2))
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(job() for _ in range(6)))
+    assert peak == 2
+    assert FakeBrowser.started == 2
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_browser_recycled_after_page_limit(site):
+    pool = make_pool(site, size=1, recycle_after=3)
+    for _ in range(2):
+        async with pool.lease() as browser:
+            for i in range(3):
+                await browser.arun(site.url(i))
+
+    assert FakeBrowser.started == 2
+    assert FakeBrowser.closed == 2
+    assert pool.snapshot()["recycled"] == 2
+
+
+@pytest.mark.asyncio
+async def test_browser_recycled_above_memory_cap(site):
+    rss = {"mb": 100.0}
+    pool = make_pool(site, size=1, max_rss_mb=500, rss_probe=lambda: rss["mb"])
+
+    async with pool.lease():
+        pass
+    assert pool.snapshot()["idle"] == 1
+
+    rss["mb"] = 900.0
+    async with pool.lease():
+        pass
+    stats = pool.snapshot()
+    assert stats["recycled"] == 1 and stats["open"] == 0
+    assert stats["browser_rss_mb"] == 900.0
+
+
+@pytest.mark.asyncio
+async def test_unhealthy_idle_browser_is_replaced(site):
+    pool = make_pool(site, size=1)
+    async with pool.lease() as browser:
+        first = browser.crawler
+    first.ready = False  # Browser died while idle
+
+    async with pool.lease() as browser:
+        assert browser.crawler is not first
+    assert FakeBrowser.started == 2
+    assert pool.snapshot()["misses"] == 2
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_start_frees_the_slot(site):
+    attempts = 0
+
+    def factory():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise RuntimeError("browser did not start")
+        return FakeBrowser(site)
+
+    pool = BrowserPool(size=1, factory=factory, rss_probe=lambda: 0.0)
+    with pytest.raises(RuntimeError):
+        async with pool.lease():
+            pass
+    async with pool.lease() as browser:
+        assert browser.ready
+    await pool.close()
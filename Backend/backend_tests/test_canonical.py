@@ -0,0 +1,138 @@
+import os
+import sys
+import pytest
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+from canonical import Canonicalizer, TrapDetector, rel_canonical, site_host
+from Crawlscraper import collect_internal_urls
+
+
+class Response:
+    def __init__(self, html):
+        self.success = True
+        self.html = html
+
+
+class VariantSiteCrawler:
+    """
+    Site whose pages link to URL variants of each other
+
+    The home page links to /zorg in five spellings, to an agenda with a
+    day page per date, and to /oud, which declares /nieuw as its
+    canonical URL. /kopie points to /zorg with rel=canonical.
+    """
+
+    def __init__(self):
+        self.requests = []
+
+    async def arun(self, url, config=None, session_id=None, **kwargs):
+        self.requests.append(url)
+        head = ""
+        links = []
+        if url == "https://a.nl":
+            links = [
+                "/zorg", "/zorg/", "https://www.a.nl/zorg", "http://a.nl/zorg/index.html",
+                "/zorg;jsessionid=ABC123", "/oud", "/kopie", "/agenda/2024/01/01",
+            ]
+        elif url.startswith("https://a.nl/agenda/"):
+            day = int(url.rsplit("/", 1)[-1])
+            links = [f"/agenda/2024/01/{day + 1:02d}"]
+        elif url == "https://a.nl/oud":
+            head = '<link rel="canonical" href="https://a.nl/nieuw">'
+        elif url == "https://a.nl/kopie":
+            head = "<link href='/zorg/' rel='canonical'>"
+        body = "".join(f'<a href="{link}">x</a>' for link in links)
+        return Response(f"<html><head>{head}</head><body>{body}</body></html>")
+
+
+def test_variants_map_to_one_url():
+    canonicalizer = Canonicalizer("https://www.a.nl")
+    assert canonicalizer.start == "https://www.a.nl/"
+    variants = [
+        "https://www.a.nl/zorg",
+        "https://www.a.nl/zorg/",
+        "https://a.nl/zorg",
+        "http://WWW.A.NL:80/zorg/index.html",
+        "https://www.a.nl:443/zorg;jsessionid=0F3A",
+        "https://www.a.nl//zorg?utm_source=x#top",
+    ]
+    assert {canonicalizer.canonical(url) for url in variants} == {"https://www.a.nl/zorg"}
+    assert canonicalizer.canonical("https://a.nl/index.php") == "https://www.a.nl/"
+    assert canonicalizer.canonical("https://a.nl/Zorg") == "https://www.a.nl/Zorg"
+    assert canonicalizer.canonical("https://b.nl/zorg") is None
+    assert canonicalizer.canonical("https://sub.a.nl/zorg") is None
+    assert canonicalizer.canonical("https://a.nl:8080/zorg") is None
+    assert site_host("WWW.A.NL:443") == site_host("a.nl") == "a.nl"
+
+
+def test_allowed_query_params_are_kept_sorted():
+    canonicalizer = Canonicalizer("https://a.nl", keep_params=("page", "q"), lowercase_paths=True)
+    assert canonicalizer.canonical("https://a.nl/Zoek?utm_source=x&q=thuiszorg&page=2") == (
+        "https://a.nl/zoek?page=2&q=thuiszorg"
+    )
+    assert canonicalizer.canonical("https://a.nl/zoek?sessionid=1") == "https://a.nl/zoek"
+
+
+def test_trap_detector_caps_patterns():
+    traps = TrapDetector(caps={"calendar": 3, "query": 2, "depth": 0, "repeat": 0}, max_depth=5)
+    assert [traps.allow(f"https://a.nl/agenda/2024/01/{d:02d}") for d in range(1, 6)] == [True] * 3 + [False] * 2
+    # Another calendar has its own cap
+    assert traps.allow("https://a.nl/events/2024/03")
+    assert not traps.allow("https://a.nl/a/b/c/d/e/f")
+    assert not traps.allow("https://a.nl/x/x/x/x")
+    assert [traps.allow(f"https://a.nl/zoek?p={i}") for i in range(3)] == [True, True, False]
+    assert traps.allow("https://a.nl/zorg/thuiszorg")
+    assert dict(traps.blocked) == {"calendar": 2, "depth": 1, "repeat": 1, "query": 1}
+
+
+def test_rel_canonical_is_read_from_the_head():
+    assert rel_canonical('<head><link rel="canonical" href="/a"></head>') == "/a"
+    assert rel_canonical("<HEAD><LINK HREF=/b REL=canonical></HEAD>") == "/b"
+    assert rel_canonical('<head><link rel="alternate" href="/en"></head>') is None
+    assert rel_canonical('<head></head><body><link rel="canonical" href="/c"></body>') is None
+
+    canonicalizer = Canonicalizer("https://a.nl")
+    page = "https://a.nl/oud"
+    assert canonicalizer.page_canonical(page, '<link rel="canonical" href="/nieuw/">') == "https://a.nl/nieuw"
+    # Itself, another site and the home page are not followed
+    assert canonicalizer.page_canonical(page, '<link rel="canonical" href="/oud/">') is None
+    assert canonicalizer.page_canonical(page, '<link rel="canonical" href="https://b.nl/oud">') is None
+    assert canonicalizer.page_canonical(page, '<link rel="canonical" href="/">') is None
+    assert Canonicalizer("https://a.nl", honour_rel_canonical=False).page_canonical(
+        page, '<link rel="canonical" href="/nieuw">'
+    ) is None
+
+
+@pytest.mark.asyncio
+async def test_crawl_fetches_each_page_once():
+    crawler = VariantSiteCrawler()
+    canonicalizer = Canonicalizer("https://a.nl", traps=TrapDetector(caps={"calendar": 5}))
+    pages = []
+
+    async def on_page(url, res, discovered_count):
+        pages.append((url, res is not None))
+
+    result = await collect_internal_urls(
+        crawler, "https://a.nl", batch_size=3, on_page=on_page, canonicalizer=canonicalizer
+    )
+
+    assert crawler.requests.count("https://a.nl/zorg") == 1
+    assert "https://a.nl/nieuw" not in crawler.requests
+    assert len([url for url in crawler.requests if "/agenda/" in url]) == 5
+    assert result == {"https://a.nl/zorg", "https://a.nl/nieuw"} | {
+        f"https://a.nl/agenda/2024/01/{d:02d}" for d in range(1, 6)
+    }
+    # /oud is stored as /nieuw; /kopie had nothing new to store
+    assert ("https://a.nl/nieuw", True) in pages
+    assert ("https://a.nl/oud", False) in pages and ("https://a.nl/kopie", False) in pages
+
+    stats = canonicalizer.snapshot()
+    assert stats["collapsed"] == 2          # /zorg/ and http://a.nl/zorg/index.html
+    assert stats["trapped"] == {"calendar": 1}
+    assert (stats["aliases"], stats["duplicates"]) == (1, 1)
+    assert stats["eliminated"] == 4
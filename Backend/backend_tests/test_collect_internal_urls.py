@@ -50,3 +50,72 @@ async def test_collect_internal_urls_filters_domain_correctly():
     # Verify that internal URLs are included and external URLs are excluded
     assert any("example.com/internal1" in url for url in result)
     assert all("external.com" not in url for url in result)
+
+
+@pytest.mark.asyncio
+async def test_collect_internal_urls_keeps_workers_busy_during_slow_page():
+    """
+    Test that one slow page does not stall the other workers
+
+    The home page links to one slow page and several fast pages that each
+    link to a further page. With a worker pool the fast chain finishes while
+    the slow page is still loading.
+    """
+    import asyncio
+    finished = []
+
+    class SlowPageCrawler:
+        async def arun(self, url, config, session_id):
+            class MockResponse:
+                def __init__(self, html):
+                    self.success = True
+                    self.html = html
+
+            if url == "https://example.com":
+                links = ["/slow"] + [f"/fast{i}" for i in range(3)]
+            elif url.endswith("/slow"):
+                await asyncio.sleep(0.3)
+                links = []
+            elif "/fast" in url and "/deep" not in url:
+                await asyncio.sleep(0.01)
+                links = [url[len("https://example.com"):] + "/deep"]
+            else:
+                await asyncio.sleep(0.01)
+                links = []
+            finished.append(url)
+            return MockResponse("".join(f'<a href="{link}">x</a>' for link in links))
+
+    result = await collect_internal_urls(SlowPageCrawler(), "https://example.com", batch_size=4)
+
+    assert "https://example.com/slow" in result
+    assert "https://example.com/fast0/deep" in result
+    # All deep pages were fetched before the slow page returned
+    assert finished[-1] == "https://example.com/slow"
+
+
+@pytest.mark.asyncio
+async def test_collect_internal_urls_matches_mock_site():
+    """Test that the worker pool discovers every reachable page of a site"""
+    from benchmarks.mock_site import MockSite, MockCrawler
+
+    site = MockSite(pages=60, fast_latency=0.001, slow_latency=0.01)
+    result = await collect_internal_urls(MockCrawler(site), site.url(0), batch_size=5)
+    assert result == site.all_urls() - {site.url(0)}
+
+
+@pytest.mark.asyncio
+async def test_collect_internal_urls_surfaces_unexpected_errors():
+    """Test that an error outside the fetch stops discovery instead of hanging"""
+    class BrokenResponseCrawler:
+        async def arun(self, url, config, session_id):
+            class MockResponse:
+                success = True
+
+                @property
+                def html(self):
+                    raise RuntimeError("kapot")
+
+            return MockResponse()
+
+    with pytest.raises(RuntimeError):
+        await collect_internal_urls(BrokenResponseCrawler(), "https://example.com", batch_size=3)
@@ -1,3 +1,4 @@
+import re
 import pytest
 from urllib.parse import urlparse
 
@@ -9,7 +10,10 @@ parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 # Add parent directory to sys.path
 sys.path.append(parent_dir)
 
-from Crawlscraper import is_excluded, clean_text
+import utils
+from Crawlscraper import is_excluded
+from utils import clean_text, clean_texts
+from benchmarks.html_fixtures import page_markdown
 
 
 # ---------- TESTS FOR is_excluded FUNCTION ----------
@@ -155,6 +159,35 @@ This is a useful paragraph. It contains helpful information. Please read it care
     assert result.count(".") <= 5
 
 
+def reference_clean_text(markdown: str) -> str:
+    """clean_text as it was before it stopped after 5 sentences"""
+    markdown = re.sub(r"(?m)^.*\|.*\|.*$", "", markdown)
+    markdown = re.sub(r"\[(.*?)\]\([^)]+\)", r"\1", markdown)
+    markdown = re.sub(r"(?m)^#+ .*$", "", markdown)
+    markdown = re.sub(r"\n{3,}", "\n\n", markdown.strip())
+    sentences = re.split(r"(?<=[.!?]) +", markdown)
+    return " ".join(sentences[:5]).strip()
+
+
+@pytest.mark.parametrize("chunk", [1, 16, utils.CLEAN_CHUNK])
+def test_clean_text_matches_full_document_cleaning(monkeypatch, chunk):
+    """Cleaning only a prefix gives the same summary as cleaning everything"""
+    monkeypatch.setattr(utils, "CLEAN_CHUNK", chunk)
+    documents = [page_markdown(seed, paragraphs=seed % 50) for seed in range(60)]
+    documents += [
+        # A link target running past the end of a prefix
+        "One. Two. Three. Four. [Five](https://a.nl/x\ny). Six. Seven.",
+        # A table row hiding the closing parenthesis of a link
+        "[One](x\n| y) | z |\nTwo. Three. Four. Five. Six. Seven.\nEight.",
+        "# Kop\n\n\n\nOne.\nTwo.   Three. Four. Five.\n\n\n\nSix. Seven.",
+        "\n\n   \n\nOne.  Two. Three!  Four? Five.\n" + "x" * 100,
+        "",
+    ]
+    for markdown in documents:
+        assert clean_text(markdown) == reference_clean_text(markdown)
+    assert clean_texts(documents) == [reference_clean_text(markdown) for markdown in documents]
+
+
 # ---------- TEST FOR URL TITLE GENERATION ----------
 
 
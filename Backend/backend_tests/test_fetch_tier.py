@@ -0,0 +1,193 @@
+import os
+import sys
+import httpx
+import pytest
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+from Crawlscraper import crawl_site, run_scrape
+from fetch_tier import TierMemory, TieredCrawler, js_rendered_reason
+from http_client import make_client
+from offload import CPUOffloader
+from rate_limiter import MAX_RATE, RateLimiter
+from scheduler import PageBudget
+from benchmarks.mock_site import MockSite, MockCrawler
+
+
+STATIC = "<html><body><main><h1>Zorg</h1><p>" + "Informatie over zorg in de wijk. " * 20 + "</p></main></body></html>"
+
+
+def test_js_rendered_heuristics():
+    assert js_rendered_reason(STATIC) is None
+    # Little text but nothing a browser would add
+    assert js_rendered_reason("<html><body><p>Welkom</p></body></html>") is None
+    assert js_rendered_reason('<html><body><div id="root"></div><script src="a.js"></script></body></html>') == "mount-point"
+    assert js_rendered_reason("<html><body><app-root></app-root></body></html>") == "mount-point"
+    assert js_rendered_reason(
+        "<html><body><p>Laden...</p><script>render()</script></body></html>"
+    ) == "little-text"
+    assert js_rendered_reason(
+        "<html><body><p>" + "Tekst " * 50 + "</p><script>x()</script>"
+        "<noscript>Schakel JavaScript in</noscript></body></html>"
+    ) == "noscript"
+    # Analytics scripts on a complete page do not count
+    assert js_rendered_reason(STATIC.replace("</body>", "<script>track()</script></body>")) is None
+
+
+def test_tier_memory_per_prefix_and_host():
+    memory = TierMemory(min_samples=3)
+    assert memory.choose("https://a.nl/agenda/1") == "http"
+    for i in range(3):
+        memory.record(f"https://a.nl/agenda/{i}", "browser")
+    for i in range(3):
+        memory.record(f"https://a.nl/zorg/{i}", "http")
+    assert memory.choose("https://a.nl/agenda/9") == "browser"
+    assert memory.choose("https://a.nl/zorg/9") == "http"
+    # Unknown prefixes follow the host, which is mixed
+    assert memory.choose("https://a.nl/nieuws") == "http"
+    assert memory.snapshot() == {"a.nl": {"http": 3, "browser": 3, "browser_prefixes": ["/agenda"]}}
+
+    for i in range(3):
+        memory.record(f"https://spa.nl/p{i}", "browser")
+    assert memory.choose("https://spa.nl/elders") == "browser"
+
+    # Browser prefixes are still probed over HTTP now and then
+    memory = TierMemory(min_samples=1, probe_every=4)
+    memory.record("https://a.nl/app/1", "browser")
+    assert [memory.choose("https://a.nl/app/2") for _ in range(4)] == ["browser"] * 3 + ["http"]
+
+
+@pytest.mark.asyncio
+async def test_crawl_output_is_identical_with_http_tier(workdir, read_output, monkeypatch):
+    """Static pages come over HTTP, JS pages from the browser, same results"""
+    site = MockSite(pages=40, fast_latency=0.001, slow_latency=0.001, js_ratio=0.25)
+    assert site.js_pages
+
+    monkeypatch.setenv("SCRAPER_DB", str(workdir / "browser.db"))
+    browser_links = await crawl_site(MockCrawler(site), site.url(0), 5, os.path.join("progress", "a.json"))
+    browser_output = read_output(site)
+
+    monkeypatch.setenv("SCRAPER_DB", str(workdir / "tiered.db"))
+    browser = MockCrawler(site)
+    async with make_client(transport=site.http_transport()) as client:
+        crawler = TieredCrawler(browser, TierMemory(min_samples=1000), client)
+        links = await crawl_site(crawler, site.url(0), 5, os.path.join("progress", "b.json"))
+
+    assert links == browser_links
+    assert read_output(site) == browser_output
+    assert browser.requests == len(site.js_pages)
+    assert crawler.http_pages == browser.raw_requests == site.pages - len(site.js_pages)
+    assert crawler.escalations["mount-point"] == len(site.js_pages)
+
+
+@pytest.mark.asyncio
+async def test_browser_decision_is_remembered_per_prefix(workdir):
+    requested = []
+
+    def handler(request):
+        requested.append(request.url.path)
+        if request.url.path.startswith("/app/"):
+            return httpx.Response(200, html='<html><body><div id="app"></div></body></html>')
+        return httpx.Response(200, html=STATIC)
+
+    site = MockSite(pages=5)
+    browser = MockCrawler(site)
+    async with make_client(transport=httpx.MockTransport(handler)) as client:
+        crawler = TieredCrawler(browser, TierMemory(min_samples=3), client)
+        for i in range(6):
+            await crawler.arun(f"{site.base}/app/{i}")
+
+    # After three empty app shells the prefix goes straight to the browser
+    assert requested == ["/app/0", "/app/1", "/app/2"]
+    assert crawler.snapshot() == {"http_pages": 0, "browser_pages": 6, "escalations": {"mount-point": 3}}
+
+
+@pytest.mark.asyncio
+async def test_http_errors_and_challenges(workdir):
+    def handler(request):
+        if request.url.path == "/weg":
+            return httpx.Response(404, html="<html></html>")
+        if request.url.path == "/brochure.pdf":
+            return httpx.Response(200, content=b"%PDF", headers={"content-type": "application/pdf"})
+        return httpx.Response(403, html="<html><body>Checking your browser</body></html>")
+
+    site = MockSite(pages=5)
+    browser = MockCrawler(site)
+    async with make_client(transport=httpx.MockTransport(handler)) as client:
+        crawler = TieredCrawler(browser, client=client)
+        missing = await crawler.arun(f"{site.base}/weg")
+        assert (missing.success, missing.status_code) == (False, 404)
+        assert browser.requests == 0
+
+        # Bot challenges and files are left to the browser
+        page = await crawler.arun(site.url(1))
+        assert page.success and browser.requests == 1
+        await crawler.arun(f"{site.base}/brochure.pdf")
+        assert browser.requests == 2
+    assert crawler.escalations == {"status": 1, "content-type": 1}
+
+
+class CountingLimiter:
+    """Rate limiter stand-in that counts the host tokens taken"""
+
+    def __init__(self):
+        self.tokens = 0
+
+    async def host(self, url):
+        return self
+
+    async def acquire(self):
+        self.tokens += 1
+
+
+@pytest.mark.asyncio
+async def test_escalation_takes_a_second_token(workdir):
+    def handler(request):
+        if request.url.path == "/pagina/1":
+            return httpx.Response(403, html="<html><body>Checking your browser</body></html>")
+        return httpx.Response(200, html=STATIC)
+
+    site = MockSite(pages=5)
+    limiter = CountingLimiter()
+    async with make_client(transport=httpx.MockTransport(handler)) as client:
+        crawler = TieredCrawler(MockCrawler(site), client=client, rate_limiter=limiter)
+        await crawler.arun(site.url(2))  # Served over HTTP: the caller's token covers it
+        assert limiter.tokens == 0
+        await crawler.arun(site.url(1))  # HTTP, then the browser
+        assert limiter.tokens == 1
+
+
+class InFlightTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper that records the most requests in flight at once"""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.in_flight = 0
+        self.peak = 0
+
+    async def handle_async_request(self, request):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            return await self.transport.handle_async_request(request)
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.mark.asyncio
+async def test_page_budget_covers_http_fetches(workdir):
+    site = MockSite(pages=30, fast_latency=0.001, slow_latency=0.005)
+    transport = InFlightTransport(site.http_transport(latency=0.2))  # Overlapping despite the host rate
+    browser = MockCrawler(site)
+    async with make_client(transport=transport) as client:
+        await run_scrape(
+            site.url(0), "budgeted", crawler=browser, offloader=CPUOffloader(workers=0), max_concurrent=8,
+            rate_limiter=RateLimiter(robots_fetcher=None, rate=MAX_RATE), discovery="links",
+            http_client=client, page_budget=PageBudget(2),
+        )
+    assert browser.raw_requests == site.pages
+    assert transport.peak == 2
@@ -0,0 +1,112 @@
+import os
+import sys
+import pytest
+from unittest.mock import patch
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+from hash_index import HashIndex, hash_content
+from storage import get_store
+from Crawlscraper import crawl_all
+
+
+class DummyMarkdown:
+    """Mock markdown object representing extracted content"""
+    def __init__(self, text):
+        self.fit_markdown = text
+
+
+class DummyResult:
+    """Mock result object representing a successful crawl response"""
+    def __init__(self, markdown):
+        self.success = True
+        self.markdown = DummyMarkdown(markdown)
+
+
+def test_empty_database_gives_empty_index(workdir):
+    """A fresh database results in an empty index"""
+    index = HashIndex().load()
+    assert len(index) == 0
+    assert index.get("example.com", "https://example.com/a") is None
+
+
+def test_lookup_and_put_keep_layout(workdir):
+    """Entries are exposed as {domain: {url: {hash, timestamp}}}"""
+    index = HashIndex().load()
+    index.put("example.com", "https://example.com/a", hash_content("inhoud"))
+    assert index.is_unchanged("example.com", "https://example.com/a", hash_content("inhoud"))
+    assert not index.is_unchanged("example.com", "https://example.com/a", hash_content("anders"))
+
+    index.flush()
+    data = get_store().load_hashes()
+    entry = data["example.com"]["https://example.com/a"]
+    assert entry["hash"] == hash_content("inhoud")
+    assert "T" in entry["timestamp"]
+
+
+def test_updates_are_batched_until_checkpoint(workdir):
+    """Nothing is written before flush_every updates are pending"""
+    index = HashIndex(flush_every=3).load()
+    index.put("example.com", "https://example.com/1", "h1")
+    index.put("example.com", "https://example.com/2", "h2")
+    assert get_store().load_hashes() == {}
+
+    index.put("example.com", "https://example.com/3", "h3")
+    assert len(get_store().load_hashes()["example.com"]) == 3
+    assert index.pending_count == 0
+
+
+def test_concurrent_jobs_keep_each_others_hashes(workdir):
+    """Two jobs flushing independently do not overwrite each other"""
+    first = HashIndex(flush_every=0).load()
+    second = HashIndex(flush_every=0).load()
+
+    first.put("a.nl", "https://a.nl/", "ha")
+    first.flush()
+    second.put("b.nl", "https://b.nl/", "hb")
+    second.flush()
+
+    merged = HashIndex().load()
+    assert merged.get("a.nl", "https://a.nl/")["hash"] == "ha"
+    assert merged.get("b.nl", "https://b.nl/")["hash"] == "hb"
+
+
+def test_load_single_domain(workdir):
+    """A job only needs the hashes of its own site"""
+    index = HashIndex(flush_every=0).load()
+    index.put("a.nl", "https://a.nl/", "ha")
+    index.put("b.nl", "https://b.nl/", "hb")
+    index.flush()
+
+    only_a = HashIndex().load("a.nl")
+    assert len(only_a) == 1
+    assert only_a.get("b.nl", "https://b.nl/") is None
+
+
+@pytest.mark.asyncio
+async def test_crawl_all_skips_unchanged_pages(workdir):
+    """A second crawl with identical content skips the page via the index"""
+    url = "https://in-gouda.nl/contact"
+
+    async def fake_arun(url, config, session_id=None):
+        return DummyResult("Inhoud van de pagina.")
+
+    progress_file = os.path.join("progress", "job.json")
+    with patch("Crawlscraper.AsyncWebCrawler") as MockCrawler:
+        mock = MockCrawler.return_value.__aenter__.return_value
+        mock.arun.side_effect = fake_arun
+
+        await crawl_all([url], 5, progress_file, url)
+        assert get_store().get_job("job")["success"] == 1
+
+        await crawl_all([url], 5, progress_file, url)
+        progress = get_store().get_job("job")
+        assert progress["success"] == 0
+        assert progress["failed"] == 0
+
+    data = get_store().load_hashes()
+    assert data["in-gouda.nl"][url]["hash"] == hash_content("Inhoud van de pagina.")
@@ -0,0 +1,199 @@
+import os
+import sys
+import gzip
+import sqlite3
+import httpx
+import pytest
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+from Crawlscraper import crawl_site, crawl_all
+from incremental import ValidatorIndex, ChangeDetector, parse_lastmod, response_validators
+from sitemap import parse_sitemap, fetch_sitemap_entries
+from storage import Store, get_store
+from http_client import make_client
+from benchmarks.mock_site import MockSite, MockCrawler
+
+
+URLSET = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://a.nl/</loc><lastmod>2024-05-01</lastmod></url>
+  <url><loc>https://a.nl/zorg</loc></url>
+</urlset>"""
+
+INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://a.nl/sitemap-pages.xml.gz</loc></sitemap>
+</sitemapindex>"""
+
+
+def test_parse_sitemap_variants():
+    assert parse_sitemap(URLSET) == (
+        "urlset", [("https://a.nl/", "2024-05-01"), ("https://a.nl/zorg", None)]
+    )
+    assert parse_sitemap(gzip.compress(URLSET))[0] == "urlset"
+    assert parse_sitemap(INDEX) == ("sitemapindex", [("https://a.nl/sitemap-pages.xml.gz", None)])
+    assert parse_sitemap(b"<html></html>") == ("invalid", [])
+    assert parse_sitemap(b"not xml") == ("invalid", [])
+
+
+@pytest.mark.asyncio
+async def test_sitemap_index_is_followed():
+    def handler(request):
+        if request.url.path == "/sitemap.xml":
+            return httpx.Response(200, content=INDEX)
+        if request.url.path == "/sitemap-pages.xml.gz":
+            return httpx.Response(200, content=gzip.compress(URLSET))
+        return httpx.Response(404)
+
+    async with make_client(transport=httpx.MockTransport(handler)) as client:
+        entries = await fetch_sitemap_entries(client, ["https://a.nl/sitemap.xml"])
+    assert entries == [("https://a.nl/", "2024-05-01"), ("https://a.nl/zorg", None)]
+
+
+def test_lastmod_and_validator_parsing():
+    assert parse_lastmod("2024-05-01") < parse_lastmod("2024-05-01T10:00:00+00:00")
+    assert parse_lastmod("Wed, 01 May 2024 10:00:00 GMT") == parse_lastmod("2024-05-01T10:00:00Z")
+    assert parse_lastmod("gisteren") is None
+    assert response_validators({"ETag": '"v1"', "Last-Modified": "x"}) == {"etag": '"v1"', "last_modified": "x"}
+    assert response_validators(None) == {"etag": None, "last_modified": None}
+
+
+def test_validator_index_round_trip(workdir):
+    index = ValidatorIndex("a.nl")
+    index.put("https://a.nl/", etag='"v1"', lastmod="2024-05-01")
+    index.flush()
+    loaded = ValidatorIndex("a.nl").load().get("https://a.nl/")
+    assert loaded["etag"] == '"v1"'
+    assert loaded["lastmod"] == "2024-05-01"
+    assert ValidatorIndex("b.nl").load().get("https://a.nl/") is None
+
+
+def test_job_counters_are_added_to_old_databases(workdir):
+    path = str(workdir / "old.db")
+    Store(path)
+    conn = sqlite3.connect(path)
+    for column in ("skipped", "changed", "new"):
+        conn.execute(f"ALTER TABLE jobs DROP COLUMN {column}")
+    conn.commit()
+    conn.close()
+
+    store = Store(path)
+    store.save_job("j", url="https://a.nl", status="done", skipped=3, changed=1, new=2)
+    job = store.get_job("j")
+    assert (job["skipped"], job["changed"], job["new"]) == (3, 1, 2)
+
+
+@pytest.mark.asyncio
+async def test_change_detector_decisions(workdir):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"same"':
+            return httpx.Response(304)
+        return httpx.Response(200, text="nieuw")
+
+    validators = ValidatorIndex("a.nl")
+    validators.put("https://a.nl/same", etag='"same"')
+    validators.put("https://a.nl/old", etag='"old"')
+    validators.put("https://a.nl/dated", lastmod="2024-05-01")
+    validators.put("https://a.nl/bare")
+    known = {"https://a.nl/same", "https://a.nl/old", "https://a.nl/dated", "https://a.nl/bare"}
+
+    async with make_client(transport=httpx.MockTransport(handler)) as client:
+        detector = ChangeDetector(client, validators, known, {"https://a.nl/dated": "2024-04-01"})
+        assert await detector.should_fetch("https://a.nl/same") is False
+        assert await detector.should_fetch("https://a.nl/old") is True
+        assert await detector.should_fetch("https://a.nl/dated") is False
+        assert await detector.should_fetch("https://a.nl/bare") is True
+        assert await detector.should_fetch("https://a.nl/unknown") is True
+
+    # Only the pages with an ETag were checked over the network
+    assert [r.url.path for r in requests] == ["/same", "/old"]
+    assert detector.snapshot() == {"sitemap_skips": 1, "conditional_requests": 2, "not_modified": 1}
+
+
+class VersionedSite(MockSite):
+    """MockSite whose pages can be edited between crawls"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.version = {}
+
+    def text(self, page):
+        return f"Versie {self.version.get(page, 1)}. " + super().text(page)
+
+    def etag(self, url):
+        return f'"{self.version.get(self.page_of(url), 1)}"'
+
+
+class ValidatingCrawler(MockCrawler):
+    """MockCrawler that sends an ETag with every page"""
+
+    async def arun(self, url, config=None, session_id=None, **kwargs):
+        res = await super().arun(url, config, session_id, **kwargs)
+        if res.status_code == 200:
+            res.response_headers = {"ETag": self.site.etag(url)}
+        return res
+
+
+def conditional_transport(site):
+    """Answers conditional GETs for the site (no sitemap)"""
+
+    def handler(request):
+        url = str(request.url)
+        if site.page_of(url) is None:
+            return httpx.Response(404)
+        if request.headers.get("If-None-Match") == site.etag(url):
+            return httpx.Response(304)
+        return httpx.Response(200, text=site.html(site.page_of(url)))
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_recrawl_only_fetches_changed_pages(workdir):
+    site = VersionedSite(pages=30, fast_latency=0.001, slow_latency=0.001)
+    progress_file = os.path.join("progress", "first.json")
+    first_links = await crawl_site(ValidatingCrawler(site), site.url(0), 5, progress_file)
+
+    # Edit two pages and crawl again
+    site.version = {4: 2, 17: 2}
+    crawler = ValidatingCrawler(site)
+    async with make_client(transport=conditional_transport(site)) as client:
+        progress_file = os.path.join("progress", "second.json")
+        links = await crawl_site(
+            crawler, site.url(0), 5, progress_file, incremental=True, http_client=client
+        )
+
+    assert links == first_links
+    # The start page is always rendered, the rest only when changed
+    assert crawler.requests == 3
+    job = get_store().get_job("second")
+    assert (job["changed"], job["new"]) == (2, 0)
+    assert job["skipped"] == len(first_links) - 2
+
+
+@pytest.mark.asyncio
+async def test_crawl_all_skips_unchanged_pages_before_rendering(workdir):
+    site = VersionedSite(pages=10, fast_latency=0.001, slow_latency=0.001)
+    urls = sorted(site.all_urls())
+    await crawl_all(urls, 5, os.path.join("progress", "first.json"), site.url(0), crawler=ValidatingCrawler(site))
+
+    site.version = {3: 2}
+    crawler = ValidatingCrawler(site)
+    async with make_client(transport=conditional_transport(site)) as client:
+        await crawl_all(
+            urls, 5, os.path.join("progress", "second.json"), site.url(0),
+            crawler=crawler, incremental=True, http_client=client,
+        )
+
+    assert crawler.requests == 1
+    job = get_store().get_job("second")
+    assert (job["skipped"], job["changed"], job["new"]) == (9, 1, 0)
+    assert job["done"] == 10
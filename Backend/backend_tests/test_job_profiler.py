@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import asyncio
+import pytest
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+import job_profiler
+from Crawlscraper import run_scrape
+from job_profiler import JobProfiler, job_profile, profile_job
+from offload import CPUOffloader
+from rate_limiter import MAX_RATE, RateLimiter
+from storage import get_store
+from benchmarks.mock_site import MockSite, MockCrawler
+
+
+def spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+async def busy_child():
+    for _ in range(10):
+        spin(0.01)
+        await asyncio.sleep(0)
+
+
+async def other_job():
+    for _ in range(10):
+        spin(0.01)
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_samples_only_the_tasks_of_the_job():
+    loop = asyncio.get_running_loop()
+    factory = loop.get_task_factory()
+    other = asyncio.create_task(other_job())  # Created before profiling: another job
+    with profile_job("profiled", interval=0.002) as profiler:
+        assert job_profile("profiled") is not None  # Readable while running
+        child = asyncio.create_task(busy_child())
+        await asyncio.sleep(0.02)
+        await asyncio.gather(child, other)
+
+    # Tracing is switched off again
+    assert loop.get_task_factory() is factory and job_profiler.running == {}
+
+    summary = get_store().get_job_profile("profiled")["summary"]
+    assert summary["samples"] > 0 and summary["busy"] > 0 and summary["other"] > 0
+    assert set(summary["tasks"]) == {"[task busy_child]"}
+    assert any(name.startswith("spin (test_job_profiler.py") for name in summary["self"])
+    # The profiled task waited for its child
+    assert any(name.startswith("busy_child") or name.startswith("sleep") for name in summary["waiting"])
+    stacks = job_profile("profiled")["stacks"].splitlines()
+    assert all(line.startswith(("cpu;[task ", "wait;[task ")) for line in stacks)
+    assert not any("other_job" in line for line in stacks)
+
+
+@pytest.mark.asyncio
+async def test_profiling_is_opt_in(workdir):
+    site = MockSite(pages=15, fast_latency=0.001, slow_latency=0.005)
+    options = dict(
+        crawler=MockCrawler(site), offloader=CPUOffloader(workers=0), http_first=False,
+        rate_limiter=RateLimiter(robots_fetcher=None, rate=MAX_RATE), discovery="links",
+    )
+    factory = asyncio.get_running_loop().get_task_factory()
+
+    await run_scrape(site.url(0), "plain", **options)
+    assert get_store().get_job_profile("plain") is None
+
+    await run_scrape(site.url(0), "profiled", profile=True, **options)
+    profile = get_store().get_job_profile("profiled")
+    assert profile["summary"]["job_id"] == "profiled"
+    assert "[task collect_internal_urls.<locals>.worker]" in profile["stacks"]
+    assert asyncio.get_running_loop().get_task_factory() is factory
+
+    # Deleting the job deletes its profile
+    get_store().delete_job("profiled")
+    assert get_store().get_job_profile("profiled") is None
+
+
+def test_profile_endpoint(tmp_path, monkeypatch):
+    import main
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(main, "store", get_store())
+    client = TestClient(main.app)
+    assert client.get("/jobs/unknown/profile").status_code == 404
+
+    profiler = JobProfiler("job-p")
+    profiler.started = time.time()
+    profiler.stacks.update({"cpu;[task worker];worker (Crawlscraper.py:1)": 3})
+    get_store().save_job_profile("job-p", profiler.folded(), profiler.summary())
+
+    response = client.get("/jobs/job-p/profile")
+    assert response.text == "cpu;[task worker];worker (Crawlscraper.py:1) 3\n"
+    assert response.headers["content-disposition"] == 'attachment; filename="job-p.folded"'
+    assert client.get("/jobs/job-p/profile", params={"format": "json"}).json()["tasks"] == {"[task worker]": 3}
+
+    response = client.post(
+        "/start-scrape", json={"urls": ["https://a.nl"], "distributed": True, "profile": True}
+    )
+    assert response.status_code == 400
@@ -0,0 +1,122 @@
+import os
+import sys
+import pytest
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+from link_extractor import (
+    LinkExtractor,
+    SoupLinkExtractor,
+    StreamingLinkExtractor,
+    LxmlLinkExtractor,
+    Crawl4aiLinkExtractor,
+    get_link_extractor,
+)
+from benchmarks.html_fixtures import directory_page
+
+
+class DummyResult:
+    """Mock crawl result with raw HTML and optional crawl4ai links"""
+    def __init__(self, html, links=None):
+        self.success = True
+        self.html = html
+        self.links = links
+
+
+PAGE = "https://in-gouda.nl/activiteiten/"
+NETLOC = "in-gouda.nl"
+
+HTML = """
+    <html>
+        <body>
+            <a href="/internal-page">Internal</a>
+            <a href="https://in-gouda.nl/contact?x=1#form">Also internal</a>
+            <a href="sport">Relative</a>
+            <a href="https://externedomein.nl/page">External</a>
+            <a href="https://in-gouda.nl/file.pdf">Excluded file</a>
+            <a href="/a?one=1&amp;two=2">Entity</a>
+            <a>No href</a>
+            <A HREF="/UPPER">Upper case tag</A>
+        </body>
+    </html>
+"""
+
+EXPECTED = {
+    "https://in-gouda.nl/internal-page",
+    "https://in-gouda.nl/contact",
+    "https://in-gouda.nl/activiteiten/sport",
+    "https://in-gouda.nl/a",
+    "https://in-gouda.nl/UPPER",
+}
+
+
+@pytest.mark.parametrize("extractor_class", [
+    SoupLinkExtractor, StreamingLinkExtractor, LxmlLinkExtractor,
+])
+def test_extractors_find_internal_links(extractor_class):
+    """Every strategy returns the same normalized internal links"""
+    links = extractor_class().internal_links(PAGE, DummyResult(HTML), NETLOC)
+    assert set(links) == EXPECTED
+    assert len(links) == len(set(links))
+
+
+@pytest.mark.parametrize("extractor_class", [StreamingLinkExtractor, LxmlLinkExtractor])
+def test_fast_extractors_match_beautifulsoup_on_large_page(extractor_class):
+    """The fast strategies agree with the original parser on a large page"""
+    html = directory_page(500)
+    page = "https://www.zorgkaartnederland.nl/zoeken"
+    netloc = "www.zorgkaartnederland.nl"
+    expected = SoupLinkExtractor().internal_links(page, DummyResult(html), netloc)
+    assert sorted(extractor_class().internal_links(page, DummyResult(html), netloc)) == sorted(expected)
+
+
+def test_lxml_falls_back_for_unparseable_documents():
+    """Documents lxml refuses (encoding declaration in a str) use the fallback"""
+    html = '<?xml version="1.0" encoding="utf-8"?>' + HTML
+    links = LxmlLinkExtractor().internal_links(PAGE, DummyResult(html), NETLOC)
+    assert set(links) == EXPECTED
+
+
+def test_empty_html_gives_no_links():
+    for name in ("bs4", "stream", "lxml"):
+        assert get_link_extractor(name).internal_links(PAGE, DummyResult(""), NETLOC) == []
+
+
+def test_crawl4ai_extractor_uses_result_links():
+    """Links crawl4ai already extracted are reused without parsing HTML"""
+    links = {
+        "internal": [
+            {"href": "https://in-gouda.nl/contact?x=1", "text": "Contact"},
+            {"href": "https://sub.in-gouda.nl/other", "text": "Subdomain"},
+        ],
+        "external": [{"href": "https://externedomein.nl/page"}],
+    }
+    result = DummyResult("<html><body>not parsed</body></html>", links=links)
+    assert Crawl4aiLinkExtractor().internal_links(PAGE, result, NETLOC) == [
+        "https://in-gouda.nl/contact"
+    ]
+
+
+def test_crawl4ai_extractor_falls_back_to_html():
+    """Without link data the HTML is parsed instead"""
+    result = DummyResult(HTML, links={"internal": [], "external": []})
+    assert set(Crawl4aiLinkExtractor().internal_links(PAGE, result, NETLOC)) == EXPECTED
+
+
+def test_get_link_extractor():
+    assert isinstance(get_link_extractor("auto"), LxmlLinkExtractor)
+    assert isinstance(get_link_extractor("stream"), StreamingLinkExtractor)
+    with pytest.raises(ValueError):
+        get_link_extractor("regex")
+
+
+def test_extractors_must_implement_hrefs():
+    class NoHrefs(LinkExtractor):
+        name = "none"
+
+    with pytest.raises(TypeError):
+        NoHrefs()
@@ -0,0 +1,79 @@
+import os
+import sys
+import pytest
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+from Crawlscraper import run_scrape
+from metrics import Histogram, metric, stage_seconds
+from offload import CPUOffloader
+from rate_limiter import MAX_RATE, RateLimiter
+from http_client import make_client
+from benchmarks.mock_site import MockSite, MockCrawler
+
+
+def test_histogram_buckets_and_exposition():
+    histogram = Histogram("test_seconds", "Test durations", buckets=(0.01, 0.1, 1.0))
+    for seconds in (0.005, 0.01, 0.05, 3.0):
+        histogram.observe("fetch", seconds)
+    with histogram.time("hash"):
+        pass
+
+    series = histogram.snapshot()["fetch"]
+    assert series["buckets"] == {0.01: 2, 0.1: 3, 1.0: 3, float("inf"): 4}
+    assert series["count"] == 4 and series["sum"] == pytest.approx(3.065)
+    assert histogram.snapshot()["hash"]["count"] == 1
+
+    lines = histogram.exposition().splitlines()
+    assert lines[:2] == ["# HELP test_seconds Test durations", "# TYPE test_seconds histogram"]
+    assert 'test_seconds_bucket{stage="fetch",le="0.01"} 2' in lines
+    assert 'test_seconds_bucket{stage="fetch",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{stage="fetch"} 4' in lines
+    assert metric("hosts", "gauge", "Rate", [({"host": 'a"b'}, 1.5)]).splitlines()[-1] == 'hosts{host="a\\"b"} 1.5'
+
+
+@pytest.mark.asyncio
+async def test_run_scrape_times_every_stage(workdir):
+    site = MockSite(pages=20, fast_latency=0.001, slow_latency=0.005, js_ratio=0.3)
+    stage_seconds.reset()
+    async with make_client(transport=site.http_transport()) as client:
+        await run_scrape(
+            site.url(0), "timed", crawler=MockCrawler(site), offloader=CPUOffloader(workers=0),
+            rate_limiter=RateLimiter(robots_fetcher=None, rate=MAX_RATE), discovery="links", http_client=client,
+        )
+
+    stages = stage_seconds.snapshot()
+    assert set(stages) == {"fetch", "rate_limit", "render", "extract", "links", "clean_text", "hash", "output"}
+    assert stages["fetch"]["count"] == stages["rate_limit"]["count"] == site.pages
+    assert stages["render"]["count"] + stages["extract"]["count"] == site.pages
+    assert stages["clean_text"]["count"] == stages["hash"]["count"] == site.pages - 1
+
+
+def test_metrics_endpoint(monkeypatch):
+    import main
+    from fastapi.testclient import TestClient
+
+    state = dict(
+        main.scheduler.snapshot(), queued=3, running=2, browsers=1,
+        hosts={"a.nl": {"rate": 4.5, "throughput": 2.0, "requests": 10, "errors": 1, "throttled": 1}},
+    )
+    monkeypatch.setattr(main.scheduler, "snapshot", lambda: state)
+    stage_seconds.observe("fetch", 0.2)
+
+    response = TestClient(main.app).get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    for line in (
+        "scraper_jobs_queued 3",
+        "scraper_jobs_running 2",
+        "scraper_browsers_leased 1",
+        'scraper_host_rate{host="a.nl"} 4.5',
+        'scraper_host_requests_total{host="a.nl"} 10',
+        "# TYPE scraper_stage_seconds histogram",
+    ):
+        assert line in lines
+    assert any(line.startswith('scraper_stage_seconds_count{stage="fetch"}') for line in lines)
@@ -0,0 +1,61 @@
+import os
+import sys
+import pytest
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+from http_client import make_client
+from benchmarks.mock_site import MockSite, MockFarm
+from benchmarks import bench_farm
+
+
+def test_site_profiles():
+    site = MockSite(pages=200, page_kb=10, latency_distribution="lognormal", fast_latency=0.01)
+    assert 10 * 1024 * 0.9 < len(site.text(5)) < 10 * 1024 * 1.1
+    assert site.text(5) != site.text(6)
+    latencies = sorted(site.latency.values())
+    assert 0.005 < latencies[100] < 0.02 < latencies[-1]
+    # The default site is unchanged by the new options
+    assert MockSite(pages=20).latency == MockSite(pages=20, page_kb=0).latency
+    with pytest.raises(ValueError):
+        MockSite(latency_distribution="uniform")
+
+
+@pytest.mark.asyncio
+async def test_farm_serves_each_site_on_its_domain():
+    farm = MockFarm([
+        MockSite(pages=5, domain=f"s{n}.local", fast_latency=0.001, slow_latency=0.001, js_ratio=0.5)
+        for n in range(2)
+    ])
+    crawler = farm.crawler()
+    res = await crawler.arun("https://s1.local/pagina/3")
+    assert res.success and "Pagina 3" in res.html
+    assert not (await crawler.arun("https://elders.local/")).success
+
+    async with make_client(transport=farm.http_transport()) as client:
+        resp = await client.get("https://s0.local/pagina/4")
+        assert resp.status_code == 200
+        assert (await client.get("https://elders.local/")).status_code == 404
+    assert farm.fetched == {("s1.local", 3), ("s0.local", 4)}
+    assert len(farm.latencies) == 2 and farm.http_fetches == 1
+
+
+def test_bench_reports_every_phase(tmp_path):
+    options = {
+        "sites": 2, "pages": 15, "fanout": 4, "latency": "bimodal", "fast_latency": 0.001,
+        "slow_latency": 0.005, "slow_ratio": 0.1, "page_kb": 2, "js_ratio": 0.3,
+        "concurrency": 4, "cpu_workers": 0,
+    }
+    results = bench_farm.run(bench_farm.PHASES, options, isolate=False)
+
+    assert [r["phase"] for r in results] == list(bench_farm.PHASES)
+    assert [r["pages"] for r in results] == [30, 28, 30]
+    for r in results:
+        assert r["pages_per_sec"] > 0 and r["peak_rss_mb"] > 0
+        assert r["latency_p50_ms"] <= r["latency_p99_ms"]
+    # HTTP-first: only the JS-rendered pages reach the browser
+    assert 0 < results[2]["rendered"] < 30 == results[2]["http_fetches"]
@@ -0,0 +1,101 @@
+import os
+import sys
+import json
+import random
+import pytest
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+from near_dup import SimHashIndex, NearDuplicateFilter, simhash
+from hash_index import HashIndex
+from storage import get_store
+from Crawlscraper import crawl_site
+from benchmarks.html_fixtures import page_markdown
+from benchmarks.mock_site import MockSite, MockCrawler
+
+
+class TemplateSite(MockSite):
+    """MockSite whose odd pages repeat page 1 with a different footer line"""
+
+    def text(self, page: int) -> str:
+        if page % 2:
+            return page_markdown(1) + f"\n\nBijgewerkt door redactie {page}."
+        return page_markdown(page + 100)
+
+
+def flip(fingerprint: int, bits) -> int:
+    for bit in bits:
+        fingerprint ^= 1 << bit
+    return fingerprint
+
+
+def test_simhash_distance_follows_similarity():
+    page = page_markdown(3)
+    assert simhash(page) == simhash(page)
+    edited = page.replace("Gouda", "Delft", 1) + "\n\nNog een zin erbij."
+    assert (simhash(page) ^ simhash(edited)).bit_count() <= 3
+    assert (simhash(page) ^ simhash(page_markdown(4))).bit_count() > 10
+    assert simhash("Te weinig tekst.") is None
+
+
+def test_index_finds_every_fingerprint_within_the_distance():
+    rng = random.Random(7)
+    index = SimHashIndex(distance=3)
+    stored = [rng.getrandbits(64) for _ in range(5000)]
+    for i, fingerprint in enumerate(stored):
+        index.add(f"https://a.nl/{i}", fingerprint)
+
+    for i in range(0, 5000, 50):
+        near = flip(stored[i], rng.sample(range(64), rng.randint(0, 3)))
+        assert index.find(near) == (f"https://a.nl/{i}", (near ^ stored[i]).bit_count())
+        far = flip(stored[i], rng.sample(range(64), 4))
+        expected = [j for j, fp in enumerate(stored) if (fp ^ far).bit_count() <= 3]
+        assert (index.find(far) is not None) == bool(expected)
+        assert index.find(stored[i], exclude=f"https://a.nl/{i}") is None
+
+    # Replacing a fingerprint moves the page to its new buckets
+    index.add("https://a.nl/0", stored[1])
+    assert index.find(stored[0]) is None
+    assert index.find(stored[1], exclude="https://a.nl/1") == ("https://a.nl/0", 0)
+    with pytest.raises(ValueError):
+        SimHashIndex(distance=32)
+    with pytest.raises(ValueError):
+        NearDuplicateFilter(mode="merge")
+
+
+def test_fingerprints_are_stored_with_the_hashes():
+    index = HashIndex(flush_every=0)
+    index.put("a.nl", "https://a.nl/a", "h", simhash=(1 << 64) - 5)
+    index.put("a.nl", "https://a.nl/b", "h")
+    index.flush()
+    stored = get_store().load_hashes("a.nl")["a.nl"]
+    assert stored["https://a.nl/a"]["simhash"] == (1 << 64) - 5
+    assert "simhash" not in stored["https://a.nl/b"]
+
+    near_dups = NearDuplicateFilter(mode="skip").load(stored)
+    assert near_dups.match("https://a.nl/c", (1 << 64) - 6) == "https://a.nl/a"
+    assert near_dups.match("https://a.nl/a", (1 << 64) - 5) is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["off", "skip", "cluster"])
+async def test_crawl_skips_or_clusters_near_duplicates(workdir, monkeypatch, mode):
+    monkeypatch.setattr("Crawlscraper.NEAR_DUPLICATES", mode)
+    site = TemplateSite(pages=12, fast_latency=0.001, slow_latency=0.001)
+    links = await crawl_site(MockCrawler(site), site.url(0), 1, os.path.join("progress", "job.json"))
+
+    out_dir = os.path.join("output", os.listdir("output")[0])
+    with open(os.path.join(out_dir, f"{site.domain}.json"), "r", encoding="utf-8") as f:
+        records = {item["url"]: item for item in json.load(f)}
+    copies = {site.url(i) for i in range(3, 12, 2)}
+    if mode == "skip":
+        assert set(records) == links - copies
+    else:
+        assert set(records) == links
+    clustered = {url for url, item in records.items() if "cluster" in item}
+    assert clustered == (copies if mode == "cluster" else set())
+    assert {records[url]["cluster"] for url in clustered} <= {site.url(1)}
@@ -0,0 +1,106 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+import pytest
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+from Crawlscraper import crawl_site
+from offload import CPUOffloader, LoopLagMonitor, extract_links_task, summarize_task
+from utils import clean_text
+from hash_index import hash_content
+from benchmarks.mock_site import MockSite, MockCrawler
+
+
+def test_tasks_match_inline_processing():
+    site = MockSite(pages=5)
+    links = extract_links_task("lxml", site.url(1), site.html(1), None, site.domain)
+    assert set(links) <= site.all_urls()
+    assert summarize_task(site.text(1)) == (clean_text(site.text(1)), hash_content(clean_text(site.text(1))))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", ["thread", "process"])
+async def test_crawl_site_output_is_identical_with_offload(workdir, read_output, monkeypatch, kind):
+    """Offloading changes where the work runs, not the results"""
+    site = MockSite(pages=30, fast_latency=0.001, slow_latency=0.005)
+
+    monkeypatch.setenv("SCRAPER_DB", str(workdir / "inline.db"))
+    inline_links = await crawl_site(MockCrawler(site), site.url(0), 5, os.path.join("progress", "a.json"))
+    inline_output = read_output(site)
+
+    monkeypatch.setenv("SCRAPER_DB", str(workdir / f"{kind}.db"))
+    async with CPUOffloader(workers=2, kind=kind) as offloader:
+        links = await crawl_site(
+            MockCrawler(site), site.url(0), 5, os.path.join("progress", "b.json"), offloader=offloader
+        )
+        assert offloader.submitted > 0
+
+    assert links == inline_links
+    assert read_output(site) == inline_output
+
+
+@pytest.mark.asyncio
+async def test_in_flight_tasks_are_bounded():
+    """Submitters wait once max_pending tasks are in the pool"""
+    lock = threading.Lock()
+    running = peak = 0
+
+    def task():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+
+    async with CPUOffloader(workers=8, kind="thread", max_pending=3) as offloader:
+        await asyncio.gather(*(offloader.run(task) for _ in range(12)))
+    assert offloader.submitted == 12
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor_sees_blocking_work():
+    async with LoopLagMonitor(interval=0.005) as lag:
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)  # blocks the event loop
+        await asyncio.sleep(0.02)
+    stats = lag.snapshot()
+    assert stats["samples"] > 0
+    assert stats["max_ms"] >= 80
+
+
+def test_loop_lag_monitor_keeps_a_fixed_size_summary():
+    lag = LoopLagMonitor(buckets=(0.001, 0.01, 0.1))
+    for _ in range(900):
+        lag.observe(0.0005)
+    for seconds in (0.005,) * 99 + (0.3,):
+        lag.observe(seconds)
+    assert lag.counts == [900, 99, 0, 1]  # No list of samples grows with the job
+    stats = lag.snapshot()
+    assert stats["samples"] == 1000
+    assert stats["p99_ms"] == pytest.approx(10.0)
+    assert stats["max_ms"] == pytest.approx(300.0)
+    assert stats["mean_ms"] == pytest.approx((900 * 0.0005 + 99 * 0.005 + 0.3) / 1000 * 1000)
+
+
+@pytest.mark.asyncio
+async def test_offloaded_work_keeps_the_loop_free():
+    offloader = CPUOffloader(workers=1, kind="thread")
+    async with LoopLagMonitor(interval=0.005) as lag:
+        await offloader.run(time.sleep, 0.1)
+    offloader.close()
+    assert lag.snapshot()["max_ms"] < 80
+
+
+def test_unknown_executor_kind():
+    with pytest.raises(ValueError):
+        CPUOffloader(kind="gpu")
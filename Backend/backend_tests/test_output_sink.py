@@ -0,0 +1,110 @@
+import os
+import sys
+import json
+import pytest
+from functools import partial
+from starlette.testclient import TestClient
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+from Crawlscraper import crawl_site
+from output_sink import OutputSink, iter_records, json_array_chunks, output_entries
+from storage import get_store
+from benchmarks.mock_site import MockSite, MockCrawler
+
+
+RECORDS = [
+    {"url": "https://a.nl/zorg", "titel": "zorg", "samenvatting": "Hulp bij \"thuiszorg\" in Zoetermeer. Café open."},
+    {"url": "https://a.nl/wonen", "titel": "wonen", "samenvatting": "Regel 1\nRegel 2 – €"},
+]
+
+
+@pytest.mark.parametrize("records", [RECORDS, RECORDS[:1], []])
+def test_json_array_matches_json_dump(records):
+    assert "".join(json_array_chunks(records)) == json.dumps(records, indent=2, ensure_ascii=False)
+
+
+@pytest.mark.parametrize("compression", ["", "gzip"])
+def test_finalize_writes_legacy_json(workdir, compression):
+    sink = OutputSink("out", compression=compression)
+    for record in RECORDS:
+        sink.write("a.nl", record)
+    sink.finalize()
+
+    with open(os.path.join("out", "a.nl.json"), "r", encoding="utf-8") as f:
+        assert f.read() == json.dumps(RECORDS, indent=2, ensure_ascii=False)
+    suffix = ".ndjson.gz" if compression else ".ndjson"
+    assert sorted(os.listdir("out")) == ["a.nl.json", f"a.nl{suffix}"]
+    assert output_entries("out") == ["a.nl.json"]
+
+
+@pytest.mark.parametrize("compression", ["", "gzip"])
+def test_records_survive_a_crash_after_checkpoint(workdir, compression):
+    """Without close() or finalize() the synced records are still readable"""
+    sink = OutputSink("out", compression=compression, checkpoint_every=2)
+    sink.write("a.nl", RECORDS[0])
+    assert not sink.checkpoint_due()
+    sink.write("a.nl", RECORDS[1])
+    assert sink.checkpoint_due()
+    sink.sync()
+    assert not sink.checkpoint_due()
+
+    assert list(iter_records("out", "a.nl")) == RECORDS
+    assert output_entries("out") == ["a.nl.json"]
+    sink.close()
+
+
+@pytest.mark.asyncio
+async def test_crawl_streams_output_and_flushes_hashes_at_checkpoints(workdir, monkeypatch):
+    monkeypatch.setattr("Crawlscraper.OutputSink", partial(OutputSink, checkpoint_every=5))
+    site = MockSite(pages=20, fast_latency=0.001, slow_latency=0.001)
+    flushed = []
+
+    def on_checkpoint(sink):
+        # Every page with a stored hash must already be in the output file
+        stored = get_store().load_hashes(site.domain).get(site.domain, {})
+        written = {record["url"] for record in iter_records(sink.out_dir, site.domain)}
+        flushed.append(len(stored))
+        assert set(stored) <= written
+
+    sync = OutputSink.sync
+
+    def checked_sync(self):
+        sync(self)
+        on_checkpoint(self)
+
+    monkeypatch.setattr(OutputSink, "sync", checked_sync)
+    links = await crawl_site(MockCrawler(site), site.url(0), 5, os.path.join("progress", "a.json"))
+
+    assert len(flushed) >= 3
+    out_dir = os.path.join("output", os.listdir("output")[0])
+    with open(os.path.join(out_dir, f"{site.domain}.json"), "r", encoding="utf-8") as f:
+        assert sorted(item["url"] for item in json.load(f)) == sorted(links)
+
+
+def test_output_endpoint_streams_both_formats(workdir):
+    from main import app
+
+    client = TestClient(app)
+    out_dir = os.path.join("output", "2024-01-01")
+    sink = OutputSink(out_dir, compression="gzip")
+    for record in RECORDS:
+        sink.write("a.nl", record)
+    sink.sync()
+
+    # Running job: JSON is built from the stream
+    assert client.get("/output/2024-01-01").json() == {"entries": ["a.nl.json"]}
+    assert client.get("/output/2024-01-01/a.nl.json").json() == RECORDS
+    resp = client.get("/output/2024-01-01/a.nl.json", params={"format": "ndjson"})
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in resp.text.splitlines()] == RECORDS
+
+    sink.finalize()
+    resp = client.get("/output/2024-01-01/a.nl.json")
+    assert resp.text == json.dumps(RECORDS, indent=2, ensure_ascii=False)
+    assert client.get("/output/2024-01-01/a.nl.ndjson").text.count("\n") == len(RECORDS)
+    assert client.get("/output/2024-01-01/b.nl.json").status_code == 404
@@ -0,0 +1,70 @@
+import os
+import sys
+import pytest
+from unittest.mock import patch
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+from Crawlscraper import crawl_site, crawl_all, collect_internal_urls
+from storage import get_store
+from benchmarks.mock_site import MockSite, MockCrawler
+
+
+@pytest.mark.asyncio
+async def test_crawl_site_fetches_every_page_once(workdir, read_output):
+    """Pipelined mode fetches each page once and extracts every discovered page"""
+    site = MockSite(pages=40, fast_latency=0.001, slow_latency=0.005)
+    crawler = MockCrawler(site)
+    progress_file = os.path.join("progress", "pipelined.json")
+
+    links = await crawl_site(crawler, site.url(0), 5, progress_file)
+
+    assert crawler.requests == site.pages
+    assert links == site.all_urls() - {site.url(0)}
+    assert [item["url"] for item in read_output(site)] == sorted(links)
+
+    job = get_store().get_job("pipelined")
+    assert job["status"] == "done"
+    assert job["progress"] == 100
+    assert job["done"] == job["total"] == job["success"] == len(links)
+
+
+@pytest.mark.asyncio
+async def test_two_pass_mode_reuses_the_shared_crawler(workdir, read_output):
+    """crawl_all accepts the discovery crawler instead of starting a browser"""
+    site = MockSite(pages=20, fast_latency=0.001, slow_latency=0.005)
+    crawler = MockCrawler(site)
+    progress_file = os.path.join("progress", "twopass.json")
+
+    with patch("Crawlscraper.AsyncWebCrawler") as MockBrowser:
+        links = await collect_internal_urls(crawler, site.url(0), 5, progress_file)
+        await crawl_all(list(links), 5, progress_file, site.url(0), crawler=crawler)
+        MockBrowser.assert_not_called()
+
+    # Two passes fetch every discovered page twice
+    assert crawler.requests == site.pages + len(links)
+    assert [item["url"] for item in read_output(site)] == sorted(links)
+
+
+@pytest.mark.asyncio
+async def test_crawl_site_counts_failed_fetches(workdir):
+    """Fetch errors during the single pass are counted as failed pages"""
+    site = MockSite(pages=10, fast_latency=0.001, slow_latency=0.001)
+    crawler = MockCrawler(site)
+    original = crawler.arun
+
+    async def flaky_arun(url, config=None, session_id=None, **kwargs):
+        if url.endswith("/pagina/3"):
+            raise TimeoutError("page timeout")
+        return await original(url, config, session_id)
+
+    crawler.arun = flaky_arun
+    await crawl_site(crawler, site.url(0), 3, os.path.join("progress", "flaky.json"))
+
+    job = get_store().get_job("flaky")
+    assert job["failed"] == 1
+    assert job["success"] == job["total"] - 1
@@ -0,0 +1,136 @@
+import os
+import sys
+import json
+import pytest
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+from progress_events import ProgressHub, hub
+from storage import get_store
+from utils import log_progress
+
+
+class Request:
+    """Client that disconnects after a number of checks"""
+
+    def __init__(self, checks=100):
+        self.checks = checks
+
+    async def is_disconnected(self):
+        self.checks -= 1
+        return self.checks < 0
+
+
+def parse(message):
+    lines = dict(line.split(": ", 1) for line in message.strip().splitlines())
+    return lines["event"], json.loads(lines["data"])
+
+
+def test_progress_is_written_on_status_changes_and_flush():
+    progress = ProgressHub(write_interval=60)
+    store = get_store()
+
+    progress.publish("job-1", status="queued", url="https://a.nl", progress=0)
+    assert store.get_job("job-1")["status"] == "queued"
+    progress.publish("job-1", status="scraping", done=1, total=10)
+    for done in range(2, 8):
+        progress.publish("job-1", status="scraping", done=done, total=10)
+    # Per-page updates stay in memory until the interval passes
+    assert store.get_job("job-1")["done"] == 1
+    assert progress.latest("job-1")["done"] == 7
+    progress.flush()
+    assert store.get_job("job-1")["done"] == 7
+
+    progress.publish("job-1", status="scraping", done=8, total=10)
+    progress.set_status("job-1", "stopped")
+    job = store.get_job("job-1")
+    assert (job["status"], job["done"], job["url"]) == ("stopped", 8, "https://a.nl")
+    # Finished jobs are read from the database again
+    assert progress.latest("job-1") is None and progress.active() == []
+
+
+def test_write_interval_zero_writes_every_update():
+    progress = ProgressHub(write_interval=0)
+    progress.publish("job-1", status="scraping", url="https://a.nl", done=1)
+    progress.publish("job-1", status="scraping", done=2)
+    assert get_store().get_job("job-1")["done"] == 2
+
+
+@pytest.mark.asyncio
+async def test_subscribers_get_the_latest_record_per_job():
+    progress = ProgressHub(write_interval=60)
+    with progress.subscribe() as everything, progress.subscribe(["job-b"]) as only_b:
+        for done in range(100):
+            progress.publish("job-a", status="scraping", url="https://a.nl", done=done)
+        progress.publish("job-b", status="scraping", url="https://b.nl", done=1)
+
+        records = await everything.next(interval=0)
+        assert sorted((r["job_id"], r["done"]) for r in records) == [("job-a", 99), ("job-b", 1)]
+        assert [r["job_id"] for r in await only_b.next(interval=0)] == ["job-b"]
+        # Nothing new: the wait times out empty
+        assert await everything.next(interval=0, timeout=0.01) == []
+
+        progress.publish("job-a", status="done", done=100)
+        assert await everything.next(interval=0) == [
+            {"job_id": "job-a", "status": "done", "url": "https://a.nl", "done": 100}
+        ]
+    assert get_store().get_job("job-a")["done"] == 100
+
+
+@pytest.mark.asyncio
+async def test_event_stream_sends_snapshot_updates_and_keepalives(tmp_path, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "store", get_store())  # main opened the store of an earlier test
+    path = str(tmp_path / "job-s.json")
+    log_progress(path, 0, "scraping", url="https://a.nl", total=50)
+
+    stream = main.progress_stream(Request(), ["job-s"], interval=0, keepalive=0.01)
+    event, data = parse(await stream.__anext__())
+    assert (event, data["job_id"], data["status"], data["total"]) == ("progress", "job-s", "scraping", 50)
+
+    for done in range(1, 21):
+        log_progress(path, done * 2, "scraping", done=done, total=50, url="https://a.nl")
+    event, data = parse(await stream.__anext__())
+    assert (data["done"], data["progress"]) == (20, 40)
+    assert await stream.__anext__() == ": keep-alive\n\n"
+
+    # /scrape-progress reads the unwritten progress as well
+    assert json.loads(main.scrape_progress("job-s").body)["done"] == 20
+    log_progress(path, 100, "done", done=50, total=50, url="https://a.nl")
+    event, data = parse(await stream.__anext__())
+    assert data["status"] == "done"
+    assert hub.latest("job-s") is None
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_event_stream_follows_jobs_of_other_processes(monkeypatch):
+    """Distributed jobs are read from the database and the workers' reports"""
+    import main
+    from work_queue import LocalWorkQueue
+
+    store = get_store()
+    queue = LocalWorkQueue()
+    monkeypatch.setattr(main, "store", store)
+    monkeypatch.setattr(main, "work_queue", queue)
+    store.save_job("job-d", url="https://a.nl", status="scraping", total=50)
+    queue.open("job-d", "https://a.nl")
+    queue.report("job-d", "w1", {"done": 5, "success": 5, "state": "running"})
+
+    stream = main.progress_stream(Request(), interval=0.01, keepalive=10)
+    event, data = parse(await stream.__anext__())
+    assert (data["job_id"], data["status"], data["done"], data["workers"]) == ("job-d", "scraping", 5, 1)
+
+    queue.report("job-d", "w2", {"done": 3, "success": 2, "fail": 1, "state": "running"})
+    event, data = parse(await stream.__anext__())
+    assert (data["done"], data["failed"], data["workers"]) == (8, 1, 2)
+
+    store.save_job("job-d", url="https://a.nl", status="done", done=8, total=8)
+    event, data = parse(await stream.__anext__())
+    assert (data["status"], data["done"]) == ("done", 8)
+    await stream.aclose()
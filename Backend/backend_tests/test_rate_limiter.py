@@ -0,0 +1,128 @@
+import os
+import sys
+import time
+import pytest
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+import rate_limiter
+from rate_limiter import HostLimiter, RateLimiter, RateLimitedCrawler, crawl_delay
+from Crawlscraper import collect_internal_urls
+from benchmarks.mock_site import MockSite, MockCrawler, MockResult
+
+
+ROBOTS = """
+User-agent: *
+Crawl-delay: 2
+Disallow: /admin
+"""
+
+
+def test_crawl_delay_from_robots_txt():
+    assert crawl_delay(ROBOTS) == 2.0
+    assert crawl_delay("User-agent: *\nDisallow:") is None
+    assert crawl_delay(None) is None
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_spaces_requests():
+    host = HostLimiter("a.nl", rate=20)
+    start = time.monotonic()
+    for _ in range(10):
+        await host.acquire()
+    # One token is available immediately, the other nine refill at 20/s
+    assert 0.4 <= time.monotonic() - start < 0.8
+
+
+def test_aimd_rate_control():
+    host = HostLimiter("a.nl", rate=4)
+    host.record(0.1, status=200)
+    assert host.rate == 4 + rate_limiter.INCREASE_STEP
+
+    host.record(0.1, status=429)
+    assert host.rate == pytest.approx((4 + rate_limiter.INCREASE_STEP) * 0.5)
+    # Throttling seen within the same response time is one congestion event
+    host.record(0.1, status=503)
+    assert host.rate == pytest.approx((4 + rate_limiter.INCREASE_STEP) * 0.5)
+
+    host.last_decrease = 0
+    host.record(0.1, error=TimeoutError("page timeout"))
+    assert host.rate == pytest.approx((4 + rate_limiter.INCREASE_STEP) * 0.25)
+
+    # Errors that are not congestion signals keep the rate
+    rate = host.rate
+    host.record(0.1, status=404)
+    assert host.rate == rate
+
+    for _ in range(1000):
+        host.record(0.1, status=200)
+    assert host.rate == rate_limiter.MAX_RATE
+
+    stats = host.snapshot()
+    assert stats["requests"] == 1005
+    assert stats["errors"] == 4
+    assert stats["throttled"] == 2
+
+
+def test_crawl_delay_caps_the_rate():
+    host = HostLimiter("a.nl", rate=5)
+    host.set_crawl_delay(2.0)
+    assert host.rate == 0.5
+    for _ in range(10):
+        host.record(0.1, status=200)
+    assert host.rate == 0.5
+
+
+@pytest.mark.asyncio
+async def test_robots_txt_is_read_once_per_host():
+    fetched = []
+
+    def fetcher(scheme, host):
+        fetched.append((scheme, host))
+        return ROBOTS
+
+    limiter = RateLimiter(robots_fetcher=fetcher)
+    first = await limiter.host("https://a.nl/x")
+    second = await limiter.host("https://a.nl/y")
+    assert first is second
+    assert fetched == [("https", "a.nl")]
+    assert first.crawl_delay == 2.0
+
+
+@pytest.mark.asyncio
+async def test_unreadable_robots_txt_is_ignored():
+    def fetcher(scheme, host):
+        raise OSError("connection refused")
+
+    host = await RateLimiter(robots_fetcher=fetcher).host("https://a.nl/")
+    assert host.crawl_delay is None
+
+
+class ThrottlingCrawler(MockCrawler):
+    """Answers the third and sixth request with 429 Too Many Requests"""
+
+    async def arun(self, url, config=None, session_id=None, **kwargs):
+        res = await super().arun(url, config, session_id, **kwargs)
+        if self.requests in (3, 6):
+            return MockResult(url, "", "", status_code=429)
+        return res
+
+
+@pytest.mark.asyncio
+async def test_shared_limiter_counts_per_host():
+    """Discovery through the limiter backs off on 429 and reports per host"""
+    site = MockSite(pages=30, fast_latency=0.001, slow_latency=0.001)
+    limiter = RateLimiter(robots_fetcher=None, rate=rate_limiter.MAX_RATE)
+    crawler = RateLimitedCrawler(ThrottlingCrawler(site), limiter)
+
+    await collect_internal_urls(crawler, site.url(0), 5)
+
+    stats = limiter.snapshot()[site.domain]
+    assert stats["requests"] == crawler.requests
+    assert stats["throttled"] == 2
+    assert stats["error_rate"] > 0
+    assert stats["rate"] < rate_limiter.MAX_RATE
@@ -0,0 +1,140 @@
+import os
+import sys
+import json
+import asyncio
+import pytest
+from starlette.testclient import TestClient
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+from Crawlscraper import run_scrape
+from crawl_state import CrawlState, QUEUED, VISITED, COMPLETED
+from offload import CPUOffloader
+from rate_limiter import RateLimiter, MAX_RATE
+from output_sink import OutputSink, iter_records
+from storage import get_store
+from benchmarks.mock_site import MockSite, MockCrawler
+
+
+class StoppingCrawler(MockCrawler):
+    """MockCrawler that calls stop() once it has fetched stop_after pages"""
+
+    def __init__(self, site, stop_after: int, stop):
+        super().__init__(site)
+        self.stop_after = stop_after
+        self.stop = stop
+
+    async def arun(self, url, config=None, session_id=None, **kwargs):
+        res = await super().arun(url, config, session_id=session_id, **kwargs)
+        if self.requests == self.stop_after:
+            self.stop()
+        return res
+
+
+async def scrape(site, job_id, crawler, **options):
+    await run_scrape(
+        site.url(0), job_id, crawler=crawler, offloader=CPUOffloader(workers=0),
+        max_concurrent=5, http_first=False, discovery="links",
+        rate_limiter=RateLimiter(robots_fetcher=None, rate=MAX_RATE), **options,
+    )
+
+
+def test_crawl_state_checkpoints_and_reloads(workdir):
+    state = CrawlState("job", "https://a.nl", flush_every=3)
+    state.queue("https://a.nl")
+    state.queue("https://a.nl/b")
+    state.visit("https://a.nl")
+    state.queue("https://a.nl")  # States never move back
+    assert dict(state.urls.items()) == {"https://a.nl": VISITED, "https://a.nl/b": QUEUED}
+    assert not state.flush_due()
+    state.queue("https://a.nl/c")
+    assert state.flush_due()
+    state.complete("https://a.nl")
+    state.options = {"pipelined": True}
+    state.flush({"done": 1})
+
+    loaded = CrawlState("job", "https://a.nl").load()
+    assert loaded.resumed
+    assert dict(loaded.urls.items()) == {"https://a.nl": COMPLETED, "https://a.nl/b": QUEUED, "https://a.nl/c": QUEUED}
+    assert loaded.unfinished() == ["https://a.nl/b", "https://a.nl/c"]
+    assert loaded.unfinished(VISITED) == ["https://a.nl/b", "https://a.nl/c"]
+    assert (loaded.options, loaded.counters) == ({"pipelined": True}, {"done": 1})
+
+    loaded.clear()
+    assert not CrawlState("job", "https://a.nl").load().resumed
+
+
+def test_restore_drops_records_after_the_checkpoint(workdir):
+    sink = OutputSink("out", compression="gzip")
+    for name in ("a", "b", "c"):
+        sink.write("a.nl", {"url": f"https://a.nl/{name}"})
+    sink.sync()  # The job dies here; only a and b were checkpointed
+
+    resumed = OutputSink("out", compression="gzip")
+    assert resumed.restore("a.nl", {"https://a.nl/a", "https://a.nl/b"}) == 2
+    resumed.write("a.nl", {"url": "https://a.nl/c"})
+    resumed.finalize()
+    assert [r["url"] for r in iter_records("out", "a.nl")] == [f"https://a.nl/{n}" for n in "abc"]
+    assert sorted(os.listdir("out")) == ["a.nl.json", "a.nl.ndjson.gz"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("pipelined", [True, False])
+async def test_stopped_job_resumes_where_it_left_off(workdir, pipelined):
+    site = MockSite(pages=30, fast_latency=0.001, slow_latency=0.003)
+    task = None
+    stopping = StoppingCrawler(site, 12, lambda: task.cancel())
+    task = asyncio.create_task(scrape(site, "job", stopping, pipelined=pipelined))
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    checkpoint = get_store().get_crawl_checkpoint("job")
+    assert checkpoint["options"]["pipelined"] is pipelined
+    assert get_store().load_crawl_urls("job")
+
+    crawler = MockCrawler(site)
+    await scrape(site, "job", crawler, resume=True)
+
+    # Only pages in flight at the stop are fetched twice
+    fetched = stopping.requests + crawler.requests
+    fetches_needed = site.pages if pipelined else 2 * site.pages - 1
+    assert fetches_needed <= fetched <= fetches_needed + 5
+
+    out_dir = os.path.join("output", os.listdir("output")[0])
+    with open(os.path.join(out_dir, f"{site.domain}.json"), "r", encoding="utf-8") as f:
+        urls = [item["url"] for item in json.load(f)]
+    assert sorted(urls) == sorted(site.all_urls() - {site.url(0)})
+
+    job = get_store().get_job("job")
+    assert job["status"] == "done"
+    assert job["done"] == job["total"] == job["success"] == site.pages - 1
+    assert get_store().get_crawl_checkpoint("job") is None
+
+
+@pytest.mark.asyncio
+async def test_resume_without_checkpoint_fails(workdir):
+    with pytest.raises(ValueError):
+        await scrape(MockSite(pages=5), "unknown", MockCrawler(MockSite(pages=5)), resume=True)
+
+
+def test_resume_endpoint(workdir, monkeypatch):
+    import main
+
+    submitted = []
+    monkeypatch.setattr(main, "store", get_store())  # main opened the store of an earlier test
+    monkeypatch.setattr(main.scheduler, "submit", lambda url, job_id, **options: submitted.append((url, job_id, options)))
+    client = TestClient(main.app)
+    assert client.post("/resume-scrape/nope").status_code == 404
+
+    get_store().save_job("job", url="https://a.nl", status="stopped")
+    assert client.post("/resume-scrape/job").status_code == 400
+
+    state = CrawlState("job", "https://a.nl")
+    state.queue("https://a.nl")
+    state.flush()
+    assert client.post("/resume-scrape/job").json() == {"job_id": "job", "url": "https://a.nl"}
+    assert submitted == [("https://a.nl", "job", {"resume": True})]
@@ -0,0 +1,122 @@
+import os
+import sys
+import socket
+import random
+import asyncio
+import pytest
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+from Crawlscraper import run_scrape
+from retry import RetryQueue, classify, retry_after
+from offload import CPUOffloader
+from rate_limiter import MAX_RATE, RateLimiter
+from storage import get_store
+from benchmarks.mock_site import MockSite, MockCrawler, MockResult
+
+
+class FlakyCrawler(MockCrawler):
+    """MockCrawler that first fails some pages as planned"""
+
+    def __init__(self, site, plan):
+        super().__init__(site)
+        self.plan = {url: list(outcomes) for url, outcomes in plan.items()}  # url -> failures to serve first
+
+    async def arun(self, url, config=None, session_id=None, **kwargs):
+        outcomes = self.plan.get(url)
+        if outcomes:
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            status, headers = outcome
+            return MockResult(url, "", "", status_code=status, response_headers=headers)
+        return await super().arun(url, config, session_id, **kwargs)
+
+
+class Failed:
+    """crawl4ai result of a failed navigation"""
+    success = False
+    status_code = None
+
+    def __init__(self, error_message):
+        self.error_message = error_message
+
+
+def test_classify_failures():
+    assert classify(asyncio.TimeoutError()) == "timeout"
+    assert classify(RuntimeError("Page.goto: Timeout 30000ms exceeded")) == "timeout"
+    assert classify(socket.gaierror("Name or service not known")) == "dns"
+    assert classify(Failed("net::ERR_NAME_NOT_RESOLVED at https://a.nl")) == "dns"
+    assert classify(Failed("Page.goto: Target page, context or browser has been closed")) == "render_crash"
+    assert classify(MockResult("u", "", "", status_code=503)) == "server_error"
+    assert classify(MockResult("u", "", "", status_code=429)) == "throttled"
+    # Not transient, or no failure at all
+    assert classify(MockResult("u", "", "", status_code=404)) is None
+    assert classify(ValueError("bad page")) is None
+    assert classify(MockResult("u", "<p>ok</p>", "ok")) is None
+
+    assert retry_after(MockResult("u", "", "", 429, {"Retry-After": "7"})) == 7.0
+    assert retry_after(MockResult("u", "", "", 503, {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+    assert retry_after(MockResult("u", "", "", 503)) is None
+
+
+def test_backoff_is_jittered_and_capped():
+    retries = RetryQueue(base_delay=1.0, max_delay=8.0, rng=random.Random(1))
+    for attempt, backoff in ((1, 1.0), (2, 2.0), (3, 4.0), (6, 8.0)):
+        delays = {retries.delay(attempt) for _ in range(20)}
+        assert len(delays) > 1 and all(backoff / 2 <= d <= backoff for d in delays)
+    # Retry-After is honoured, up to max_delay
+    assert retries.delay(1, server_delay=5.0) == 5.0
+    assert retries.delay(1, server_delay=60.0) == 8.0
+
+
+@pytest.mark.asyncio
+async def test_retries_are_delayed_and_capped():
+    released = []
+    retries = RetryQueue(released.append, attempts=3, base_delay=0.02, max_delay=0.05)
+    timeout = asyncio.TimeoutError()
+
+    assert retries.retry("a", timeout) and retries.retry("b", timeout)
+    assert len(retries) == 2 and released == []  # Waiting without blocking the caller
+    await retries.wait()
+    await asyncio.sleep(0.05)
+    assert sorted(released) == ["a", "b"] and not retries
+
+    assert not retries.retry("a", MockResult("a", "<p>ok</p>", "ok"))  # Recovered
+    assert retries.retry("b", timeout)
+    await asyncio.sleep(0.1)
+    assert not retries.retry("b", timeout)  # Third failure: given up
+    assert not retries.retry("c", MockResult("c", "", "", status_code=404))  # Not retried, not counted
+    assert retries.counters() == {"retried": 3, "recovered": 1, "abandoned": 1}
+    assert retries.snapshot()["classes"] == {"timeout": 4}
+
+    retries.retry("d", timeout)
+    assert retries.close() == ["d"] and not retries
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("pipelined", [True, False])
+async def test_run_scrape_retries_transient_failures(workdir, pipelined):
+    site = MockSite(pages=20, fast_latency=0.001, slow_latency=0.005)
+    crawler = FlakyCrawler(site, {
+        site.url(12): [asyncio.TimeoutError()],                 # Recovered
+        site.url(13): [(503, {})] * 3,                          # Abandoned after 3 attempts
+        site.url(14): [(429, {"Retry-After": "0"})],            # Recovered
+        site.url(15): [(404, {})],                              # Not transient
+    })
+    await run_scrape(
+        site.url(0), "flaky", pipelined=pipelined, crawler=crawler, offloader=CPUOffloader(workers=0),
+        http_first=False, rate_limiter=RateLimiter(robots_fetcher=None, rate=MAX_RATE), discovery="links",
+        retries=RetryQueue(attempts=3, base_delay=0.01, max_delay=0.02),
+    )
+
+    job = get_store().get_job("flaky")
+    assert job["status"] == "done"
+    assert (job["retried"], job["recovered"], job["abandoned"]) == (4, 2, 1)
+    # In two passes the failures hit discovery, and extraction fetches the pages again
+    assert job["failed"] == (2 if pipelined else 0)
+    assert job["success"] == job["total"] - job["failed"] == site.pages - 1 - job["failed"]
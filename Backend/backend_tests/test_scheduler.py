@@ -0,0 +1,149 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+from scheduler import BudgetedCrawler, JobScheduler
+from storage import get_store
+from benchmarks.mock_site import MockSite, MockCrawler
+
+
+class Tracker:
+    """Records the peak number of open browsers and pages in flight"""
+
+    def __init__(self, site):
+        self.site = site
+        self.lock = threading.Lock()
+        self.browsers = self.pages = 0
+        self.peak_browsers = self.peak_pages = 0
+
+    @asynccontextmanager
+    async def browser(self):
+        with self.lock:
+            self.browsers += 1
+            self.peak_browsers = max(self.peak_browsers, self.browsers)
+        try:
+            yield TrackedCrawler(self)
+        finally:
+            with self.lock:
+                self.browsers -= 1
+
+
+class TrackedCrawler(MockCrawler):
+    def __init__(self, tracker):
+        super().__init__(tracker.site)
+        self.tracker = tracker
+
+    async def arun(self, url, config=None, session_id=None, **kwargs):
+        t = self.tracker
+        with t.lock:
+            t.pages += 1
+            t.peak_pages = max(t.peak_pages, t.pages)
+        try:
+            return await super().arun(url, config, session_id, **kwargs)
+        finally:
+            with t.lock:
+                t.pages -= 1
+
+
+async def mock_runner(url, job_id, crawler, offloader, max_concurrent, rate_limiter=None, page_budget=None, **options):
+    """Crawl the mock site through the budgeted crawler, like run_scrape"""
+    from Crawlscraper import collect_internal_urls
+    from utils import log_progress
+    progress_file = os.path.join("progress", f"{job_id}.json")
+    log_progress(progress_file, 0, "starting", url=url)
+    await collect_internal_urls(BudgetedCrawler(crawler, page_budget), url, max_concurrent, progress_file)
+    log_progress(progress_file, 100, "done", url=url)
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_jobs_respect_the_global_budgets(workdir):
+    """Many jobs never exceed the browser and page budgets"""
+    site = MockSite(pages=30, fast_latency=0.005, slow_latency=0.02)
+    tracker = Tracker(site)
+    scheduler = JobScheduler(
+        max_jobs=3, browser_budget=2, page_budget=4,
+        runner=mock_runner, browser_factory=tracker.browser,
+    )
+    job_ids = [f"job{i}" for i in range(6)]
+    try:
+        for job_id in job_ids:
+            scheduler.submit(site.url(0), job_id)
+        store = get_store()
+        assert wait_for(lambda: all(store.get_job(j)["status"] == "done" for j in job_ids))
+    finally:
+        scheduler.shutdown()
+
+    assert tracker.peak_browsers == 2
+    assert tracker.peak_pages == 4
+
+
+def test_queued_and_running_states(workdir):
+    """Jobs wait as "queued" until a worker is free"""
+    release = threading.Event()
+
+    async def blocking_runner(url, job_id, crawler, offloader, max_concurrent, rate_limiter=None, **options):
+        get_store().save_job(job_id, url=url, status="scraping")
+        while not release.is_set():
+            await asyncio.sleep(0.01)
+        get_store().save_job(job_id, url=url, status="done")
+
+    @asynccontextmanager
+    async def no_browser():
+        yield None
+
+    scheduler = JobScheduler(max_jobs=1, runner=blocking_runner, browser_factory=no_browser)
+    try:
+        scheduler.submit("https://a.nl", "first")
+        scheduler.submit("https://b.nl", "second")
+        assert wait_for(lambda: scheduler.state("first") == "running")
+        assert scheduler.state("second") == "queued"
+        assert get_store().get_job("second")["status"] == "queued"
+        assert scheduler.snapshot()["queued"] == 1
+
+        release.set()
+        assert wait_for(lambda: get_store().get_job("second")["status"] == "done")
+        assert scheduler.state("first") is None
+    finally:
+        scheduler.shutdown()
+
+
+def test_cancel_queued_and_running_jobs(workdir):
+    async def endless_runner(url, job_id, crawler, offloader, max_concurrent, rate_limiter=None, **options):
+        get_store().save_job(job_id, url=url, status="scraping")
+        await asyncio.sleep(3600)
+
+    @asynccontextmanager
+    async def no_browser():
+        yield None
+
+    scheduler = JobScheduler(max_jobs=1, runner=endless_runner, browser_factory=no_browser)
+    try:
+        scheduler.submit("https://a.nl", "running")
+        scheduler.submit("https://b.nl", "waiting")
+        assert wait_for(lambda: scheduler.state("running") == "running")
+
+        assert sorted(scheduler.stop_all()) == ["running", "waiting"]
+        store = get_store()
+        assert wait_for(lambda: store.get_job("running")["status"] == "stopped")
+        assert store.get_job("waiting")["status"] == "stopped"
+        assert wait_for(lambda: scheduler.snapshot()["running"] == 0)
+        assert scheduler.cancel("unknown") is False
+    finally:
+        scheduler.shutdown()
@@ -0,0 +1,84 @@
+import os
+import sys
+import httpx
+import pytest
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+from Crawlscraper import crawl_site, discover_urls, collect_internal_urls
+from sitemap import robots_sitemaps, find_sitemaps, sitemap_page_urls
+from storage import get_store
+from http_client import make_client
+from benchmarks.mock_site import MockSite, MockCrawler
+
+
+def test_robots_sitemaps():
+    robots = "User-agent: *\nDisallow: /admin\nSitemap: https://a.nl/s1.xml\nSitemap: https://a.nl/s2.xml.gz\n"
+    assert robots_sitemaps(robots) == ["https://a.nl/s1.xml", "https://a.nl/s2.xml.gz"]
+    assert robots_sitemaps("User-agent: *\nDisallow:") == []
+    assert robots_sitemaps(None) == []
+
+
+@pytest.mark.asyncio
+async def test_find_sitemaps_falls_back_to_sitemap_xml():
+    transport = httpx.MockTransport(lambda request: httpx.Response(404))
+    async with make_client(transport=transport) as client:
+        assert await find_sitemaps(client, "https://a.nl/zorg") == ["https://a.nl/sitemap.xml"]
+
+
+@pytest.mark.asyncio
+async def test_sitemap_page_urls_reads_index_and_gzip():
+    site = MockSite(pages=50)
+    async with make_client(transport=site.http_transport(per_file=20)) as client:
+        urls = [url async for url in sitemap_page_urls(client, site.url(0))]
+    assert sorted(urls) == sorted(site.all_urls())
+
+
+@pytest.mark.asyncio
+async def test_sitemap_discovery_renders_no_pages(workdir):
+    site = MockSite(pages=50, fast_latency=0.001, slow_latency=0.001)
+    crawler = MockCrawler(site)
+    async with make_client(transport=site.http_transport()) as client:
+        urls = await discover_urls(crawler, site.url(0), 5, discovery="sitemap", http_client=client)
+    assert urls == site.all_urls() - {site.url(0)}
+    assert crawler.requests == 0
+
+
+@pytest.mark.asyncio
+async def test_sitemap_discovery_without_sitemap_follows_links(workdir):
+    site = MockSite(pages=30, fast_latency=0.001, slow_latency=0.001)
+    transport = httpx.MockTransport(lambda request: httpx.Response(404))
+    async with make_client(transport=transport) as client:
+        urls = await discover_urls(
+            MockCrawler(site), site.url(0), 5, discovery="sitemap", http_client=client
+        )
+    assert urls == await collect_internal_urls(MockCrawler(site), site.url(0), 5)
+
+
+@pytest.mark.asyncio
+async def test_crawl_site_fills_sitemap_gaps_with_links(workdir):
+    """Pages missing from the sitemap are still found, every page renders once"""
+    site = MockSite(pages=60, fast_latency=0.001, slow_latency=0.001)
+    links_mode = await crawl_site(MockCrawler(site), site.url(0), 5, os.path.join("progress", "a.json"))
+
+    crawler = MockCrawler(site)
+    async with make_client(transport=site.http_transport(coverage=0.6, per_file=10)) as client:
+        sitemap_mode = await crawl_site(
+            crawler, site.url(0), 5, os.path.join("progress", "b.json"),
+            http_client=client, discovery="sitemap",
+        )
+    assert sitemap_mode == links_mode
+    assert crawler.requests == site.pages
+
+
+def test_discovery_strategy_per_website(workdir):
+    store = get_store()
+    website = store.add_website("https://a.nl")
+    assert website["discovery"] == "links"
+    assert store.set_website_discovery(website["id"], "sitemap")["discovery"] == "sitemap"
+    assert store.get_website_by_url("https://a.nl/")["discovery"] == "sitemap"
+    assert store.set_website_discovery(99, "sitemap") is None
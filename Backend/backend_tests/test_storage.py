@@ -0,0 +1,214 @@
+import os
+import sys
+import json
+import sqlite3
+import random
+import multiprocessing
+import pytest
+from fastapi.testclient import TestClient
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+from storage import Store, get_store, migrate_json
+from utils import log_progress
+
+
+def test_database_uses_wal_mode(isolated_store):
+    """The store must run in WAL mode so readers never block writers"""
+    mode = get_store().connection().execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "wal"
+
+
+def test_website_crud():
+    """Websites can be added, found without trailing slash and removed"""
+    store = get_store()
+    created = store.add_website("https://www.goudawijzer.nl")
+    assert created["id"] == 1
+    assert store.get_website_by_url("https://www.goudawijzer.nl/")["id"] == 1
+
+    with pytest.raises(sqlite3.IntegrityError):
+        store.add_website("https://www.goudawijzer.nl")
+
+    assert store.delete_website(1)["url"] == "https://www.goudawijzer.nl"
+    assert store.delete_website(1) is None
+    assert store.list_websites() == []
+
+
+def test_log_progress_writes_job_row():
+    """log_progress stores one row per job, keyed by the progress file name"""
+    log_progress(os.path.join("progress", "abc.json"), 10, "discovering", url="https://a.nl")
+    log_progress(os.path.join("progress", "abc.json"), 90, "scraping", 9, 10, 8, 1, url="https://a.nl")
+
+    job = get_store().get_job("abc")
+    assert job["status"] == "scraping"
+    assert (job["done"], job["total"], job["success"], job["failed"]) == (9, 10, 8, 1)
+    assert len(get_store().list_jobs()) == 1
+
+
+def test_stats_only_counts_registered_websites():
+    """Stats aggregate jobs of registered websites only"""
+    store = get_store()
+    store.add_website("https://a.nl")
+    store.save_job("j1", url="https://a.nl/", status="done", success=8, failed=2)
+    store.save_job("j2", url="https://a.nl", status="scraping", success=1, failed=1)
+    store.save_job("j3", url="https://a.nl", status="error: boom", success=5, failed=5)
+    store.save_job("j4", url="https://unknown.nl", status="done", success=100)
+
+    stats = store.stats()
+    assert stats["total"] == 1
+    assert stats["completed"] == 1
+    assert stats["active"] == 1
+    assert stats["success"] == 9
+    assert stats["failed"] == 3
+
+
+def test_stats_uses_index(isolated_store):
+    """The aggregate join must be served by the (site, status) index"""
+    plan = get_store().connection().execute(
+        "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM websites w JOIN jobs j ON j.site = w.site"
+    ).fetchall()
+    assert any("idx_jobs_site_status" in row[-1] for row in plan)
+
+
+def _scanned_counts(store):
+    rows = store.connection().execute(
+        "SELECT site, status, COUNT(*), SUM(success), SUM(failed) FROM jobs GROUP BY site, status"
+    )
+    return sorted(tuple(row) for row in rows)
+
+
+def test_job_counts_follow_every_change():
+    """The running totals always equal a full scan of the jobs"""
+    store = get_store()
+    rng = random.Random(3)
+    statuses = ["queued", "scraping", "done", "stopped", "error: boom"]
+    for step in range(300):
+        job_id = f"j{rng.randrange(40)}"
+        action = rng.random()
+        if action < 0.7:
+            store.save_job(
+                job_id, url=rng.choice(["https://a.nl", "https://b.nl/"]), status=rng.choice(statuses),
+                success=rng.randrange(10), failed=rng.randrange(3),
+            )
+        elif action < 0.85:
+            store.set_job_status(job_id, rng.choice(statuses))
+        else:
+            store.delete_job(job_id)
+    counted = store.connection().execute("SELECT site, status, jobs, success, failed FROM job_counts")
+    assert sorted(tuple(row) for row in counted) == _scanned_counts(store)
+    assert sum(store.job_counts().values()) == len(store.list_jobs())
+
+
+def test_job_counts_are_built_for_older_databases(isolated_store):
+    """A database from before job_counts gets its totals on first open"""
+    store = Store(isolated_store)
+    store.save_job("j1", url="https://a.nl", status="done", success=4)
+    store.save_job("j2", url="https://a.nl", status="done", success=6)
+    conn = store.connection()
+    conn.execute("DELETE FROM job_counts")
+    conn.execute("DELETE FROM meta WHERE key = 'job_counts'")
+
+    reopened = Store(isolated_store)
+    assert reopened.job_counts() == {"done": 2}
+    store.add_website("https://a.nl")
+    assert reopened.stats()["success"] == 10
+
+
+def test_list_jobs_filters_and_pages():
+    """Jobs can be filtered by status group and website and read page by page"""
+    store = get_store()
+    for i, status in enumerate(["done", "scraping", "error: boom", "queued", "done", "stopped"]):
+        url = "https://a.nl" if i % 2 == 0 else "https://b.nl"
+        store.save_job(f"j{i}", url=url, status=status, timestamp=f"2024-01-0{i + 1}T00:00:00")
+
+    assert [j["job_id"] for j in store.list_jobs(["active"])] == ["j1", "j3"]
+    assert [j["job_id"] for j in store.list_jobs(["error", "stopped"])] == ["j2", "j5"]
+    assert [j["job_id"] for j in store.list_jobs(site="https://a.nl/")] == ["j0", "j2", "j4"]
+    assert [j["job_id"] for j in store.list_jobs(newest_first=True, limit=2, offset=1)] == ["j4", "j3"]
+    assert store.job_counts(["done", "error"], "https://a.nl") == {"done": 2, "error: boom": 1}
+
+
+def test_activity_endpoint_pages_and_filters(tmp_path, monkeypatch):
+    """/activity returns one page plus totals that cover all matching jobs"""
+    import main
+
+    # A database of its own: importing main migrates the legacy progress files
+    store = get_store(str(tmp_path / "activity.db"))
+    monkeypatch.setattr(main, "store", store)
+    for i in range(25):
+        store.save_job(
+            f"j{i:02d}", url="https://a.nl", status="done" if i % 5 else f"error: {i}",
+            timestamp=f"2024-01-01T00:00:{i:02d}",
+        )
+    client = TestClient(main.app)
+
+    page = client.get("/activity", params={"limit": 10, "offset": 10}).json()
+    assert [e["job_id"] for e in page["entries"]] == [f"j{i:02d}" for i in range(14, 4, -1)]
+    assert page["total"] == 25
+    assert page["counts"] == {"done": 20, "error": 5}
+
+    errors = client.get("/activity", params={"status": "error", "order": "oldest"}).json()
+    assert errors["total"] == 5 and errors["entries"][0]["job_id"] == "j00"
+    assert client.get("/activity", params={"url": "https://b.nl"}).json()["total"] == 0
+    assert client.get("/activity", params={"limit": 0}).status_code == 422
+
+
+def test_migrate_json_imports_legacy_files(tmp_path):
+    """The migration imports websites, hashes and progress files once"""
+    source = tmp_path / "legacy"
+    (source / "progress").mkdir(parents=True)
+    (source / "websites.json").write_text(json.dumps([
+        {"id": 1, "url": "https://www.goudawijzer.nl"},
+        {"id": 2, "url": "https://www.welthuis.nl"},
+    ]))
+    (source / "hashes.json").write_text(json.dumps({
+        "www.welthuis.nl": {"https://www.welthuis.nl/a": {"hash": "h", "timestamp": "t"}},
+    }))
+    (source / "progress" / "job-1.json").write_text(json.dumps({
+        "progress": 100, "status": "done", "done": 9, "total": 9,
+        "success": 9, "failed": 0, "url": "https://www.welthuis.nl",
+        "timestamp": "2025-06-25T19:38:28.408079",
+    }))
+    (source / "progress" / "broken.json").write_text("{ invalid")
+
+    store = get_store()
+    counts = migrate_json(store, str(source))
+    assert counts == {"websites": 2, "jobs": 1, "hashes": 1}
+    assert [w["id"] for w in store.list_websites()] == [1, 2]
+    assert store.get_job("job-1")["success"] == 9
+    assert store.load_hashes()["www.welthuis.nl"]["https://www.welthuis.nl/a"]["hash"] == "h"
+    assert store.get_meta("json_migrated") is not None
+
+    # Running the migration again does not duplicate anything
+    assert migrate_json(store, str(source))["websites"] == 0
+    assert len(store.list_jobs()) == 1
+
+
+def _write_jobs(db_path, prefix, count):
+    store = Store(db_path)
+    for i in range(count):
+        store.save_job(f"{prefix}-{i % 5}", url="https://a.nl", status="scraping", done=i)
+        store.save_hashes({"a.nl": {f"https://a.nl/{prefix}/{i}": {"hash": "h", "timestamp": "t"}}})
+
+
+def test_concurrent_processes_do_not_lose_rows(isolated_store):
+    """Several scraper processes can write at the same time"""
+    Store(isolated_store)
+    ctx = multiprocessing.get_context("spawn")
+    procs = [
+        ctx.Process(target=_write_jobs, args=(isolated_store, f"p{n}", 50))
+        for n in range(3)
+    ]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join(60)
+        assert proc.exitcode == 0
+
+    store = Store(isolated_store)
+    assert len(store.list_jobs()) == 15
+    assert len(store.load_hashes()["a.nl"]) == 150
@@ -0,0 +1,100 @@
+import os
+import sys
+import json
+import pytest
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+import url_store
+from Crawlscraper import crawl_site
+from crawl_state import CrawlState
+from url_store import URLStore, BloomFilter, QUEUED, VISITED, COMPLETED
+from storage import get_store
+from benchmarks.mock_site import MockSite, MockCrawler
+
+
+URLS = [
+    "https://a.nl",
+    "https://a.nl/",
+    "https://a.nl/zorg/thuiszorg",
+    "https://a.nl/zorg/thuiszorg/",
+    "https://a.nl/zoek?q=a/b&page=2",
+    "https://a.nl/agenda#12/3",
+    "https://a.nl/wijk/café-zuid",
+    "http://b.nl/zorg/thuiszorg",
+]
+
+
+def test_keys_round_trip_and_share_prefixes():
+    store = URLStore()
+    keys = [store.add(url) for url in URLS]
+    assert len(set(keys)) == len(URLS)
+    assert [store.url(key) for key in keys] == URLS
+    assert list(store) == URLS
+    # The path prefix is stored once, the key only holds the last segment
+    assert store.key("https://a.nl/zorg/wijkverpleging").endswith(b"wijkverpleging")
+    assert len(store.key("https://a.nl/zorg/wijkverpleging")) == 1 + len("wijkverpleging")
+
+    # Many prefixes still give unique, decodable keys
+    for i in range(300):
+        key = store.add(f"https://a.nl/p{i}/x")
+        assert store.url(key) == f"https://a.nl/p{i}/x"
+
+
+def test_states_only_move_forward():
+    store = URLStore()
+    assert store.add("https://a.nl/x") is not None
+    assert store.add("https://a.nl/x") is None
+    assert store.mark("https://a.nl/x", COMPLETED) is not None
+    assert store.mark("https://a.nl/x", VISITED) is None
+    assert store.get("https://a.nl/x") == COMPLETED
+    assert store.get("https://a.nl/y") is None and "https://a.nl/y" not in store
+    store.forget("https://a.nl/x")  # Without a filter URLs stay
+    assert dict(store.items()) == {"https://a.nl/x": COMPLETED}
+
+
+def test_forgotten_urls_stay_seen():
+    store = URLStore(BloomFilter(capacity=1000, fp_rate=0.001))
+    for i in range(100):
+        store.add(f"https://a.nl/p/{i}")
+    for i in range(90):
+        store.forget(f"https://a.nl/p/{i}")
+    assert len(store) == 100 and store.forgotten == 90
+    assert list(store) == [f"https://a.nl/p/{i}" for i in range(90, 100)]
+    assert store.get("https://a.nl/p/5") == COMPLETED
+    assert store.add("https://a.nl/p/5") is None
+    assert store.mark("https://a.nl/p/5", QUEUED) is None
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(capacity=20000, fp_rate=0.01)
+    for i in range(20000):
+        bloom.add(f"https://a.nl/in/{i}")
+    assert all(f"https://a.nl/in/{i}" in bloom for i in range(20000))
+    false_positives = sum(f"https://a.nl/out/{i}" in bloom for i in range(20000))
+    assert false_positives / 20000 < 0.02
+    assert bloom.nbytes() < 1.3 * 20000
+    with pytest.raises(ValueError):
+        BloomFilter(fp_rate=0)
+
+
+@pytest.mark.asyncio
+async def test_crawl_with_seen_filter_drops_completed_urls(workdir, monkeypatch):
+    monkeypatch.setattr("crawl_state.make_url_store", lambda: url_store.make_url_store(0.0001, 1000))
+    site = MockSite(pages=40, fast_latency=0.001, slow_latency=0.001)
+    state = CrawlState("job", site.url(0), flush_every=5)
+    crawler = MockCrawler(site)
+
+    await crawl_site(crawler, site.url(0), 5, os.path.join("progress", "job.json"), state=state)
+
+    assert crawler.requests == site.pages
+    assert state.urls.forgotten >= site.pages - 5
+    assert len(state.known()) == site.pages
+    out_dir = os.path.join("output", os.listdir("output")[0])
+    with open(os.path.join(out_dir, f"{site.domain}.json"), "r", encoding="utf-8") as f:
+        assert sorted(item["url"] for item in json.load(f)) == sorted(site.all_urls() - {site.url(0)})
+    assert get_store().get_job("job")["total"] == site.pages - 1
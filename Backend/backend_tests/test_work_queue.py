@@ -0,0 +1,275 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import multiprocessing
+import pytest
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+
+from Crawlscraper import run_worker
+from offload import CPUOffloader
+from rate_limiter import MAX_RATE, RateLimiter
+from storage import get_store
+from work_queue import LocalWorkQueue, SQLiteWorkQueue, WorkQueue, aggregate_reports
+from output_sink import OutputSink, merge_worker_output, worker_output_dir
+from benchmarks.mock_site import MockSite, MockCrawler
+
+
+@pytest.fixture(params=["local", "sqlite"])
+def queue(request):
+    return LocalWorkQueue(lease=60) if request.param == "local" else SQLiteWorkQueue(lease=60)
+
+
+def merged_files():
+    """Files in the output folder once the workers' output is merged (their folders are gone)"""
+    return sorted(os.listdir(os.path.join("output", os.listdir("output")[0])))
+
+
+def test_queue_hands_out_each_url_once(queue):
+    assert queue.open("job", "https://a.nl") == "https://a.nl"
+    assert queue.open("job", "https://b.nl") == "https://a.nl"
+    assert queue.open("unknown") is None
+
+    assert queue.add("job", ["https://a.nl/1", "https://a.nl/2", "https://a.nl/1"]) == 2
+    assert queue.add("job", ["https://a.nl/2", "https://a.nl/3"]) == 1
+    assert queue.add("job", ["https://a.nl/3", "https://a.nl/4"], completed=True) == 1
+
+    first = queue.claim("job", "w1", 2)
+    second = queue.claim("job", "w2", 2)
+    assert sorted(first + second) == ["https://a.nl/1", "https://a.nl/2", "https://a.nl/3"]
+    assert queue.counts("job") == {"queued": 0, "leased": 3, "completed": 1}
+    assert queue.complete("job", "w2", first) == 0  # Not leased to w2
+    assert queue.complete("job", "w1", first) == len(first)
+    assert queue.counts("job") == {"queued": 0, "leased": len(second), "completed": 1 + len(first)}
+    assert queue.jobs() == [("job", "https://a.nl")]
+
+    assert queue.finish("job") and not queue.finish("job")
+    assert queue.jobs() == []
+    queue.delete("job")
+    assert queue.open("job") is None
+
+
+def test_expired_leases_are_handed_out_again(queue):
+    queue.lease = 0
+    queue.open("job", "https://a.nl")
+    queue.add("job", ["https://a.nl/1"])
+    assert queue.claim("job", "dead", 5) == ["https://a.nl/1"]
+    assert queue.claim("job", "alive", 5) == ["https://a.nl/1"]
+    # The first worker lost the URL: it can neither renew nor complete it
+    assert queue.extend("job", "dead", ["https://a.nl/1"]) == 0
+    assert queue.complete("job", "dead", ["https://a.nl/1"]) == 0
+    assert queue.complete("job", "alive", ["https://a.nl/1"]) == 1
+
+
+def test_extended_leases_are_kept(queue):
+    queue.lease = 0.05
+    queue.open("job", "https://a.nl")
+    queue.add("job", ["https://a.nl/1"])
+    assert queue.claim("job", "slow", 5) == ["https://a.nl/1"]
+    queue.lease = 60
+    assert queue.extend("job", "slow", ["https://a.nl/1"]) == 1
+    time.sleep(0.1)  # Past the first lease
+    assert queue.claim("job", "other", 5) == []
+    assert queue.complete("job", "slow", ["https://a.nl/1"]) == 1
+
+
+def test_deleted_and_cancelled_jobs_take_no_urls(queue):
+    queue.open("deleted", "https://a.nl")
+    queue.add("deleted", ["https://a.nl/1"])
+    queue.delete("deleted")
+    assert queue.add("deleted", ["https://a.nl/1", "https://a.nl/2"]) == 0
+    assert queue.claim("deleted", "w1", 5) == []
+
+    queue.open("stopped", "https://b.nl")
+    queue.add("stopped", ["https://b.nl/1"])
+    assert queue.cancel("stopped") and not queue.cancel("stopped")
+    assert queue.open("stopped") is None and queue.open("stopped", "https://b.nl") is None
+    assert queue.add("stopped", ["https://b.nl/2"]) == 0
+    assert queue.claim("stopped", "w1", 5) == []
+    assert queue.jobs() == []
+    assert not queue.cancel("unknown")
+
+
+def test_backends_implement_the_whole_interface():
+    class Partial(WorkQueue):
+        def open(self, job_id, start_url=None):
+            return start_url
+
+    with pytest.raises(TypeError):
+        Partial()  # Fails when created, not in the middle of a crawl
+
+
+def test_reports_are_summed_per_job(queue):
+    queue.open("job", "https://a.nl")
+    queue.report("job", "w1", {"done": 3, "success": 2, "fail": 1, "state": "running"})
+    queue.report("job", "w2", {"done": 5, "success": 5, "state": "closed"})
+    queue.report("job", "w1", {"done": 4, "success": 3, "fail": 1, "state": "running"})
+    totals = aggregate_reports(queue.reports("job"))
+    assert (totals["done"], totals["success"], totals["fail"]) == (9, 8, 1)
+    assert (totals["workers"], totals["reported"]) == (1, 2)
+
+
+def test_merge_keeps_one_record_per_url(workdir):
+    out_dir = os.path.join("output", "2024-01-01")
+    for worker in ("w1", "w2"):
+        sink = OutputSink(worker_output_dir(out_dir, worker))
+        sink.write("a.nl", {"url": "https://a.nl/1", "samenvatting": worker})
+        sink.write("a.nl", {"url": f"https://a.nl/{worker}", "samenvatting": worker})
+        sink.close()
+
+    assert merge_worker_output(out_dir) == 3
+    with open(os.path.join(out_dir, "a.nl.json"), "r", encoding="utf-8") as f:
+        records = json.load(f)
+    assert sorted(r["url"] for r in records) == ["https://a.nl/1", "https://a.nl/w1", "https://a.nl/w2"]
+
+
+@pytest.mark.asyncio
+async def test_workers_share_the_crawl_of_one_site(workdir, read_output):
+    """Three workers fetch every page of the site exactly once between them"""
+    site = MockSite(pages=60, fast_latency=0.001, slow_latency=0.01)
+    crawler = MockCrawler(site)
+    queue = LocalWorkQueue()
+    queue.open("shared", site.url(0))
+    rate_limiter = RateLimiter(robots_fetcher=None, rate=MAX_RATE)
+
+    results = await asyncio.gather(*(
+        run_worker(
+            "shared", queue=queue, worker=f"w{n}", crawler=crawler, max_concurrent=4,
+            offloader=CPUOffloader(workers=0), rate_limiter=rate_limiter, poll_interval=0.01,
+        )
+        for n in range(3)
+    ))
+
+    assert crawler.requests == site.pages
+    assert all(result["done"] for result in results)
+    assert sum(result["done"] for result in results) == site.pages - 1
+    assert merged_files() == [f"{site.domain}.json", f"{site.domain}.ndjson"]
+    assert [item["url"] for item in read_output(site)] == sorted(site.all_urls() - {site.url(0)})
+
+    job = get_store().get_job("shared")
+    assert (job["status"], job["progress"]) == ("done", 100)
+    assert job["done"] == job["total"] == job["success"] == site.pages - 1
+    assert queue.jobs() == []
+
+    # A worker that joins afterwards finds nothing to do
+    late = await run_worker("shared", queue=queue, worker="late", crawler=crawler, offloader=CPUOffloader(workers=0))
+    assert late["done"] == 0 and crawler.requests == site.pages
+    assert get_store().get_job("shared")["status"] == "done"
+
+
+@pytest.mark.asyncio
+async def test_closing_workers_do_not_publish_after_done(workdir, monkeypatch):
+    import Crawlscraper
+
+    site = MockSite(pages=20, fast_latency=0.001, slow_latency=0.005)
+    crawler = MockCrawler(site)
+    queue = LocalWorkQueue()
+    events = []
+    report = queue.report
+    monkeypatch.setattr(queue, "report", lambda job_id, worker, counters: (
+        events.append(("report", counters["state"])), report(job_id, worker, counters)
+    ))
+    log_progress = Crawlscraper.log_progress
+    monkeypatch.setattr(Crawlscraper, "log_progress", lambda path, progress, status, *args, **kwargs: (
+        events.append(("progress", status)), log_progress(path, progress, status, *args, **kwargs)
+    ))
+
+    await asyncio.gather(*(
+        run_worker(
+            "closing", site.url(0), queue=queue, worker=f"w{n}", crawler=crawler, max_concurrent=4,
+            offloader=CPUOffloader(workers=0), rate_limiter=RateLimiter(robots_fetcher=None, rate=MAX_RATE),
+            poll_interval=0.01,
+        )
+        for n in range(2)
+    ))
+
+    last_closed = max(i for i, event in enumerate(events) if event == ("report", "closed"))
+    assert [event for event in events[last_closed + 1:] if event[0] == "progress"] == [("progress", "done")]
+    assert get_store().get_job("closing")["status"] == "done"
+
+
+@pytest.mark.asyncio
+async def test_workers_leave_a_deleted_job(workdir):
+    site = MockSite(pages=60, fast_latency=0.01, slow_latency=0.02)
+    crawler = MockCrawler(site)
+    queue = LocalWorkQueue()
+    worker = asyncio.create_task(run_worker(
+        "deleted", site.url(0), queue=queue, worker="w1", crawler=crawler, max_concurrent=2,
+        offloader=CPUOffloader(workers=0), rate_limiter=RateLimiter(robots_fetcher=None, rate=MAX_RATE),
+        poll_interval=0.01,
+    ))
+    while crawler.requests < 5:
+        await asyncio.sleep(0.01)
+    queue.delete("deleted")
+    get_store().delete_job("deleted")
+
+    await asyncio.wait_for(worker, 10)
+    assert crawler.requests < site.pages
+    assert get_store().get_job("deleted") is None  # Not written back by the worker
+
+
+def test_stop_scrape_cancels_distributed_jobs(monkeypatch):
+    import main
+    from fastapi.testclient import TestClient
+
+    queue = LocalWorkQueue()
+    monkeypatch.setattr(main, "store", get_store())
+    monkeypatch.setattr(main, "work_queue", queue)
+    get_store().save_job("job", url="https://a.nl", status="scraping")
+    queue.open("job", "https://a.nl")
+
+    assert TestClient(main.app).post("/stop-scrape").json() == {"stopped": ["job"]}
+    assert get_store().get_job("job")["status"] == "stopped"
+    assert queue.open("job") is None and queue.claim("job", "w1", 5) == []
+
+
+def test_activity_sums_the_workers_of_a_running_job(tmp_path, monkeypatch):
+    import main
+    from fastapi.testclient import TestClient
+
+    store = get_store(str(tmp_path / "activity.db"))  # main migrated the legacy progress files
+    queue = LocalWorkQueue()
+    monkeypatch.setattr(main, "store", store)
+    monkeypatch.setattr(main, "work_queue", queue)
+    store.save_job("job", url="https://a.nl", status="scraping", done=1)
+    queue.open("job", "https://a.nl")
+    queue.report("job", "w1", {"done": 10, "success": 9, "fail": 1, "state": "running"})
+    queue.report("job", "w2", {"done": 5, "success": 5, "state": "running"})
+
+    entry = TestClient(main.app).get("/activity").json()["entries"][0]
+    assert (entry["done"], entry["success"], entry["failed"], entry["workers"]) == (15, 14, 1, 2)
+
+
+def _worker_process(url, pages, worker):
+    site = MockSite(pages=pages, fast_latency=0.001, slow_latency=0.01)
+    asyncio.run(run_worker(
+        "processes", url, queue=SQLiteWorkQueue(), worker=worker, crawler=MockCrawler(site),
+        max_concurrent=4, offloader=CPUOffloader(workers=0),
+        rate_limiter=RateLimiter(robots_fetcher=None, rate=MAX_RATE), poll_interval=0.05,
+    ))
+
+
+def test_worker_processes_share_the_sqlite_queue(workdir, read_output):
+    """Separate worker processes crawl one site through the database"""
+    site = MockSite(pages=40)
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_worker_process, args=(site.url(0), site.pages, f"p{n}")) for n in range(2)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join(120)
+        assert proc.exitcode == 0
+
+    assert merged_files() == [f"{site.domain}.json", f"{site.domain}.ndjson"]
+    assert [item["url"] for item in read_output(site)] == sorted(site.all_urls() - {site.url(0)})
+    job = get_store().get_job("processes")
+    assert job["status"] == "done" and job["done"] == site.pages - 1
+    reports = SQLiteWorkQueue().reports("processes")
+    assert set(reports) == {"p0", "p1"}
+    assert sum(report["done"] for report in reports.values()) == site.pages - 1
@@ -0,0 +1,140 @@
+"""
+Benchmark: /stats and /activity latency with 100k historical jobs
+
+Fills a temporary database with --jobs finished and running jobs over
+--sites websites and measures p50/p99 latency of the endpoints through
+the FastAPI test client, next to the former implementations (aggregate
+join over every job, every job in one /activity response). Also reports
+how fast job progress can be written now that the job_counts triggers
+run on every change. Run from the Backend directory:
+
+    python benchmarks/bench_activity.py --jobs 100000
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+# Add the backend directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from storage import ACTIVE_STATUSES, JOB_FIELDS, get_store
+
+STATUSES = ["done"] * 80 + ["stopped"] * 10 + ["error: timeout"] * 5 + ["scraping"] * 3 + ["queued"] * 2
+
+
+def fill(store, jobs: int, sites: int, rng):
+    for i in range(sites):
+        store.add_website(f"https://site{i}.nl")
+    conn = store.connection()
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO jobs (job_id, url, site, status, progress, done, total, success, failed, timestamp) "
+        "VALUES (?, ?, ?, ?, 100, ?, ?, ?, ?, ?)",
+        (
+            (
+                f"job-{i}", f"https://site{i % sites}.nl", f"https://site{i % sites}.nl",
+                rng.choice(STATUSES), 50, 50, rng.randrange(50), rng.randrange(5),
+                f"2024-{1 + i * 12 // jobs:02d}-01T00:00:{i % 60:02d}.{i:06d}",
+            )
+            for i in range(jobs)
+        ),
+    )
+    conn.execute("COMMIT")
+
+
+def legacy_stats(store):
+    """The aggregate join /stats ran before job_counts"""
+    active_marks = ", ".join("?" for _ in ACTIVE_STATUSES)
+    return dict(store.connection().execute(
+        f"""
+        SELECT
+            (SELECT COUNT(*) FROM websites) AS total,
+            COALESCE(SUM(j.status IN ({active_marks})), 0) AS active,
+            COALESCE(SUM(j.status = 'done'), 0) AS completed,
+            COALESCE(SUM(CASE WHEN j.status IN ('done', 'stopped', 'scraping')
+                         THEN j.success ELSE 0 END), 0) AS success,
+            COALESCE(SUM(CASE WHEN j.status IN ('done', 'stopped', 'scraping')
+                         THEN j.failed ELSE 0 END), 0) AS failed
+        FROM websites w JOIN jobs j ON j.site = w.site
+        """,
+        ACTIVE_STATUSES,
+    ).fetchone())
+
+
+def legacy_activity(store):
+    """/activity before pagination: every job in one response"""
+    rows = store.connection().execute(f"SELECT {', '.join(JOB_FIELDS)} FROM jobs ORDER BY timestamp")
+    return json.dumps({"entries": [dict(row) for row in rows]})
+
+
+def latency(call, rounds: int) -> dict:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 2),
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=100_000)
+    parser.add_argument("--sites", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--legacy-rounds", type=int, default=10, help="Calls of the former implementations")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["SCRAPER_DB"] = os.path.join(tmp, "scraper.db")
+        store = get_store()
+        store.set_meta("json_migrated", "benchmark")  # keep the legacy progress files out
+        fill(store, args.jobs, args.sites, random.Random(1))
+
+        from fastapi.testclient import TestClient
+        import main as api  # imported late: opens the database named by SCRAPER_DB
+
+        client = TestClient(api.app)
+        assert client.get("/stats").json()["completed"] == legacy_stats(store)["completed"]
+        endpoints = {
+            "stats": lambda: client.get("/stats"),
+            "activity": lambda: client.get("/activity"),
+            "activity_offset_5000": lambda: client.get("/activity", params={"offset": 5000}),
+            "activity_errors": lambda: client.get("/activity", params={"status": "error", "url": "https://site7.nl"}),
+            "legacy_stats": lambda: legacy_stats(store),
+            "legacy_activity": lambda: legacy_activity(store),
+        }
+        results = {
+            name: latency(call, args.legacy_rounds if name.startswith("legacy") else args.rounds)
+            for name, call in endpoints.items()
+        }
+
+        start = time.perf_counter()
+        writes = 2000
+        for i in range(writes):
+            store.save_job(f"job-{i}", url=f"https://site{i % args.sites}.nl", status="scraping", success=i)
+        results["save_job_per_second"] = round(writes / (time.perf_counter() - start))
+
+    result = {"jobs": args.jobs, "sites": args.sites, **results}
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"{args.jobs} jobs over {args.sites} websites")
+    print(f"{'call':<22} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, value in results.items():
+        if isinstance(value, dict):
+            print(f"{name:<22} {value['p50_ms']:>9.2f} {value['p99_ms']:>9.2f}")
+    print(f"save_job: {results['save_job_per_second']} writes/s")
+
+
+if __name__ == "__main__":
+    main()
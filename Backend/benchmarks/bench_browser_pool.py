@@ -0,0 +1,99 @@
+"""
+Benchmark: job start-up time with and without the browser pool
+
+Runs a series of short jobs (a few pages each) and measures the time from
+job start to the first fetched page, once opening a browser per job (the
+previous behaviour) and once leasing from a warm BrowserPool. By default
+the browser is simulated with a fixed start-up delay; pass --real to use
+crawl4ai with a headless Chromium. Run from the Backend directory:
+
+    python benchmarks/bench_browser_pool.py --jobs 10 --startup 1.5
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+# Add the backend directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from browser_pool import BrowserPool, default_browser_factory
+from benchmarks.mock_site import MockSite, MockCrawler
+
+
+class SlowStartBrowser(MockCrawler):
+    """MockCrawler that takes `startup` seconds to launch"""
+
+    def __init__(self, site, startup):
+        super().__init__(site)
+        self.startup = startup
+
+    async def __aenter__(self):
+        await asyncio.sleep(self.startup)
+        return self
+
+
+async def measure(mode, factory, jobs, urls):
+    """Time from job start until its first page is fetched"""
+    pool = BrowserPool(size=1, factory=factory)
+    ready = []
+    for _ in range(jobs):
+        start = time.perf_counter()
+        if mode == "per-job":
+            async with factory() as crawler:
+                await crawler.arun(urls[0])
+                ready.append(time.perf_counter() - start)
+                for url in urls[1:]:
+                    await crawler.arun(url)
+        else:
+            async with pool.lease() as crawler:
+                await crawler.arun(urls[0])
+                ready.append(time.perf_counter() - start)
+                for url in urls[1:]:
+                    await crawler.arun(url)
+    stats = pool.snapshot()
+    await pool.close()
+    return {
+        "mode": mode,
+        "jobs": jobs,
+        "first_page_p50_ms": round(statistics.median(ready) * 1000, 1),
+        "first_page_max_ms": round(max(ready) * 1000, 1),
+        "pool_hit_rate": stats["hit_rate"] if mode == "pool" else None,
+        "browser_rss_mb": stats["browser_rss_mb"] if mode == "pool" else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--jobs", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=3, help="pages per job")
+    parser.add_argument("--startup", type=float, default=1.5, help="simulated browser start-up (s)")
+    parser.add_argument("--real", action="store_true", help="use crawl4ai and Chromium")
+    parser.add_argument("--url", default="https://example.com/", help="page fetched with --real")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    if args.real:
+        factory = default_browser_factory
+        urls = [args.url] * args.pages
+    else:
+        site = MockSite(pages=50, fast_latency=0.01, slow_latency=0.01)
+        factory = lambda: SlowStartBrowser(site, args.startup)
+        urls = [site.url(i) for i in range(args.pages)]
+
+    results = [asyncio.run(measure(mode, factory, args.jobs, urls)) for mode in ("per-job", "pool")]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':<8} {'first page p50 ms':>18} {'max ms':>8} {'hit rate':>9}")
+    for r in results:
+        hit_rate = "" if r["pool_hit_rate"] is None else r["pool_hit_rate"]
+        print(f"{r['mode']:<8} {r['first_page_p50_ms']:>18} {r['first_page_max_ms']:>8} {hit_rate:>9}")
+
+
+if __name__ == "__main__":
+    main()
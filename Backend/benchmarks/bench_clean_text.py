@@ -0,0 +1,97 @@
+"""
+Benchmark: clean_text throughput in documents per second
+
+Compares the former clean_text (five passes over the whole markdown,
+then keep 5 sentences) with the current one, which stops once it has
+the 5 sentences, and with clean_texts over the whole corpus. The corpus
+is generated page markdown (benchmarks/html_fixtures.page_markdown), or
+the .md files in a folder of crawled pages with --corpus. Every summary
+is checked to be identical. Run from the Backend directory:
+
+    python benchmarks/bench_clean_text.py --docs 2000
+    python benchmarks/bench_clean_text.py --corpus /path/to/markdown
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+# Add the backend directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import clean_text, clean_texts
+from benchmarks.html_fixtures import page_markdown
+
+
+def legacy_clean_text(markdown: str) -> str:
+    """clean_text before it stopped after 5 sentences"""
+    markdown = re.sub(r"(?m)^.*\|.*\|.*$", "", markdown)
+    markdown = re.sub(r"\[(.*?)\]\([^)]+\)", r"\1", markdown)
+    markdown = re.sub(r"(?m)^#+ .*$", "", markdown)
+    markdown = re.sub(r"\n{3,}", "\n\n", markdown.strip())
+    sentences = re.split(r"(?<=[.!?]) +", markdown)
+    return " ".join(sentences[:5]).strip()
+
+
+def load_corpus(folder: str = None, docs: int = 2000) -> list:
+    if folder:
+        corpus = []
+        for root, _, files in os.walk(folder):
+            for name in sorted(files):
+                if name.endswith((".md", ".markdown", ".txt")):
+                    with open(os.path.join(root, name), "r", encoding="utf-8", errors="replace") as f:
+                        corpus.append(f.read())
+        return corpus
+    return [page_markdown(seed, paragraphs=20 + seed % 200) for seed in range(docs)]
+
+
+def measure(name, run, corpus, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        summaries = run(corpus)
+        best = min(best, time.perf_counter() - start)
+    return {"variant": name, "docs": len(corpus), "seconds": round(best, 3), "docs_per_second": round(len(corpus) / best)}, summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=2000, help="Generated documents (without --corpus)")
+    parser.add_argument("--corpus", help="Folder with crawled markdown files (.md)")
+    parser.add_argument("--rounds", type=int, default=3, help="Best of this many runs")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus, args.docs)
+    if not corpus:
+        sys.exit(f"No markdown files in {args.corpus}")
+    variants = [
+        ("legacy", lambda docs: [legacy_clean_text(doc) for doc in docs]),
+        ("clean_text", lambda docs: [clean_text(doc) for doc in docs]),
+        ("clean_texts", clean_texts),
+    ]
+    results, outputs = [], []
+    for name, run in variants:
+        result, summaries = measure(name, run, corpus, args.rounds)
+        results.append(result)
+        outputs.append(summaries)
+    if any(summaries != outputs[0] for summaries in outputs):
+        sys.exit("Summaries differ from the legacy clean_text")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    mb = sum(len(doc) for doc in corpus) / 2**20
+    print(f"{len(corpus)} documents, {mb:.1f} MB of markdown; summaries identical")
+    print(f"{'variant':<12} {'seconds':>8} {'docs/s':>9} {'speedup':>8}")
+    for r in results:
+        print(
+            f"{r['variant']:<12} {r['seconds']:>8.3f} {r['docs_per_second']:>9} "
+            f"{r['docs_per_second'] / results[0]['docs_per_second']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark: URL discovery throughput with skewed page latencies
+
+Runs the lock-step batch algorithm that collect_internal_urls used before
+(gather a batch, wait for the slowest page, rebuild the batch list from the
+set) and the current worker-pool implementation against the same mock site,
+and checks that both discover the same URLs. Run from the Backend directory:
+
+    python benchmarks/bench_discovery.py --pages 500 --workers 15
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from urllib.parse import urljoin, urlparse
+from bs4 import BeautifulSoup
+
+# Add the backend directory to the path to import modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from Crawlscraper import collect_internal_urls
+from utils import is_excluded
+from benchmarks.mock_site import MockSite, MockCrawler
+
+
+async def lockstep_collect(crawler, start_url: str, batch_size: int) -> set:
+    """The previous batch-and-gather discovery loop (without progress logging)"""
+    to_visit = set([start_url])
+    visited = set()
+    discovered = set()
+    while to_visit:
+        batch = list(to_visit)[:batch_size]
+        to_visit.difference_update(batch)
+        visited.update(batch)
+        results = await asyncio.gather(
+            *[crawler.arun(url, None) for url in batch], return_exceptions=True
+        )
+        for url, res in zip(batch, results):
+            if isinstance(res, Exception) or not (res.success and res.html):
+                continue
+            soup = BeautifulSoup(res.html, "html.parser")
+            for tag in soup.find_all("a", href=True):
+                parsed = urlparse(urljoin(url, tag["href"]))
+                if parsed.netloc == urlparse(start_url).netloc:
+                    norm = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+                    if norm not in visited and norm not in to_visit and not is_excluded(norm):
+                        to_visit.add(norm)
+                        discovered.add(norm)
+    return discovered
+
+
+async def run(name, collect, site, workers):
+    crawler = MockCrawler(site)
+    start = time.perf_counter()
+    found = await collect(crawler, site.url(0), workers)
+    elapsed = time.perf_counter() - start
+    return {
+        "implementation": name,
+        "pages": crawler.requests,
+        "discovered": len(found),
+        "seconds": elapsed,
+        "pages_per_sec": crawler.requests / elapsed,
+    }, found
+
+
+async def main_async(args):
+    site = MockSite(
+        pages=args.pages, fanout=args.fanout,
+        slow_latency=args.slow_latency, slow_ratio=args.slow_ratio,
+    )
+    lockstep, lockstep_found = await run("lock-step batches", lockstep_collect, site, args.workers)
+    pool, pool_found = await run("worker pool", collect_internal_urls, site, args.workers)
+    assert lockstep_found == pool_found, "implementations discovered different URL sets"
+    return [lockstep, pool]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--fanout", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=15)
+    parser.add_argument("--slow-latency", type=float, default=0.3)
+    parser.add_argument("--slow-ratio", type=float, default=0.1)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'implementation':<20} {'pages':>6} {'found':>6} {'seconds':>8} {'pages/s':>8}")
+    for r in results:
+        print(
+            f"{r['implementation']:<20} {r['pages']:>6} {r['discovered']:>6} "
+            f"{r['seconds']:>8.2f} {r['pages_per_sec']:>8.1f}"
+        )
+    print(f"speed-up: {results[0]['seconds'] / results[1]['seconds']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
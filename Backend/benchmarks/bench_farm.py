@@ -0,0 +1,230 @@
+"""
+Benchmark: crawl throughput against a local farm of mock websites
+
+Builds --sites synthetic websites (page count, link fan-out, latency
+distribution, page size and share of JS-rendered pages are configurable)
+and serves them in-process (MockFarm): static pages to the HTTP tier
+through an httpx transport, rendered pages through a MockCrawler. The
+discovery crawl (collect_internal_urls), the extraction crawl (crawl_all)
+and full jobs (run_scrape, single pass and HTTP-first) each run over all
+websites at once, in a fresh process, so peak RSS and CPU time belong to
+that phase alone. Reports pages/s, p50/p99 page fetch latency, peak RSS,
+CPU time and the time per crawl stage (metrics.stage_seconds); store the
+--json output per commit to track regressions. Run from the Backend
+directory:
+
+    python benchmarks/bench_farm.py --sites 3 --pages 300 --js-ratio 0.2 --json
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import resource
+import tempfile
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Add the backend directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.mock_site import MockSite, MockFarm
+
+PHASES = ("collect_internal_urls", "crawl_all", "run_scrape")
+
+
+def build_farm(options: dict) -> MockFarm:
+    return MockFarm([
+        MockSite(
+            pages=options["pages"],
+            fanout=options["fanout"],
+            domain=f"site{n}.mock.local",
+            fast_latency=options["fast_latency"],
+            slow_latency=options["slow_latency"],
+            slow_ratio=options["slow_ratio"],
+            seed=42 + n,
+            js_ratio=options["js_ratio"],
+            latency_distribution=options["latency"],
+            page_kb=options["page_kb"],
+        )
+        for n in range(options["sites"])
+    ])
+
+
+def cpu_seconds() -> float:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # kilobytes on Linux
+
+
+def percentile(samples: list, fraction: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))] if samples else 0.0
+
+
+async def measure(phase: str, options: dict) -> dict:
+    # imported late: the database location is set by run_phase
+    from Crawlscraper import collect_internal_urls, crawl_all, run_scrape
+    from http_client import make_client
+    from metrics import stage_seconds
+    from offload import CPUOffloader
+    from rate_limiter import MAX_RATE, RateLimiter
+    from storage import get_store
+
+    stage_seconds.reset()  # Only this phase (a process may run several)
+    farm = build_farm(options)
+    sites = list(farm.sites.values())
+    crawler = farm.crawler()
+    concurrency = options["concurrency"]
+    offloader = CPUOffloader(workers=options["cpu_workers"])
+    # Politeness would only measure the token bucket; hosts get the maximum rate
+    rate_limiter = RateLimiter(robots_fetcher=None, rate=MAX_RATE)
+    rss_before, cpu, start = peak_rss_mb(), cpu_seconds(), time.perf_counter()
+    try:
+        async with make_client(transport=farm.http_transport()) as client:
+            if phase == "collect_internal_urls":
+                found = await asyncio.gather(*(
+                    collect_internal_urls(crawler, site.url(0), concurrency, offloader=offloader)
+                    for site in sites
+                ))
+                for site, links in zip(sites, found):
+                    assert links == site.all_urls() - {site.url(0)}, f"{site.domain}: incomplete discovery"
+            elif phase == "crawl_all":
+                await asyncio.gather(*(
+                    crawl_all(
+                        sorted(site.all_urls() - {site.url(0)}), concurrency,
+                        os.path.join("progress", f"{site.domain}.json"), site.url(0),
+                        crawler=crawler, offloader=offloader,
+                    )
+                    for site in sites
+                ))
+                jobs = [site.domain for site in sites]
+            else:
+                await asyncio.gather(*(
+                    run_scrape(
+                        site.url(0), f"bench-{site.domain}", pipelined=True, offloader=offloader,
+                        crawler=crawler, max_concurrent=concurrency, rate_limiter=rate_limiter,
+                        discovery="links", http_first=True, http_client=client,
+                    )
+                    for site in sites
+                ))
+                jobs = [f"bench-{site.domain}" for site in sites]
+            if phase != "collect_internal_urls":
+                for job_id in jobs:
+                    job = get_store().get_job(job_id)
+                    assert job["status"] == "done", f"{job_id}: {job['status']}"
+    finally:
+        offloader.close()  # Pool processes are reaped, so their CPU time counts
+    elapsed, cpu = time.perf_counter() - start, cpu_seconds() - cpu
+
+    pages = len(farm.fetched)
+    return {
+        "phase": phase,
+        "sites": len(sites),
+        "pages": pages,
+        "rendered": crawler.requests,
+        "http_fetches": farm.http_fetches,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(pages / elapsed, 1),
+        "latency_p50_ms": round(percentile(farm.latencies, 0.5) * 1000, 2),
+        "latency_p99_ms": round(percentile(farm.latencies, 0.99) * 1000, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "rss_growth_mb": round(peak_rss_mb() - rss_before, 1),
+        "cpu_seconds": round(cpu, 3),
+        "cpu_percent": round(100 * cpu / elapsed, 1),
+        # Where the time went, from the hot-path histograms (see metrics.py)
+        "stages": {
+            stage: {
+                "count": series["count"],
+                "seconds": round(series["sum"], 3),
+                "mean_ms": round(1000 * series["sum"] / series["count"], 3),
+            }
+            for stage, series in sorted(stage_seconds.snapshot().items())
+        },
+    }
+
+
+def run_phase(phase: str, options: dict) -> dict:
+    """Measure one phase in an empty working directory and database"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["SCRAPER_DB"] = os.path.join(tmp, "scraper.db")
+        os.chdir(tmp)
+        try:
+            # The scraper logs every page; keep the results readable
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                return asyncio.run(measure(phase, options))
+        finally:
+            os.chdir(cwd)
+
+
+def run(phases, options: dict, isolate: bool = True) -> list:
+    """
+    Run the phases one after another
+
+    Args:
+        phases: Names from PHASES
+        options: Farm and crawl settings (see main)
+        isolate: Run every phase in a new process, so peak RSS is its own
+
+    Returns:
+        list: Measurements per phase
+    """
+    results = []
+    for phase in phases:
+        if phase not in PHASES:
+            raise ValueError(f"Unknown phase: {phase}")
+        if not isolate:
+            results.append(run_phase(phase, options))
+            continue
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results.append(pool.submit(run_phase, phase, options).result())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sites", type=int, default=3, help="Websites crawled at the same time")
+    parser.add_argument("--pages", type=int, default=300, help="Pages per website")
+    parser.add_argument("--fanout", type=int, default=8, help="Links per page")
+    parser.add_argument("--latency", choices=["bimodal", "lognormal"], default="bimodal")
+    parser.add_argument("--fast-latency", type=float, default=0.01, help="Seconds (median for lognormal)")
+    parser.add_argument("--slow-latency", type=float, default=0.3)
+    parser.add_argument("--slow-ratio", type=float, default=0.1)
+    parser.add_argument("--page-kb", type=float, default=20, help="Text per page")
+    parser.add_argument("--js-ratio", type=float, default=0.2, help="Fraction of JS-rendered pages")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent fetches per website")
+    parser.add_argument("--cpu-workers", type=int, default=0, help="Offload pool size (0: inline)")
+    parser.add_argument("--phases", default=",".join(PHASES))
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    options = {name: value for name, value in vars(args).items() if name not in ("phases", "json")}
+    results = run(args.phases.split(","), options)
+    if args.json:
+        print(json.dumps({"options": options, "results": results}, indent=2))
+        return
+    print(
+        f"{args.sites} websites of {args.pages} pages, {args.latency} latency, "
+        f"{args.page_kb:g} kB pages, {args.js_ratio:.0%} JS-rendered"
+    )
+    print(
+        f"{'phase':<22} {'pages':>6} {'pages/s':>8} {'p50 ms':>7} {'p99 ms':>7} "
+        f"{'peak MB':>8} {'+MB':>6} {'cpu s':>7} {'cpu %':>6}"
+    )
+    for r in results:
+        print(
+            f"{r['phase']:<22} {r['pages']:>6} {r['pages_per_sec']:>8.1f} {r['latency_p50_ms']:>7.1f} "
+            f"{r['latency_p99_ms']:>7.1f} {r['peak_rss_mb']:>8.1f} {r['rss_growth_mb']:>6.1f} "
+            f"{r['cpu_seconds']:>7.2f} {r['cpu_percent']:>6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
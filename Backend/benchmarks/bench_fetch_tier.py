@@ -0,0 +1,153 @@
+"""
+Benchmark: CPU time and memory per page, browser only vs HTTP-first
+
+Serves a mock site from a local HTTP server (a fraction of its pages are
+JS-rendered app shells) and extracts every page once with the browser
+only and once through TieredCrawler, which renders only the JS pages.
+CPU time includes child processes (Chromium), memory is the peak RSS of
+those children. By default the browser is simulated by MockCrawler, which
+only shows the cost of the HTTP tier itself; pass --real to use crawl4ai
+with a headless Chromium. Run from the Backend directory:
+
+    python benchmarks/bench_fetch_tier.py --pages 200 --js-ratio 0.1 --real
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import resource
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Add the backend directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fetch_tier import TierMemory, TieredCrawler
+from browser_pool import browser_rss_mb
+from http_client import make_client
+from benchmarks.mock_site import MockSite, MockCrawler
+
+
+def serve(site):
+    """Serve the site on a free local port; returns the server"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            page = site.page_of(site.base + self.path)
+            if page is None:
+                body, status = b"<html><body>Niet gevonden</body></html>", 404
+            else:
+                html = site.app_shell(page) if page in site.js_pages else site.html(page)
+                body, status = html.encode(), 200
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def cpu_seconds():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+async def extract_all(crawler, urls, workers):
+    queue = asyncio.Queue()
+    for url in urls:
+        queue.put_nowait(url)
+    peak_rss = 0.0
+
+    async def worker():
+        nonlocal peak_rss
+        while not queue.empty():
+            res = await crawler.arun(queue.get_nowait())
+            assert res.success, res.error_message
+            peak_rss = max(peak_rss, browser_rss_mb() or 0.0)
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return peak_rss
+
+
+async def measure(mode, browser, urls, workers):
+    async with make_client() as client:
+        crawler = browser if mode == "browser" else TieredCrawler(browser, TierMemory(), client)
+        cpu, start = cpu_seconds(), time.perf_counter()
+        peak_rss = await extract_all(crawler, urls, workers)
+        elapsed, cpu = time.perf_counter() - start, cpu_seconds() - cpu
+    result = {
+        "mode": mode,
+        "pages": len(urls),
+        "seconds": elapsed,
+        "cpu_ms_per_page": 1000 * cpu / len(urls),
+        "peak_browser_rss_mb": round(peak_rss, 1),
+    }
+    if mode != "browser":
+        result.update(crawler.snapshot())
+    return result
+
+
+async def main_async(args):
+    site = MockSite(pages=args.pages, js_ratio=args.js_ratio, fast_latency=0.0, slow_latency=0.0)
+    server = serve(site)
+    site.base = f"http://127.0.0.1:{server.server_port}"
+    urls = [site.url(i) for i in range(site.pages)]
+    try:
+        if args.real:
+            from crawl4ai import AsyncWebCrawler, BrowserConfig, CacheMode
+            from Crawlscraper import extraction_config
+
+            config = extraction_config(cache_mode=CacheMode.BYPASS)
+
+            class Browser:
+                def __init__(self, crawler):
+                    self.crawler = crawler
+
+                async def arun(self, url, config_=None, **kwargs):
+                    return await self.crawler.arun(url, config_ or config, **kwargs)
+
+            results = []
+            for mode in ("browser", "http-first"):
+                async with AsyncWebCrawler(config=BrowserConfig(headless=True)) as crawler:
+                    results.append(await measure(mode, Browser(crawler), urls, args.workers))
+            return results
+        return [await measure(mode, MockCrawler(site), urls, args.workers) for mode in ("browser", "http-first")]
+    finally:
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--js-ratio", type=float, default=0.1, help="Fraction of JS-rendered pages")
+    parser.add_argument("--workers", type=int, default=5)
+    parser.add_argument("--real", action="store_true", help="use crawl4ai and Chromium")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':<11} {'pages':>6} {'seconds':>8} {'cpu ms/page':>12} {'browser MB':>11} {'rendered':>9}")
+    for r in results:
+        print(
+            f"{r['mode']:<11} {r['pages']:>6} {r['seconds']:>8.2f} {r['cpu_ms_per_page']:>12.2f} "
+            f"{r['peak_browser_rss_mb']:>11.1f} {r.get('browser_pages', r['pages']):>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark: per-page cost of duplicate detection as the hash database grows
+
+Compares the legacy approach (json.load + json.dump of hashes.json for every
+page) with HashIndex (one load per job from SQLite, in-memory lookups,
+batched transactional flushes). The index flush is reported separately because it runs once per
+checkpoint, not once per page; "amortized" spreads it over FLUSH_EVERY pages,
+the worst case of the checkpoint policy. Run from the Backend directory:
+
+    python benchmarks/bench_hash_index.py --sizes 1000 10000 100000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from datetime import datetime
+
+# Add the backend directory to the path to import modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from hash_index import HashIndex, hash_content, FLUSH_EVERY
+from storage import Store
+
+DOMAIN = "www.example.nl"
+
+
+def make_data(size: int) -> dict:
+    """Hash database with `size` stored URLs"""
+    timestamp = datetime.now().isoformat()
+    return {
+        DOMAIN: {
+            f"https://{DOMAIN}/pagina/{i}": {
+                "hash": hash_content(f"inhoud {i}"),
+                "timestamp": timestamp,
+            }
+            for i in range(size)
+        }
+    }
+
+
+def make_database(path: str, size: int):
+    """Write a legacy hashes.json with `size` stored URLs"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(make_data(size), f, indent=2, ensure_ascii=False)
+
+
+def legacy_page(path: str, url: str, summary: str):
+    """Duplicate check + update exactly like the old crawl_all did per page"""
+    with open(path, "r", encoding="utf-8") as f:
+        existing = json.load(f)
+        if url in existing.get(DOMAIN, {}):
+            if existing[DOMAIN][url]["hash"] == hash_content(summary):
+                return
+    with open(path, "r", encoding="utf-8") as f:
+        existing = json.load(f)
+    with open(path, "w", encoding="utf-8") as f:
+        existing.setdefault(DOMAIN, {})[url] = {
+            "hash": hash_content(summary),
+            "timestamp": datetime.now().isoformat(),
+        }
+        json.dump(existing, f, indent=2, ensure_ascii=False)
+
+
+def index_page(index: HashIndex, url: str, summary: str):
+    """Duplicate check + update through the in-memory index"""
+    content_hash = hash_content(summary)
+    if index.is_unchanged(DOMAIN, url, content_hash):
+        return
+    index.put(DOMAIN, url, content_hash)
+
+
+def bench(size: int, pages: int, legacy_pages: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "hashes.json")
+        store = Store(os.path.join(tmp, "scraper.db"))
+        store.save_hashes(make_data(size))
+        urls = [f"https://{DOMAIN}/nieuw/{i}" for i in range(pages)]
+
+        # Index: load once, then in-memory per-page lookups and updates.
+        # Automatic checkpoints are disabled so the flush can be timed on its own.
+        start = time.perf_counter()
+        index = HashIndex(store, flush_every=0, flush_interval=float("inf")).load(DOMAIN)
+        load_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for url in urls:
+            index_page(index, url, f"samenvatting {url}")
+        index_per_page = (time.perf_counter() - start) / pages
+        start = time.perf_counter()
+        index.flush()
+        flush_time = time.perf_counter() - start
+
+        # Legacy: full read/write of hashes.json for every page
+        make_database(path, size)
+        start = time.perf_counter()
+        for url in urls[:legacy_pages]:
+            legacy_page(path, url, f"samenvatting {url}")
+        legacy_per_page = (time.perf_counter() - start) / legacy_pages
+
+    return {
+        "stored_urls": size,
+        "index_load_s": load_time,
+        "index_per_page_us": index_per_page * 1e6,
+        "index_flush_s": flush_time,
+        "index_amortized_us": index_per_page * 1e6 + flush_time * 1e6 / FLUSH_EVERY,
+        "legacy_per_page_us": legacy_per_page * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--pages", type=int, default=5000, help="Pages crawled per run")
+    parser.add_argument("--legacy-pages", type=int, default=20, help="Pages measured for the legacy path")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = [bench(size, args.pages, args.legacy_pages) for size in args.sizes]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(
+        f"{'stored URLs':>12} {'load (s)':>10} {'index/page (us)':>16} "
+        f"{'flush (s)':>10} {'amortized (us)':>15} {'legacy/page (us)':>17}"
+    )
+    for r in results:
+        print(
+            f"{r['stored_urls']:>12} {r['index_load_s']:>10.3f} "
+            f"{r['index_per_page_us']:>16.1f} {r['index_flush_s']:>10.3f} "
+            f"{r['index_amortized_us']:>15.1f} {r['legacy_per_page_us']:>17.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
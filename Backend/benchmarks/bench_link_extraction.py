@@ -0,0 +1,116 @@
+"""
+Micro-benchmark: link extraction speed and peak memory per strategy
+
+Each extractor runs in a fresh process (so peak RSS is not polluted by the
+others; RSS also covers memory allocated by C parsers, which tracemalloc
+cannot see) over the generated large-page fixtures, or over saved pages passed
+with --files. All extractors must return the same links as the original
+BeautifulSoup parser. Run from the Backend directory:
+
+    python benchmarks/bench_link_extraction.py
+    python benchmarks/bench_link_extraction.py --files saved/*.html
+"""
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+import tracemalloc
+import multiprocessing
+
+# Add the backend directory to the path to import modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from link_extractor import EXTRACTORS, etree, get_link_extractor
+from benchmarks.html_fixtures import fixtures
+
+PAGE_URL = "https://www.zorgkaartnederland.nl/zoeken"
+NETLOC = "www.zorgkaartnederland.nl"
+
+
+class Page:
+    """Minimal crawl result carrying raw HTML"""
+    def __init__(self, html):
+        self.html = html
+        self.links = None
+
+
+def load_pages(files):
+    if not files:
+        return fixtures()
+    pages = {}
+    for path in files:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def measure(name, pages, repeat, queue):
+    extractor = get_link_extractor(name)
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Timed passes (tracemalloc off, it slows allocation-heavy parsers down)
+    links = 0
+    found = {}
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page_name, html in pages.items():
+            result = extractor.internal_links(PAGE_URL, Page(html), NETLOC)
+            links += len(result)
+            found[page_name] = sorted(result)
+    elapsed = time.perf_counter() - start
+
+    # One extra pass to record the peak of Python-level allocations
+    tracemalloc.start()
+    for html in pages.values():
+        extractor.internal_links(PAGE_URL, Page(html), NETLOC)
+    _, py_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    queue.put({
+        "extractor": name,
+        "seconds": elapsed,
+        "links_per_sec": links / elapsed,
+        "python_peak_mb": py_peak / 1e6,
+        "rss_growth_mb": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_rss) / 1024,
+        "found": found,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", nargs="*", help="Saved HTML pages to use instead of fixtures")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    pages = load_pages(args.files)
+    names = [n for n in EXTRACTORS if n != "crawl4ai" and (n != "lxml" or etree is not None)]
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for name in names:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=measure, args=(name, pages, args.repeat, queue))
+        proc.start()
+        results.append(queue.get())
+        proc.join()
+
+    reference = next(r["found"] for r in results if r["extractor"] == "bs4")
+    for r in results:
+        r["matches_bs4"] = r.pop("found") == reference
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    sizes = ", ".join(f"{n} {len(h) / 1e6:.1f}MB" for n, h in pages.items())
+    print(f"pages: {sizes}")
+    print(f"{'extractor':<10} {'links/s':>10} {'py peak MB':>11} {'RSS +MB':>8} {'same links':>11}")
+    for r in results:
+        print(
+            f"{r['extractor']:<10} {r['links_per_sec']:>10.0f} {r['python_peak_mb']:>11.1f} "
+            f"{r['rss_growth_mb']:>8.1f} {str(r['matches_bs4']):>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark: event loop lag with and without the CPU offload pool
+
+Runs the single-pass crawl (crawl_site) against a mock site with large pages
+and measures how late the event loop wakes up while link parsing, clean_text
+and hashing run inline, in a thread pool and in a process pool. Run from the
+Backend directory:
+
+    python benchmarks/bench_loop_lag.py --pages 200 --workers 4
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import contextlib
+
+# Add the backend directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.mock_site import MockSite, MockCrawler, MockResult
+from benchmarks.html_fixtures import ICON
+
+
+class HeavyCrawler(MockCrawler):
+    """MockCrawler whose pages carry a large body and long markdown"""
+
+    def __init__(self, site, blocks):
+        super().__init__(site)
+        self.padding = "".join(
+            f'<div class="card c{i}"><span>{ICON}</span><p>Tekst {i} &amp; meer.</p></div>'
+            for i in range(blocks)
+        )
+        self.markdown = "\n".join(
+            f"## Kop {i}\n| a | b |\n|---|---|\nZin {i} met [een link](https://x.nl/{i}). Nog een zin!"
+            for i in range(blocks // 10)
+        )
+
+    async def arun(self, url, config=None, session_id=None, **kwargs):
+        res = await super().arun(url, config, session_id, **kwargs)
+        if res.success:
+            html = res.html.replace("</main>", self.padding + "</main>")
+            return MockResult(url, html, res.markdown.fit_markdown + "\n" + self.markdown)
+        return res
+
+
+async def run(mode, site, blocks, concurrency, workers):
+    from Crawlscraper import crawl_site
+    from offload import CPUOffloader, LoopLagMonitor
+
+    offloader = None
+    if mode != "inline":
+        offloader = CPUOffloader(workers=workers, kind=mode)
+    crawler = HeavyCrawler(site, blocks)
+    start = time.perf_counter()
+    try:
+        async with LoopLagMonitor(interval=0.01) as lag:
+            links = await crawl_site(
+                crawler, site.url(0), concurrency, os.path.join("progress", f"{mode}.json"),
+                offloader=offloader,
+            )
+    finally:
+        if offloader:
+            offloader.close()
+    elapsed = time.perf_counter() - start
+    stats = lag.snapshot()
+    return {
+        "mode": mode,
+        "pages": crawler.requests,
+        "links": len(links),
+        "seconds": round(elapsed, 2),
+        "pages_per_sec": round(crawler.requests / elapsed, 1),
+        "lag_mean_ms": round(stats["mean_ms"], 1),
+        "lag_p99_ms": round(stats["p99_ms"], 1),
+        "lag_max_ms": round(stats["max_ms"], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--blocks", type=int, default=3000, help="filler blocks per page")
+    parser.add_argument("--concurrency", type=int, default=15)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", default="inline,thread,process")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    site = MockSite(pages=args.pages, fast_latency=0.02, slow_latency=0.2)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            for mode in args.modes.split(","):
+                # Fresh hash database per mode so no run skips pages
+                os.environ["SCRAPER_DB"] = os.path.join(tmp, f"{mode}.db")
+                with contextlib.redirect_stdout(sys.stderr if args.json else open(os.devnull, "w")):
+                    results.append(asyncio.run(run(mode, site, args.blocks, args.concurrency, args.workers)))
+        finally:
+            os.chdir(cwd)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':<8} {'pages/s':>8} {'lag mean':>9} {'lag p99':>8} {'lag max':>8}  (ms)")
+    for r in results:
+        print(
+            f"{r['mode']:<8} {r['pages_per_sec']:>8} {r['lag_mean_ms']:>9} "
+            f"{r['lag_p99_ms']:>8} {r['lag_max_ms']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
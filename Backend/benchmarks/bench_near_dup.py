@@ -0,0 +1,102 @@
+"""
+Benchmark: near-duplicate lookups in a SimHashIndex of millions of pages
+
+Fills the index with random 64-bit fingerprints (what SimHash gives for
+unrelated pages) and measures the memory per page, lookups per second
+for near-duplicates (up to --distance bits flipped) and for new pages,
+and how fast SimHash fingerprints generated page markdown. Near lookups
+must find their page every time. Run from the Backend directory:
+
+    python benchmarks/bench_near_dup.py --pages 1000000
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+# Add the backend directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from near_dup import SimHashIndex, simhash
+from benchmarks.html_fixtures import page_markdown
+
+
+def build(pages: int, distance: int, rng):
+    urls = [f"https://www.zorgkaartnederland.nl/zorginstelling/{i}" for i in range(pages)]
+    fingerprints = [rng.getrandbits(64) for _ in range(pages)]
+    tracemalloc.start()
+    start = time.perf_counter()
+    index = SimHashIndex(distance)
+    for url, fingerprint in zip(urls, fingerprints):
+        index.add(url, fingerprint)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # The URL strings belong to the hash index and are not counted
+    return index, fingerprints, elapsed, current
+
+
+def lookups(index, queries, expected=None):
+    start = time.perf_counter()
+    found = [index.find(query) for query in queries]
+    elapsed = time.perf_counter() - start
+    hits = sum(
+        result is not None and (expected is None or result[0] == index.urls[position])
+        for result, position in zip(found, expected or [None] * len(found))
+    )
+    return len(queries) / elapsed, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=1_000_000)
+    parser.add_argument("--distance", type=int, default=3, help="Maximum differing bits")
+    parser.add_argument("--queries", type=int, default=20_000)
+    parser.add_argument("--docs", type=int, default=200, help="Documents for the SimHash throughput")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    index, fingerprints, build_seconds, memory = build(args.pages, args.distance, rng)
+
+    positions = [rng.randrange(args.pages) for _ in range(args.queries)]
+    near = []
+    for position in positions:
+        fingerprint = fingerprints[position]
+        for bit in rng.sample(range(64), rng.randint(0, args.distance)):
+            fingerprint ^= 1 << bit
+        near.append(fingerprint)
+    near_rate, near_hits = lookups(index, near, positions)
+    new_rate, false_hits = lookups(index, [rng.getrandbits(64) for _ in range(args.queries)])
+
+    docs = [page_markdown(seed, paragraphs=20 + seed % 200) for seed in range(args.docs)]
+    start = time.perf_counter()
+    for doc in docs:
+        simhash(doc)
+    simhash_rate = len(docs) / (time.perf_counter() - start)
+
+    result = {
+        "pages": args.pages,
+        "distance": args.distance,
+        "build_seconds": round(build_seconds, 2),
+        "mb": round(memory / 2**20, 1),
+        "bytes_per_page": round(memory / args.pages, 1),
+        "near_lookups_per_second": round(near_rate),
+        "near_recall": near_hits / args.queries,
+        "new_lookups_per_second": round(new_rate),
+        "new_false_matches": false_hits,
+        "simhash_docs_per_second": round(simhash_rate),
+        "simhash_kb_per_doc": round(sum(len(doc) for doc in docs) / len(docs) / 1024, 1),
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    for key, value in result.items():
+        print(f"{key:<26} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark: URL discovery with and without sitemaps
+
+Discovers the same mock site once by rendering pages and following links
+(collect_internal_urls) and once from its robots.txt and gzipped sitemap
+index (discover_urls with the "sitemap" strategy), then runs the pipelined
+crawl_site in both modes to show that pages missing from the sitemap are
+still found. Render and HTTP latencies are simulated. Run from the Backend
+directory:
+
+    python benchmarks/bench_sitemap_discovery.py --pages 2000 --coverage 0.95
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import contextlib
+import httpx
+
+# Add the backend directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Crawlscraper import collect_internal_urls, discover_urls, crawl_site
+from http_client import make_client
+from benchmarks.mock_site import MockSite, MockCrawler
+
+
+class CountingTransport(httpx.AsyncBaseTransport):
+    """Wraps an httpx transport and counts the requests"""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.requests = 0
+
+    async def handle_async_request(self, request):
+        self.requests += 1
+        return await self.transport.handle_async_request(request)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+async def discovery(site, args, strategy):
+    crawler = MockCrawler(site)
+    transport = CountingTransport(site.http_transport(args.coverage, args.per_file, args.http_latency))
+    async with make_client(transport=transport) as client:
+        start = time.perf_counter()
+        if strategy == "sitemap":
+            found = await discover_urls(crawler, site.url(0), args.workers, discovery="sitemap", http_client=client)
+        else:
+            found = await collect_internal_urls(crawler, site.url(0), args.workers)
+        elapsed = time.perf_counter() - start
+    return {
+        "phase": "discovery",
+        "strategy": strategy,
+        "seconds": elapsed,
+        "urls": len(found),
+        "renders": crawler.requests,
+        "http_requests": transport.requests,
+    }
+
+
+async def pipelined(site, args, strategy):
+    crawler = MockCrawler(site)
+    transport = CountingTransport(site.http_transport(args.coverage, args.per_file, args.http_latency))
+    progress_file = os.path.join("progress", f"{strategy}.json")
+    async with make_client(transport=transport) as client:
+        start = time.perf_counter()
+        found = await crawl_site(
+            crawler, site.url(0), args.workers, progress_file, http_client=client, discovery=strategy
+        )
+        elapsed = time.perf_counter() - start
+    return {
+        "phase": "crawl_site",
+        "strategy": strategy,
+        "seconds": elapsed,
+        "urls": len(found),
+        "renders": crawler.requests,
+        "http_requests": transport.requests,
+    }
+
+
+async def main_async(args):
+    site = MockSite(
+        pages=args.pages, fanout=args.fanout,
+        fast_latency=args.render_latency, slow_latency=args.render_latency * 5,
+    )
+    results = []
+    for strategy in ("links", "sitemap"):
+        results.append(await discovery(site, args, strategy))
+    if args.crawl:
+        for strategy in ("links", "sitemap"):
+            # Separate databases, so the second run does not skip the first one's pages
+            os.environ["SCRAPER_DB"] = os.path.abspath(f"{strategy}.db")
+            results.append(await pipelined(site, args, strategy))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--fanout", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=15)
+    parser.add_argument("--coverage", type=float, default=0.95, help="Fraction of pages in the sitemap")
+    parser.add_argument("--per-file", type=int, default=500, help="Entries per sitemap file")
+    parser.add_argument("--render-latency", type=float, default=0.05, help="Seconds per page render")
+    parser.add_argument("--http-latency", type=float, default=0.02, help="Seconds per sitemap request")
+    parser.add_argument("--crawl", action="store_true", help="Also run the pipelined crawl_site")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_sitemap_")
+    os.chdir(workdir)
+    with contextlib.redirect_stdout(sys.stderr):  # Keep the scraper's prints out of the table
+        results = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'phase':<11} {'strategy':<8} {'seconds':>8} {'urls':>6} {'renders':>8} {'http':>5}")
+    for r in results:
+        print(
+            f"{r['phase']:<11} {r['strategy']:<8} {r['seconds']:>8.2f} {r['urls']:>6} "
+            f"{r['renders']:>8} {r['http_requests']:>5}"
+        )
+    print(f"discovery speed-up: {results[0]['seconds'] / results[1]['seconds']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark: memory of the crawl frontier, sets of strings vs URLStore
+
+Builds the URL bookkeeping of a crawl halfway through a site of synthetic
+URLs: every URL discovered, half of them visited and the other half in the
+frontier. "sets" is the former layout (a frontier queue plus seen and
+discovered sets of full URL strings), "url-store" one URLStore with a
+state per URL and the frontier as a queue of its keys, and "bloom" the
+same store once the visited half is completed and only kept in the seen
+filter. Memory is measured with tracemalloc. Run from the Backend
+directory:
+
+    python benchmarks/bench_url_store.py --urls 1000000
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+from collections import deque
+
+# Add the backend directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from url_store import URLStore, BloomFilter, VISITED
+
+SECTIONS = ["zorginstelling", "zorgverlener", "specialisme", "vestiging", "nieuws", "agenda", "wijk", "aanbod"]
+
+
+def synthetic_urls(count: int, seed: int = 1):
+    """URLs of a large directory site: a few thousand folders, unique slugs"""
+    rng = random.Random(seed)
+    base = "https://www.zorgkaartnederland.nl"
+    cities = [f"plaats-{i}" for i in range(400)]
+    for i in range(count):
+        section = rng.choice(SECTIONS)
+        slug = f"{rng.choice(('huisartsenpraktijk', 'tandarts', 'fysiotherapie', 'apotheek'))}-{i}"
+        if i % 10 == 0:
+            yield f"{base}/{section}/{rng.choice(cities)}/{slug}?pagina={i % 7}"
+        else:
+            yield f"{base}/{section}/{rng.choice(cities)}/{slug}"
+
+
+def build_sets(count):
+    frontier, seen, discovered = deque(), set(), set()
+    for i, url in enumerate(synthetic_urls(count)):
+        seen.add(url)
+        discovered.add(url)
+        if i % 2:
+            frontier.append(url)
+    return frontier, seen, discovered
+
+
+def build_store(count, fp_rate=None):
+    store = URLStore(BloomFilter(count, fp_rate) if fp_rate else None)
+    frontier = deque()
+    for i, url in enumerate(synthetic_urls(count)):
+        key = store.add(url)
+        if i % 2:
+            frontier.append(key)
+        else:
+            store.mark(url, VISITED)
+            store.forget(url)  # Only with a seen filter
+    return frontier, store
+
+
+def lookups_per_second(contains, count, samples=200_000):
+    urls = list(synthetic_urls(min(count, samples), seed=1))
+    start = time.perf_counter()
+    for url in urls:
+        contains(url)
+    return len(urls) / (time.perf_counter() - start)
+
+
+def measure(name, build, count):
+    tracemalloc.start()
+    start = time.perf_counter()
+    structures = build(count)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    seen = structures[1]
+    return {
+        "layout": name,
+        "urls": count,
+        "mb": round(current / 2**20, 1),
+        "bytes_per_url": round(current / count, 1),
+        "build_seconds": round(elapsed, 2),
+        "lookups_per_second": round(lookups_per_second(seen.__contains__, count)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--urls", type=int, default=1_000_000)
+    parser.add_argument("--fp-rate", type=float, default=0.001, help="False-positive rate of the seen filter")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = [
+        measure("sets", build_sets, args.urls),
+        measure("url-store", build_store, args.urls),
+        measure("bloom", lambda count: build_store(count, args.fp_rate), args.urls),
+    ]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'layout':<10} {'urls':>9} {'MB':>8} {'bytes/url':>10} {'build s':>8} {'lookups/s':>11}")
+    for r in results:
+        print(
+            f"{r['layout']:<10} {r['urls']:>9} {r['mb']:>8.1f} {r['bytes_per_url']:>10.1f} "
+            f"{r['build_seconds']:>8.2f} {r['lookups_per_second']:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Large HTML fixtures modelled on the directory sites we crawl
+
+Pages combine what makes real pages expensive to parse: a mega-menu, long
+result lists with cards, inline SVG icons, big inline scripts and JSON-LD,
+tracking pixels, comments and a sitemap-style footer. Generation is
+deterministic so results are comparable between runs.
+"""
+import random
+
+SIZES = {
+    "small": 200,     # anchors in the result list
+    "medium": 2000,
+    "large": 10000,
+}
+
+ICON = (
+    '<svg class="icon" viewBox="0 0 24 24" aria-hidden="true"><path d="M12 2C6.48 2 2 '
+    '6.48 2 12s4.48 10 10 10 10-4.48 10-10S17.52 2 12 2zm0 18c-4.41 0-8-3.59-8-8s3.59-8 '
+    '8-8 8 3.59 8 8-3.59 8-8 8z"/></svg>'
+)
+
+
+def directory_page(cards: int, domain: str = "www.zorgkaartnederland.nl", seed: int = 1) -> str:
+    """Render a search-result page with `cards` organisation cards"""
+    rng = random.Random(seed)
+    parts = [
+        "<!DOCTYPE html><html lang=\"nl\"><head><meta charset=\"utf-8\">",
+        "<title>Zorgverleners in Gouda</title>",
+        "<script type=\"application/ld+json\">",
+        "{\"@context\":\"https://schema.org\",\"@type\":\"ItemList\",\"itemListElement\":[",
+        ",".join(
+            f'{{"@type":"ListItem","position":{i},"url":"https://{domain}/zorginstelling/{i}"}}'
+            for i in range(min(cards, 500))
+        ),
+        "]}</script>",
+        "<script>window.__STATE__=" + "{" + ",".join(
+            f'"k{i}":"{rng.random():.12f}"' for i in range(cards)
+        ) + "};</script>",
+        "<style>" + " ".join(f".c{i}{{margin:{i % 7}px}}" for i in range(300)) + "</style>",
+        "</head><body>",
+        "<!-- header -->",
+        "<header><nav class=\"mega-menu\"><ul>",
+    ]
+    for section in range(12):
+        parts.append(f'<li><a href="/categorie/{section}">Categorie {section}</a><ul>')
+        for sub in range(20):
+            parts.append(
+                f'<li><a href="/categorie/{section}/{sub}?utm_source=menu#top">'
+                f"{ICON}Subcategorie {sub}</a></li>"
+            )
+        parts.append("</ul></li>")
+    parts.append("</ul></nav></header><main><section class=\"results\">")
+    for i in range(cards):
+        kind = rng.choice(["huisarts", "fysiotherapeut", "tandarts", "apotheek"])
+        parts.append(
+            f'<article class="card c{i % 300}" data-id="{i}">{ICON}'
+            f'<h2><a href="/zorginstelling/{kind}-{i}" title="{kind} {i}">{kind.title()} {i}</a></h2>'
+            f"<p>Adres: Straatweg {i}, Gouda &amp; omstreken. Telefoon 0182-{i:06d}.</p>"
+            f'<a href="https://{domain}/zorginstelling/{kind}-{i}/reviews">Reviews</a> '
+            f'<a href="https://maps.example.com/?q={i}" rel="nofollow">Kaart</a> '
+            f'<a href="/downloads/folder-{i}.pdf">Folder</a> '
+            f'<img src="/pixel.gif?i={i}" width="1" height="1" alt="">'
+            f"</article>"
+        )
+    parts.append("</section><nav class=\"pagination\">")
+    parts.extend(f'<a href="?page={p}">{p}</a>' for p in range(1, 50))
+    parts.append("</nav></main><footer><ul>")
+    parts.extend(f'<li><a href="/over-ons/{i}">Over ons {i}</a></li>' for i in range(150))
+    parts.append("</ul><a href=\"mailto:info@example.nl\">Mail</a>")
+    parts.append("<a href=\"javascript:void(0)\">Cookie-instellingen</a>")
+    parts.append("</footer></body></html>")
+    return "".join(parts)
+
+
+def fixtures() -> dict:
+    """Return {name: html} for all fixture sizes"""
+    return {name: directory_page(cards, seed=i) for i, (name, cards) in enumerate(SIZES.items())}
+
+
+def page_markdown(seed: int = 1, paragraphs: int = 40) -> str:
+    """
+    Markdown as crawl4ai makes of a directory or article page
+
+    Menus come out as link lists, result cards as tables and headers, and
+    the body text as paragraphs with inline links; the mix and lengths vary
+    with the seed.
+    """
+    rng = random.Random(seed)
+    words = (
+        "zorg huisarts praktijk afspraak patiënten wijk Gouda spreekuur telefonisch "
+        "behandeling informatie openingstijden verwijzing apotheek vestiging team"
+    ).split()
+
+    def sentence():
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(4, 18)))
+        if rng.random() < 0.3:
+            text += f" [{rng.choice(words)}](https://www.example.nl/{rng.choice(words)}/{rng.randint(1, 999)})"
+        return text.capitalize() + rng.choice(".....!?")
+
+    parts = [f"* [{word.title()}](/{word})" for word in rng.sample(words, rng.randint(3, 10))]
+    parts.append(f"\n# {' '.join(rng.sample(words, 3)).title()}\n")
+    for i in range(paragraphs):
+        kind = rng.random()
+        if kind < 0.15:
+            parts.append(f"\n## {rng.choice(words).title()} {i}\n")
+        elif kind < 0.25:
+            parts.append("| Naam | Adres | Telefoon |\n|---|---|---|")
+            parts.extend(f"| {rng.choice(words)} {r} | Straatweg {r} | 0182-{r:06d} |" for r in range(rng.randint(2, 12)))
+        else:
+            parts.append(" ".join(sentence() for _ in range(rng.randint(1, 6))))
+        parts.append("\n" * rng.randint(1, 4))
+    return "\n".join(parts)
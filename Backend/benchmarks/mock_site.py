@@ -0,0 +1,313 @@
+"""
+Synthetic website used by the benchmarks
+
+MockSite builds a deterministic link graph and MockCrawler serves it through
+the same arun() interface as crawl4ai's AsyncWebCrawler, sleeping for a
+per-page latency to simulate the network and the browser. The site's pages,
+robots.txt and (gzipped) sitemaps are served to httpx through
+http_transport(); pages marked as JS-rendered only return an empty app
+shell there. MockFarm serves several sites on their own domains through
+one crawler and one transport and records every page fetch.
+"""
+import gzip
+import time
+import random
+import asyncio
+from urllib.parse import urlparse
+
+WORDS = (
+    "zorg huisarts afspraak wijkteam ondersteuning informatie bereikbaarheid praktijk "
+    "spreekuur verwijzing apotheek fysiotherapie thuiszorg vergoeding wachttijd locatie "
+    "medewerkers openingstijden behandeling clienten gemeente aanvraag contact"
+).split()
+
+
+class MockMarkdown:
+    """Markdown part of a crawl result"""
+    def __init__(self, text):
+        self.raw_markdown = text
+        self.fit_markdown = text
+
+
+class MockResult:
+    """Crawl result with the attributes the scraper reads"""
+    def __init__(self, url, html, markdown, status_code=200, response_headers=None):
+        self.url = url
+        self.success = status_code < 400
+        self.status_code = status_code
+        self.html = html
+        self.markdown = MockMarkdown(markdown)
+        self.links = {"internal": [], "external": []}
+        self.response_headers = response_headers or {}
+
+
+class MockSite:
+    """
+    Deterministic site of `pages` pages with `fanout` links per page
+
+    Pages form a tree (so everything is reachable from the home page) plus
+    random cross links. Latencies are skewed: with the "bimodal"
+    distribution most pages are fast, a fraction `slow_ratio` takes
+    `slow_latency` seconds; with "lognormal" the median is `fast_latency`
+    and the tail is long (p99 about ten times the median). A fraction
+    `js_ratio` of the pages needs JavaScript to show its content, and
+    `page_kb` pads every page with generated text to about that size.
+    """
+
+    def __init__(
+        self,
+        pages: int = 500,
+        fanout: int = 8,
+        domain: str = "mock.local",
+        fast_latency: float = 0.01,
+        slow_latency: float = 0.3,
+        slow_ratio: float = 0.1,
+        seed: int = 42,
+        js_ratio: float = 0.0,
+        latency_distribution: str = "bimodal",
+        page_kb: float = 0.0,
+    ):
+        if latency_distribution not in ("bimodal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {latency_distribution}")
+        self.pages = pages
+        self.domain = domain
+        self.base = f"https://{domain}"
+        rng = random.Random(seed)
+
+        self.links = {}
+        self.latency = {}
+        self.js_pages = {i for i in range(pages) if random.Random(seed + i).random() < js_ratio}
+        for i in range(pages):
+            children = [c for c in (2 * i + 1, 2 * i + 2) if c < pages]
+            extra = [rng.randrange(pages) for _ in range(max(0, fanout - len(children)))]
+            self.links[i] = children + extra
+            if latency_distribution == "lognormal":
+                self.latency[i] = fast_latency * rng.lognormvariate(0.0, 1.0)
+            else:
+                slow = rng.random() < slow_ratio
+                self.latency[i] = slow_latency if slow else fast_latency * (0.5 + rng.random())
+
+        # Filler sentences; every page strings a different selection together
+        filler_rng = random.Random(seed)
+        self.sentences = [
+            " ".join(filler_rng.choice(WORDS) for _ in range(12)).capitalize() + "."
+            for _ in range(64)
+        ]
+        average = sum(len(sentence) + 1 for sentence in self.sentences) / len(self.sentences)
+        self.filler_sentences = int(page_kb * 1024 / average)
+
+    def url(self, page: int) -> str:
+        return f"{self.base}/" if page == 0 else f"{self.base}/pagina/{page}"
+
+    def page_of(self, url: str):
+        path = url[len(self.base):]
+        if path in ("", "/"):
+            return 0
+        if path.startswith("/pagina/"):
+            try:
+                page = int(path[len("/pagina/"):])
+            except ValueError:
+                return None
+            return page if 0 <= page < self.pages else None
+        return None
+
+    def html(self, page: int) -> str:
+        anchors = "\n".join(
+            f'<li><a href="/pagina/{target}?ref={page}#top">Pagina {target}</a></li>'
+            if target else '<li><a href="/">Home</a></li>'
+            for target in self.links[page]
+        )
+        return (
+            f"<html><head><title>Pagina {page}</title></head><body>"
+            f"<nav><a href=\"https://extern.example.org/\">Extern</a></nav>"
+            f"<main><h1>Pagina {page}</h1><p>{self.text(page)}</p><ul>{anchors}</ul></main>"
+            f"</body></html>"
+        )
+
+    def app_shell(self, page: int) -> str:
+        """What the server sends for a JS-rendered page"""
+        return (
+            f"<html><head><title>Pagina {page}</title><script src=\"/static/app.js\"></script></head>"
+            f"<body><div id=\"root\"></div>"
+            f"<noscript>Schakel JavaScript in om deze website te gebruiken.</noscript></body></html>"
+        )
+
+    def text(self, page: int) -> str:
+        text = (
+            f"Dit is pagina {page} van de testsite. Hier staat informatie over zorg. "
+            f"Bel ons voor meer informatie. Wij helpen u graag. Tot ziens."
+        )
+        if self.filler_sentences:
+            step = 1 + page % 7
+            text += " " + " ".join(
+                self.sentences[(page + n * step) % len(self.sentences)] for n in range(self.filler_sentences)
+            )
+        return text
+
+    def all_urls(self) -> set:
+        return {self.url(i) for i in range(self.pages)}
+
+    def http_transport(
+        self, coverage: float = 1.0, per_file: int = 1000, latency: float = 0.0, page_latency: bool = False
+    ):
+        """
+        httpx transport serving the pages, robots.txt, a sitemap index and
+        gzipped sitemaps
+
+        Args:
+            coverage: Fraction of the pages listed in the sitemaps (the rest
+                are only reachable through links)
+            per_file: Page entries per sitemap file
+            latency: Seconds per HTTP response
+            page_latency: Also wait the latency of the requested page, as
+                MockCrawler does
+
+        Returns:
+            httpx.MockTransport: Transport for make_client(transport=...)
+        """
+        import httpx
+
+        rng = random.Random(len(self.links))
+        listed = [self.url(i) for i in range(self.pages) if i == 0 or rng.random() < coverage]
+        files = [listed[i : i + per_file] for i in range(0, len(listed), per_file)]
+        ns = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+        index = "".join(
+            f"<sitemap><loc>{self.base}/sitemaps/{n}.xml.gz</loc></sitemap>" for n in range(len(files))
+        )
+        bodies = {
+            "/robots.txt": f"User-agent: *\nDisallow:\nSitemap: {self.base}/sitemap_index.xml\n".encode(),
+            "/sitemap_index.xml": f"<sitemapindex {ns}>{index}</sitemapindex>".encode(),
+        }
+        for n, urls in enumerate(files):
+            entries = "".join(f"<url><loc>{url}</loc></url>" for url in urls)
+            bodies[f"/sitemaps/{n}.xml.gz"] = gzip.compress(f"<urlset {ns}>{entries}</urlset>".encode())
+
+        async def handler(request):
+            await asyncio.sleep(latency)
+            body = bodies.get(request.url.path)
+            if body is not None:
+                return httpx.Response(200, content=body)
+            page = self.page_of(str(request.url.copy_with(query=None, fragment=None)))
+            if page is None:
+                return httpx.Response(404, html="<html><body>Niet gevonden</body></html>")
+            if page_latency:
+                await asyncio.sleep(self.latency[page])
+            html = self.app_shell(page) if page in self.js_pages else self.html(page)
+            return httpx.Response(200, html=html)
+
+        return httpx.MockTransport(handler)
+
+
+class MockCrawler:
+    """Stand-in for AsyncWebCrawler that serves a MockSite"""
+
+    def __init__(self, site: MockSite):
+        self.site = site
+        self.requests = 0      # Pages rendered
+        self.raw_requests = 0  # Raw HTML processed without rendering
+
+    async def arun(self, url, config=None, session_id=None, **kwargs):
+        if url.startswith("raw:"):
+            # Fetched over HTTP by the caller; only the extraction runs
+            self.raw_requests += 1
+            base_url = config.base_url
+            page = self.site.page_of(base_url)
+            return MockResult(base_url, url[4:], self.site.text(page) if page is not None else "")
+        self.requests += 1
+        page = self.site.page_of(url)
+        if page is None:
+            await asyncio.sleep(0.005)
+            return MockResult(url, "", "", status_code=404)
+        await asyncio.sleep(self.site.latency[page])
+        return MockResult(url, self.site.html(page), self.site.text(page))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class MockFarm:
+    """
+    Several MockSites on their own domains, served in-process
+
+    crawler() renders the pages of every site like MockCrawler does and
+    http_transport() serves them to httpx (JS-rendered pages as app
+    shells), both waiting each page's latency. Every page fetch through
+    either is recorded, so benchmarks can report the fetch latencies and
+    the pages reached however the scraper fetched them.
+    """
+
+    def __init__(self, sites):
+        """
+        Args:
+            sites: MockSites with distinct domains
+        """
+        self.sites = {site.domain: site for site in sites}
+        self.latencies = []   # Seconds per page fetch, browser and HTTP
+        self.fetched = set()  # (domain, page) of every page fetched
+        self.http_fetches = 0
+
+    def record(self, url: str, seconds: float):
+        site = self.sites.get(urlparse(url).hostname)
+        page = site.page_of(url.split("?")[0].split("#")[0]) if site else None
+        if page is not None:
+            self.latencies.append(seconds)
+            self.fetched.add((site.domain, page))
+
+    def crawler(self) -> "FarmCrawler":
+        return FarmCrawler(self)
+
+    def http_transport(self):
+        """
+        Returns:
+            httpx.MockTransport: Transport serving all sites by host name
+        """
+        import httpx
+
+        transports = {domain: site.http_transport(page_latency=True) for domain, site in self.sites.items()}
+
+        async def handler(request):
+            transport = transports.get(request.url.host)
+            if transport is None:
+                return httpx.Response(404, html="<html><body>Onbekende host</body></html>")
+            start = time.perf_counter()
+            response = await transport.handle_async_request(request)
+            self.http_fetches += 1
+            self.record(str(request.url), time.perf_counter() - start)
+            return response
+
+        return httpx.MockTransport(handler)
+
+
+class FarmCrawler:
+    """Stand-in for AsyncWebCrawler that serves the sites of a MockFarm"""
+
+    def __init__(self, farm: MockFarm):
+        self.farm = farm
+        self.crawlers = {domain: MockCrawler(site) for domain, site in farm.sites.items()}
+
+    @property
+    def requests(self) -> int:
+        """Pages rendered"""
+        return sum(crawler.requests for crawler in self.crawlers.values())
+
+    async def arun(self, url, config=None, session_id=None, **kwargs):
+        raw = url.startswith("raw:")
+        target = config.base_url if raw else url
+        crawler = self.crawlers.get(urlparse(target).hostname)
+        if crawler is None:
+            return MockResult(target, "", "", status_code=404)
+        if raw:
+            return await crawler.arun(url, config, session_id, **kwargs)
+        start = time.perf_counter()
+        res = await crawler.arun(url, config, session_id, **kwargs)
+        self.farm.record(url, time.perf_counter() - start)
+        return res
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
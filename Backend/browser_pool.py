@@ -0,0 +1,231 @@
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager
+
+try:
+    import psutil
+except ImportError:  # psutil is optional; without it the memory cap is not enforced
+    psutil = None
+
+# Configuration constants (override with environment variables)
+POOL_SIZE = int(os.environ.get("SCRAPER_MAX_BROWSERS", 2))             # Browsers kept open
+RECYCLE_AFTER_PAGES = int(os.environ.get("SCRAPER_RECYCLE_PAGES", 2000))  # Restart a browser after N pages
+MAX_BROWSER_RSS_MB = int(os.environ.get("SCRAPER_BROWSER_RSS_MB", 1500))  # Memory cap per browser
+BROWSER_PROCESS_NAMES = ("chrome", "chromium", "headless_shell")
+
+
+def default_browser_factory():
+    """Start a headless crawl4ai browser"""
+    from crawl4ai import AsyncWebCrawler, BrowserConfig  # imported late: heavy
+    return AsyncWebCrawler(config=BrowserConfig(headless=True))
+
+
+def browser_rss_mb() -> float:
+    """
+    Resident memory of all browser processes started by this process
+
+    Returns:
+        float: RSS in megabytes (0 when psutil is not installed)
+    """
+    if psutil is None:
+        return 0.0
+    total = 0
+    for child in psutil.Process().children(recursive=True):
+        try:
+            if any(name in child.name().lower() for name in BROWSER_PROCESS_NAMES):
+                total += child.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return total / (1024 * 1024)
+
+
+class PooledBrowser:
+    """
+    A started crawler owned by the pool
+
+    Counts the pages fetched through it; everything else is passed on to
+    the underlying crawler, so jobs use it like an AsyncWebCrawler.
+    """
+
+    def __init__(self, crawler, context=None):
+        self.crawler = crawler
+        self.context = context or crawler  # What was entered to start it
+        self.pages = 0
+        self.leases = 0
+        self.started = time.time()
+
+    async def arun(self, url, config=None, **kwargs):
+        self.pages += 1
+        return await self.crawler.arun(url, config, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.crawler, name)
+
+    def healthy(self) -> bool:
+        """
+        Returns:
+            bool: False if the crawler stopped or its browser disconnected
+        """
+        if getattr(self.crawler, "ready", True) is False:
+            return False
+        manager = getattr(getattr(self.crawler, "crawler_strategy", None), "browser_manager", None)
+        browser = getattr(manager, "browser", None)
+        if browser is not None and hasattr(browser, "is_connected"):
+            return browser.is_connected()
+        return True
+
+    async def reset(self):
+        """Close the pages that a finished job left open as sessions"""
+        strategy = getattr(self.crawler, "crawler_strategy", None)
+        sessions = getattr(getattr(strategy, "browser_manager", None), "sessions", None)
+        if not sessions:
+            return
+        for session_id in list(sessions):
+            try:
+                await strategy.kill_session(session_id)
+            except Exception:
+                pass
+
+
+class BrowserPool:
+    """
+    Long-lived pool of started browsers that jobs lease from
+
+    A lease hands out an idle browser (a hit) or starts a new one while the
+    pool is below its size (a miss); otherwise it waits for a release.
+    Browsers are health-checked on lease and recycled on release when they
+    served recycle_after pages, lost their browser process, or the average
+    browser RSS exceeds max_rss_mb.
+    """
+
+    def __init__(
+        self,
+        size: int = POOL_SIZE,
+        factory=default_browser_factory,
+        recycle_after: int = RECYCLE_AFTER_PAGES,
+        max_rss_mb: int = MAX_BROWSER_RSS_MB,
+        rss_probe=browser_rss_mb,
+    ):
+        """
+        Args:
+            size: Maximum number of open browsers
+            factory: Callable returning an unstarted crawler (async context manager)
+            recycle_after: Pages after which a browser is restarted
+            max_rss_mb: Memory cap per browser in megabytes (0 disables it)
+            rss_probe: Callable returning the RSS of all browsers in megabytes
+        """
+        self.size = max(1, size)
+        self.factory = factory
+        self.recycle_after = recycle_after
+        self.max_rss_mb = max_rss_mb
+        self.rss_probe = rss_probe
+
+        self.idle = []       # Started browsers waiting for a lease
+        self.open = 0        # Started browsers (idle and leased)
+        self.hits = 0        # Leases served by an already running browser
+        self.misses = 0      # Leases that had to start a browser
+        self.recycled = 0    # Browsers closed by the recycle policy
+        self._available = None
+
+    @property
+    def leased(self) -> int:
+        return self.open - len(self.idle)
+
+    def _condition(self) -> asyncio.Condition:
+        if self._available is None:
+            self._available = asyncio.Condition()
+        return self._available
+
+    @asynccontextmanager
+    async def lease(self):
+        """
+        Borrow a browser for the duration of a job
+
+        Yields:
+            PooledBrowser: Started browser; returned to the pool afterwards
+        """
+        browser = await self._acquire()
+        try:
+            yield browser
+        finally:
+            await self._release(browser)
+
+    async def _acquire(self) -> PooledBrowser:
+        available = self._condition()
+        async with available:
+            while True:
+                while self.idle:
+                    browser = self.idle.pop()
+                    if browser.healthy():
+                        self.hits += 1
+                        browser.leases += 1
+                        return browser
+                    await self._close(browser)
+                if self.open < self.size:
+                    self.open += 1  # Reserve the slot while starting
+                    break
+                await available.wait()
+
+        try:
+            context = self.factory()
+            crawler = await context.__aenter__()
+        except BaseException:
+            async with available:
+                self.open -= 1
+                available.notify()
+            raise
+        self.misses += 1
+        browser = PooledBrowser(crawler, context)
+        browser.leases += 1
+        return browser
+
+    async def _release(self, browser: PooledBrowser):
+        if self._should_recycle(browser):
+            self.recycled += 1
+            await self._close(browser)
+        else:
+            await browser.reset()
+            self.idle.append(browser)
+        available = self._condition()
+        async with available:
+            available.notify()
+
+    def _should_recycle(self, browser: PooledBrowser) -> bool:
+        if not browser.healthy():
+            return True
+        if self.recycle_after and browser.pages >= self.recycle_after:
+            return True
+        if self.max_rss_mb and self.open:
+            return self.rss_probe() / self.open > self.max_rss_mb
+        return False
+
+    async def _close(self, browser: PooledBrowser):
+        self.open -= 1
+        try:
+            await browser.context.__aexit__(None, None, None)
+        except Exception:
+            pass
+
+    async def close(self):
+        """Close all idle browsers (leased browsers close on release)"""
+        while self.idle:
+            await self._close(self.idle.pop())
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+            dict: Pool size, open/idle/leased browsers, hit rate, recycles and RSS
+        """
+        leases = self.hits + self.misses
+        return {
+            "size": self.size,
+            "open": self.open,
+            "idle": len(self.idle),
+            "leased": self.leased,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / leases, 3) if leases else 0.0,
+            "recycled": self.recycled,
+            "browser_rss_mb": round(self.rss_probe(), 1),
+        }
@@ -0,0 +1,324 @@
+import os
+import re
+from collections import Counter
+from urllib.parse import urljoin, urlsplit, parse_qsl, urlencode
+
+# Configuration constants (override with environment variables)
+KEEP_QUERY_PARAMS = tuple(  # Query parameters that select different content; all others are dropped
+    name.strip() for name in os.environ.get("SCRAPER_KEEP_QUERY_PARAMS", "").split(",") if name.strip()
+)
+INDEX_FILES = ("index.html", "index.htm", "index.php", "index.asp", "default.asp", "default.aspx")
+STRIP_TRAILING_SLASH = True    # "/zorg/" and "/zorg" are the same page
+LOWERCASE_PATHS = False        # Only for sites on case-insensitive servers (IIS)
+HONOUR_REL_CANONICAL = True    # Store a page under the URL its <link rel="canonical"> names
+MAX_PATH_DEPTH = 12            # Deeper paths are taken for a trap
+MAX_SEGMENT_REPEATS = 3        # Same path segment more often than this is a trap (/a/b/a/b/a/b/a)
+
+# URLs allowed per trap pattern and path template (digits replaced), 0 drops them all
+TRAP_CAPS = {
+    "calendar": 50,     # Date archives and agenda pages: /agenda/2024/05/12, ?datum=2024-05-12
+    "query": 100,       # Query variants of one path: faceted search, sorting, paging
+    "depth": 0,         # Paths deeper than MAX_PATH_DEPTH
+    "repeat": 0,        # Relative link loops repeating a segment
+}
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+SESSION_SEGMENT = re.compile(r";(?:jsessionid|phpsessid|sid|sessionid|cfid|cftoken)=[^/;]*", re.IGNORECASE)
+ASPNET_SESSION = re.compile(r"/\([A-Z]\([A-Za-z0-9]+\)\)(?=/)")
+CALENDAR_PATH = re.compile(r"/(?:19|20)\d\d[/-](?:0?[1-9]|1[0-2])(?:[/-]|$)")
+CALENDAR_PARAMS = {"date", "datum", "day", "dag", "month", "maand", "year", "jaar", "week", "from", "van"}
+DIGITS = re.compile(r"\d+")
+LINK_TAG = re.compile(r"<link\b[^>]*>", re.IGNORECASE)
+REL_CANONICAL = re.compile(r"""\brel\s*=\s*["']?canonical\b""", re.IGNORECASE)
+HREF = re.compile(r"""\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+
+
+def site_host(netloc: str, scheme: str = "https") -> str:
+    """
+    Host of a netloc without case, default port and "www." prefix
+
+    Args:
+        netloc: Host with optional port
+        scheme: URL scheme, for the default port
+
+    Returns:
+        str: Host that the www and apex variants of a site share
+    """
+    host = netloc.lower()
+    host, _, port = host.partition(":")
+    if port and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    return host[4:] if host.startswith("www.") else host
+
+
+def rel_canonical(html: str):
+    """
+    Read the <link rel="canonical"> of a page
+
+    Only the <head> is searched, with regular expressions instead of a
+    parser; the link tag is short and always in the head.
+
+    Args:
+        html: Page HTML
+
+    Returns:
+        str: The raw href, or None if the page declares no canonical URL
+    """
+    end = html.find("</head>")
+    head = html[: end if end >= 0 else 64 * 1024]
+    for tag in LINK_TAG.findall(head):
+        if REL_CANONICAL.search(tag):
+            match = HREF.search(tag)
+            if match:
+                return next(group for group in match.groups() if group is not None).strip() or None
+    return None
+
+
+class TrapDetector:
+    """
+    Caps the number of URLs that match a crawler trap pattern
+
+    Calendars, faceted search and relative link loops generate endless
+    URLs of the same shape. Each pattern has a cap per path template
+    (the path with its digits replaced), so one agenda is limited without
+    affecting the rest of the site.
+    """
+
+    def __init__(
+        self,
+        caps: dict = None,
+        max_depth: int = MAX_PATH_DEPTH,
+        max_repeats: int = MAX_SEGMENT_REPEATS,
+    ):
+        """
+        Args:
+            caps: URLs allowed per pattern and template (default: TRAP_CAPS)
+            max_depth: Path segments above which a URL matches "depth"
+            max_repeats: Repeats of one segment above which a URL matches "repeat"
+        """
+        self.caps = dict(TRAP_CAPS if caps is None else caps)
+        self.max_depth = max_depth
+        self.max_repeats = max_repeats
+        self.seen = Counter()      # (pattern, template) -> URLs allowed
+        self.blocked = Counter()   # pattern -> URLs dropped
+
+    def patterns(self, url: str) -> list:
+        """
+        Returns:
+            list: (pattern, template) of every trap pattern the URL matches
+        """
+        parts = urlsplit(url)
+        path = parts.path
+        template = DIGITS.sub("N", path)
+        found = []
+        names = {name.lower() for name, _ in parse_qsl(parts.query, keep_blank_values=True)}
+        if CALENDAR_PATH.search(path) or names & CALENDAR_PARAMS:
+            found.append(("calendar", template))
+        if parts.query:
+            found.append(("query", path))
+        segments = [segment for segment in path.split("/") if segment]
+        if len(segments) > self.max_depth:
+            found.append(("depth", template))
+        if segments and max(Counter(segments).values()) > self.max_repeats:
+            found.append(("repeat", template))
+        return [(name, template) for name, template in found if name in self.caps]
+
+    def allow(self, url: str) -> bool:
+        """
+        Count a new URL against the caps of the patterns it matches
+
+        Returns:
+            bool: False if a cap is reached and the URL should be dropped
+        """
+        matched = self.patterns(url)
+        for name, template in matched:
+            if self.seen[name, template] >= self.caps[name]:
+                self.blocked[name] += 1
+                return False
+        for key in matched:
+            self.seen[key] += 1
+        return True
+
+
+class Canonicalizer:
+    """
+    Maps the URL variants of one website to a single canonical URL
+
+    Pages are reachable under many URLs: with and without "www.", a
+    trailing slash or "index.html", http and https, session ids in the
+    path and tracking or sorting parameters in the query. Fetching each
+    variant costs a render and stores the same page twice. The
+    canonicalizer rewrites every discovered URL to one form:
+
+    - scheme and host of the start URL (www and apex are one site),
+      without default port and fragment
+    - session path segments (";jsessionid=...") and index files removed,
+      trailing slash stripped (except for the root)
+    - only the query parameters in keep_params, sorted
+
+    resolve() also drops URLs caught by the TrapDetector and counts the
+    fetches saved compared with plain normalization (see snapshot()).
+    One canonicalizer is used per job, by both discovery and extraction.
+    """
+
+    def __init__(
+        self,
+        start_url: str,
+        keep_params=KEEP_QUERY_PARAMS,
+        index_files=INDEX_FILES,
+        strip_trailing_slash: bool = STRIP_TRAILING_SLASH,
+        lowercase_paths: bool = LOWERCASE_PATHS,
+        honour_rel_canonical: bool = HONOUR_REL_CANONICAL,
+        traps: TrapDetector = None,
+    ):
+        """
+        Args:
+            start_url: Starting URL of the job; its scheme and host are kept
+            keep_params: Query parameters that are part of the canonical URL
+            index_files: File names that stand for their directory
+            strip_trailing_slash: Remove a trailing "/" from paths
+            lowercase_paths: Lowercase paths (case-insensitive servers only)
+            honour_rel_canonical: Follow the pages' <link rel="canonical">
+            traps: Detector for crawler traps (default: TrapDetector())
+        """
+        parts = urlsplit(start_url)
+        self.scheme = parts.scheme.lower() or "https"
+        self.netloc = parts.netloc
+        self.site = site_host(parts.netloc, self.scheme)
+        host, _, port = parts.netloc.lower().partition(":")
+        self.host = host if not port or port == DEFAULT_PORTS.get(self.scheme) else f"{host}:{port}"
+        self.keep_params = frozenset(keep_params)
+        self.index_files = tuple(index_files)
+        self.strip_trailing_slash = strip_trailing_slash
+        self.lowercase_paths = lowercase_paths
+        self.honour_rel_canonical = honour_rel_canonical
+        self.traps = traps if traps is not None else TrapDetector()
+        self.start = self.canonical(start_url)
+
+        self.collapsed = 0      # Variants of a URL that was already known
+        self.aliases = 0        # Pages stored under their rel=canonical URL instead
+        self.duplicates = 0     # Pages whose rel=canonical URL was already known
+        self._variants = set()  # Plainly normalized URLs that differ from their canonical form
+        self._targets = set()   # Canonical URLs first reached through a variant
+
+    def same_site(self, netloc: str, scheme: str = "https") -> bool:
+        """
+        Returns:
+            bool: True if the netloc is the start URL's host or its www/apex variant
+        """
+        return site_host(netloc, scheme) == self.site
+
+    def canonical(self, url: str):
+        """
+        Canonical form of an absolute URL
+
+        Returns:
+            str: Canonical URL, or None if it is not on this website
+        """
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in DEFAULT_PORTS or not self.same_site(parts.netloc, scheme):
+            return None
+
+        path = parts.path
+        if ";" in path:
+            path = SESSION_SEGMENT.sub("", path)
+        if "(" in path:
+            path = ASPNET_SESSION.sub("", path)
+        if "//" in path:
+            path = re.sub(r"/{2,}", "/", path)
+        if self.lowercase_paths:
+            path = path.lower()
+        head, _, last = path.rpartition("/")
+        if last.lower() in self.index_files:
+            path = head + "/"
+        if self.strip_trailing_slash and len(path) > 1:
+            path = path.rstrip("/")
+        path = path or "/"
+
+        query = ""
+        if parts.query and self.keep_params:
+            params = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k in self.keep_params]
+            query = urlencode(sorted(params))
+        return f"{self.scheme}://{self.host}{path}" + (f"?{query}" if query else "")
+
+    def resolve(self, url: str, known) -> str:
+        """
+        Canonicalize a discovered URL and decide whether it may be queued
+
+        Args:
+            url: Absolute internal URL (query kept if keep_params is set)
+            known: Container of the canonical URLs already queued
+
+        Returns:
+            str: Canonical URL, or None if it is off-site or caught in a trap
+        """
+        canon = self.canonical(url)
+        if canon is None:
+            return None
+
+        # Count the variants plain normalization (host, scheme and path
+        # as given, query dropped) would have fetched separately
+        plain = url.split("?", 1)[0].split("#", 1)[0]
+        if urlsplit(plain).netloc == self.netloc:
+            if plain != canon.split("?", 1)[0]:
+                if plain not in self._variants:
+                    self._variants.add(plain)
+                    if canon in known:
+                        self.collapsed += 1
+                    else:
+                        self._targets.add(canon)
+            elif canon in self._targets:
+                self._targets.discard(canon)
+                self.collapsed += 1
+
+        if canon not in known and canon != self.start and not self.traps.allow(canon):
+            return None
+        return canon
+
+    def page_canonical(self, page_url: str, html: str):
+        """
+        Canonical URL a fetched page declares for itself
+
+        Links to another site and to the start page are ignored: sites
+        that point every page at their home page would otherwise lose
+        all content.
+
+        Args:
+            page_url: Canonical URL the page was fetched as
+            html: Page HTML
+
+        Returns:
+            str: Canonical form of the page's rel=canonical URL, or None if
+                it has none or names the page itself
+        """
+        if not self.honour_rel_canonical or not html:
+            return None
+        href = rel_canonical(html)
+        if href is None:
+            return None
+        target = self.canonical(urljoin(page_url, href))
+        if target is None or target == page_url or target == self.start:
+            return None
+        return target
+
+    def eliminated(self) -> int:
+        """
+        Returns:
+            int: Fetches saved by collapsing variants, trap caps and rel=canonical
+        """
+        return self.collapsed + sum(self.traps.blocked.values()) + self.aliases
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+            dict: Counters of the URLs canonicalization removed
+        """
+        return {
+            "eliminated": self.eliminated(),
+            "collapsed": self.collapsed,
+            "aliases": self.aliases,
+            "duplicates": self.duplicates,
+            "trapped": dict(self.traps.blocked),
+        }
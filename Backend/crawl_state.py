@@ -0,0 +1,173 @@
+import time
+from storage import Store, get_store
+from url_store import QUEUED, VISITED, COMPLETED, make_url_store
+
+# Configuration constants
+FLUSH_EVERY = 1000           # Changed URL states that trigger a checkpoint
+FLUSH_INTERVAL = 30          # Seconds after which a checkpoint is due
+
+
+class CrawlState:
+    """
+    Frontier, visited and completed URLs of one job, checkpointed to the database
+
+    Discovery and extraction mark every URL as they go; flush() writes the
+    changes together with the job's phase, options and page counters in a
+    single transaction. A job that is stopped or dies can then continue
+    from the last checkpoint (run_scrape(resume=True)): known URLs are not
+    discovered again and completed pages are not fetched again.
+
+    The caller decides when to flush, because a URL may only be written as
+    completed once its output is on disk (see PageProcessor.checkpoint).
+    The URLs are held in a URLStore; with a seen filter configured
+    (SCRAPER_SEEN_FILTER_FP) completed URLs leave memory once they are
+    checkpointed and are read back from the database when needed.
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        url: str,
+        store: Store = None,
+        flush_every: int = FLUSH_EVERY,
+        flush_interval: float = FLUSH_INTERVAL,
+    ):
+        """
+        Args:
+            job_id: Unique job identifier
+            url: Starting URL of the job
+            store: Database holding the checkpoints (default: shared store)
+            flush_every: Changed URL states after which flush_due() is True
+            flush_interval: Seconds after which flush_due() is True
+        """
+        self.job_id = job_id
+        self.url = url
+        self.store = store or get_store()
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.phase = "crawling"   # "crawling" (pipelined), "discovering" or "extracting"
+        self.options = {}         # run_scrape arguments to resume with
+        self.out_dir = None       # Output folder, kept when the job resumes on another day
+        self.counters = {}        # Page counters of the PageProcessor
+        self.urls = make_url_store()  # url -> state, in the order the URLs were queued
+        self.pending = {}         # States not yet written to the database
+        self.resumed = False      # True if load() found a checkpoint
+        self._last_flush = time.monotonic()
+
+    def load(self):
+        """
+        Read the job's last checkpoint, if there is one
+
+        Returns:
+            CrawlState: The state itself, for chaining
+        """
+        checkpoint = self.store.get_crawl_checkpoint(self.job_id)
+        if checkpoint is not None:
+            self.resumed = True
+            self.phase = checkpoint["phase"]
+            self.options = checkpoint["options"]
+            self.out_dir = checkpoint["out_dir"]
+            self.counters = checkpoint["counters"]
+            for url, state in self.store.load_crawl_urls(self.job_id).items():
+                self.urls.mark(url, state)
+                if state == COMPLETED:
+                    self.urls.forget(url)
+        return self
+
+    def _mark(self, url: str, state: int):
+        if self.urls.mark(url, state) is not None:
+            self.pending[url] = state
+
+    def add(self, url: str):
+        """
+        Record a URL added to the frontier if it was not seen before
+
+        Returns:
+            bytes: Key of the URL in self.urls if it is new, otherwise None
+        """
+        key = self.urls.add(url)
+        if key is not None:
+            self.pending[url] = QUEUED
+        return key
+
+    def queue(self, url: str):
+        """Record a URL added to the frontier"""
+        self._mark(url, QUEUED)
+
+    def visit(self, url: str):
+        """Record a fetched URL whose links are queued"""
+        self._mark(url, VISITED)
+
+    def complete(self, url: str):
+        """Record a URL whose page was processed"""
+        self._mark(url, COMPLETED)
+
+    def unfinished(self, below: int = COMPLETED) -> list:
+        """
+        Returns:
+            list: URLs whose state is lower than below, in queue order
+        """
+        return [url for url, state in self.urls.items() if state < below]
+
+    def completed(self) -> set:
+        """
+        Returns:
+            set: URLs whose page was processed
+        """
+        completed = {url for url, state in self.urls.items() if state == COMPLETED}
+        if self.urls.forgotten:
+            stored = self.store.load_crawl_urls(self.job_id)
+            completed.update(url for url, state in stored.items() if state == COMPLETED)
+        return completed
+
+    def known(self) -> set:
+        """
+        Returns:
+            set: Every URL of the job, including those only in the database
+        """
+        known = set(self.urls)
+        if self.urls.forgotten:
+            known.update(self.store.load_crawl_urls(self.job_id))
+        return known
+
+    def flush_due(self) -> bool:
+        """
+        Returns:
+            bool: True if enough changes or time passed since the last flush
+        """
+        if not self.pending:
+            return False
+        if self.flush_every and len(self.pending) >= self.flush_every:
+            return True
+        return time.monotonic() - self._last_flush >= self.flush_interval
+
+    def flush(self, counters: dict = None):
+        """
+        Write a checkpoint with the changed URL states
+
+        Args:
+            counters: Current page counters (default: the last ones given)
+        """
+        if counters is not None:
+            self.counters = counters
+        self.store.save_crawl_checkpoint(
+            self.job_id,
+            self.pending,
+            url=self.url,
+            phase=self.phase,
+            options=self.options,
+            out_dir=self.out_dir,
+            counters=self.counters,
+        )
+        # Checkpointed completed URLs only need to be recognized as seen
+        for url, state in self.pending.items():
+            if state == COMPLETED:
+                self.urls.forget(url)
+        self.pending = {}
+        self._last_flush = time.monotonic()
+
+    def clear(self):
+        """Delete the checkpoint once the job has finished"""
+        self.store.delete_crawl_checkpoint(self.job_id)
+        self.urls = make_url_store()
+        self.pending = {}
@@ -0,0 +1,276 @@
+import re
+import copy
+from collections import Counter
+from urllib.parse import urlparse
+import httpx
+from crawl4ai import CrawlerRunConfig, CacheMode
+from crawl4ai.models import CrawlResult
+from http_client import make_client
+from metrics import stage_seconds
+
+# Configuration constants
+MIN_TEXT_CHARS = 200         # Visible text below which a page with scripts counts as JS-rendered
+NOSCRIPT_TEXT_CHARS = 1000   # Same, for pages whose <noscript> asks to enable JavaScript
+MIN_SAMPLES = 3              # Pages seen before a host or path prefix gets a fixed tier
+BROWSER_SHARE = 0.9          # Share of escalated pages that sends a prefix to the browser
+PROBE_EVERY = 50             # Still try every n-th page of a browser prefix over HTTP
+ESCALATE_STATUSES = (403, 503)  # Often bot challenges that only a browser passes
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+
+# Heuristics for pages that need JavaScript to show their content
+SCRIPT_RE = re.compile(r"<script\b[^>]*>.*?</script\s*>", re.I | re.S)
+HIDDEN_RE = re.compile(r"<(style|template|noscript|head)\b[^>]*>.*?</\1\s*>", re.I | re.S)
+TAG_RE = re.compile(r"<[^>]+>")
+SPACE_RE = re.compile(r"\s+")
+MOUNT_RE = re.compile(
+    r'<(div|main|section)\b[^>]*\bid=["\'](root|app|__next|__nuxt|___gatsby|svelte)["\'][^>]*>\s*</\1\s*>'
+    r"|<app-root\b[^>]*>\s*</app-root\s*>",
+    re.I,
+)
+NOSCRIPT_RE = re.compile(r"<noscript\b[^>]*>(.*?)</noscript\s*>", re.I | re.S)
+
+
+def js_rendered_reason(html: str):
+    """
+    Tell whether a server response needs a browser to show its content
+
+    Args:
+        html: Raw HTML as returned by the server
+
+    Returns:
+        str: "mount-point" (empty SPA root element), "noscript" (asks to
+            enable JavaScript) or "little-text" (scripts but almost no
+            visible text); None for a complete server-rendered page
+    """
+    if MOUNT_RE.search(html):
+        return "mount-point"
+    without_scripts = SCRIPT_RE.sub(" ", html)
+    if len(without_scripts) == len(html):
+        return None  # Without scripts nothing more would appear in a browser
+    text = SPACE_RE.sub(" ", TAG_RE.sub(" ", HIDDEN_RE.sub(" ", without_scripts))).strip()
+    if len(text) < MIN_TEXT_CHARS:
+        return "little-text"
+    if len(text) < NOSCRIPT_TEXT_CHARS and any(
+        "javascript" in block.lower() for block in NOSCRIPT_RE.findall(html)
+    ):
+        return "noscript"
+    return None
+
+
+class TierMemory:
+    """
+    Remembers per host and path prefix whether pages need the browser
+
+    The prefix is the host plus the first path segment, so /agenda on a
+    site can be rendered while its static /zorgaanbieders pages are not.
+    Until a prefix has MIN_SAMPLES pages the host-wide counts decide, and
+    until the host has them every page is tried over HTTP first. Every
+    PROBE_EVERY-th page sent to the browser is still tried over HTTP, so a
+    site that starts rendering on the server is noticed. Shared by all
+    jobs of the scheduler.
+    """
+
+    def __init__(
+        self,
+        min_samples: int = MIN_SAMPLES,
+        browser_share: float = BROWSER_SHARE,
+        probe_every: int = PROBE_EVERY,
+    ):
+        self.min_samples = min_samples
+        self.browser_share = browser_share
+        self.probe_every = probe_every
+        self.counts = {}  # (host, prefix) -> Counter of "http"/"browser"; prefix None is the host
+        self.skipped = Counter()  # key -> pages sent to the browser without trying HTTP
+
+    @staticmethod
+    def keys(url: str):
+        """
+        Returns:
+            tuple: (prefix key, host key) of the URL
+        """
+        parsed = urlparse(url)
+        segment = parsed.path.strip("/").split("/", 1)[0]
+        return (parsed.netloc, f"/{segment}"), (parsed.netloc, None)
+
+    def choose(self, url: str) -> str:
+        """
+        Returns:
+            str: "browser" if pages like this one are known to need it,
+                otherwise "http" (try the HTTP client first)
+        """
+        for key in self.keys(url):
+            counts = self.counts.get(key)
+            if counts is None:
+                continue
+            total = counts["http"] + counts["browser"]
+            if total < self.min_samples:
+                continue
+            if counts["browser"] < self.browser_share * total:
+                return "http"
+            self.skipped[key] += 1
+            if self.probe_every and self.skipped[key] % self.probe_every == 0:
+                return "http"
+            return "browser"
+        return "http"
+
+    def record(self, url: str, tier: str):
+        """Count the tier a page of the URL's prefix needed"""
+        for key in self.keys(url):
+            self.counts.setdefault(key, Counter())[tier] += 1
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+            dict: {host: {"http", "browser", "browser_prefixes"}} where
+                browser_prefixes lists the prefixes sent to the browser
+        """
+        hosts = {}
+        for (host, prefix), counts in self.counts.items():
+            entry = hosts.setdefault(host, {"http": 0, "browser": 0, "browser_prefixes": []})
+            if prefix is None:
+                entry["http"] = counts["http"]
+                entry["browser"] = counts["browser"]
+            elif counts["browser"] >= max(self.min_samples, self.browser_share * sum(counts.values())):
+                entry["browser_prefixes"].append(prefix)
+        return hosts
+
+
+class TieredCrawler:
+    """
+    Crawler wrapper that fetches static pages without driving the browser
+
+    Pages are downloaded with the pooled HTTP client (keep-alive, HTTP/2,
+    gzip/brotli) and handed to the wrapped crawler as raw HTML, so
+    crawl4ai's content filter and markdown generation run without opening
+    a browser page. Responses that look JS-rendered, are not HTML or are
+    likely bot challenges are fetched again with the browser, and the
+    decision is remembered per host and path prefix (TierMemory). Other
+    attributes are passed on to the wrapped crawler.
+
+    The caller's host token (RateLimitedCrawler) covers one request; a
+    page fetched again with the browser waits for a second token of the
+    rate limiter given here.
+    """
+
+    def __init__(self, crawler, memory: TierMemory = None, client=None, rate_limiter=None):
+        """
+        Args:
+            crawler: AsyncWebCrawler (or wrapper) used for rendering
+            memory: Tier decisions, shared between jobs (default: a new one)
+            client: httpx.AsyncClient (default: a new client, closed by close())
+            rate_limiter: RateLimiter of the job, for the browser request
+                after an HTTP attempt (optional)
+        """
+        self.crawler = crawler
+        self.memory = memory or TierMemory()
+        self.client = client
+        self.rate_limiter = rate_limiter
+        self._own_client = client is None
+        self._default_config = None
+
+        # Counters
+        self.http_pages = 0       # Pages served without the browser
+        self.browser_pages = 0    # Pages rendered by the browser
+        self.escalations = Counter()  # Reason -> pages tried over HTTP first
+
+    async def arun(self, url, config=None, session_id=None, **kwargs):
+        if not url.startswith(("http://", "https://")) or self.memory.choose(url) == "browser":
+            return await self._render(url, config, session_id, **kwargs)
+
+        if self.client is None:
+            self.client = make_client()
+        try:
+            resp = await self.client.get(url)
+        except httpx.HTTPError:
+            self.escalations["http-error"] += 1
+            return await self._escalate(url, config, session_id, **kwargs)
+
+        reason = self.escalation_reason(resp)
+        if reason is not None:
+            self.escalations[reason] += 1
+            if reason != "content-type":  # Files say nothing about the prefix
+                self.memory.record(url, "browser")
+            return await self._escalate(url, config, session_id, **kwargs)
+
+        self.http_pages += 1
+        headers = dict(resp.headers)
+        if resp.status_code >= 400:
+            return CrawlResult(
+                url=url,
+                html="",
+                success=False,
+                status_code=resp.status_code,
+                response_headers=headers,
+                error_message=f"HTTP {resp.status_code}",
+            )
+        self.memory.record(url, "http")
+        with stage_seconds.time("extract"):
+            res = await self.crawler.arun(f"raw:{resp.text}", self._raw_config(config, str(resp.url)))
+        res.url = url
+        res.redirected_url = str(resp.url)
+        res.status_code = resp.status_code
+        res.response_headers = headers
+        return res
+
+    def _raw_config(self, config, base_url: str):
+        """
+        Copy of the page's config for processing downloaded HTML
+
+        CrawlerRunConfig.clone() inspects the constructor signature for
+        every attribute (~0.1 s per call), so the copy is shallow and the
+        two fields are set directly.
+        """
+        if config is None:
+            if self._default_config is None:
+                self._default_config = CrawlerRunConfig()
+            config = self._default_config
+        raw = copy.copy(config)
+        raw.__dict__.update(base_url=base_url, cache_mode=CacheMode.BYPASS)  # Links resolve against the page
+        return raw
+
+    async def _escalate(self, url, config, session_id, **kwargs):
+        # The HTTP request used the caller's token; the render is another request to the host
+        if self.rate_limiter is not None:
+            host = await self.rate_limiter.host(url)
+            await host.acquire()
+        return await self._render(url, config, session_id, **kwargs)
+
+    async def _render(self, url, config, session_id, **kwargs):
+        self.browser_pages += 1
+        with stage_seconds.time("render"):
+            return await self.crawler.arun(url, config, session_id=session_id, **kwargs)
+
+    @staticmethod
+    def escalation_reason(resp):
+        """
+        Returns:
+            str: Why the response needs the browser, or None if it is usable
+        """
+        if resp.status_code in ESCALATE_STATUSES:
+            return "status"
+        if resp.status_code >= 400:
+            return None  # A real error; the browser would get the same
+        content_type = resp.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type not in HTML_TYPES:
+            return "content-type"
+        return js_rendered_reason(resp.text)
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+            dict: Pages per tier and escalation reasons
+        """
+        return {
+            "http_pages": self.http_pages,
+            "browser_pages": self.browser_pages,
+            "escalations": dict(self.escalations),
+        }
+
+    async def close(self):
+        """Close the HTTP client if this crawler created it"""
+        if self._own_client and self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def __getattr__(self, name):
+        return getattr(self.crawler, name)
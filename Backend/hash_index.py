@@ -0,0 +1,133 @@
+import time
+import hashlib
+from datetime import datetime
+from storage import Store, get_store
+
+# Configuration constants
+FLUSH_EVERY = 1000           # Pending updates that trigger a checkpoint flush
+FLUSH_INTERVAL = 30          # Seconds after which pending updates are checkpointed
+
+
+def hash_content(text: str) -> str:
+    """
+    Compute the content hash used for duplicate detection
+
+    Args:
+        text: Cleaned page summary
+
+    Returns:
+        str: Hex encoded SHA-256 digest of the text
+    """
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class HashIndex:
+    """
+    In-memory index of page content hashes backed by the page_hashes table
+
+    The stored hashes are loaded once per job, lookups are plain dictionary
+    reads and updates are buffered until a checkpoint. A flush upserts the
+    buffered rows in a single transaction, so concurrent jobs only touch
+    their own rows and a crash never leaves a half-written database behind.
+    """
+
+    def __init__(
+        self,
+        store: Store = None,
+        flush_every: int = FLUSH_EVERY,
+        flush_interval: float = FLUSH_INTERVAL,
+    ):
+        """
+        Args:
+            store: Database holding the hashes (default: shared store)
+            flush_every: Pending updates after which put() flushes automatically
+            flush_interval: Seconds after which put() flushes automatically
+        """
+        self.store = store or get_store()
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.data = {}      # {domain: {url: {"hash": ..., "timestamp": ...}}}
+        self.pending = {}   # Updates not yet written to the database, same layout
+        self.pending_count = 0
+        self._last_flush = time.monotonic()
+
+    def load(self, domain: str = None):
+        """
+        Load stored hashes into memory
+
+        Args:
+            domain: Only load this domain (default: everything)
+
+        Returns:
+            HashIndex: The index itself, for chaining
+        """
+        self.data = self.store.load_hashes(domain)
+        return self
+
+    def get(self, domain: str, url: str):
+        """
+        Get the stored entry for a URL
+
+        Args:
+            domain: Domain the URL belongs to
+            url: Page URL
+
+        Returns:
+            dict: Entry with "hash" and "timestamp", or None if unknown
+        """
+        return self.data.get(domain, {}).get(url)
+
+    def is_unchanged(self, domain: str, url: str, content_hash: str) -> bool:
+        """
+        Check whether a page was stored before with identical content
+
+        Args:
+            domain: Domain the URL belongs to
+            url: Page URL
+            content_hash: Hash of the freshly extracted content
+
+        Returns:
+            bool: True if the stored hash equals content_hash
+        """
+        entry = self.get(domain, url)
+        return entry is not None and entry.get("hash") == content_hash
+
+    def put(self, domain: str, url: str, content_hash: str, timestamp: str = None, simhash: int = None):
+        """
+        Record the content hash of a page
+
+        The update is visible to lookups immediately and written to the
+        database at the next checkpoint.
+
+        Args:
+            domain: Domain the URL belongs to
+            url: Page URL
+            content_hash: Hash of the extracted content
+            timestamp: ISO timestamp (default: current time)
+            simhash: Fingerprint of the page content for near-duplicate
+                detection (optional, see near_dup.simhash)
+        """
+        entry = {
+            "hash": content_hash,
+            "timestamp": timestamp or datetime.now().isoformat(),
+        }
+        if simhash is not None:
+            entry["simhash"] = simhash
+        self.data.setdefault(domain, {})[url] = entry
+        self.pending.setdefault(domain, {})[url] = entry
+        self.pending_count += 1
+        if self.flush_every and self.pending_count >= self.flush_every:
+            self.flush()
+        elif time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write pending updates to the database in one transaction"""
+        if self.pending:
+            self.store.save_hashes(self.pending)
+            self.pending = {}
+            self.pending_count = 0
+        self._last_flush = time.monotonic()
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.data.values())
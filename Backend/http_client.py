@@ -0,0 +1,39 @@
+import httpx
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+except ImportError:  # h2 is optional; connections then stay on HTTP/1.1
+    h2 = None
+
+# Configuration constants
+HTTP_TIMEOUT = 15.0         # Seconds per request
+HTTP_MAX_CONNECTIONS = 20   # Open connections across all hosts
+USER_AGENT = "Mozilla/5.0 (compatible; ZorgScraper/1.0)"
+
+
+def make_client(**overrides) -> httpx.AsyncClient:
+    """
+    Create the lightweight HTTP client used next to the browser
+
+    Connections are kept alive between requests, HTTP/2 is negotiated when
+    the h2 package is installed, and gzip (plus brotli when installed)
+    responses are decompressed transparently. The caller closes the client
+    (it is an async context manager).
+
+    Args:
+        **overrides: Extra httpx.AsyncClient arguments (e.g. transport)
+
+    Returns:
+        httpx.AsyncClient: Configured client
+    """
+    options = {
+        "timeout": HTTP_TIMEOUT,
+        "follow_redirects": True,
+        "http2": h2 is not None,
+        "headers": {"User-Agent": USER_AGENT},
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS
+        ),
+    }
+    options.update(overrides)
+    return httpx.AsyncClient(**options)
@@ -0,0 +1,187 @@
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from storage import Store, get_store
+
+# Configuration constants
+FLUSH_EVERY = 1000           # Pending updates that trigger a checkpoint flush
+FLUSH_INTERVAL = 30          # Seconds after which pending updates are checkpointed
+
+
+def parse_lastmod(value: str):
+    """
+    Parse a sitemap <lastmod> (W3C datetime) or an HTTP date
+
+    Returns:
+        datetime: Timezone-aware datetime, or None if the value is unusable
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def response_validators(headers) -> dict:
+    """
+    Pick the cache validators out of response headers
+
+    Args:
+        headers: Mapping of response headers (any case), or None
+
+    Returns:
+        dict: "etag" and "last_modified" (None when absent)
+    """
+    lowered = {k.lower(): v for k, v in (headers or {}).items()}
+    return {"etag": lowered.get("etag"), "last_modified": lowered.get("last-modified")}
+
+
+class ValidatorIndex:
+    """
+    ETag, Last-Modified and sitemap lastmod per URL of one domain
+
+    Backed by the page_validators table; loaded once per job and written
+    at checkpoints, like HashIndex.
+    """
+
+    def __init__(
+        self,
+        domain: str,
+        store: Store = None,
+        flush_every: int = FLUSH_EVERY,
+        flush_interval: float = FLUSH_INTERVAL,
+    ):
+        """
+        Args:
+            domain: Domain whose validators are kept
+            store: Database holding the validators (default: shared store)
+            flush_every: Pending updates after which put() flushes automatically
+            flush_interval: Seconds after which put() flushes automatically
+        """
+        self.domain = domain
+        self.store = store or get_store()
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.data = {}
+        self.pending = {}
+        self._last_flush = time.monotonic()
+
+    def load(self):
+        """
+        Returns:
+            ValidatorIndex: The index itself, for chaining
+        """
+        self.data = self.store.load_validators(self.domain)
+        return self
+
+    def get(self, url: str):
+        """
+        Returns:
+            dict: Stored etag, last_modified and lastmod, or None
+        """
+        return self.data.get(url)
+
+    def put(self, url: str, etag: str = None, last_modified: str = None, lastmod: str = None):
+        """Record the validators seen for a page at this fetch"""
+        entry = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "lastmod": lastmod,
+            "timestamp": datetime.now().isoformat(),
+        }
+        self.data[url] = entry
+        self.pending[url] = entry
+        if self.flush_every and len(self.pending) >= self.flush_every:
+            self.flush()
+        elif time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write pending updates to the database in one transaction"""
+        if self.pending:
+            self.store.save_validators(self.domain, self.pending)
+            self.pending = {}
+        self._last_flush = time.monotonic()
+
+
+class ChangeDetector:
+    """
+    Decides before the browser runs whether a known page may have changed
+
+    A page is skipped without any request when the sitemap lastmod is not
+    newer than the one stored at the previous fetch. Otherwise, if the
+    server sent an ETag or Last-Modified before, a conditional GET is made
+    and a 304 answer skips the page. Pages without stored content, without
+    validators, or whose check fails are always fetched.
+    """
+
+    def __init__(self, client, validators: ValidatorIndex, known_urls, sitemap_lastmods: dict = None,
+                 rate_limiter=None):
+        """
+        Args:
+            client: httpx.AsyncClient for conditional requests
+            validators: Stored validators of the domain
+            known_urls: URLs whose content was stored before
+            sitemap_lastmods: {url: lastmod} from the current sitemap
+            rate_limiter: RateLimiter the conditional requests wait for (optional)
+        """
+        self.client = client
+        self.validators = validators
+        self.known_urls = known_urls
+        self.sitemap_lastmods = sitemap_lastmods or {}
+        self.rate_limiter = rate_limiter
+
+        # Counters
+        self.sitemap_skips = 0          # Skipped on sitemap lastmod, no request
+        self.conditional_requests = 0
+        self.not_modified = 0           # Skipped on a 304 answer
+
+    async def should_fetch(self, url: str) -> bool:
+        """
+        Returns:
+            bool: False if the page is known to be unchanged
+        """
+        if url not in self.known_urls:
+            return True
+        stored = self.validators.get(url) or {}
+
+        current = parse_lastmod(self.sitemap_lastmods.get(url))
+        previous = parse_lastmod(stored.get("lastmod"))
+        if current is not None and previous is not None and current <= previous:
+            self.sitemap_skips += 1
+            return False
+
+        headers = {}
+        if stored.get("etag"):
+            headers["If-None-Match"] = stored["etag"]
+        if stored.get("last_modified"):
+            headers["If-Modified-Since"] = stored["last_modified"]
+        if not headers:
+            return True
+
+        self.conditional_requests += 1
+        try:
+            if self.rate_limiter is not None:
+                await (await self.rate_limiter.host(url)).acquire()
+            async with self.client.stream("GET", url, headers=headers) as resp:
+                status = resp.status_code  # The body is not needed
+        except Exception:
+            return True
+        if status == 304:
+            self.not_modified += 1
+            return False
+        return True
+
+    def snapshot(self) -> dict:
+        return {
+            "sitemap_skips": self.sitemap_skips,
+            "conditional_requests": self.conditional_requests,
+            "not_modified": self.not_modified,
+        }
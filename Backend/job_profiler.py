@@ -0,0 +1,245 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+import contextvars
+import weakref
+from collections import Counter
+from contextlib import contextmanager
+from storage import get_store
+
+# Configuration constants (override with environment variables)
+PROFILE_INTERVAL = float(os.environ.get("SCRAPER_PROFILE_INTERVAL", 0.005))  # Seconds between stack samples
+MAX_DEPTH = 128          # Frames kept per sample (innermost first)
+TOP_FUNCTIONS = 25       # Functions listed in the profile summary
+
+ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+HANDLE_RUN = asyncio.events.Handle._run.__code__  # Runs a task step: the stack above it is the task's
+
+_current = contextvars.ContextVar("job_profiler", default=None)  # Profiler of the running task
+_factories = {}  # loop -> [task factory before profiling, number of active profilers]
+running = {}     # job_id -> JobProfiler of the jobs being profiled in this process
+
+
+def _task_factory(loop, coro, **kwargs):
+    """Create a task and assign it to the profiled job that created it"""
+    previous = _factories[loop][0]
+    if previous is not None:
+        task = previous(loop, coro, **kwargs)
+    else:
+        task = asyncio.Task(coro, loop=loop, **kwargs)
+    context = kwargs.get("context")
+    profiler = context.get(_current) if context is not None else _current.get()
+    if profiler is not None:
+        profiler.tasks.add(task)
+    return task
+
+
+def frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+
+def await_chain(coro) -> list:
+    """
+    Returns:
+        list: Frames of a suspended coroutine and the coroutines it awaits,
+            outermost first
+    """
+    frames = []
+    while coro is not None and len(frames) < MAX_DEPTH:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return frames
+
+
+class JobProfiler:
+    """
+    Sampling profiler for the asyncio tasks of one job
+
+    Jobs share the scheduler's event loop, so a per-thread profiler such
+    as cProfile would mix them up. Instead every task the job creates is
+    traced (a task factory assigns new tasks to the job of the task that
+    created them), and a background thread takes a sample every interval
+    seconds, in the folded stack format:
+
+    - "cpu;[task <coroutine>];<frames>": the loop thread's stack, when
+      one of the job's tasks is running
+    - "wait;[task <coroutine>];<frames>": the await chain of every other
+      task of the job, i.e. where it is suspended (a fetch, the rate
+      limiter, the offload pool); these add up to wall-clock task time
+
+    Work in the CPU offload pool and other threads is not sampled.
+    """
+
+    def __init__(self, job_id: str, interval: float = PROFILE_INTERVAL):
+        """
+        Args:
+            job_id: Unique job identifier
+            interval: Seconds between stack samples
+        """
+        self.job_id = job_id
+        self.interval = interval
+        self.tasks = weakref.WeakSet()  # Tasks of the job
+        self.stacks = Counter()         # Folded stack -> samples
+        self.samples = 0                # Samples taken
+        self.busy = 0                   # Samples with one of the job's tasks running
+        self.other = 0                  # Samples with another job's task running
+        self.idle = 0                   # Samples with the loop waiting for I/O or timers
+        self.started = None
+        self.stopped = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Trace the tasks of the calling task's job and start sampling (in the loop)"""
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        factory = _factories.get(self.loop)
+        if factory is None:
+            factory = _factories[self.loop] = [self.loop.get_task_factory(), 0]
+            self.loop.set_task_factory(_task_factory)
+        factory[1] += 1
+        self.tasks.add(asyncio.current_task())
+        self._token = _current.set(self)
+        self.started = time.time()
+        self._thread = threading.Thread(target=self._sample, name=f"profile-{self.job_id}", daemon=True)
+        self._thread.start()
+        running[self.job_id] = self
+
+    def stop(self):
+        """Stop sampling and tracing; the caller's task must be the one that started"""
+        self._stop.set()
+        self._thread.join()
+        self.stopped = time.time()
+        _current.reset(self._token)
+        factory = _factories[self.loop]
+        factory[1] -= 1
+        if factory[1] == 0:
+            self.loop.set_task_factory(factory[0])
+            del _factories[self.loop]
+        running.pop(self.job_id, None)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.loop_thread)
+            current = asyncio.current_task(self.loop)
+            try:
+                tasks = [task for task in self.tasks if not task.done()]
+            except RuntimeError:
+                continue  # The loop created a task while the set was copied
+            samples = Counter()
+            if current is None:
+                self.idle += 1
+            elif current in self.tasks and frame is not None:
+                frames = []
+                while frame is not None and frame.f_code is not HANDLE_RUN and len(frames) < MAX_DEPTH:
+                    frames.append(frame)
+                    frame = frame.f_back
+                # Leave out the task machinery between the loop and the coroutine
+                while frames and frames[-1].f_code.co_filename.startswith(ASYNCIO_DIR):
+                    frames.pop()
+                samples[self._fold("cpu", current, reversed(frames))] += 1
+                self.busy += 1
+            else:
+                self.other += 1
+            for task in tasks:
+                if task is not current:
+                    samples[self._fold("wait", task, await_chain(task.get_coro()))] += 1
+            with self._lock:
+                self.stacks.update(samples)
+                self.samples += 1
+
+    @staticmethod
+    def _fold(kind: str, task, frames) -> str:
+        coro = task.get_coro()
+        names = [kind, f"[task {getattr(coro, '__qualname__', task.get_name())}]"]
+        names.extend(frame_name(frame) for frame in frames)
+        return ";".join(names)
+
+    def folded(self) -> str:
+        """
+        Returns:
+            str: Samples in the folded stack format ("frame;frame;frame count"
+                per line), read by flamegraph.pl, inferno and speedscope
+        """
+        with self._lock:
+            stacks = self.stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def summary(self) -> dict:
+        """
+        Returns:
+            dict: Sample counts, CPU samples per task, the functions with the
+                most CPU samples on top of the stack (self) and anywhere in
+                it (total), and where the job's tasks wait most (waiting)
+        """
+        with self._lock:
+            stacks = list(self.stacks.items())
+        tasks, own, total, waiting = Counter(), Counter(), Counter(), Counter()
+        for stack, count in stacks:
+            kind, task, *frames = stack.split(";")
+            if kind == "wait":
+                if frames:
+                    waiting[frames[-1]] += count
+                continue
+            tasks[task] += count
+            if frames:
+                own[frames[-1]] += count
+            for name in set(frames):
+                total[name] += count
+        end = self.stopped or time.time()
+        return {
+            "job_id": self.job_id,
+            "interval": self.interval,
+            "seconds": round(end - self.started, 3) if self.started else 0.0,
+            "samples": self.samples,
+            "busy": self.busy,
+            "other": self.other,
+            "idle": self.idle,
+            "tasks": dict(tasks.most_common()),
+            "self": dict(own.most_common(TOP_FUNCTIONS)),
+            "total": dict(total.most_common(TOP_FUNCTIONS)),
+            "waiting": dict(waiting.most_common(TOP_FUNCTIONS)),
+        }
+
+
+@contextmanager
+def profile_job(job_id: str, interval: float = PROFILE_INTERVAL):
+    """
+    Profile the calling task and the tasks it creates, then store the profile
+
+    The profile is saved with the job in the database (see
+    Store.save_job_profile), also when the job fails or is cancelled.
+
+    Args:
+        job_id: Unique job identifier
+        interval: Seconds between stack samples
+
+    Yields:
+        JobProfiler: The running profiler
+    """
+    profiler = JobProfiler(job_id, interval)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        get_store().save_job_profile(job_id, profiler.folded(), profiler.summary())
+
+
+def job_profile(job_id: str):
+    """
+    Returns:
+        dict: {"stacks": folded stacks, "summary": dict} of a job being
+            profiled (so far) or profiled before, or None
+    """
+    profiler = running.get(job_id)
+    if profiler is not None:
+        return {"stacks": profiler.folded(), "summary": profiler.summary()}
+    return get_store().get_job_profile(job_id)
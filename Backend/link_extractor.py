@@ -0,0 +1,224 @@
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+from bs4 import BeautifulSoup
+from utils import is_excluded
+from canonical import site_host
+
+try:
+    from lxml import etree
+except ImportError:  # lxml is optional; the BeautifulSoup extractor is the fallback
+    etree = None
+
+# Default extraction strategy: "auto" picks lxml when installed
+LINK_EXTRACTOR = "auto"
+
+
+def normalize_internal(page_url: str, href: str, netloc: str, keep_query: bool = False):
+    """
+    Resolve an href and keep it only if it points to the same site
+
+    The www and apex variants of the host (and a different case or the
+    default port) count as the same site; canonical.Canonicalizer maps
+    them to one host.
+
+    Args:
+        page_url: URL of the page the link was found on
+        href: Raw href attribute value
+        netloc: Host of the website being crawled
+        keep_query: Keep the query string (for canonicalization)
+
+    Returns:
+        str: URL without fragment (and query), or None for external links
+    """
+    parsed = urlparse(urljoin(page_url, href))  # Convert relative to absolute URL
+    if parsed.netloc != netloc and site_host(parsed.netloc, parsed.scheme) != site_host(netloc, parsed.scheme):
+        return None
+    if keep_query and parsed.query:
+        return f"{parsed.scheme}://{parsed.netloc}{parsed.path}?{parsed.query}"
+    return f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+
+
+class LinkExtractor(ABC):
+    """
+    Base class for link extraction strategies
+
+    Subclasses only implement hrefs(); normalization, domain filtering and
+    exclusion of file types are shared.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def hrefs(self, html: str):
+        """
+        Args:
+            html: Page HTML
+
+        Returns:
+            iterable: Raw href values of all <a> tags, in document order
+        """
+
+    def internal_links(self, page_url: str, result, netloc: str, keep_query: bool = False) -> list:
+        """
+        Collect the normalized internal links of a crawled page
+
+        Args:
+            page_url: URL of the crawled page
+            result: Crawl result (needs .html, optionally .links)
+            netloc: Host of the website being crawled
+            keep_query: Keep query strings (see normalize_internal)
+
+        Returns:
+            list: Unique internal, non-excluded URLs in document order
+        """
+        return self._filter(page_url, self.hrefs(result.html or ""), netloc, keep_query)
+
+    def _filter(self, page_url: str, hrefs, netloc: str, keep_query: bool = False) -> list:
+        links = {}
+        for href in hrefs:
+            norm = normalize_internal(page_url, href, netloc, keep_query)
+            if norm and norm not in links and not is_excluded(norm):
+                links[norm] = None
+        return list(links)
+
+
+class SoupLinkExtractor(LinkExtractor):
+    """The original BeautifulSoup(html.parser) extractor; slow but forgiving"""
+
+    name = "bs4"
+
+    def hrefs(self, html: str):
+        soup = BeautifulSoup(html, "html.parser")
+        return [tag["href"] for tag in soup.find_all("a", href=True)]
+
+
+class _AnchorParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.found = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            for name, value in attrs:
+                if name == "href" and value is not None:
+                    self.found.append(value)
+                    break
+
+
+class StreamingLinkExtractor(LinkExtractor):
+    """
+    Streaming tokenizer from the standard library
+
+    Only start tags are inspected and no tree is built, so memory stays
+    flat regardless of page size. Needs no optional dependencies.
+    """
+
+    name = "stream"
+    chunk_size = 64 * 1024
+
+    def hrefs(self, html: str):
+        parser = _AnchorParser()
+        for i in range(0, len(html), self.chunk_size):
+            parser.feed(html[i : i + self.chunk_size])
+        parser.close()
+        return parser.found
+
+
+class LxmlLinkExtractor(LinkExtractor):
+    """
+    libxml2 based extractor (requires lxml)
+
+    Parses in C and only pulls @href values out via XPath. Falls back to
+    BeautifulSoup for documents libxml2 cannot parse.
+    """
+
+    name = "lxml"
+
+    def __init__(self):
+        if etree is None:
+            raise ImportError("lxml is not installed")
+        self._fallback = SoupLinkExtractor()
+
+    def hrefs(self, html: str):
+        if not html.strip():
+            return []
+        try:
+            parser = etree.HTMLParser(recover=True, remove_comments=True)
+            root = etree.fromstring(html, parser)
+        except (ValueError, etree.ParserError, etree.XMLSyntaxError):
+            root = None
+        if root is None:
+            return self._fallback.hrefs(html)
+        return [str(href) for href in root.xpath("//a/@href")]
+
+
+class Crawl4aiLinkExtractor(LinkExtractor):
+    """
+    Reuse the links crawl4ai already extracted into result.links
+
+    crawl4ai returns absolute hrefs grouped in "internal" and "external".
+    Both groups are checked against the crawled host, because crawl4ai
+    counts subdomains as internal. Pages without link data are parsed with
+    the fallback extractor instead.
+    """
+
+    name = "crawl4ai"
+
+    def __init__(self, fallback: LinkExtractor = None):
+        self._fallback = fallback or default_html_extractor()
+
+    def hrefs(self, html: str):
+        return self._fallback.hrefs(html)
+
+    def internal_links(self, page_url: str, result, netloc: str, keep_query: bool = False) -> list:
+        links = getattr(result, "links", None) or {}
+        hrefs = [
+            link.get("href")
+            for group in ("internal", "external")
+            for link in links.get(group, [])
+            if isinstance(link, dict) and link.get("href")
+        ]
+        if not hrefs:
+            return super().internal_links(page_url, result, netloc, keep_query)
+        return self._filter(page_url, hrefs, netloc, keep_query)
+
+
+EXTRACTORS = {
+    SoupLinkExtractor.name: SoupLinkExtractor,
+    StreamingLinkExtractor.name: StreamingLinkExtractor,
+    LxmlLinkExtractor.name: LxmlLinkExtractor,
+    Crawl4aiLinkExtractor.name: Crawl4aiLinkExtractor,
+}
+
+
+def default_html_extractor() -> LinkExtractor:
+    """
+    Returns:
+        LinkExtractor: lxml when installed, otherwise the BeautifulSoup parser
+    """
+    if etree is not None:
+        return LxmlLinkExtractor()
+    return SoupLinkExtractor()
+
+
+def get_link_extractor(name: str = None) -> LinkExtractor:
+    """
+    Create a link extractor by name
+
+    Args:
+        name: "auto", "lxml", "stream", "bs4" or "crawl4ai"
+            (default: LINK_EXTRACTOR)
+
+    Returns:
+        LinkExtractor: The requested strategy
+
+    Raises:
+        ValueError: If the name is unknown
+    """
+    name = name or LINK_EXTRACTOR
+    if name == "auto":
+        return default_html_extractor()
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown link extractor: {name}")
+    return EXTRACTORS[name]()
@@ -1,74 +1,73 @@
 import os
 import json
+import time
 import uuid
-import subprocess
-from fastapi import FastAPI, HTTPException
-from starlette.responses import FileResponse, JSONResponse
+import sqlite3
+from fastapi import FastAPI, HTTPException, Query, Request
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from typing import List, Literal
 from pydantic import BaseModel, HttpUrl
+from storage import ACTIVE_STATUSES, get_store, migrate_json
 from utils import log_progress
+from work_queue import aggregate_reports, get_work_queue
+from scheduler import JobScheduler
+from progress_events import EVENT_INTERVAL, KEEPALIVE, hub, sse_event
+from metrics import CONTENT_TYPE, metric, stage_seconds
+from job_profiler import job_profile
+from output_sink import OUTPUT_FOLDER, find_output, iter_records, json_array_chunks, output_entries, split_output_name
 
 # Configuration constants
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Current script directory
-DB_FILE = os.path.join(BASE_DIR, "websites.json")      # Website database file
 PROGRESS_FOLDER = "progress"                            # Progress tracking folder
-SCRAPER_SCRIPT = "Crawlscraper.py"                    # Main scraper script
+ACTIVITY_PAGE_SIZE = 100                                # Jobs per /activity page by default
+MAX_ACTIVITY_PAGE_SIZE = 1000                           # Largest /activity page
 
 # Ensure progress folder exists
 os.makedirs(PROGRESS_FOLDER, exist_ok=True)
 
-# Global dictionary to track running scraping jobs
-running_jobs = {}
-
 
 # Pydantic models for API request/response validation
+# URL discovery strategies (see sitemap.DISCOVERY_STRATEGIES)
+Discovery = Literal["links", "sitemap"]
+
+
 class Website(BaseModel):
-    """Model for website data with ID and URL"""
+    """Model for website data with ID, URL and discovery strategy"""
     id: int
     url: HttpUrl
+    discovery: Discovery = "links"
 
 
 class WebsiteCreate(BaseModel):
     """Model for creating a new website entry"""
     url: HttpUrl
+    discovery: Discovery = "links"  # "sitemap" reads robots.txt/sitemaps before following links
+
+
+class WebsiteUpdate(BaseModel):
+    """Model for changing the settings of a website"""
+    discovery: Discovery
 
 
 class ScrapeRequest(BaseModel):
     """Model for initiating scraping requests with multiple URLs"""
     urls: List[HttpUrl]
+    incremental: bool = False  # Only re-extract pages that changed since the last crawl
+    distributed: bool = False  # Leave the jobs to the workers of the shared work queue
+    profile: bool = False      # Sample the jobs and keep the profile (GET /jobs/{job_id}/profile)
 
 
-def load_db(path: str) -> List[dict]:
-    """
-    Load website database from JSON file
-    
-    Args:
-        path: Path to the JSON database file
-        
-    Returns:
-        List of website dictionaries, empty list if file doesn't exist
-    """
-    if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
-
+# Open the shared database; import the legacy JSON files on first start
+store = get_store()
+if store.get_meta("json_migrated") is None:
+    migrate_json(store, BASE_DIR)
 
-def save_db(path: str, data: List[dict]):
-    """
-    Save website database to JSON file
-    
-    Args:
-        path: Path to the JSON database file
-        data: List of website dictionaries to save
-    """
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+# In-process job queue with a global browser and page budget
+scheduler = JobScheduler()
 
-
-# Load website database on startup
-db_websites = load_db(DB_FILE)
+# Queue of distributed jobs, served by "python Crawlscraper.py --worker" processes
+work_queue = get_work_queue()
 
 # Initialize FastAPI application
 app = FastAPI()
@@ -98,7 +97,7 @@ def get_websites():
         List of valid websites (filters out entries without URLs)
     """
     # Filter out websites without valid URLs
-    valid = [w for w in db_websites if w.get("url")]
+    valid = [w for w in store.list_websites() if w.get("url")]
     return valid
 
 
@@ -116,33 +115,36 @@ def add_website(website: WebsiteCreate):
     Raises:
         HTTPException: If website already exists
     """
-def add_website(website: WebsiteCreate):
+    # Check if website already exists
+    if store.get_website_by_url(str(website.url)):
+        raise HTTPException(status_code=400, detail="Website already exists")
+
+    # Add to database (the id is assigned by the database)
+    try:
+        return store.add_website(str(website.url), discovery=website.discovery)
+    except sqlite3.IntegrityError:
+        raise HTTPException(status_code=400, detail="Website already exists")
+
+
+@app.patch("/websites/{website_id}", response_model=Website)
+def update_website(website_id: int, update: WebsiteUpdate):
     """
-    Add a new website to the database
+    Change the URL discovery strategy of a website
     
     Args:
-        website: Website data to add
+        website_id: ID of the website to update
+        update: New settings
         
     Returns:
-        Created website with assigned ID
+        Updated website
         
     Raises:
-        HTTPException: If website already exists
+        HTTPException: If website not found
     """
-    # Check if website already exists
-    for w in db_websites:
-        if str(website.url) == str(w["url"]):
-            raise HTTPException(status_code=400, detail="Website already exists")
-        continue
-    
-    # Generate new ID (max existing ID + 1)
-    new_id = max([w["id"] for w in db_websites], default=0) + 1
-    new_entry = {"id": new_id, "url": str(website.url)}
-    
-    # Add to database and save
-    db_websites.append(new_entry)
-    save_db(DB_FILE, db_websites)
-    return new_entry
+    w = store.set_website_discovery(website_id, update.discovery)
+    if w is None:
+        raise HTTPException(status_code=404, detail="Website not found")
+    return w
 
 
 @app.delete("/websites/{website_id}")
@@ -159,12 +161,10 @@ def delete_website(website_id: int):
     Raises:
         HTTPException: If website not found
     """
-    for w in db_websites:
-        if w["id"] == website_id:
-            db_websites.remove(w)
-            save_db(DB_FILE, db_websites)
-            return {"detail": "Website removed", "id": website_id, "url": w["url"]}
-    raise HTTPException(status_code=404, detail="Website not found")
+    w = store.delete_website(website_id)
+    if w is None:
+        raise HTTPException(status_code=404, detail="Website not found")
+    return {"detail": "Website removed", "id": website_id, "url": w["url"]}
 
 
 @app.get("/stats")
@@ -175,39 +175,13 @@ def get_stats():
     Returns:
         Dictionary with total websites, active jobs, completed jobs, and success rate
     """
-    websites = load_db(DB_FILE)
-    website_urls = set([w["url"].rstrip("/") for w in websites])
-    total = len(websites)
-
-    # Initialize counters
-    completed = 0
-    active = 0
-    relevant_jobs = 0
-    total_success = 0
-    total_failed = 0
-
-    # Analyze progress files for statistics
-    for fname in os.listdir(PROGRESS_FOLDER):
-        if not fname.endswith(".json"):
-            continue
-        path = os.path.join(PROGRESS_FOLDER, fname)
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                url = data.get("url", "").rstrip("/")
-                
-                # Only count jobs for websites in our database
-                if url in website_urls:
-                    relevant_jobs += 1
-                    if data.get("status") == "done":
-                        completed += 1
-                    if data.get("status") in ("done", "stopped", "scraping"):
-                        total_success += data.get("success", 0)
-                        total_failed += data.get("failed", 0)
-                    elif data.get("status") == "scraping":
-                        active += 1
-        except Exception:
-            continue
+    # Single aggregate query over the jobs of registered websites
+    stats = store.stats()
+    total = stats["total"]
+    active = stats["active"]
+    completed = stats["completed"]
+    total_success = stats["success"]
+    total_failed = stats["failed"]
 
     # Calculate success rate
     denom = total_success + total_failed
@@ -223,48 +197,93 @@ def get_stats():
 
 
 
+def with_live_progress(job: dict) -> dict:
+    """
+    Job record with the progress of a running job that is not written yet
+
+    A running distributed job gets the sum of its workers' reports and
+    the number of workers still running under "workers".
+    """
+    live = hub.latest(job["job_id"])
+    if live:
+        job.update(live)
+    if job["status"] in ACTIVE_STATUSES:
+        reports = work_queue.reports(job["job_id"])
+        if reports:
+            totals = aggregate_reports(reports)
+            job.update(
+                done=totals["done"], success=totals["success"], failed=totals["fail"],
+                skipped=totals["skipped"], changed=totals["changed"], new=totals["new"],
+                retried=totals["retried"], recovered=totals["recovered"], abandoned=totals["abandoned"],
+                workers=totals["workers"],
+            )
+    return job
+
+
 @app.get("/activity")
-def get_activity():
+def get_activity(
+    status: List[str] = Query(None),
+    url: str = None,
+    limit: int = Query(ACTIVITY_PAGE_SIZE, ge=1, le=MAX_ACTIVITY_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    order: Literal["newest", "oldest"] = "newest",
+):
     """
-    Get current activity and job status
+    Get current activity and job status, one page at a time
+    
+    Args:
+        status: Only jobs with these statuses, repeatable; "active" means
+            any running or queued status and "error" any error
+        url: Only jobs of this website
+        limit: Jobs per page
+        offset: Jobs to skip
+        order: "newest" (most recently updated first) or "oldest"
     
     Returns:
-        Dictionary with list of all job entries and their current status
+        Dictionary with the page of job entries and their current status,
+        the scheduler state of each job ("queued", "running" or null),
+        the running workers of a distributed job ("workers", whose
+        counters are summed; null for other jobs),
+        the number of matching jobs ("total"), the number of jobs per
+        status for the website filter ("counts", errors counted as
+        "error") and the scheduler's queue and budget usage
     """
-    entries = []
-    
-    # Read all progress files
-    for fname in os.listdir(PROGRESS_FOLDER):
-        if not fname.endswith(".json"):
-            continue
-        path = os.path.join(PROGRESS_FOLDER, fname)
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                # Use filename as job_id (without .json extension)
-                job_id = fname.replace(".json", "")
-                entries.append(
-                    {
-                        "job_id": job_id,
-                        "url": data.get("url", "Unknown URL"),
-                        "status": data.get("status", "unknown"),
-                        "progress": data.get("progress", 0),
-                        "done": data.get("done", 0),
-                        "total": data.get("total", 0),
-                        "success": data.get("success", 0),
-                        "failed": data.get("failed", 0),
-                        "timestamp": data.get("timestamp", "Unknown time"),
-                    }
-                )
-        except Exception:
-            continue
-    return {"entries": entries}
+    jobs = store.list_jobs(status, url, limit=limit, offset=offset, newest_first=order == "newest")
+    entries = [
+        {
+            "job_id": job["job_id"],
+            "url": job["url"] or "Unknown URL",
+            "status": job["status"],
+            "state": scheduler.state(job["job_id"]),
+            "progress": job["progress"],
+            "done": job["done"],
+            "total": job["total"],
+            "success": job["success"],
+            "failed": job["failed"],
+            "timestamp": job["timestamp"],
+            "workers": job.get("workers"),
+        }
+        for job in map(with_live_progress, jobs)
+    ]
+    counts = {}
+    for name, jobs in store.job_counts(site=url).items():
+        name = "error" if name.startswith("error") else name
+        counts[name] = counts.get(name, 0) + jobs
+    total = sum(store.job_counts(status, url).values()) if status else sum(counts.values())
+    return {
+        "entries": entries,
+        "total": total,
+        "counts": counts,
+        "limit": limit,
+        "offset": offset,
+        "scheduler": scheduler.snapshot(),
+    }
 
 
 @app.delete("/activity/{job_id}")
 def delete_activity(job_id: str):
     """
-    Delete a specific activity/job and its progress file
+    Delete a specific activity/job and its progress record
     
     Args:
         job_id: ID of the job to delete
@@ -275,22 +294,115 @@ def delete_activity(job_id: str):
     Raises:
         HTTPException: If activity not found or deletion fails
     """
-    progress_file = os.path.join(PROGRESS_FOLDER, f"{job_id}.json")
-    if os.path.exists(progress_file):
+    if store.get_job(job_id):
         try:
-            # Remove progress file
-            os.remove(progress_file)
-            
-            # Terminate running process if exists
-            if job_id in running_jobs:
-                running_jobs[job_id].terminate()
-                del running_jobs[job_id]
+            # Stop the job if it is still queued or running
+            scheduler.cancel(job_id)
+
+            # Remove the queue of a distributed job first, so its workers
+            # stop writing, then the progress record
+            work_queue.delete(job_id)
+            store.delete_job(job_id)
+            hub.notify(job_id, {"job_id": job_id, "deleted": True})
             return {"detail": f"Activity {job_id} deleted"}
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to delete: {str(e)}")
     raise HTTPException(status_code=404, detail="Activity not found")
 
 
+def metrics_text() -> str:
+    """
+    Returns:
+        str: Stage timings, job queue, browser and per-host gauges in the
+            Prometheus text format
+    """
+    state = scheduler.snapshot()
+    pool = state["browser_pool"] or {}
+    work = {"queued": 0, "leased": 0, "completed": 0}
+    for job_id, _ in work_queue.jobs():
+        for name, count in work_queue.counts(job_id).items():
+            work[name] += count
+    hosts = state["hosts"]
+
+    def per_host(field):
+        return [({"host": host}, counters[field]) for host, counters in sorted(hosts.items())]
+
+    families = [
+        stage_seconds.exposition(),
+        metric("scraper_jobs_queued", "gauge", "Jobs waiting for the scheduler", state["queued"]),
+        metric("scraper_jobs_running", "gauge", "Jobs being scraped", state["running"]),
+        metric("scraper_jobs_max", "gauge", "Jobs scraped at the same time at most", state["max_jobs"]),
+        metric("scraper_pages_in_flight", "gauge", "Page fetches in progress across all jobs", state["pages_in_flight"]),
+        metric("scraper_page_budget", "gauge", "Page fetches in flight at most", state["page_budget"]),
+        metric("scraper_browsers_leased", "gauge", "Browsers in use by a job", state["browsers"]),
+        metric("scraper_browsers_open", "gauge", "Started browsers, idle or leased", pool.get("open", 0)),
+        metric("scraper_browser_budget", "gauge", "Size of the browser pool", state["browser_budget"]),
+        metric(
+            "scraper_browser_rss_bytes", "gauge", "Memory of the browser processes",
+            int(pool.get("browser_rss_mb", 0) * 1024 * 1024),
+        ),
+        metric(
+            "scraper_work_urls", "gauge", "URLs of unfinished distributed jobs by state",
+            [({"state": name}, count) for name, count in work.items()],
+        ),
+        metric("scraper_host_rate", "gauge", "Requests per second the host's limiter allows", per_host("rate")),
+        metric("scraper_host_throughput", "gauge", "Requests per second sent to the host", per_host("throughput")),
+        metric("scraper_host_requests_total", "counter", "Requests sent to the host", per_host("requests")),
+        metric("scraper_host_errors_total", "counter", "Failed requests to the host", per_host("errors")),
+        metric("scraper_host_throttled_total", "counter", "Responses 429/503 from the host", per_host("throttled")),
+    ]
+    return "".join(families)
+
+
+@app.get("/metrics")
+def get_metrics():
+    """
+    Prometheus metrics of this process
+
+    scraper_stage_seconds is a histogram per crawl stage: fetch (a page
+    through the crawler, HTTP or browser), rate_limit (waiting for the
+    host's token), render (browser), extract (markdown of a page fetched
+    over HTTP), links, clean_text, hash and output. Next to it: the job
+    queue, page and browser budgets, distributed queue depth and the
+    rate, throughput and errors per host.
+
+    Returns:
+        Plain text in the Prometheus exposition format
+    """
+    return Response(metrics_text(), media_type=CONTENT_TYPE)
+
+
+@app.get("/jobs/{job_id}/profile")
+def get_job_profile(job_id: str, format: Literal["folded", "json"] = "folded"):
+    """
+    Download the profile of a job started with "profile": true
+
+    The profile of a running job holds the samples taken so far.
+
+    Args:
+        job_id: ID of the job
+        format: "folded" for the samples in the folded stack format (for
+            flamegraph.pl, inferno or speedscope), "json" for the summary
+            (sample counts, busiest tasks and functions, where tasks wait)
+
+    Returns:
+        Plain text attachment or JSON summary
+
+    Raises:
+        HTTPException: If the job was not profiled
+    """
+    profile = job_profile(job_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="No profile for this job")
+    if format == "json":
+        return profile["summary"]
+    return Response(
+        profile["stacks"],
+        media_type="text/plain; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{job_id}.folded"'},
+    )
+
+
 @app.get("/runs")
 def list_runs():
     """
@@ -299,9 +411,9 @@ def list_runs():
     Returns:
         Dictionary with sorted list of run dates (most recent first)
     """
-    if not os.path.isdir("output"):
+    if not os.path.isdir(OUTPUT_FOLDER):
         return {"runs": []}
-    dates = sorted(os.listdir("output"), reverse=True)
+    dates = sorted(os.listdir(OUTPUT_FOLDER), reverse=True)
     return {"runs": dates}
 
 
@@ -314,42 +426,66 @@ def get_output_for_date(date: str):
         date: Date string (YYYY-MM-DD format)
         
     Returns:
-        Dictionary with sorted list of output files for the date
+        Dictionary with sorted list of output files for the date, one
+        <domain>.json per domain (also while its job is still running)
         
     Raises:
         HTTPException: If date directory not found
     """
-    path = os.path.join("output", date)
+    path = os.path.join(OUTPUT_FOLDER, date)
     if not os.path.isdir(path):
         raise HTTPException(status_code=404, detail="Date not found")
-    return {"entries": sorted(os.listdir(path))}
+    return {"entries": output_entries(path)}
 
 
 @app.get("/output/{date}/{filename}")
-def get_output_file(date: str, filename: str):
+def get_output_file(date: str, filename: str, format: Literal["json", "ndjson"] = None):
     """
-    Download a specific output file
+    Download the output of a domain as a JSON array or as NDJSON
+    
+    Finished jobs are served from their files; for a running job the
+    records written so far are streamed from its NDJSON output.
     
     Args:
         date: Date string (YYYY-MM-DD format)
-        filename: Name of the output file
+        filename: <domain>.json, <domain>.ndjson or <domain>.ndjson.gz
+        format: Response format (default: the format of the file name)
         
     Returns:
-        File response with JSON content
+        File or streaming response with JSON or NDJSON content
         
     Raises:
         HTTPException: If file not found
     """
-    full_path = os.path.join("output", date, filename)
-    if not os.path.isfile(full_path):
+    out_dir = os.path.join(OUTPUT_FOLDER, date)
+    domain, name_format = split_output_name(filename)
+    found = find_output(out_dir, domain) if domain and os.path.isdir(out_dir) else {}
+    if not any(found.values()):
         raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(full_path, media_type="application/json")
+    format = format or name_format
+
+    stream, legacy = found["ndjson"], found["json"]
+    if format == "json" and legacy and (stream is None or os.path.getmtime(legacy) >= os.path.getmtime(stream)):
+        return FileResponse(legacy, media_type="application/json")
+    if format == "json":
+        chunks = (chunk.encode("utf-8") for chunk in json_array_chunks(iter_records(out_dir, domain)))
+        return StreamingResponse(chunks, media_type="application/json")
+    lines = (
+        json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+        for record in iter_records(out_dir, domain)
+    )
+    return StreamingResponse(lines, media_type="application/x-ndjson")
 
 
 @app.post("/start-scrape")
 def start_scrape(request: ScrapeRequest):
     """
-    Start scraping jobs for multiple URLs
+    Queue scraping jobs for multiple URLs
+    
+    Jobs start as soon as the scheduler has a free worker and browser;
+    until then their status is "queued". Distributed jobs wait for the
+    workers of the shared work queue instead. Profiled jobs keep a
+    sampling profile (see /jobs/{job_id}/profile).
     
     Args:
         request: Scrape request containing list of URLs to scrape
@@ -358,26 +494,28 @@ def start_scrape(request: ScrapeRequest):
         Dictionary with list of created job IDs and URLs
         
     Raises:
-        HTTPException: If URL not in database or subprocess creation fails
+        HTTPException: If URL not in database, a distributed job should be
+            profiled, or the job cannot be queued
     """
-    job_ids = []
-    
+    if request.profile and request.distributed:
+        raise HTTPException(status_code=400, detail="Distributed jobs cannot be profiled")
+
+    # Verify all URLs exist in database before queueing any job
     for url in request.urls:
-        # Verify URL exists in database
-        if not any(w["url"].rstrip("/") == str(url).rstrip("/") for w in db_websites):
+        if not store.get_website_by_url(str(url)):
             raise HTTPException(status_code=400, detail=f"URL not in database: {url}")
 
+    job_ids = []
+    for url in request.urls:
         # Generate unique job ID
         job_id = str(uuid.uuid4())
-        progress_file = os.path.join(PROGRESS_FOLDER, f"{job_id}.json")
-
-        # Initialize progress tracking
-        log_progress(progress_file, 0, "starting", url=str(url))
 
         try:
-            # Start scraper subprocess
-            proc = subprocess.Popen(["python", SCRAPER_SCRIPT, str(url), job_id])
-            running_jobs[job_id] = proc
+            if request.distributed:
+                work_queue.open(job_id, str(url))
+                log_progress(os.path.join(PROGRESS_FOLDER, f"{job_id}.json"), 0, "queued", url=str(url))
+            else:
+                scheduler.submit(str(url), job_id, incremental=request.incremental, profile=request.profile)
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -386,36 +524,54 @@ def start_scrape(request: ScrapeRequest):
     return {"jobs": job_ids}
 
 
+@app.post("/resume-scrape/{job_id}")
+def resume_scrape(job_id: str):
+    """
+    Continue a stopped or interrupted job from its last checkpoint
+    
+    Pages completed before the interruption are not fetched again and
+    the job keeps its counters and output file.
+    
+    Args:
+        job_id: ID of the job to resume
+        
+    Returns:
+        Dictionary with the job ID and URL
+        
+    Raises:
+        HTTPException: If the job is unknown, still queued or running,
+            or has no checkpoint (e.g. because it finished)
+    """
+    job = store.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if scheduler.state(job_id) is not None:
+        raise HTTPException(status_code=409, detail="Job is already queued or running")
+    if store.get_crawl_checkpoint(job_id) is None:
+        raise HTTPException(status_code=400, detail="Job has no checkpoint to resume from")
+
+    try:
+        scheduler.submit(job["url"], job_id, resume=True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"job_id": job_id, "url": job["url"]}
+
+
 @app.post("/stop-scrape")
 def stop_scrape():
     """
-    Stop all running scraping jobs
+    Stop all queued and running scraping jobs, including distributed jobs
     
     Returns:
         Dictionary with list of stopped job IDs
     """
-    stopped = []
-    
-    # Terminate all running processes
-    for job_id, proc in list(running_jobs.items()):
-        proc.terminate()
-        
-        # Update progress file to mark as stopped
-        progress_file = os.path.join(PROGRESS_FOLDER, f"{job_id}.json")
-        if os.path.exists(progress_file):
-            with open(progress_file, "r+", encoding="utf-8") as f:
-                try:
-                    data = json.load(f)
-                    data["status"] = "stopped"
-                    f.seek(0)
-                    json.dump(data, f, indent=2)
-                    f.truncate()
-                except Exception:
-                    pass
-        
-        stopped.append(job_id)
-        del running_jobs[job_id]
-    
+    # Cancelled jobs are marked as stopped by the scheduler
+    stopped = scheduler.stop_all()
+    # Workers of a cancelled distributed job leave it without writing its record
+    for job_id, _ in work_queue.jobs():
+        if work_queue.cancel(job_id):
+            hub.set_status(job_id, "stopped")
+            stopped.append(job_id)
     return {"stopped": stopped}
 
 
@@ -433,9 +589,116 @@ def scrape_progress(job_id: str):
     Raises:
         HTTPException: If job not found
     """
-    progress_file = os.path.join(PROGRESS_FOLDER, f"{job_id}.json")
-    if not os.path.exists(progress_file):
+    job = store.get_job(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
-    
-    with open(progress_file, "r", encoding="utf-8") as f:
-        return JSONResponse(content=json.load(f))
+
+    job = with_live_progress(job)
+    job.pop("job_id")
+    return JSONResponse(content=job)
+
+
+def stored_updates(job_ids, sent: dict) -> list:
+    """
+    Changed records of active jobs that other processes scrape
+
+    Distributed workers publish to the hub of their own process, so their
+    jobs are read from the database (with the sum of the workers' reports)
+    instead. A job stays followed until its final record was sent.
+
+    Args:
+        job_ids: Only these jobs (default: all active jobs)
+        sent: job_id -> last record sent, updated in place
+
+    Returns:
+        list: Records that changed since they were last sent
+    """
+    if job_ids:
+        candidates = set(job_ids)
+    else:
+        candidates = {job["job_id"] for job in store.list_jobs(statuses=["active"])}
+    updates = []
+    for job_id in sorted(candidates | set(sent)):
+        if hub.latest(job_id) is not None:
+            continue  # Scraped by this process: the hub sends it
+        job = store.get_job(job_id)
+        if job is None:
+            sent.pop(job_id, None)
+            continue
+        if job_id not in sent and job["status"] not in ACTIVE_STATUSES:
+            continue
+        job = with_live_progress(job)
+        if sent.get(job_id) != job:
+            updates.append(job)
+        if job["status"] in ACTIVE_STATUSES:
+            sent[job_id] = job
+        else:
+            sent.pop(job_id, None)
+    return updates
+
+
+async def progress_stream(request: Request, job_ids=None, interval: float = EVENT_INTERVAL, keepalive: float = KEEPALIVE):
+    """
+    Server-Sent Events with the progress of jobs
+
+    Starts with the current record of the requested jobs (or of all
+    running jobs), then sends a job's record whenever it changes, at most
+    once per interval; a comment keeps idle connections open. Jobs of
+    distributed workers are read from the database every interval (see
+    stored_updates).
+
+    Args:
+        request: Request of the client, to stop when it disconnects
+        job_ids: Only send these jobs (default: all jobs)
+        interval: Minimum seconds between two messages
+        keepalive: Seconds without updates before a keep-alive comment
+
+    Yields:
+        str: Event stream messages
+    """
+    with hub.subscribe(job_ids) as subscription:
+        sent = {}   # job_id -> last record sent of jobs read from the database
+        if job_ids:
+            current = [store.get_job(job_id) for job_id in job_ids]
+            current = [with_live_progress(job) for job in current if job is not None]
+            sent.update(
+                (job["job_id"], job) for job in current
+                if job["status"] in ACTIVE_STATUSES and hub.latest(job["job_id"]) is None
+            )
+        else:
+            current = hub.active()
+        for job in current:
+            yield sse_event(job)
+        poll = min(interval, keepalive) or keepalive
+        last_message = time.monotonic()
+        while not await request.is_disconnected():
+            records = await subscription.next(interval, timeout=poll)
+            records += stored_updates(job_ids, sent)
+            if records:
+                last_message = time.monotonic()
+            elif time.monotonic() - last_message >= keepalive:
+                last_message = time.monotonic()
+                yield ": keep-alive\n\n"
+            for record in records:
+                yield sse_event(record)
+
+
+@app.get("/events")
+async def progress_events(request: Request, job_id: List[str] = Query(None)):
+    """
+    Stream progress updates instead of polling /scrape-progress
+
+    Args:
+        request: Incoming request
+        job_id: Jobs to follow, repeatable (default: all jobs)
+
+    Returns:
+        Event stream with a "progress" event per update; the data is the
+        job record (as /scrape-progress, with job_id), or {"job_id",
+        "deleted": true} for a deleted job
+    """
+    return StreamingResponse(
+        progress_stream(request, job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,135 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+# Configuration constants
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)  # Upper bounds in seconds
+STAGES = ("fetch", "rate_limit", "render", "extract", "links", "clean_text", "hash", "output")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"  # Prometheus text format
+
+
+def escape(value) -> str:
+    """Escape a label value (backslash, double quote and newline)"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: dict) -> str:
+    """
+    Returns:
+        str: Labels in the exposition format, e.g. {stage="fetch"} (empty without labels)
+    """
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+def metric(name: str, kind: str, help: str, samples) -> str:
+    """
+    One metric family in the Prometheus text format
+
+    Args:
+        name: Metric name
+        kind: "gauge" or "counter"
+        help: Description
+        samples: A single value, or (labels dict, value) pairs
+
+    Returns:
+        str: HELP and TYPE lines followed by the samples
+    """
+    if not isinstance(samples, (list, tuple)):
+        samples = [({}, samples)]
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{format_labels(labels)} {format_value(value)}" for labels, value in samples)
+    return "\n".join(lines) + "\n"
+
+
+class Histogram:
+    """
+    Durations per label value, bucketed like a Prometheus histogram
+
+    Observations cost a bisect and a few additions under a lock, so the
+    crawl can time every page. Observers may run on any thread.
+    """
+
+    def __init__(self, name: str, help: str, label: str = "stage", buckets=BUCKETS):
+        """
+        Args:
+            name: Metric name
+            help: Description
+            label: Name of the label that tells the series apart
+            buckets: Sorted upper bounds in seconds (+Inf is implied)
+        """
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series = {}  # label value -> [counts per bucket (last: +Inf), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: str, seconds: float):
+        """Record one duration of the series named value"""
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(value)
+            if series is None:
+                series = self._series[value] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += seconds
+
+    @contextmanager
+    def time(self, value: str):
+        """Observe the duration of the with block (also when it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(value, time.perf_counter() - start)
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+            dict: {value: {"count", "sum", "buckets": {upper bound: cumulative count}}}
+        """
+        with self._lock:
+            series = {value: (list(counts), total) for value, (counts, total) in self._series.items()}
+        result = {}
+        for value, (counts, total) in series.items():
+            cumulative, buckets = 0, {}
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                buckets[bound] = cumulative
+            result[value] = {"count": cumulative, "sum": total, "buckets": buckets}
+        return result
+
+    def exposition(self) -> str:
+        """
+        Returns:
+            str: The histogram in the Prometheus text format
+        """
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for value, series in sorted(self.snapshot().items()):
+            for bound, cumulative in series["buckets"].items():
+                labels = format_labels({self.label: value, "le": format_value(bound)})
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels({self.label: value})
+            lines.append(f"{self.name}_sum{labels} {format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{labels} {series['count']}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+# Shared by every job of this process; exported by GET /metrics
+stage_seconds = Histogram(
+    "scraper_stage_seconds",
+    "Seconds per page spent in each crawl stage (fetch, rate_limit, render, extract, links, clean_text, hash, output)",
+)
@@ -0,0 +1,31 @@
+import os
+import argparse
+from storage import BASE_DIR, Store, get_store, migrate_json
+
+
+def main():
+    """
+    Import websites.json, hashes.json and progress/*.json into the database
+
+    Usage:
+        python migrate.py [--db scraper.db] [--source <dir with the JSON files>]
+    """
+    parser = argparse.ArgumentParser(
+        description="Import the legacy JSON files into the SQLite database"
+    )
+    parser.add_argument("--db", help="Database file (default: $SCRAPER_DB or scraper.db)")
+    parser.add_argument(
+        "--source", default=BASE_DIR, help="Directory containing the JSON files"
+    )
+    args = parser.parse_args()
+
+    store = Store(args.db) if args.db else get_store()
+    counts = migrate_json(store, os.path.abspath(args.source))
+    print(
+        f"Imported {counts['websites']} websites, {counts['jobs']} jobs "
+        f"and {counts['hashes']} hashes into {store.path}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import os
+import re
+import hashlib
+from array import array
+from collections import Counter
+
+# Configuration constants (override with environment variables)
+NEAR_DUPLICATES = os.environ.get("SCRAPER_NEAR_DUPLICATES", "off")   # "off", "skip" or "cluster"
+NEAR_DUP_DISTANCE = int(os.environ.get("SCRAPER_NEAR_DUP_DISTANCE", 3))  # Differing bits that still count as near-identical
+SHINGLE_WORDS = 3          # Words per feature
+MIN_FEATURES = 8           # Pages with fewer shingles get no fingerprint (too little text to compare)
+FINGERPRINT_BITS = 64
+
+NEAR_DUP_MODES = ("off", "skip", "cluster")
+
+WORD = re.compile(r"\w+")
+
+
+def simhash(text: str, shingle: int = SHINGLE_WORDS, min_features: int = MIN_FEATURES):
+    """
+    64-bit SimHash of the word shingles of a text
+
+    Similar texts get fingerprints that differ in few bits; the number of
+    differing bits grows with the share of shingles the texts do not have
+    in common. Every distinct shingle votes once, so repeated boilerplate
+    does not outweigh the rest of the page. The bit votes are counted per
+    byte of the shingle hashes with Counter, not per bit in Python.
+
+    Args:
+        text: Page content (markdown)
+        shingle: Words per shingle
+        min_features: Minimum number of distinct shingles
+
+    Returns:
+        int: Unsigned fingerprint, or None for texts with too few shingles
+    """
+    words = WORD.findall(text.lower())
+    features = {" ".join(words[i : i + shingle]) for i in range(max(1, len(words) - shingle + 1))}
+    features.discard("")
+    if len(features) < min_features:
+        return None
+    data = b"".join(hashlib.blake2b(feature.encode(), digest_size=8).digest() for feature in features)
+    majority = len(features) / 2
+    fingerprint = 0
+    for position in range(8):
+        counts = Counter(data[position::8])
+        for bit in range(8):
+            ones = sum(count for value, count in counts.items() if value >> bit & 1)
+            if ones > majority:
+                fingerprint |= 1 << (position * 8 + bit)
+    return fingerprint
+
+
+class SimHashIndex:
+    """
+    Finds stored fingerprints within a Hamming distance of a fingerprint
+
+    The 64 bits are cut into distance + 1 bands. Two fingerprints that
+    differ in at most distance bits are equal in at least one band, so a
+    lookup only compares the fingerprints sharing a band value with the
+    query (one dictionary read per band) instead of every stored one.
+    Fingerprints live in an array and the buckets hold their positions;
+    with the URL to position map that is about 135 bytes per page at
+    distance 3 (benchmarks/bench_near_dup.py).
+
+    Larger distances mean narrower bands and more candidates per lookup;
+    at millions of fingerprints keep the distance at 3 (16-bit bands).
+    """
+
+    def __init__(self, distance: int = NEAR_DUP_DISTANCE):
+        """
+        Args:
+            distance: Maximum number of differing bits for a near-duplicate
+
+        Raises:
+            ValueError: If the distance leaves no bits per band
+        """
+        if not 0 <= distance < FINGERPRINT_BITS // 2:
+            raise ValueError(f"Near-duplicate distance must be between 0 and {FINGERPRINT_BITS // 2 - 1}: {distance}")
+        self.distance = distance
+        bands = distance + 1
+        width, wider = divmod(FINGERPRINT_BITS, bands)
+        self._bands = []   # (shift, mask) per band
+        shift = 0
+        for band in range(bands):
+            bits = width + (band < wider)
+            self._bands.append((shift, (1 << bits) - 1))
+            shift += bits
+        self._tables = [{} for _ in range(bands)]   # band value -> array of positions
+        self.fingerprints = array("Q")
+        self.urls = []
+        self._positions = {}   # url -> position
+
+    def add(self, url: str, fingerprint: int):
+        """Store (or replace) the fingerprint of a page"""
+        position = self._positions.get(url)
+        if position is None:
+            position = self._positions[url] = len(self.urls)
+            self.urls.append(url)
+            self.fingerprints.append(fingerprint)
+        else:
+            old = self.fingerprints[position]
+            if old == fingerprint:
+                return
+            for (shift, mask), table in zip(self._bands, self._tables):
+                table[(old >> shift) & mask].remove(position)
+            self.fingerprints[position] = fingerprint
+        for (shift, mask), table in zip(self._bands, self._tables):
+            bucket = table.get((fingerprint >> shift) & mask)
+            if bucket is None:
+                bucket = table[(fingerprint >> shift) & mask] = array("I")
+            bucket.append(position)
+
+    def find(self, fingerprint: int, exclude: str = None):
+        """
+        Closest stored page within the distance
+
+        Args:
+            fingerprint: Fingerprint to look up
+            exclude: URL to ignore (the page itself)
+
+        Returns:
+            tuple: (url, distance) of the closest page, or None
+        """
+        best = None
+        fingerprints = self.fingerprints
+        for (shift, mask), table in zip(self._bands, self._tables):
+            for position in table.get((fingerprint >> shift) & mask, ()):
+                distance = (fingerprints[position] ^ fingerprint).bit_count()
+                if distance <= self.distance and (best is None or distance < best[1]):
+                    url = self.urls[position]
+                    if url != exclude:
+                        best = (url, distance)
+        return best
+
+    def __len__(self):
+        return len(self.urls)
+
+
+class NearDuplicateFilter:
+    """
+    Decides per page whether it is a near-duplicate of a stored page
+
+    "skip" leaves near-duplicates out of the output, "cluster" stores
+    them with the URL of the page they resemble, "off" disables the
+    check. Pages are compared with the stored pages of the same website.
+    """
+
+    def __init__(self, mode: str = NEAR_DUPLICATES, distance: int = NEAR_DUP_DISTANCE):
+        """
+        Args:
+            mode: "off", "skip" or "cluster"
+            distance: Maximum number of differing bits for a near-duplicate
+
+        Raises:
+            ValueError: If the mode is unknown
+        """
+        if mode not in NEAR_DUP_MODES:
+            raise ValueError(f"Unknown near-duplicate mode: {mode}")
+        self.mode = mode
+        self.index = SimHashIndex(distance)
+        self.found = 0   # Near-duplicates seen by match()
+
+    def load(self, entries: dict):
+        """
+        Index the fingerprints of stored pages
+
+        Args:
+            entries: {url: hash entry} of one website (see HashIndex)
+
+        Returns:
+            NearDuplicateFilter: The filter itself, for chaining
+        """
+        if self.mode != "off":
+            for url, entry in entries.items():
+                if entry.get("simhash") is not None:
+                    self.index.add(url, entry["simhash"])
+        return self
+
+    def match(self, url: str, fingerprint):
+        """
+        Returns:
+            str: URL of a stored page the page is a near-duplicate of, or None
+        """
+        if self.mode == "off" or fingerprint is None:
+            return None
+        found = self.index.find(fingerprint, exclude=url)
+        if found is None:
+            return None
+        self.found += 1
+        return found[0]
+
+    def add(self, url: str, fingerprint):
+        """Index the fingerprint of a stored page"""
+        if self.mode != "off" and fingerprint is not None:
+            self.index.add(url, fingerprint)
@@ -0,0 +1,230 @@
+import os
+import time
+import bisect
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from hash_index import hash_content
+from link_extractor import get_link_extractor
+from near_dup import simhash
+from utils import clean_text
+
+# Configuration constants (override with environment variables)
+CPU_WORKERS = int(os.environ.get("SCRAPER_CPU_WORKERS", min(4, os.cpu_count() or 1)))
+CPU_EXECUTOR = os.environ.get("SCRAPER_CPU_EXECUTOR", "process")  # "process" or "thread"
+LAG_INTERVAL = 0.05  # Seconds between event loop lag probes
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)  # Upper bounds of the lag histogram (seconds)
+
+
+# ---------- tasks (top-level so they can be pickled to worker processes) ----------
+
+_extractors = {}
+
+
+class _Page:
+    def __init__(self, html, links):
+        self.html = html
+        self.links = links
+
+
+def extract_links_task(
+    extractor_name: str, page_url: str, html: str, links, netloc: str, keep_query: bool = False
+) -> list:
+    """
+    Run link extraction for one page inside a worker
+
+    Args:
+        extractor_name: Name of the link extraction strategy
+        page_url: URL of the crawled page
+        html: Raw page HTML
+        links: crawl4ai link data of the page (may be None)
+        netloc: Host of the website being crawled
+        keep_query: Keep query strings (see normalize_internal)
+
+    Returns:
+        list: Normalized internal links
+    """
+    extractor = _extractors.get(extractor_name)
+    if extractor is None:
+        extractor = _extractors[extractor_name] = get_link_extractor(extractor_name)
+    return extractor.internal_links(page_url, _Page(html, links), netloc, keep_query)
+
+
+def summarize_task(markdown: str, fingerprint: bool = False, timed: bool = False) -> tuple:
+    """
+    Clean a page and hash the summary inside a worker
+
+    Args:
+        markdown: Fit markdown of the page
+        fingerprint: Also compute the SimHash of the page content
+        timed: Also return the seconds spent cleaning and hashing
+
+    Returns:
+        tuple: (summary, content hash), plus the SimHash (or None for
+            pages with too little text) if fingerprint is set; with timed,
+            (that tuple, (clean_text seconds, hashing seconds))
+    """
+    start = time.perf_counter()
+    summary = clean_text(markdown)
+    cleaned = time.perf_counter()
+    if fingerprint:
+        result = summary, hash_content(summary), simhash(markdown)
+    else:
+        result = summary, hash_content(summary)
+    if timed:
+        return result, (cleaned - start, time.perf_counter() - cleaned)
+    return result
+
+
+class CPUOffloader:
+    """
+    Runs CPU-bound post-processing outside the asyncio event loop
+
+    Work is submitted to a process pool (or a thread pool, for parsers that
+    release the GIL such as lxml). At most max_pending tasks are in flight;
+    further submitters wait, so results flow back through a bounded window
+    instead of piling up in memory. With workers=0 tasks run inline.
+    """
+
+    def __init__(self, workers: int = CPU_WORKERS, kind: str = CPU_EXECUTOR, max_pending: int = None):
+        """
+        Args:
+            workers: Pool size (0 runs tasks inline on the event loop)
+            kind: "process" or "thread"
+            max_pending: Maximum tasks in flight (default: 4 per worker)
+        """
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.workers = max(0, workers)
+        self.kind = kind
+        self.max_pending = max_pending or max(1, self.workers * 4)
+        self._executor = None
+        self._slots = None
+        self.submitted = 0
+
+    def _ensure_executor(self):
+        if self._executor is None:
+            if self.kind == "process":
+                # spawn avoids forking a process that already runs threads
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="cpu")
+            self._slots = asyncio.Semaphore(self.max_pending)
+        return self._executor
+
+    async def run(self, fn, *args):
+        """
+        Run fn(*args) in the pool and wait for the result
+
+        Args:
+            fn: Picklable top-level function
+            *args: Picklable arguments
+
+        Returns:
+            The return value of fn
+        """
+        self.submitted += 1
+        if self.workers == 0:
+            return fn(*args)
+        executor = self._ensure_executor()
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+    def close(self):
+        """Shut down the pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+        return False
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes up a sleeping task
+
+    Lag is the difference between the requested and the actual sleep time.
+    High lag means synchronous work is blocking the loop and starving
+    in-flight requests. A probe runs for the whole job, so it keeps a
+    running count, sum and maximum and a fixed-bucket histogram instead
+    of every sample.
+    """
+
+    def __init__(self, interval: float = LAG_INTERVAL, buckets=LAG_BUCKETS):
+        """
+        Args:
+            interval: Seconds between probes
+            buckets: Sorted upper bounds of the histogram in seconds (+Inf is implied)
+        """
+        self.interval = interval
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Samples per bucket (last: +Inf)
+        self.samples = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._task = None
+
+    def observe(self, lag: float):
+        """Record one lag sample in seconds"""
+        self.counts[bisect.bisect_left(self.buckets, lag)] += 1
+        self.samples += 1
+        self.total += lag
+        self.max = max(self.max, lag)
+
+    async def _probe(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.observe(max(0.0, loop.time() - start - self.interval))
+
+    def start(self):
+        """Start probing on the running loop"""
+        self._task = asyncio.get_running_loop().create_task(self._probe())
+        return self
+
+    async def stop(self):
+        """Stop probing"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+            dict: Number of samples and mean, p99 and max lag in
+                milliseconds; p99 is the upper bound of its bucket (at
+                most the max)
+        """
+        if not self.samples:
+            return {"samples": 0, "mean_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        rank = min(self.samples, int(self.samples * 0.99) + 1)
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                break
+        return {
+            "samples": self.samples,
+            "mean_ms": self.total / self.samples * 1000,
+            "p99_ms": min(bound, self.max) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+    async def __aenter__(self):
+        return self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+        return False
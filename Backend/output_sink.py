@@ -0,0 +1,315 @@
+import os
+import gzip
+import json
+import time
+import zlib
+import shutil
+
+# Configuration constants
+OUTPUT_FOLDER = "output"     # Root of the output/<date>/ folders
+COMPRESSION = os.environ.get("SCRAPER_OUTPUT_COMPRESSION", "")  # "" or "gzip"
+CHECKPOINT_EVERY = 500       # Records after which the files are fsynced
+CHECKPOINT_INTERVAL = 30     # Seconds after which the files are fsynced
+WORKER_FOLDER = "workers"    # Subfolder with the streams of distributed workers
+
+
+def ndjson_path(out_dir: str, domain: str, compression: str = "") -> str:
+    """
+    Returns:
+        str: Location of the streaming output of a domain
+    """
+    suffix = ".ndjson.gz" if compression == "gzip" else ".ndjson"
+    return os.path.join(out_dir, f"{domain}{suffix}")
+
+
+def _json_item(item: dict) -> str:
+    """One element of the legacy array, indented like json.dump(indent=2)"""
+    return "  " + json.dumps(item, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+
+
+def json_array_chunks(records):
+    """
+    Serialize records exactly like json.dump(records, f, indent=2, ensure_ascii=False)
+
+    Args:
+        records: Iterable of dictionaries (consumed lazily)
+
+    Yields:
+        str: Pieces of the JSON document
+    """
+    first = True
+    for record in records:
+        yield ("[\n" if first else ",\n") + _json_item(record)
+        first = False
+    yield "[]" if first else "\n]"
+
+
+def read_ndjson(path: str):
+    """
+    Yields:
+        dict: Records of a plain or gzipped NDJSON file; a line cut off by
+            a crash is ignored
+    """
+    with open(path, "rb") as raw:
+        compressed = raw.read(2) == b"\x1f\x8b"  # gzip magic number
+    opener = gzip.open if compressed else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        return  # Unterminated last record
+        except EOFError:
+            return  # Gzip stream cut off by a crash
+
+
+def find_output(out_dir: str, domain: str) -> dict:
+    """
+    Locate the output files of a domain
+
+    Returns:
+        dict: Existing paths under "json" (legacy array) and "ndjson"
+            (plain or gzipped stream); missing formats are None
+    """
+    found = {"json": None, "ndjson": None}
+    legacy = os.path.join(out_dir, f"{domain}.json")
+    if os.path.isfile(legacy):
+        found["json"] = legacy
+    streams = [p for p in (ndjson_path(out_dir, domain), ndjson_path(out_dir, domain, "gzip")) if os.path.isfile(p)]
+    if streams:
+        found["ndjson"] = max(streams, key=os.path.getmtime)
+    return found
+
+
+def split_output_name(filename: str):
+    """
+    Returns:
+        tuple: (domain, format) of an output file name, format being
+            "json" or "ndjson"; (None, None) for other files
+    """
+    for suffix, fmt in ((".ndjson.gz", "ndjson"), (".ndjson", "ndjson"), (".json", "json")):
+        if filename.endswith(suffix):
+            return filename[: -len(suffix)], fmt
+    return None, None
+
+
+def output_entries(out_dir: str) -> list:
+    """
+    List the output of a date folder as <domain>.json names
+
+    Domains whose job is still running (or crashed) only have a stream
+    but are listed the same way; their JSON is built from the stream.
+
+    Returns:
+        list: Sorted file names, one per domain
+    """
+    domains = {split_output_name(name)[0] for name in os.listdir(out_dir)}
+    return sorted(f"{domain}.json" for domain in domains if domain)
+
+
+def iter_records(out_dir: str, domain: str):
+    """
+    Records of a domain, from the stream if it is newer than the legacy file
+
+    A running (or crashed) job only has the stream; a finished one has
+    both and they hold the same records.
+
+    Yields:
+        dict: Output records
+    """
+    found = find_output(out_dir, domain)
+    stream, legacy = found["ndjson"], found["json"]
+    if stream and (legacy is None or os.path.getmtime(stream) > os.path.getmtime(legacy)):
+        yield from read_ndjson(stream)
+    elif legacy:
+        with open(legacy, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+
+
+class OutputSink:
+    """
+    Appends page records to output/<date>/<domain>.ndjson as they complete
+
+    Memory stays flat however large the site is, and a crash loses at most
+    the records since the last checkpoint: sync() flushes and fsyncs every
+    open file. finalize() writes the legacy <domain>.json arrays from the
+    streams, so existing consumers keep working. Like the old JSON output,
+    a job replaces the files of the domains it writes to.
+    """
+
+    def __init__(
+        self,
+        out_dir: str,
+        compression: str = COMPRESSION,
+        checkpoint_every: int = CHECKPOINT_EVERY,
+        checkpoint_interval: float = CHECKPOINT_INTERVAL,
+    ):
+        """
+        Args:
+            out_dir: Folder of the output files (created if missing)
+            compression: "" for plain NDJSON or "gzip"
+            checkpoint_every: Records after which checkpoint_due() is True
+            checkpoint_interval: Seconds after which checkpoint_due() is True
+        """
+        if compression not in ("", "gzip"):
+            raise ValueError(f"Unknown output compression: {compression}")
+        self.out_dir = out_dir
+        self.compression = compression
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_interval = checkpoint_interval
+        self.files = {}       # domain -> open file
+        self.paths = {}       # domain -> stream path, kept after close()
+        self.records = 0      # Records written by this sink
+        self.unsynced = 0     # Records written since the last sync
+        self._last_sync = time.monotonic()
+        os.makedirs(out_dir, exist_ok=True)
+
+    def _open(self, domain: str):
+        path = ndjson_path(self.out_dir, domain, self.compression)
+        if self.compression == "gzip":
+            f = gzip.open(path, "wt", encoding="utf-8")
+        else:
+            f = open(path, "w", encoding="utf-8")
+        self.files[domain] = f
+        self.paths[domain] = path
+        return f
+
+    def write(self, domain: str, record: dict):
+        """Append one record to the domain's stream"""
+        f = self.files.get(domain) or self._open(domain)
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.records += 1
+        self.unsynced += 1
+
+    def restore(self, domain: str, keep_urls) -> int:
+        """
+        Continue the stream of a domain after the job is resumed
+
+        Records of pages in keep_urls (completed at the job's last
+        checkpoint) are kept; records written after that checkpoint are
+        dropped, because those pages are extracted again.
+
+        Args:
+            domain: Domain of the stream
+            keep_urls: URLs whose records are kept
+
+        Returns:
+            int: Number of records kept
+        """
+        previous = [p + ".resume" for p in (ndjson_path(self.out_dir, domain), ndjson_path(self.out_dir, domain, "gzip"))]
+        previous = [p for p in previous if os.path.isfile(p)]  # Left by an interrupted restore
+        if previous:
+            old = previous[0]
+        else:
+            stream = find_output(self.out_dir, domain)["ndjson"]
+            if stream is None:
+                return 0
+            old = stream + ".resume"
+            os.replace(stream, old)
+
+        kept = set()
+        for record in read_ndjson(old):
+            if record.get("url") in keep_urls and record["url"] not in kept:
+                kept.add(record["url"])
+                self.write(domain, record)
+        self.sync()
+        os.remove(old)
+        return len(kept)
+
+    def checkpoint_due(self) -> bool:
+        """
+        Returns:
+            bool: True if enough records or time passed since the last sync
+        """
+        if not self.unsynced:
+            return False
+        if self.checkpoint_every and self.unsynced >= self.checkpoint_every:
+            return True
+        return time.monotonic() - self._last_sync >= self.checkpoint_interval
+
+    def sync(self):
+        """Flush and fsync all open files (a checkpoint)"""
+        for f in self.files.values():
+            f.flush()
+            raw = f
+            if isinstance(f.buffer, gzip.GzipFile):
+                f.buffer.flush(zlib.Z_SYNC_FLUSH)  # Complete deflate block, readable after a crash
+                raw = f.buffer.fileobj
+            raw.flush()
+            os.fsync(raw.fileno())
+        self.unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        """Sync and close the streams (also when the crawl is interrupted)"""
+        if self.files:
+            self.sync()
+            for f in self.files.values():
+                f.close()
+            self.files = {}
+
+    def finalize(self):
+        """
+        Close the streams and write the legacy JSON array of each domain
+
+        The arrays are written record by record to a temporary file that
+        replaces <domain>.json, so readers never see a partial file.
+        """
+        self.close()
+        for domain, path in self.paths.items():
+            target = os.path.join(self.out_dir, f"{domain}.json")
+            tmp = f"{target}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for chunk in json_array_chunks(read_ndjson(path)):
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, target)
+
+
+def worker_output_dir(out_dir: str, worker: str) -> str:
+    """
+    Returns:
+        str: Folder of the output streams of one worker of a distributed job
+    """
+    return os.path.join(out_dir, WORKER_FOLDER, worker)
+
+
+def merge_worker_output(out_dir: str, compression: str = COMPRESSION) -> int:
+    """
+    Combine the streams of the workers of a distributed job
+
+    The records of every worker folder are appended to the job's own
+    <domain> streams and legacy JSON files (OutputSink.finalize), then the
+    worker folders are removed. A URL that two workers stored (a lease
+    ran out while its first worker was still busy) is merged once.
+
+    Args:
+        out_dir: Output folder of the job (output/<date>)
+        compression: "" for plain NDJSON or "gzip"
+
+    Returns:
+        int: Number of records merged
+    """
+    root = os.path.join(out_dir, WORKER_FOLDER)
+    if not os.path.isdir(root):
+        return 0
+    sink = OutputSink(out_dir, compression)
+    seen = set()  # (domain, url) of the records merged
+    for worker in sorted(os.listdir(root)):
+        folder = os.path.join(root, worker)
+        for name in sorted(os.listdir(folder)):
+            domain, fmt = split_output_name(name)
+            if fmt == "ndjson":
+                for record in read_ndjson(os.path.join(folder, name)):
+                    key = (domain, record.get("url"))
+                    if key in seen:
+                        continue
+                    if key[1] is not None:
+                        seen.add(key)
+                    sink.write(domain, record)
+    sink.finalize()
+    shutil.rmtree(root)
+    return sink.records
@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+from storage import ACTIVE_STATUSES, get_store
+
+# Configuration constants (override with environment variables)
+EVENT_INTERVAL = float(os.environ.get("SCRAPER_EVENT_INTERVAL", 0.5))   # Minimum seconds between two updates sent to one client
+WRITE_INTERVAL = float(os.environ.get("SCRAPER_PROGRESS_WRITE_INTERVAL", 2.0))  # Seconds between database writes of a job whose status did not change
+KEEPALIVE = 15           # Seconds after which an idle event stream sends a comment
+
+
+class Subscription:
+    """
+    Progress updates for one client, coalesced per job
+
+    Updates of the same job that arrive between two reads replace each
+    other, so a client receives at most one record per job per read
+    however fast the scrapers publish.
+    """
+
+    def __init__(self, hub, job_ids=None):
+        """
+        Args:
+            hub: ProgressHub to receive updates from
+            job_ids: Only receive these jobs (default: all jobs)
+        """
+        self.hub = hub
+        self.job_ids = set(job_ids) if job_ids else None
+        self.pending = {}   # job_id -> latest record, guarded by the hub's lock
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+
+    def _notify(self, job_id: str, record: dict):
+        """Called by the hub (any thread) with its lock held"""
+        if self.job_ids is not None and job_id not in self.job_ids:
+            return
+        first = not self.pending
+        self.pending[job_id] = record
+        if first:
+            self._loop.call_soon_threadsafe(self._ready.set)
+
+    async def next(self, interval: float = EVENT_INTERVAL, timeout: float = None) -> list:
+        """
+        Wait for updates, then collect what arrives within interval
+
+        Args:
+            interval: Coalescing window after the first update
+            timeout: Seconds to wait for the first update (default: forever)
+
+        Returns:
+            list: Latest record of every updated job (empty after a timeout)
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        await asyncio.sleep(interval)
+        with self.hub.lock:
+            pending, self.pending = self.pending, {}
+            self._ready.clear()
+            return [dict(record) for record in pending.values()]
+
+
+class ProgressHub:
+    """
+    Latest progress of the jobs of this process, pushed to subscribers
+
+    Scrapers publish a progress record for every page (see log_progress);
+    the hub keeps the latest record per job in memory, notifies the
+    subscribed event streams and writes to the database only when the
+    status changes or WRITE_INTERVAL passed, instead of once per page.
+    Reads of running jobs (latest()) come from memory.
+    """
+
+    def __init__(self, write_interval: float = WRITE_INTERVAL):
+        """
+        Args:
+            write_interval: Seconds between database writes while the status stays the same
+        """
+        self.write_interval = write_interval
+        self.lock = threading.Lock()
+        self.jobs = {}            # job_id -> latest record of jobs with an active status
+        self._dirty = set()       # job_ids with progress not yet in the database
+        self._written = {}        # job_id -> (status, monotonic time) of the last write
+        self._subscribers = set()
+
+    def publish(self, job_id: str, **fields):
+        """
+        Record new progress of a job
+
+        Args:
+            job_id: Unique job identifier
+            **fields: Job fields as for Store.save_job
+        """
+        now = time.monotonic()
+        with self.lock:
+            record = self.jobs.get(job_id)
+            if record is None:
+                record = self.jobs[job_id] = {"job_id": job_id}
+            record.update(fields)
+            status, written_at = self._written.get(job_id, (None, 0.0))
+            due = record["status"] != status or now - written_at >= self.write_interval
+            if due:
+                write = {name: value for name, value in record.items() if name != "job_id"}
+                self._dirty.discard(job_id)
+                self._written[job_id] = (record["status"], now)
+            else:
+                self._dirty.add(job_id)
+            if record["status"] not in ACTIVE_STATUSES:
+                # Finished: the database holds the final record
+                self._forget(job_id)
+            for subscriber in self._subscribers:
+                subscriber._notify(job_id, record)
+        if due:
+            get_store().save_job(job_id, **write)
+
+    def set_status(self, job_id: str, status: str):
+        """Change the status of a job (e.g. "stopped"), writing its latest counters with it"""
+        with self.lock:
+            live = job_id in self.jobs
+        if live:
+            self.publish(job_id, status=status)
+        else:
+            get_store().set_job_status(job_id, status)
+            self.notify(job_id, {"job_id": job_id, "status": status})
+
+    def notify(self, job_id: str, record: dict):
+        """Send a record to the subscribers without storing it (e.g. a deleted job)"""
+        with self.lock:
+            if record.get("deleted"):
+                self._forget(job_id)
+            for subscriber in self._subscribers:
+                subscriber._notify(job_id, record)
+
+    def flush(self, job_id: str = None):
+        """Write the progress of one job (default: all jobs) not written yet to the database"""
+        with self.lock:
+            job_ids = [job_id] if job_id is not None else list(self._dirty)
+            writes = []
+            for job_id in job_ids:
+                if job_id in self._dirty:
+                    self._dirty.discard(job_id)
+                    writes.append((job_id, {name: value for name, value in self.jobs[job_id].items() if name != "job_id"}))
+        for job_id, fields in writes:
+            get_store().save_job(job_id, **fields)
+
+    def discard(self, job_id: str):
+        """Drop the progress of a job without writing it (e.g. a job stopped by another process)"""
+        with self.lock:
+            self._forget(job_id)
+
+    def latest(self, job_id: str):
+        """
+        Returns:
+            dict: In-memory record of an active job, or None
+        """
+        with self.lock:
+            record = self.jobs.get(job_id)
+            return dict(record) if record is not None else None
+
+    def active(self) -> list:
+        """
+        Returns:
+            list: In-memory records of all active jobs
+        """
+        with self.lock:
+            return [dict(record) for record in self.jobs.values()]
+
+    def _forget(self, job_id: str):
+        self.jobs.pop(job_id, None)
+        self._dirty.discard(job_id)
+        self._written.pop(job_id, None)
+
+    @contextmanager
+    def subscribe(self, job_ids=None):
+        """
+        Receive progress updates inside a with block
+
+        Args:
+            job_ids: Only receive these jobs (default: all jobs)
+
+        Yields:
+            Subscription: Call await subscription.next() for updates
+        """
+        subscription = Subscription(self, job_ids)
+        with self.lock:
+            self._subscribers.add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self.lock:
+                self._subscribers.discard(subscription)
+
+
+def sse_event(record: dict, event: str = "progress") -> str:
+    """
+    Returns:
+        str: The record as a Server-Sent Events message
+    """
+    return f"event: {event}\nid: {record['job_id']}\ndata: {json.dumps(record)}\n\n"
+
+
+hub = ProgressHub()  # Shared by the scrapers and the API of this process
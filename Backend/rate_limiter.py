@@ -0,0 +1,224 @@
+import time
+import asyncio
+import urllib.request
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+from metrics import stage_seconds
+
+# Configuration constants
+INITIAL_RATE = 5.0        # Requests per second a new host starts with
+MIN_RATE = 0.2            # Never go slower than one request per 5 seconds
+MAX_RATE = 30.0           # Upper bound for the additive increase
+INCREASE_STEP = 0.25      # Requests per second added after a fast response
+DECREASE_FACTOR = 0.5     # Rate multiplier after throttling (429/503) or a timeout
+SLOW_FACTOR = 0.8         # Rate multiplier after a response slower than SLOW_LATENCY
+SLOW_LATENCY = 5.0        # Seconds; slower responses count as congestion
+THROTTLE_STATUSES = (429, 503)
+ROBOTS_TIMEOUT = 10       # Seconds to wait for robots.txt
+USER_AGENT = "*"          # robots.txt group used for crawl-delay
+
+
+def fetch_robots_txt(scheme: str, host: str):
+    """
+    Download robots.txt of a host
+
+    Returns:
+        str: File contents, or None if it is missing or unreachable
+    """
+    try:
+        with urllib.request.urlopen(f"{scheme}://{host}/robots.txt", timeout=ROBOTS_TIMEOUT) as resp:
+            return resp.read().decode("utf-8", errors="replace")
+    except Exception:
+        return None
+
+
+def crawl_delay(robots_txt: str, user_agent: str = USER_AGENT):
+    """
+    Returns:
+        float: Crawl-delay in seconds for the user agent, or None
+    """
+    if not robots_txt:
+        return None
+    parser = RobotFileParser()
+    parser.parse(robots_txt.splitlines())
+    delay = parser.crawl_delay(user_agent)
+    return float(delay) if delay is not None else None
+
+
+class HostLimiter:
+    """
+    Token bucket for one host with an AIMD-controlled refill rate
+
+    Each request takes a token. Fast successful responses add INCREASE_STEP
+    to the rate (additive increase); 429/503 responses and timeouts halve it,
+    slow responses reduce it by SLOW_FACTOR (multiplicative decrease, at most
+    once per response time so one burst of errors counts once). The rate
+    never exceeds the robots.txt crawl-delay.
+    """
+
+    def __init__(self, host: str, rate: float = INITIAL_RATE, max_rate: float = MAX_RATE):
+        self.host = host
+        self.max_rate = max_rate
+        self.rate = min(rate, max_rate)
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.last_decrease = 0.0
+        self.crawl_delay = None
+        self._lock = asyncio.Lock()
+
+        # Counters
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.latency_total = 0.0
+        self.first_request = None
+
+    def set_crawl_delay(self, delay):
+        """Cap the rate to one request per crawl-delay seconds"""
+        if delay:
+            self.crawl_delay = delay
+            self.max_rate = min(self.max_rate, 1.0 / delay)
+            self.rate = min(self.rate, self.max_rate)
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        async with self._lock:  # FIFO: waiters are served in arrival order
+            while True:
+                now = time.monotonic()
+                # Burst of at most one second worth of requests
+                capacity = max(1.0, self.rate)
+                self.tokens = min(capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    break
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+        if self.first_request is None:
+            self.first_request = time.monotonic()
+
+    def record(self, latency: float, status: int = None, error: Exception = None):
+        """
+        Update counters and the rate after a response
+
+        Args:
+            latency: Seconds the request took
+            status: HTTP status code (if a response was received)
+            error: Exception raised by the request (if any)
+        """
+        self.requests += 1
+        self.latency_total += latency
+        now = time.monotonic()
+
+        if status in THROTTLE_STATUSES or isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+            self.throttled += status in THROTTLE_STATUSES
+            self.errors += 1
+            self._decrease(DECREASE_FACTOR, latency, now)
+        elif error is not None or (status is not None and status >= 400):
+            self.errors += 1  # Not a congestion signal; keep the rate
+        elif latency > SLOW_LATENCY:
+            self._decrease(SLOW_FACTOR, latency, now)
+        else:
+            self.rate = min(self.max_rate, self.rate + INCREASE_STEP)
+
+    def _decrease(self, factor: float, latency: float, now: float):
+        if now - self.last_decrease < latency:
+            return  # Same congestion event as the previous decrease
+        self.last_decrease = now
+        self.rate = max(MIN_RATE, self.rate * factor)
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+            dict: Current rate, request/error counts, throughput and latency
+        """
+        elapsed = time.monotonic() - self.first_request if self.first_request else 0.0
+        return {
+            "rate": round(self.rate, 2),
+            "crawl_delay": self.crawl_delay,
+            "requests": self.requests,
+            "errors": self.errors,
+            "throttled": self.throttled,
+            "error_rate": round(self.errors / self.requests, 3) if self.requests else 0.0,
+            "throughput": round(self.requests / elapsed, 2) if elapsed > 0 else 0.0,
+            "mean_latency": round(self.latency_total / self.requests, 3) if self.requests else 0.0,
+        }
+
+
+class RateLimiter:
+    """
+    Per-host limiters shared by discovery and extraction (and by all jobs)
+
+    robots.txt is read once per host, on the first request to it.
+    """
+
+    def __init__(self, robots_fetcher=fetch_robots_txt, rate: float = INITIAL_RATE):
+        """
+        Args:
+            robots_fetcher: Callable (scheme, host) -> robots.txt text or None;
+                runs in a thread. None skips robots.txt.
+            rate: Initial requests per second for new hosts
+        """
+        self.robots_fetcher = robots_fetcher
+        self.rate = rate
+        self.hosts = {}
+        self._robots = {}  # host -> asyncio.Task reading robots.txt
+
+    async def host(self, url: str) -> HostLimiter:
+        """
+        Returns:
+            HostLimiter: Limiter of the URL's host (created on first use)
+        """
+        parsed = urlparse(url)
+        host = parsed.netloc
+        limiter = self.hosts.get(host)
+        if limiter is None:
+            limiter = self.hosts[host] = HostLimiter(host, self.rate)
+            if self.robots_fetcher is not None:
+                self._robots[host] = asyncio.ensure_future(
+                    asyncio.to_thread(self.robots_fetcher, parsed.scheme or "https", host)
+                )
+        task = self._robots.get(host)
+        if task is not None:
+            try:
+                robots_txt = await task
+            except Exception:
+                robots_txt = None  # Unreadable robots.txt: no crawl-delay
+            if self._robots.pop(host, None) is not None:
+                limiter.set_crawl_delay(crawl_delay(robots_txt))
+        return limiter
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+            dict: Counters per host
+        """
+        return {host: limiter.snapshot() for host, limiter in list(self.hosts.items())}
+
+
+class RateLimitedCrawler:
+    """
+    Crawler wrapper that waits for a host token before every fetch
+
+    Latency, status codes and errors of each fetch feed the host's AIMD
+    controller. Other attributes are passed on to the wrapped crawler.
+    """
+
+    def __init__(self, crawler, limiter: RateLimiter):
+        self.crawler = crawler
+        self.limiter = limiter
+
+    async def arun(self, url, config=None, **kwargs):
+        with stage_seconds.time("rate_limit"):
+            host = await self.limiter.host(url)
+            await host.acquire()
+        start = time.monotonic()
+        try:
+            res = await self.crawler.arun(url, config, **kwargs)
+        except Exception as e:
+            host.record(time.monotonic() - start, error=e)
+            raise
+        host.record(time.monotonic() - start, status=getattr(res, "status_code", None))
+        return res
+
+    def __getattr__(self, name):
+        return getattr(self.crawler, name)
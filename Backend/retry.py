@@ -0,0 +1,241 @@
+import os
+import re
+import random
+import socket
+import asyncio
+from collections import Counter
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import httpx
+
+# Configuration constants (override with environment variables)
+RETRY_ATTEMPTS = int(os.environ.get("SCRAPER_RETRY_ATTEMPTS", 3))            # Fetches per URL, including the first
+RETRY_BASE_DELAY = float(os.environ.get("SCRAPER_RETRY_BASE_DELAY", 1.0))    # Seconds before the first retry (before jitter)
+RETRY_MAX_DELAY = float(os.environ.get("SCRAPER_RETRY_MAX_DELAY", 60.0))     # Upper bound of a backoff, also of Retry-After
+
+# Transient failures worth another attempt; anything else (404, a page
+# without content, a parse error) fails the same way again
+FAILURE_CLASSES = ("timeout", "server_error", "throttled", "dns", "render_crash")
+
+# Error messages of crawl4ai/Playwright results and exceptions, per class
+MESSAGE_PATTERNS = (
+    ("dns", re.compile(
+        r"ERR_NAME_NOT_RESOLVED|Name or service not known|nodename nor servname|"
+        r"getaddrinfo|Temporary failure in name resolution|No address associated", re.I)),
+    ("render_crash", re.compile(
+        r"crashed|Target closed|has been closed|Browser closed|browser has disconnected", re.I)),
+    ("timeout", re.compile(r"timeout|timed out|ERR_TIMED_OUT", re.I)),
+)
+
+
+def classify(outcome):
+    """
+    Failure class of a fetch
+
+    Args:
+        outcome: Crawl result, or the exception raised while fetching
+
+    Returns:
+        str: One of FAILURE_CLASSES, or None for a successful fetch and
+            for failures a retry would not change
+    """
+    if isinstance(outcome, Exception):
+        if isinstance(outcome, (asyncio.TimeoutError, TimeoutError, httpx.TimeoutException)):
+            return "timeout"
+        if isinstance(outcome, socket.gaierror):
+            return "dns"
+        message = f"{type(outcome).__name__}: {outcome}"
+    else:
+        if outcome.success:
+            return None
+        status = getattr(outcome, "status_code", None)
+        if status == 429:
+            return "throttled"
+        if status is not None and 500 <= status < 600:
+            return "server_error"
+        message = getattr(outcome, "error_message", None) or ""
+    for name, pattern in MESSAGE_PATTERNS:
+        if pattern.search(message):
+            return name
+    return None
+
+
+def retry_after(outcome):
+    """
+    Returns:
+        float: Seconds the server asked to wait in a Retry-After header
+            (a number or an HTTP date), or None
+    """
+    headers = getattr(outcome, "response_headers", None) or {}
+    value = next((v for k, v in headers.items() if k.lower() == "retry-after"), None)
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def is_failure(outcome) -> bool:
+    return isinstance(outcome, Exception) or not outcome.success
+
+
+class RetryQueue:
+    """
+    Delayed queue of URLs whose fetch failed for a transient reason
+
+    The crawl loops hand every fetch outcome to retry(): a timeout, 5xx,
+    429, DNS error or browser crash schedules the URL again after an
+    exponential backoff with jitter, up to `attempts` fetches per URL.
+    A waiting URL holds no worker: a timer of the event loop hands it
+    back to the crawl (the `put` callback, set by the loop that owns the
+    frontier) when its delay is over, so the workers keep fetching other
+    pages meanwhile. A 429 or 503 that sends Retry-After waits at least
+    that long (up to max_delay); the host's rate limiter slows down on
+    its own.
+
+    One queue serves both phases of a job, so its counters cover the
+    whole job: URLs retried, recovered by a retry and abandoned (still
+    failing after the last attempt, or failing permanently after a
+    retry), plus the transient failures per class.
+    """
+
+    COUNTERS = ("retried", "recovered", "abandoned")
+
+    def __init__(
+        self,
+        put=None,
+        attempts: int = RETRY_ATTEMPTS,
+        base_delay: float = RETRY_BASE_DELAY,
+        max_delay: float = RETRY_MAX_DELAY,
+        rng: random.Random = None,
+    ):
+        """
+        Args:
+            put: Function put(url) that queues a URL again when its delay
+                is over (see bind)
+            attempts: Maximum number of fetches per URL (1: no retries)
+            base_delay: Backoff before the first retry; it doubles with
+                every further attempt
+            max_delay: Upper bound of a backoff
+            rng: Random generator for the jitter (default: module random)
+        """
+        self.put = put
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng or random
+        self.failures = {}         # url -> failed fetches of a URL that is being retried
+        self.pending = {}          # url -> TimerHandle of a URL waiting for its next attempt
+        self.classes = Counter()   # Transient failures per class
+        self.retried = 0           # Fetches scheduled again
+        self.recovered = 0         # URLs that succeeded after a retry
+        self.abandoned = 0         # URLs given up after a retry or at the attempt limit
+        self._released = asyncio.Event()
+
+    def __len__(self) -> int:
+        """Number of URLs waiting for their next attempt"""
+        return len(self.pending)
+
+    def bind(self, put):
+        """Send the URLs that are due to put(url) from now on"""
+        self.put = put
+
+    def failed_attempts(self, url: str) -> int:
+        return self.failures.get(url, 0)
+
+    def delay(self, attempt: int, server_delay: float = None) -> float:
+        """
+        Seconds to wait before attempt + 1
+
+        "Equal jitter": half of the exponential backoff is fixed, the
+        other half random, so URLs that failed together (a host that
+        went down) do not return together, and none returns at once.
+
+        Args:
+            attempt: Number of failed fetches of the URL so far (1 or more)
+            server_delay: Retry-After of the last response (optional)
+        """
+        backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        delay = backoff / 2 + self.rng.uniform(0, backoff / 2)
+        if server_delay is not None:
+            delay = max(delay, min(server_delay, self.max_delay))
+        return delay
+
+    def retry(self, url: str, outcome) -> bool:
+        """
+        Record the outcome of a fetch and schedule a retry if it is worth one
+
+        Args:
+            url: Fetched URL
+            outcome: Crawl result, or the exception raised while fetching
+
+        Returns:
+            bool: True if the URL was scheduled again; the caller must not
+                process the outcome then (it comes back through put)
+        """
+        failures = self.failures.pop(url, 0)
+        if not is_failure(outcome):
+            self.recovered += failures > 0
+            return False
+        kind = classify(outcome)
+        if kind is not None:
+            self.classes[kind] += 1
+            if failures + 1 < self.attempts:
+                self.failures[url] = failures + 1
+                self.retried += 1
+                self.schedule(url, self.delay(failures + 1, retry_after(outcome)))
+                return True
+        if kind is not None or failures:
+            self.abandoned += 1
+        return False
+
+    def schedule(self, url: str, delay: float):
+        """Hand url to put after delay seconds"""
+        self.pending[url] = asyncio.get_running_loop().call_later(delay, self._release, url)
+
+    def _release(self, url: str):
+        self.pending.pop(url, None)
+        self.put(url)
+        self._released.set()
+
+    async def wait(self):
+        """Wait until the next waiting URL is handed back"""
+        self._released.clear()
+        await self._released.wait()
+
+    def close(self) -> list:
+        """
+        Cancel the waiting retries (an interrupted crawl)
+
+        Returns:
+            list: URLs that were waiting; they are still queued in the
+                crawl state, so a resumed job fetches them again
+        """
+        for handle in self.pending.values():
+            handle.cancel()
+        urls = list(self.pending)
+        self.pending.clear()
+        return urls
+
+    def counters(self) -> dict:
+        return {name: getattr(self, name) for name in self.COUNTERS}
+
+    def restore(self, counters: dict):
+        """Continue the counters of an interrupted run (from its checkpoint)"""
+        for name in self.COUNTERS:
+            setattr(self, name, counters.get(name, 0))
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+            dict: Counters, transient failures per class and URLs waiting
+        """
+        return {**self.counters(), "classes": dict(self.classes), "waiting": len(self.pending)}
@@ -0,0 +1,286 @@
+import os
+import asyncio
+import threading
+from utils import log_progress
+from progress_events import hub
+from offload import CPUOffloader
+from browser_pool import BrowserPool, default_browser_factory
+from rate_limiter import RateLimiter
+
+# Configuration constants (override with environment variables)
+MAX_RUNNING_JOBS = int(os.environ.get("SCRAPER_MAX_JOBS", 2))      # Jobs scraped at the same time
+BROWSER_BUDGET = int(os.environ.get("SCRAPER_MAX_BROWSERS", 2))    # Headless browsers open at once
+PAGE_BUDGET = int(os.environ.get("SCRAPER_PAGE_BUDGET", 20))       # Page fetches in flight across all jobs
+PROGRESS_FOLDER = "progress"
+
+
+class PageBudget:
+    """Semaphore that also counts the page fetches currently in flight"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.in_flight = 0
+        self._slots = asyncio.Semaphore(size)
+
+    async def __aenter__(self):
+        await self._slots.acquire()
+        self.in_flight += 1
+
+    async def __aexit__(self, *exc):
+        self.in_flight -= 1
+        self._slots.release()
+        return False
+
+
+class BudgetedCrawler:
+    """
+    Crawler wrapper that takes a slot of the global page budget per fetch
+
+    All jobs share one PageBudget, so the number of pages loading at the
+    same time stays below PAGE_BUDGET however many jobs are running.
+    """
+
+    def __init__(self, crawler, budget: PageBudget):
+        self.crawler = crawler
+        self.budget = budget
+
+    async def arun(self, url, config=None, **kwargs):
+        async with self.budget:
+            return await self.crawler.arun(url, config, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.crawler, name)
+
+
+async def _scrape(url: str, job_id: str, crawler, offloader, max_concurrent: int, rate_limiter=None, **options):
+    from Crawlscraper import run_scrape, MAX_CONCURRENT  # imported late: pulls in crawl4ai
+    await run_scrape(
+        url,
+        job_id,
+        offloader=offloader,
+        crawler=crawler,
+        max_concurrent=min(MAX_CONCURRENT, max_concurrent),
+        rate_limiter=rate_limiter,
+        **options,
+    )
+
+
+class JobScheduler:
+    """
+    Runs scrape jobs in-process with a bounded worker pool
+
+    Jobs wait in a FIFO queue (status "queued") until one of max_jobs
+    workers picks them up. A running job leases one of browser_budget
+    browsers from a long-lived BrowserPool (so short jobs skip the browser
+    start-up) and every page fetch takes a slot of the shared page budget.
+    The scheduler owns an event loop in a background thread, so the
+    synchronous API endpoints can submit and cancel jobs directly.
+    """
+
+    def __init__(
+        self,
+        max_jobs: int = MAX_RUNNING_JOBS,
+        browser_budget: int = BROWSER_BUDGET,
+        page_budget: int = PAGE_BUDGET,
+        runner=_scrape,
+        browser_factory=default_browser_factory,
+    ):
+        """
+        Args:
+            max_jobs: Number of worker coroutines (jobs running at once)
+            browser_budget: Maximum number of open browsers (browser pool size)
+            page_budget: Maximum page fetches in flight across all jobs
+            runner: Coroutine function runner(url, job_id, crawler, offloader,
+                max_concurrent, rate_limiter, tier_memory=...,
+                page_budget=..., **options) that scrapes one job; every
+                page fetch must take a slot of page_budget (a PageBudget,
+                e.g. through BudgetedCrawler)
+            browser_factory: Callable returning an unstarted crawler
+                (async context manager) for the browser pool
+        """
+        self.max_jobs = max(1, max_jobs)
+        self.browser_budget = max(1, browser_budget)
+        self.page_budget = max(1, page_budget)
+        self.runner = runner
+        self.browser_factory = browser_factory
+
+        self.queued = {}    # job_id -> url, in submission order
+        self.running = {}   # job_id -> asyncio.Task
+        self.options = {}   # job_id -> extra runner arguments (e.g. incremental)
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+
+    # ---------- public API (thread-safe) ----------
+
+    def start(self):
+        """Start the scheduler loop in a background thread (idempotent)"""
+        with self._lock:
+            if self._loop is not None:
+                return self
+            ready = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run_loop, args=(ready,), name="job-scheduler", daemon=True
+            )
+            self._thread.start()
+            ready.wait()
+        return self
+
+    def submit(self, url: str, job_id: str, **options):
+        """
+        Queue a job; it starts as soon as a worker and a browser are free
+
+        Args:
+            url: The starting URL to scrape
+            job_id: Unique identifier for the job
+            **options: Extra arguments for the runner (e.g. incremental=True)
+        """
+        self.start()
+        log_progress(self._progress_file(job_id), 0, "queued", url=url)
+        with self._lock:
+            self.queued[job_id] = url
+            self.options[job_id] = options
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Remove a queued job or stop a running one
+
+        Args:
+            job_id: ID of the job
+
+        Returns:
+            bool: True if the job was queued or running
+        """
+        with self._lock:
+            if self.queued.pop(job_id, None) is not None:
+                self.options.pop(job_id, None)
+                hub.set_status(job_id, "stopped")
+                return True
+            task = self.running.get(job_id)
+        if task is None:
+            return False
+        self._loop.call_soon_threadsafe(task.cancel)
+        return True
+
+    def stop_all(self) -> list:
+        """
+        Cancel every queued and running job
+
+        Returns:
+            list: IDs of the cancelled jobs
+        """
+        with self._lock:
+            job_ids = list(self.queued) + list(self.running)
+        return [job_id for job_id in job_ids if self.cancel(job_id)]
+
+    def state(self, job_id: str):
+        """
+        Returns:
+            str: "queued", "running" or None if the scheduler does not hold the job
+        """
+        with self._lock:
+            if job_id in self.queued:
+                return "queued"
+            if job_id in self.running:
+                return "running"
+        return None
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+            dict: Queue length, running jobs and budget usage
+        """
+        with self._lock:
+            return {
+                "queued": len(self.queued),
+                "running": len(self.running),
+                "max_jobs": self.max_jobs,
+                "browsers": self._pool.leased if self._loop else 0,
+                "browser_budget": self.browser_budget,
+                "browser_pool": self._pool.snapshot() if self._loop else None,
+                "pages_in_flight": self._pages.in_flight if self._loop else 0,
+                "page_budget": self.page_budget,
+                "hosts": self._rate_limiter.snapshot() if self._loop else {},
+                "fetch_tiers": self._tier_memory.snapshot() if self._loop else {},
+            }
+
+    def shutdown(self):
+        """Cancel all jobs and stop the loop thread"""
+        if self._loop is None:
+            return
+        self.stop_all()
+        asyncio.run_coroutine_threadsafe(self._stop_workers(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop = None
+
+    # ---------- scheduler loop ----------
+
+    def _run_loop(self, ready: threading.Event):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._queue = asyncio.Queue()
+        self._pages = PageBudget(self.page_budget)
+        self._pool = BrowserPool(self.browser_budget, factory=self.browser_factory)
+        self._offloader = CPUOffloader()  # One parsing pool shared by all jobs
+        self._rate_limiter = RateLimiter()  # Jobs on the same host share its limit
+        from fetch_tier import TierMemory  # imported late: pulls in crawl4ai
+        self._tier_memory = TierMemory()    # HTTP or browser, learned per host and path prefix
+        self._workers = [loop.create_task(self._worker()) for _ in range(self.max_jobs)]
+        self._loop = loop
+        ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            self._offloader.close()
+            loop.close()
+
+    async def _stop_workers(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        await self._pool.close()
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            with self._lock:
+                url = self.queued.pop(job_id, None)
+                options = self.options.pop(job_id, {})
+                if url is None:  # Cancelled while waiting
+                    continue
+                task = asyncio.get_running_loop().create_task(self._run_job(url, job_id, options))
+                self.running[job_id] = task
+            try:
+                await task
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    raise  # The worker itself is being stopped
+            except Exception as e:
+                print(f"Job {job_id} failed: {e}")
+            finally:
+                with self._lock:
+                    self.running.pop(job_id, None)
+
+    async def _run_job(self, url: str, job_id: str, options: dict):
+        try:
+            async with self._pool.lease() as crawler:
+                await self.runner(
+                    url,
+                    job_id,
+                    crawler,
+                    self._offloader,
+                    self.page_budget,
+                    self._rate_limiter,
+                    tier_memory=self._tier_memory,
+                    page_budget=self._pages,
+                    **options,
+                )
+        except asyncio.CancelledError:
+            hub.set_status(job_id, "stopped")
+            raise
+
+    @staticmethod
+    def _progress_file(job_id: str) -> str:
+        return os.path.join(PROGRESS_FOLDER, f"{job_id}.json")
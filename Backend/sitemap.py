@@ -0,0 +1,167 @@
+import gzip
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+from xml.etree import ElementTree
+from link_extractor import normalize_internal
+from utils import is_excluded
+
+# Configuration constants
+MAX_SITEMAPS = 200      # Sitemap files read per website (indexes can be huge)
+
+# URL discovery strategies selectable per website
+DISCOVERY_STRATEGIES = (
+    "links",    # Render pages and follow their links
+    "sitemap",  # Read robots.txt / sitemaps first, follow links only for gaps
+)
+DEFAULT_DISCOVERY = "links"
+
+
+def _local(tag: str) -> str:
+    """Strip the XML namespace from a tag"""
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_sitemap(content: bytes):
+    """
+    Parse a sitemap or sitemap index (plain or gzipped)
+
+    Args:
+        content: Raw response body
+
+    Returns:
+        tuple: (kind, entries) where kind is "urlset" or "sitemapindex" and
+            entries is a list of (loc, lastmod) tuples; lastmod may be None.
+            Unparseable content gives ("invalid", []).
+    """
+    if content[:2] == b"\x1f\x8b":  # gzip magic number
+        try:
+            content = gzip.decompress(content)
+        except (OSError, EOFError):
+            return "invalid", []
+    try:
+        root = ElementTree.fromstring(content)
+    except ElementTree.ParseError:
+        return "invalid", []
+
+    kind = _local(root.tag)
+    if kind not in ("urlset", "sitemapindex"):
+        return "invalid", []
+    entries = []
+    for item in root:
+        loc = lastmod = None
+        for child in item:
+            name = _local(child.tag)
+            if name == "loc" and child.text:
+                loc = child.text.strip()
+            elif name == "lastmod" and child.text:
+                lastmod = child.text.strip()
+        if loc:
+            entries.append((loc, lastmod))
+    return kind, entries
+
+
+def default_sitemap_url(start_url: str) -> str:
+    """
+    Returns:
+        str: The conventional /sitemap.xml location of the website
+    """
+    parsed = urlparse(start_url)
+    return f"{parsed.scheme}://{parsed.netloc}/sitemap.xml"
+
+
+def robots_sitemaps(robots_txt: str) -> list:
+    """
+    Returns:
+        list: Sitemap URLs declared in robots.txt ("Sitemap:" lines)
+    """
+    if not robots_txt:
+        return []
+    parser = RobotFileParser()
+    parser.parse(robots_txt.splitlines())
+    return parser.site_maps() or []
+
+
+async def find_sitemaps(client, start_url: str) -> list:
+    """
+    Locate the sitemaps of a website
+
+    Args:
+        client: httpx.AsyncClient
+        start_url: Any URL of the website
+
+    Returns:
+        list: Sitemaps listed in robots.txt, or the conventional /sitemap.xml
+    """
+    parsed = urlparse(start_url)
+    try:
+        resp = await client.get(f"{parsed.scheme}://{parsed.netloc}/robots.txt")
+        declared = robots_sitemaps(resp.text) if resp.status_code == 200 else []
+    except Exception:
+        declared = []
+    return declared or [default_sitemap_url(start_url)]
+
+
+async def iter_sitemap_entries(client, sitemap_urls, max_sitemaps: int = MAX_SITEMAPS):
+    """
+    Read sitemaps, following sitemap indexes
+
+    Entries are yielded per sitemap file as soon as it is parsed, so a
+    crawl can start on the first file while the others download.
+
+    Args:
+        client: httpx.AsyncClient
+        sitemap_urls: Sitemap or sitemap index URLs to start from
+        max_sitemaps: Maximum number of sitemap files to download
+
+    Yields:
+        tuple: (loc, lastmod) of every page entry; lastmod may be None
+    """
+    pending = list(sitemap_urls)
+    seen = set()
+    while pending and len(seen) < max_sitemaps:
+        url = pending.pop(0)
+        if url in seen:
+            continue
+        seen.add(url)
+        try:
+            resp = await client.get(url)
+        except Exception:
+            continue
+        if resp.status_code != 200:
+            continue
+        kind, entries = parse_sitemap(resp.content)
+        if kind == "sitemapindex":
+            pending.extend(loc for loc, _ in entries)
+        else:
+            for entry in entries:
+                yield entry
+
+
+async def fetch_sitemap_entries(client, sitemap_urls, max_sitemaps: int = MAX_SITEMAPS) -> list:
+    """
+    Read sitemaps completely (see iter_sitemap_entries)
+
+    Returns:
+        list: (loc, lastmod) tuples of all page entries
+    """
+    return [entry async for entry in iter_sitemap_entries(client, sitemap_urls, max_sitemaps)]
+
+
+async def sitemap_page_urls(client, start_url: str, max_sitemaps: int = MAX_SITEMAPS):
+    """
+    Stream the crawlable pages of a website listed in its sitemaps
+
+    Args:
+        client: httpx.AsyncClient
+        start_url: The starting URL of the website
+        max_sitemaps: Maximum number of sitemap files to download
+
+    Yields:
+        str: Normalized internal URLs (same host, no excluded file types)
+    """
+    netloc = urlparse(start_url).netloc
+    sitemaps = await find_sitemaps(client, start_url)
+    async for loc, _ in iter_sitemap_entries(client, sitemaps, max_sitemaps):
+        url = normalize_internal(start_url, loc, netloc)
+        if url and not is_excluded(url):
+            yield url
@@ -0,0 +1,1009 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime
+
+# Configuration constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Backend directory
+DB_FILE = os.path.join(BASE_DIR, "scraper.db")         # Default database location
+BUSY_TIMEOUT = 30                                      # Seconds to wait on a locked database
+
+# Job statuses that mean the job is still working
+ACTIVE_STATUSES = ("queued", "starting", "discovering", "discovery done", "scraping")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS websites (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    site TEXT NOT NULL,             -- url without trailing slash, used for matching
+    discovery TEXT NOT NULL DEFAULT 'links'  -- URL discovery strategy: links or sitemap
+);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    site TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress INTEGER NOT NULL DEFAULT 0,
+    done INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 0,
+    success INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    timestamp TEXT NOT NULL,
+    skipped INTEGER NOT NULL DEFAULT 0,   -- unchanged pages (incremental re-crawl)
+    changed INTEGER NOT NULL DEFAULT 0,
+    new INTEGER NOT NULL DEFAULT 0,
+    retried INTEGER NOT NULL DEFAULT 0,   -- fetches retried after a transient failure
+    recovered INTEGER NOT NULL DEFAULT 0,
+    abandoned INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_site_status ON jobs (site, status);
+CREATE INDEX IF NOT EXISTS idx_jobs_timestamp ON jobs (timestamp);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_timestamp ON jobs (status, timestamp);
+
+-- Running totals of the jobs per site and status, kept up to date by the
+-- triggers below so statistics never scan the jobs table
+CREATE TABLE IF NOT EXISTS job_counts (
+    site TEXT NOT NULL,
+    status TEXT NOT NULL,
+    jobs INTEGER NOT NULL,
+    success INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    PRIMARY KEY (site, status)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS job_counts_insert AFTER INSERT ON jobs BEGIN
+    INSERT INTO job_counts (site, status, jobs, success, failed)
+    VALUES (NEW.site, NEW.status, 1, NEW.success, NEW.failed)
+    ON CONFLICT (site, status) DO UPDATE SET
+        jobs = jobs + 1, success = success + excluded.success, failed = failed + excluded.failed;
+END;
+
+CREATE TRIGGER IF NOT EXISTS job_counts_update AFTER UPDATE OF site, status, success, failed ON jobs
+WHEN OLD.site IS NOT NEW.site OR OLD.status IS NOT NEW.status
+    OR OLD.success IS NOT NEW.success OR OLD.failed IS NOT NEW.failed
+BEGIN
+    UPDATE job_counts SET jobs = jobs - 1, success = success - OLD.success, failed = failed - OLD.failed
+    WHERE site = OLD.site AND status = OLD.status;
+    INSERT INTO job_counts (site, status, jobs, success, failed)
+    VALUES (NEW.site, NEW.status, 1, NEW.success, NEW.failed)
+    ON CONFLICT (site, status) DO UPDATE SET
+        jobs = jobs + 1, success = success + excluded.success, failed = failed + excluded.failed;
+    DELETE FROM job_counts WHERE site = OLD.site AND status = OLD.status AND jobs = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS job_counts_delete AFTER DELETE ON jobs BEGIN
+    UPDATE job_counts SET jobs = jobs - 1, success = success - OLD.success, failed = failed - OLD.failed
+    WHERE site = OLD.site AND status = OLD.status;
+    DELETE FROM job_counts WHERE site = OLD.site AND status = OLD.status AND jobs = 0;
+END;
+
+CREATE TABLE IF NOT EXISTS page_hashes (
+    domain TEXT NOT NULL,
+    url TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    simhash INTEGER,                -- SimHash of the page content, as signed 64-bit
+    PRIMARY KEY (domain, url)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS page_validators (
+    domain TEXT NOT NULL,
+    url TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    lastmod TEXT,                   -- sitemap <lastmod> seen at the last fetch
+    timestamp TEXT NOT NULL,
+    PRIMARY KEY (domain, url)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS crawl_checkpoints (
+    job_id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    phase TEXT NOT NULL,            -- crawling (pipelined), discovering or extracting
+    options TEXT NOT NULL,          -- JSON run_scrape arguments to resume with
+    out_dir TEXT,                   -- output folder of the job
+    counters TEXT NOT NULL,         -- JSON page counters at the checkpoint
+    timestamp TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS crawl_urls (
+    job_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    state INTEGER NOT NULL,         -- 0 queued, 1 visited, 2 completed
+    PRIMARY KEY (job_id, url)
+);
+
+-- Sampling profiles of jobs started with profiling (see job_profiler.py)
+CREATE TABLE IF NOT EXISTS job_profiles (
+    job_id TEXT PRIMARY KEY,
+    stacks TEXT NOT NULL,           -- samples in the folded stack format
+    summary TEXT NOT NULL,          -- JSON sample counts and top functions
+    timestamp TEXT NOT NULL
+);
+
+-- Shared work queue of distributed crawls (see work_queue.SQLiteWorkQueue)
+CREATE TABLE IF NOT EXISTS work_jobs (
+    job_id TEXT PRIMARY KEY,
+    start_url TEXT NOT NULL,
+    finished INTEGER NOT NULL DEFAULT 0,  -- 1 once a worker took over finishing the job
+    cancelled INTEGER NOT NULL DEFAULT 0  -- 1 once the job was stopped; workers leave it
+);
+
+CREATE TABLE IF NOT EXISTS work_urls (
+    job_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    state INTEGER NOT NULL,         -- 0 queued, 1 leased, 2 completed
+    worker TEXT,                    -- worker holding the lease
+    leased_until REAL,              -- time.time() at which the lease expires
+    PRIMARY KEY (job_id, url)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_work_urls_state ON work_urls (job_id, state);
+
+CREATE TABLE IF NOT EXISTS work_reports (
+    job_id TEXT NOT NULL,
+    worker TEXT NOT NULL,
+    counters TEXT NOT NULL,         -- JSON page counters and state of the worker
+    timestamp REAL NOT NULL,        -- time.time() of the report
+    PRIMARY KEY (job_id, worker)
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+JOB_FIELDS = (
+    "job_id", "url", "status", "progress", "done", "total",
+    "success", "failed", "timestamp", "skipped", "changed", "new",
+    "retried", "recovered", "abandoned",
+)
+
+# Columns added after the first release: (table, column, definition)
+ADDED_COLUMNS = (
+    ("jobs", "skipped", "INTEGER NOT NULL DEFAULT 0"),
+    ("jobs", "changed", "INTEGER NOT NULL DEFAULT 0"),
+    ("jobs", "new", "INTEGER NOT NULL DEFAULT 0"),
+    ("jobs", "retried", "INTEGER NOT NULL DEFAULT 0"),
+    ("jobs", "recovered", "INTEGER NOT NULL DEFAULT 0"),
+    ("jobs", "abandoned", "INTEGER NOT NULL DEFAULT 0"),
+    ("websites", "discovery", "TEXT NOT NULL DEFAULT 'links'"),
+    ("page_hashes", "simhash", "INTEGER"),
+    ("work_jobs", "cancelled", "INTEGER NOT NULL DEFAULT 0"),
+)
+
+
+def _site(url: str) -> str:
+    return str(url).rstrip("/")
+
+
+def _status_filter(statuses):
+    """
+    SQL condition for a status filter
+
+    Besides exact statuses, "active" matches every status of
+    ACTIVE_STATUSES and "error" every "error: ..." status.
+
+    Returns:
+        tuple: (condition, parameters)
+    """
+    exact = set()
+    conditions = []
+    for status in statuses:
+        if status == "active":
+            exact.update(ACTIVE_STATUSES)
+        elif status == "error":
+            conditions.append("status LIKE 'error%'")
+        else:
+            exact.add(status)
+    if exact:
+        conditions.append(f"status IN ({', '.join('?' for _ in exact)})")
+    return f"({' OR '.join(conditions)})", sorted(exact)
+
+
+def _job_filter(statuses=None, site: str = None):
+    """WHERE clause and parameters for the jobs and job_counts tables"""
+    conditions, params = [], []
+    if statuses:
+        condition, status_params = _status_filter(statuses)
+        conditions.append(condition)
+        params.extend(status_params)
+    if site:
+        conditions.append("site = ?")
+        params.append(_site(site))
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+def _signed64(value):
+    """SQLite integers are signed; store unsigned 64-bit values shifted"""
+    if value is None or value < 1 << 63:
+        return value
+    return value - (1 << 64)
+
+
+class Store:
+    """
+    Embedded SQLite database shared by the API and the scraper processes
+
+    The database runs in WAL mode so readers never block the writer and
+    several processes can update their own rows without rewriting (or
+    truncating) anybody else's data. Every thread gets its own connection.
+    """
+
+    def __init__(self, path: str = DB_FILE):
+        """
+        Args:
+            path: Location of the SQLite database file
+        """
+        self.path = path
+        self._local = threading.local()
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+            self._add_columns(conn)
+            self._count_jobs(conn)
+
+    @staticmethod
+    def _add_columns(conn: sqlite3.Connection):
+        """Bring databases created by older versions up to date"""
+        for table, column, definition in ADDED_COLUMNS:
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    @staticmethod
+    def _count_jobs(conn: sqlite3.Connection):
+        """Fill job_counts once for jobs saved before it existed"""
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'job_counts'").fetchone():
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have filled it while we waited for the lock
+            if not conn.execute("SELECT 1 FROM meta WHERE key = 'job_counts'").fetchone():
+                conn.execute("DELETE FROM job_counts")
+                conn.execute(
+                    "INSERT INTO job_counts (site, status, jobs, success, failed) "
+                    "SELECT site, status, COUNT(*), SUM(success), SUM(failed) FROM jobs GROUP BY site, status"
+                )
+                conn.execute("INSERT INTO meta (key, value) VALUES ('job_counts', '1')")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        Get the connection for the current thread, opening it if needed
+
+        Returns:
+            sqlite3.Connection: Autocommit connection with WAL enabled
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=BUSY_TIMEOUT, isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close the connection of the current thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ---------- websites ----------
+
+    def list_websites(self) -> list:
+        """
+        Returns:
+            list: Website dictionaries ({"id", "url", "discovery"}) ordered by id
+        """
+        rows = self.connection().execute("SELECT id, url, discovery FROM websites ORDER BY id")
+        return [dict(row) for row in rows]
+
+    def get_website_by_url(self, url: str):
+        """
+        Find a website, ignoring a trailing slash
+
+        Returns:
+            dict: The website, or None if it is not registered
+        """
+        row = self.connection().execute(
+            "SELECT id, url, discovery FROM websites WHERE site = ?", (_site(url),)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def add_website(self, url: str, website_id: int = None, discovery: str = "links") -> dict:
+        """
+        Register a website
+
+        Args:
+            url: Website URL
+            website_id: Explicit id (default: next free id)
+            discovery: URL discovery strategy ("links" or "sitemap")
+
+        Returns:
+            dict: The created website
+
+        Raises:
+            sqlite3.IntegrityError: If the URL is already registered
+        """
+        cur = self.connection().execute(
+            "INSERT INTO websites (id, url, site, discovery) VALUES (?, ?, ?, ?)",
+            (website_id, str(url), _site(url), discovery),
+        )
+        return {"id": cur.lastrowid, "url": str(url), "discovery": discovery}
+
+    def set_website_discovery(self, website_id: int, discovery: str):
+        """
+        Change the URL discovery strategy of a website
+
+        Returns:
+            dict: The updated website, or None if it does not exist
+        """
+        conn = self.connection()
+        conn.execute(
+            "UPDATE websites SET discovery = ? WHERE id = ?", (discovery, website_id)
+        )
+        row = conn.execute(
+            "SELECT id, url, discovery FROM websites WHERE id = ?", (website_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def delete_website(self, website_id: int):
+        """
+        Remove a website
+
+        Returns:
+            dict: The removed website, or None if it did not exist
+        """
+        conn = self.connection()
+        row = conn.execute(
+            "SELECT id, url, discovery FROM websites WHERE id = ?", (website_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("DELETE FROM websites WHERE id = ?", (website_id,))
+        return dict(row)
+
+    # ---------- jobs ----------
+
+    def save_job(self, job_id: str, **fields):
+        """
+        Insert or update the progress record of a job
+
+        Args:
+            job_id: Unique job identifier
+            **fields: Any of url, status, progress, done, total, success,
+                failed, timestamp, skipped, changed, new, retried,
+                recovered and abandoned
+        """
+        fields.setdefault("timestamp", datetime.now().isoformat())
+        columns = [name for name in JOB_FIELDS if name in fields]
+        values = [fields[name] for name in columns]
+        if "url" in fields:
+            columns.append("site")
+            values.append(_site(fields["url"]))
+        updates = ", ".join(f"{name} = excluded.{name}" for name in columns)
+        self.connection().execute(
+            f"INSERT INTO jobs (job_id, {', '.join(columns)}) "
+            f"VALUES (?, {', '.join('?' for _ in columns)}) "
+            f"ON CONFLICT (job_id) DO UPDATE SET {updates}",
+            [job_id, *values],
+        )
+
+    def set_job_status(self, job_id: str, status: str):
+        """Change the status of a job without touching its counters"""
+        self.connection().execute(
+            "UPDATE jobs SET status = ? WHERE job_id = ?", (status, job_id)
+        )
+
+    def get_job(self, job_id: str):
+        """
+        Returns:
+            dict: Progress record of the job, or None if unknown
+        """
+        row = self.connection().execute(
+            f"SELECT {', '.join(JOB_FIELDS)} FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def list_jobs(self, statuses=None, site: str = None, limit: int = None, offset: int = 0,
+                  newest_first: bool = False) -> list:
+        """
+        Progress records of jobs, ordered by their last update
+
+        Args:
+            statuses: Only jobs with one of these statuses (see _status_filter)
+            site: Only jobs of this website URL
+            limit: Maximum number of records (default: all)
+            offset: Records to skip
+            newest_first: Most recently updated first (default: oldest first)
+
+        Returns:
+            list: Progress records
+        """
+        where, params = _job_filter(statuses, site)
+        order = "DESC" if newest_first else "ASC"
+        rows = self.connection().execute(
+            f"SELECT {', '.join(JOB_FIELDS)} FROM jobs{where} "
+            f"ORDER BY timestamp {order}, job_id {order} LIMIT ? OFFSET ?",
+            [*params, -1 if limit is None else limit, offset],
+        )
+        return [dict(row) for row in rows]
+
+    def job_counts(self, statuses=None, site: str = None) -> dict:
+        """
+        Number of jobs per status, read from the running totals
+
+        Args:
+            statuses: Only these statuses (see _status_filter)
+            site: Only jobs of this website URL
+
+        Returns:
+            dict: {status: number of jobs}
+        """
+        where, params = _job_filter(statuses, site)
+        rows = self.connection().execute(
+            f"SELECT status, SUM(jobs) FROM job_counts{where} GROUP BY status", params
+        )
+        return {status: jobs for status, jobs in rows if jobs}
+
+    def delete_job(self, job_id: str) -> bool:
+        """
+        Returns:
+            bool: True if a job was removed
+        """
+        conn = self.connection()
+        cur = conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+        conn.execute("DELETE FROM job_profiles WHERE job_id = ?", (job_id,))
+        self.delete_crawl_checkpoint(job_id)
+        return cur.rowcount > 0
+
+    def stats(self) -> dict:
+        """
+        Aggregate job statistics for all registered websites
+
+        Only jobs whose URL is registered count. Success and failure totals
+        include finished, stopped and running jobs. The totals come from
+        job_counts, so the cost depends on the number of websites and
+        statuses, not on the number of jobs.
+
+        Returns:
+            dict: total, active, completed, success and failed counts
+        """
+        active_marks = ", ".join("?" for _ in ACTIVE_STATUSES)
+        row = self.connection().execute(
+            f"""
+            SELECT
+                (SELECT COUNT(*) FROM websites) AS total,
+                COALESCE(SUM(CASE WHEN c.status IN ({active_marks}) THEN c.jobs ELSE 0 END), 0) AS active,
+                COALESCE(SUM(CASE WHEN c.status = 'done' THEN c.jobs ELSE 0 END), 0) AS completed,
+                COALESCE(SUM(CASE WHEN c.status IN ('done', 'stopped', 'scraping')
+                             THEN c.success ELSE 0 END), 0) AS success,
+                COALESCE(SUM(CASE WHEN c.status IN ('done', 'stopped', 'scraping')
+                             THEN c.failed ELSE 0 END), 0) AS failed
+            FROM websites w JOIN job_counts c ON c.site = w.site
+            """,
+            ACTIVE_STATUSES,
+        ).fetchone()
+        return dict(row)
+
+    # ---------- page hashes ----------
+
+    def load_hashes(self, domain: str = None) -> dict:
+        """
+        Args:
+            domain: Only return hashes of this domain (default: all domains)
+
+        Returns:
+            dict: Stored hashes as {domain: {url: {hash, timestamp}}}; entries
+                with a content fingerprint also hold "simhash"
+        """
+        data = {}
+        query = "SELECT domain, url, hash, timestamp, simhash FROM page_hashes"
+        if domain is None:
+            rows = self.connection().execute(query)
+        else:
+            rows = self.connection().execute(query + " WHERE domain = ?", (domain,))
+        for domain, url, content_hash, timestamp, simhash in rows:
+            entry = data.setdefault(domain, {})[url] = {
+                "hash": content_hash, "timestamp": timestamp,
+            }
+            if simhash is not None:
+                entry["simhash"] = simhash + (1 << 64) if simhash < 0 else simhash
+        return data
+
+    def save_hashes(self, data: dict):
+        """
+        Insert or replace hashes in one transaction
+
+        Args:
+            data: Hashes as {domain: {url: {hash, timestamp}}}, optionally
+                with an unsigned 64-bit "simhash"
+        """
+        rows = [
+            (domain, url, entry["hash"], entry["timestamp"], _signed64(entry.get("simhash")))
+            for domain, entries in data.items()
+            for url, entry in entries.items()
+        ]
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO page_hashes (domain, url, hash, timestamp, simhash) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ---------- page validators ----------
+
+    def load_validators(self, domain: str) -> dict:
+        """
+        Args:
+            domain: Domain to load
+
+        Returns:
+            dict: {url: {etag, last_modified, lastmod, timestamp}}
+        """
+        rows = self.connection().execute(
+            "SELECT url, etag, last_modified, lastmod, timestamp "
+            "FROM page_validators WHERE domain = ?",
+            (domain,),
+        )
+        return {row["url"]: dict(row) for row in rows}
+
+    def save_validators(self, domain: str, data: dict):
+        """
+        Insert or replace validators in one transaction
+
+        Args:
+            domain: Domain the URLs belong to
+            data: {url: {etag, last_modified, lastmod, timestamp}}
+        """
+        rows = [
+            (domain, url, v.get("etag"), v.get("last_modified"), v.get("lastmod"), v["timestamp"])
+            for url, v in data.items()
+        ]
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO page_validators "
+                "(domain, url, etag, last_modified, lastmod, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ---------- crawl checkpoints ----------
+
+    def get_crawl_checkpoint(self, job_id: str):
+        """
+        Returns:
+            dict: Checkpoint of the job (url, phase, options, out_dir,
+                counters, timestamp), or None if it has none
+        """
+        row = self.connection().execute(
+            "SELECT url, phase, options, out_dir, counters, timestamp "
+            "FROM crawl_checkpoints WHERE job_id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        checkpoint = dict(row)
+        checkpoint["options"] = json.loads(checkpoint["options"])
+        checkpoint["counters"] = json.loads(checkpoint["counters"])
+        return checkpoint
+
+    def load_crawl_urls(self, job_id: str) -> dict:
+        """
+        Returns:
+            dict: {url: state} of the job in the order the URLs were queued
+        """
+        rows = self.connection().execute(
+            "SELECT url, state FROM crawl_urls WHERE job_id = ? ORDER BY rowid", (job_id,)
+        )
+        return {url: state for url, state in rows}
+
+    def save_crawl_checkpoint(self, job_id: str, urls: dict, **fields):
+        """
+        Write a checkpoint and the changed URL states in one transaction
+
+        URL states only move forward (queued, visited, completed).
+
+        Args:
+            job_id: Unique job identifier
+            urls: {url: state} changed since the previous checkpoint
+            **fields: url, phase, options, out_dir and counters of the job
+        """
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO crawl_checkpoints "
+                "(job_id, url, phase, options, out_dir, counters, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    fields["url"],
+                    fields["phase"],
+                    json.dumps(fields.get("options") or {}),
+                    fields.get("out_dir"),
+                    json.dumps(fields.get("counters") or {}),
+                    datetime.now().isoformat(),
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO crawl_urls (job_id, url, state) VALUES (?, ?, ?) "
+                "ON CONFLICT (job_id, url) DO UPDATE SET state = max(state, excluded.state)",
+                [(job_id, url, state) for url, state in urls.items()],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete_crawl_checkpoint(self, job_id: str):
+        """Forget the checkpoint and URL states of a job"""
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM crawl_urls WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM crawl_checkpoints WHERE job_id = ?", (job_id,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ---------- job profiles ----------
+
+    def save_job_profile(self, job_id: str, stacks: str, summary: dict):
+        """
+        Store the profile of a job, replacing an earlier one
+
+        Args:
+            job_id: Unique job identifier
+            stacks: Samples in the folded stack format
+            summary: Sample counts and top functions (see JobProfiler.summary)
+        """
+        self.connection().execute(
+            "INSERT OR REPLACE INTO job_profiles (job_id, stacks, summary, timestamp) VALUES (?, ?, ?, ?)",
+            (job_id, stacks, json.dumps(summary), datetime.now().isoformat()),
+        )
+
+    def get_job_profile(self, job_id: str):
+        """
+        Returns:
+            dict: {"stacks", "summary", "timestamp"} of the job, or None
+        """
+        row = self.connection().execute(
+            "SELECT stacks, summary, timestamp FROM job_profiles WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        profile = dict(row)
+        profile["summary"] = json.loads(profile["summary"])
+        return profile
+
+    # ---------- work queue ----------
+
+    def open_work_job(self, job_id: str, start_url: str = None):
+        """
+        Register a distributed job, or look up its start URL
+
+        Args:
+            job_id: Unique job identifier
+            start_url: Start URL of a new job (ignored if it is registered)
+
+        Returns:
+            tuple: (start URL, True if the job was registered now), or
+                (None, False) for an unknown job without start_url and
+                for a cancelled job
+        """
+        conn = self.connection()
+        created = False
+        if start_url is not None:
+            created = conn.execute(
+                "INSERT OR IGNORE INTO work_jobs (job_id, start_url) VALUES (?, ?)", (job_id, start_url)
+            ).rowcount > 0
+        row = conn.execute(
+            "SELECT start_url FROM work_jobs WHERE job_id = ? AND cancelled = 0", (job_id,)
+        ).fetchone()
+        return (row[0] if row else None), created
+
+    def list_work_jobs(self) -> list:
+        """
+        Returns:
+            list: (job_id, start URL) of the distributed jobs not finished yet
+        """
+        rows = self.connection().execute(
+            "SELECT job_id, start_url FROM work_jobs WHERE finished = 0 AND cancelled = 0 ORDER BY rowid"
+        )
+        return [tuple(row) for row in rows]
+
+    def cancel_work_job(self, job_id: str) -> bool:
+        """
+        Stop a distributed job that is not finished yet
+
+        Workers can no longer queue or claim its URLs; they leave the
+        job at their next batch (see Crawlscraper.run_worker).
+
+        Returns:
+            bool: True if the job was open
+        """
+        return self.connection().execute(
+            "UPDATE work_jobs SET cancelled = 1 WHERE job_id = ? AND finished = 0 AND cancelled = 0", (job_id,)
+        ).rowcount > 0
+
+    @staticmethod
+    def _work_job_open(conn: sqlite3.Connection, job_id: str) -> bool:
+        return conn.execute(
+            "SELECT 1 FROM work_jobs WHERE job_id = ? AND cancelled = 0", (job_id,)
+        ).fetchone() is not None
+
+    def add_work_urls(self, job_id: str, urls, state: int = 0) -> int:
+        """
+        Queue the URLs a job has not seen before, in one transaction
+
+        Args:
+            job_id: Unique job identifier
+            urls: Candidate URLs
+            state: 0 to queue them, 2 to record them as completed
+
+        Returns:
+            int: Number of URLs that were new (0 for a deleted or
+                cancelled job)
+        """
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not self._work_job_open(conn, job_id):
+                conn.execute("COMMIT")
+                return 0
+            added = sum(
+                conn.execute(
+                    "INSERT OR IGNORE INTO work_urls (job_id, url, state) VALUES (?, ?, ?)",
+                    (job_id, url, state),
+                ).rowcount
+                for url in urls
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def claim_work_urls(self, job_id: str, worker: str, count: int, lease: float) -> list:
+        """
+        Lease up to count queued URLs to a worker
+
+        Leases that expired (their worker died or hangs) are queued again
+        first.
+
+        Args:
+            job_id: Unique job identifier
+            worker: Name of the worker
+            count: Maximum number of URLs
+            lease: Seconds until the lease expires
+
+        Returns:
+            list: Leased URLs (none for a deleted or cancelled job)
+        """
+        now = time.time()
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not self._work_job_open(conn, job_id):
+                conn.execute("COMMIT")
+                return []
+            conn.execute(
+                "UPDATE work_urls SET state = 0, worker = NULL, leased_until = NULL "
+                "WHERE job_id = ? AND state = 1 AND leased_until < ?",
+                (job_id, now),
+            )
+            urls = [
+                row[0] for row in conn.execute(
+                    "SELECT url FROM work_urls WHERE job_id = ? AND state = 0 LIMIT ?", (job_id, count)
+                )
+            ]
+            conn.executemany(
+                "UPDATE work_urls SET state = 1, worker = ?, leased_until = ? WHERE job_id = ? AND url = ?",
+                [(worker, now + lease, job_id, url) for url in urls],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return urls
+
+    def extend_work_leases(self, job_id: str, worker: str, urls, lease: float) -> int:
+        """
+        Renew the lease of the URLs a worker still holds
+
+        Returns:
+            int: Number of leases renewed
+        """
+        until = time.time() + lease
+        return self.connection().executemany(
+            "UPDATE work_urls SET leased_until = ? WHERE job_id = ? AND url = ? AND state = 1 AND worker = ?",
+            [(until, job_id, url, worker) for url in urls],
+        ).rowcount
+
+    def complete_work_urls(self, job_id: str, worker: str, urls) -> int:
+        """
+        Mark the URLs leased to a worker as completed (others are left alone)
+
+        Returns:
+            int: Number of URLs completed
+        """
+        return self.connection().executemany(
+            "UPDATE work_urls SET state = 2, worker = NULL, leased_until = NULL "
+            "WHERE job_id = ? AND url = ? AND state = 1 AND worker = ?",
+            [(job_id, url, worker) for url in urls],
+        ).rowcount
+
+    def work_counts(self, job_id: str) -> dict:
+        """
+        Returns:
+            dict: Number of queued, leased and completed URLs of the job
+        """
+        rows = self.connection().execute(
+            "SELECT state, COUNT(*) FROM work_urls WHERE job_id = ? GROUP BY state", (job_id,)
+        )
+        counts = dict(rows.fetchall())
+        return {"queued": counts.get(0, 0), "leased": counts.get(1, 0), "completed": counts.get(2, 0)}
+
+    def finish_work_job(self, job_id: str) -> bool:
+        """
+        Returns:
+            bool: True for exactly one caller per job
+        """
+        return self.connection().execute(
+            "UPDATE work_jobs SET finished = 1 WHERE job_id = ? AND finished = 0", (job_id,)
+        ).rowcount > 0
+
+    def save_work_report(self, job_id: str, worker: str, counters: dict):
+        """Replace the latest counters of a worker"""
+        self.connection().execute(
+            "INSERT OR REPLACE INTO work_reports (job_id, worker, counters, timestamp) VALUES (?, ?, ?, ?)",
+            (job_id, worker, json.dumps(counters), time.time()),
+        )
+
+    def load_work_reports(self, job_id: str) -> dict:
+        """
+        Returns:
+            dict: {worker: counters} with the time.time() of each report
+                under "timestamp"
+        """
+        rows = self.connection().execute(
+            "SELECT worker, counters, timestamp FROM work_reports WHERE job_id = ?", (job_id,)
+        )
+        return {worker: {**json.loads(counters), "timestamp": timestamp} for worker, counters, timestamp in rows}
+
+    def delete_work_job(self, job_id: str):
+        """Forget the queue, the seen URLs and the reports of a job"""
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table in ("work_urls", "work_reports", "work_jobs"):
+                conn.execute(f"DELETE FROM {table} WHERE job_id = ?", (job_id,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ---------- meta ----------
+
+    def get_meta(self, key: str, default=None):
+        row = self.connection().execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: str):
+        self.connection().execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+        )
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: str = None) -> Store:
+    """
+    Get the shared Store for a database file
+
+    Args:
+        path: Database file (default: $SCRAPER_DB or scraper.db next to this file)
+
+    Returns:
+        Store: One instance per database path and process
+    """
+    path = path or os.environ.get("SCRAPER_DB", DB_FILE)
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = Store(path)
+        return _stores[path]
+
+
+def migrate_json(store: Store, base_dir: str = BASE_DIR) -> dict:
+    """
+    Import the legacy JSON files into the database
+
+    Reads websites.json, hashes.json and progress/*.json from base_dir.
+    Existing rows are kept (websites, jobs) or overwritten (hashes), so
+    running the migration twice is harmless.
+
+    Args:
+        store: Target database
+        base_dir: Directory containing the legacy files
+
+    Returns:
+        dict: Number of imported websites, jobs and hashes
+    """
+    counts = {"websites": 0, "jobs": 0, "hashes": 0}
+
+    websites_file = os.path.join(base_dir, "websites.json")
+    if os.path.exists(websites_file):
+        with open(websites_file, "r", encoding="utf-8") as f:
+            for website in json.load(f):
+                if not website.get("url") or store.get_website_by_url(website["url"]):
+                    continue
+                try:
+                    store.add_website(website["url"], website.get("id"))
+                except sqlite3.IntegrityError:
+                    store.add_website(website["url"])
+                counts["websites"] += 1
+
+    hashes_file = os.path.join(base_dir, "hashes.json")
+    if os.path.exists(hashes_file):
+        with open(hashes_file, "r", encoding="utf-8") as f:
+            hashes = json.load(f)
+        store.save_hashes(hashes)
+        counts["hashes"] = sum(len(entries) for entries in hashes.values())
+
+    progress_dir = os.path.join(base_dir, "progress")
+    if os.path.isdir(progress_dir):
+        for fname in os.listdir(progress_dir):
+            if not fname.endswith(".json"):
+                continue
+            job_id = fname[: -len(".json")]
+            if store.get_job(job_id):
+                continue
+            try:
+                with open(os.path.join(progress_dir, fname), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            store.save_job(
+                job_id,
+                url=data.get("url", ""),
+                status=data.get("status", "unknown"),
+                progress=data.get("progress", 0),
+                done=data.get("done", 0),
+                total=data.get("total", 0),
+                success=data.get("success", 0),
+                failed=data.get("failed", 0),
+                timestamp=data.get("timestamp") or datetime.now().isoformat(),
+            )
+            counts["jobs"] += 1
+
+    store.set_meta("json_migrated", datetime.now().isoformat())
+    return counts
@@ -0,0 +1,218 @@
+import os
+import math
+import hashlib
+
+# Configuration constants (override with environment variables)
+SEEN_FILTER_FP_RATE = float(os.environ.get("SCRAPER_SEEN_FILTER_FP", 0) or 0)  # 0 keeps every URL exactly
+SEEN_FILTER_CAPACITY = int(os.environ.get("SCRAPER_SEEN_FILTER_CAPACITY", 1_000_000))  # URLs per filter
+
+# URL states, in the order a URL goes through them
+QUEUED = 0      # In the frontier
+VISITED = 1     # Fetched and its links queued
+COMPLETED = 2   # Extracted (or failed, or skipped as unchanged)
+
+
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+class BloomFilter:
+    """
+    Fixed-size set membership test with false positives but no false negatives
+
+    Uses about 1.2 bytes per URL at a 1% false-positive rate. The rate holds
+    up to capacity items and grows beyond it.
+    """
+
+    def __init__(self, capacity: int = SEEN_FILTER_CAPACITY, fp_rate: float = 0.001):
+        """
+        Args:
+            capacity: Number of items the filter is sized for
+            fp_rate: Probability that an item that was never added is reported
+        """
+        if not 0 < fp_rate < 1:
+            raise ValueError(f"False-positive rate must be between 0 and 1: {fp_rate}")
+        self.capacity = max(1, capacity)
+        self.fp_rate = fp_rate
+        self.bits = max(8, int(-self.capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / self.capacity * math.log(2)))
+        self._array = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._array[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        array = self._array
+        return all(array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def nbytes(self) -> int:
+        """
+        Returns:
+            int: Size of the bit array in bytes
+        """
+        return len(self._array)
+
+
+class URLStore:
+    """
+    Compact set of URLs with a state flag per URL
+
+    Replaces separate frontier, visited and discovered sets of full URL
+    strings. Each URL is stored once, as a key made of the id of its
+    interned directory prefix (scheme, host and path up to the last "/")
+    plus the remaining bytes, so the long prefix shared by the pages of
+    a site is kept once. Keys stay in insertion order, which is the
+    order the URLs were queued.
+
+    With a seen filter (BloomFilter), forget() drops a URL from memory
+    and only remembers that it was seen; use it for completed URLs whose
+    state is stored elsewhere (the crawl checkpoint). A small fraction of
+    new URLs (the filter's false-positive rate) is then taken for seen.
+    """
+
+    def __init__(self, seen_filter: BloomFilter = None):
+        """
+        Args:
+            seen_filter: Filter holding forgotten URLs (optional)
+        """
+        self.seen_filter = seen_filter
+        self.forgotten = 0    # URLs only held by the seen filter
+        self._states = {}     # key -> state
+        self._heads = {}      # prefix -> encoded prefix id that starts its keys
+        self._prefixes = []   # prefix id -> prefix
+
+    @staticmethod
+    def _split(url: str):
+        """Split after the last "/" of the path (a query may contain slashes)"""
+        end = url.find("?")
+        if end < 0:
+            end = url.find("#")
+        cut = url.rfind("/", 0, end if end >= 0 else len(url)) + 1
+        return url[:cut], url[cut:]
+
+    def key(self, url: str) -> bytes:
+        """
+        Returns:
+            bytes: Compact key of the URL (its prefix is interned)
+        """
+        prefix, rest = self._split(url)
+        head = self._heads.get(prefix)
+        if head is None:
+            head = self._heads[prefix] = _varint(len(self._prefixes))
+            self._prefixes.append(prefix)
+        return head + rest.encode()
+
+    def _lookup_key(self, url: str):
+        """Key of a URL without interning a new prefix (None if the prefix is unknown)"""
+        prefix, rest = self._split(url)
+        head = self._heads.get(prefix)
+        return None if head is None else head + rest.encode()
+
+    def url(self, key: bytes) -> str:
+        """
+        Returns:
+            str: URL of a key returned by key()
+        """
+        prefix_id = shift = i = 0
+        while True:
+            byte = key[i]
+            prefix_id |= (byte & 0x7F) << shift
+            i += 1
+            if byte < 0x80:
+                break
+            shift += 7
+        return self._prefixes[prefix_id] + key[i:].decode()
+
+    def get(self, url: str, default=None):
+        """
+        Returns:
+            int: State of the URL (COMPLETED for forgotten URLs), or default
+        """
+        key = self._lookup_key(url)
+        state = self._states.get(key) if key is not None else None
+        if state is not None:
+            return state
+        if self.seen_filter is not None and url in self.seen_filter:
+            return COMPLETED
+        return default
+
+    def mark(self, url: str, state: int):
+        """
+        Raise the state of a URL, adding it if it is new
+
+        Returns:
+            bytes: Key of the URL if its state changed, otherwise None
+        """
+        key = self.key(url)
+        current = self._states.get(key)
+        if current is None and self.seen_filter is not None and url in self.seen_filter:
+            return None  # Forgotten, so completed
+        if current is not None and current >= state:
+            return None
+        self._states[key] = state
+        return key
+
+    def add(self, url: str):
+        """
+        Add a URL as queued
+
+        Returns:
+            bytes: Key of the URL if it was not seen before, otherwise None
+        """
+        key = self.key(url)
+        if key in self._states or (self.seen_filter is not None and url in self.seen_filter):
+            return None
+        self._states[key] = QUEUED
+        return key
+
+    def forget(self, url: str):
+        """Drop a URL from memory, keeping it in the seen filter"""
+        if self.seen_filter is None:
+            return
+        key = self._lookup_key(url)
+        if key is not None and self._states.pop(key, None) is not None:
+            self.seen_filter.add(url)
+            self.forgotten += 1
+
+    def items(self):
+        """
+        Yields:
+            tuple: (url, state) of the URLs held in memory, in insertion order
+        """
+        for key, state in self._states.items():
+            yield self.url(key), state
+
+    def __contains__(self, url: str) -> bool:
+        key = self._lookup_key(url)
+        if key is not None and key in self._states:
+            return True
+        return self.seen_filter is not None and url in self.seen_filter
+
+    def __iter__(self):
+        for key in self._states:
+            yield self.url(key)
+
+    def __len__(self):
+        return len(self._states) + self.forgotten
+
+
+def make_url_store(fp_rate: float = SEEN_FILTER_FP_RATE, capacity: int = SEEN_FILTER_CAPACITY) -> URLStore:
+    """
+    Returns:
+        URLStore: Store with a seen filter if fp_rate is set, otherwise exact
+    """
+    return URLStore(BloomFilter(capacity, fp_rate) if fp_rate else None)
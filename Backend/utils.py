@@ -1,8 +1,8 @@
 import re
-import json
 import os
 from datetime import datetime
 from urllib.parse import urlparse
+from progress_events import hub
 
 # File extensions to exclude from crawling (typically non-content files)
 EXCLUDE_EXTENSIONS = [".pdf", ".doc", ".zip", ".rar", ".ppt", ".xlsx"]
@@ -22,12 +22,36 @@ def is_excluded(url: str) -> bool:
     return any(path.lower().endswith(ext) for ext in EXCLUDE_EXTENSIONS)
 
 
+# clean_text patterns, compiled once
+TABLE_ROW = re.compile(r"(?m)^.*\|.*\|.*$")          # Lines containing multiple | characters
+MARKDOWN_LINK = re.compile(r"\[(.*?)\]\([^)]+\)")     # [text](url)
+HEADER_LINE = re.compile(r"(?m)^#+ .*$")              # Lines starting with #
+BLANK_LINES = re.compile(r"\n{3,}")
+SENTENCE_END = re.compile(r"(?<=[.!?]) +")
+SUMMARY_SENTENCES = 5      # Sentences kept by clean_text
+CLEAN_CHUNK = 4096         # Characters clean_text reads before checking for enough sentences
+
+
+def _summary_sentences(markdown: str) -> list:
+    """Remaining clean_text passes on text without table rows; returns up to 5 sentences and the rest"""
+    markdown = MARKDOWN_LINK.sub(r"\1", markdown)
+    markdown = HEADER_LINE.sub("", markdown)
+    markdown = BLANK_LINES.sub("\n\n", markdown.strip())
+    return SENTENCE_END.split(markdown, SUMMARY_SENTENCES)
+
+
 def clean_text(markdown: str) -> str:
     """
     Clean and process markdown text for better readability and storage
     
     This function removes unwanted elements like tables, headers, and links,
     then limits the output to the first 5 sentences for summary purposes.
+
+    Only as much of the document is cleaned as the summary needs: the
+    passes run over a prefix of whole lines, which grows until it holds
+    more than 5 sentences. Every pass except link removal works line by
+    line, so the result equals cleaning the whole document unless a link
+    target is still open at the end of the prefix; then the prefix grows.
     
     Args:
         markdown: Raw markdown text to clean
@@ -35,21 +59,47 @@ def clean_text(markdown: str) -> str:
     Returns:
         str: Cleaned and truncated text summary
     """
-    # Remove table rows (lines containing multiple | characters)
-    markdown = re.sub(r"(?m)^.*\|.*\|.*$", "", markdown)
-    
-    # Convert markdown links to plain text (keep only the link text)
-    markdown = re.sub(r"\[(.*?)\]\([^)]+\)", r"\1", markdown)
-    
-    # Remove markdown headers (lines starting with #)
-    markdown = re.sub(r"(?m)^#+ .*$", "", markdown)
-    
-    # Reduce multiple consecutive newlines to maximum of 2
-    markdown = re.sub(r"\n{3,}", "\n\n", markdown.strip())
-    
-    # Split into sentences and limit to first 5 for summary
-    sentences = re.split(r"(?<=[.!?]) +", markdown)
-    return " ".join(sentences[:5]).strip()
+    size = CLEAN_CHUNK
+    while True:
+        cut = markdown.find("\n", size)
+        if cut < 0:
+            break
+        head = TABLE_ROW.sub("", markdown[:cut])
+        # A "](" without a closing ")" may be a link continuing past the cut
+        if head.find("](", head.rfind(")") + 1) < 0:
+            sentences = _summary_sentences(head)
+            if len(sentences) > SUMMARY_SENTENCES:
+                return " ".join(sentences[:SUMMARY_SENTENCES]).strip()
+        size *= 4
+    sentences = _summary_sentences(TABLE_ROW.sub("", markdown))
+    return " ".join(sentences[:SUMMARY_SENTENCES]).strip()
+
+
+def clean_texts(markdowns) -> list:
+    """
+    Clean many documents (see clean_text)
+
+    Args:
+        markdowns: Iterable of raw markdown texts
+
+    Returns:
+        list: Cleaned summaries, in the same order
+    """
+    return [clean_text(markdown) for markdown in markdowns]
+
+
+def job_id_from_path(path: str) -> str:
+    """
+    Derive the job ID from a progress path like "progress/<job_id>.json"
+
+    Args:
+        path: Progress path used by the scraper and the API
+
+    Returns:
+        str: The job ID
+    """
+    name = os.path.basename(path)
+    return name[: -len(".json")] if name.endswith(".json") else name
 
 
 def log_progress(
@@ -62,15 +112,24 @@ def log_progress(
     failed: int = 0,
     url: str = "",
     timestamp: datetime = None,
+    skipped: int = None,
+    changed: int = None,
+    new: int = None,
+    retried: int = None,
+    recovered: int = None,
+    abandoned: int = None,
 ):
     """
-    Log scraping progress to a JSON file for tracking and monitoring
-    
-    This function creates or updates a progress file with current status,
-    completion metrics, and timing information for a scraping job.
-    
+    Log scraping progress to the job table for tracking and monitoring
+
+    This function creates or updates the progress record of a scraping job
+    with current status, completion metrics, and timing information. The
+    record is published to the progress hub, which pushes it to the
+    connected dashboards and writes it to the job's row when the status
+    changes or every WRITE_INTERVAL seconds (not for every page).
+
     Args:
-        path: File path where progress should be logged
+        path: Progress path of the job; its base name is the job ID
         progress: Current progress percentage (0-100)
         status: Current status description (e.g., "starting", "scraping", "done")
         done: Number of items completed (default: 0)
@@ -79,19 +138,32 @@ def log_progress(
         failed: Number of failed operations (default: 0)
         url: URL being processed (default: "")
         timestamp: Custom timestamp (default: current time)
+        skipped: Number of unchanged pages (only written when given)
+        changed: Number of changed pages (only written when given)
+        new: Number of pages not seen before (only written when given)
+        retried: Number of fetches retried after a transient failure
+            (only written when given)
+        recovered: Number of pages fetched by a retry (only written when given)
+        abandoned: Number of pages still failing after their retries
+            (only written when given)
     """
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(
-            {
-                "progress": progress,
-                "status": status,
-                "done": done,
-                "total": total,
-                "success": success,
-                "failed": failed,
-                "url": url,
-                "timestamp": datetime.now().isoformat(),
-            },
-            f,
-            indent=2,
-        )
\ No newline at end of file
+    counters = {
+        name: value
+        for name, value in (
+            ("skipped", skipped), ("changed", changed), ("new", new),
+            ("retried", retried), ("recovered", recovered), ("abandoned", abandoned),
+        )
+        if value is not None
+    }
+    hub.publish(
+        job_id_from_path(path),
+        progress=progress,
+        status=status,
+        done=done,
+        total=total,
+        success=success,
+        failed=failed,
+        url=url,
+        timestamp=(timestamp or datetime.now()).isoformat(),
+        **counters,
+    )
@@ -0,0 +1,556 @@
+import os
+import json
+import time
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from storage import get_store
+
+try:
+    import redis
+except ImportError:  # redis is optional; only needed for SCRAPER_WORK_QUEUE=redis://...
+    redis = None
+
+# Configuration constants (override with environment variables)
+WORK_QUEUE = os.environ.get("SCRAPER_WORK_QUEUE", "sqlite")   # "sqlite", "local" or a redis:// URL
+LEASE_SECONDS = float(os.environ.get("SCRAPER_WORK_LEASE", 120))  # A claimed URL is handed out again after this
+COUNTERS = (  # PageProcessor.COUNTERS and RetryQueue.COUNTERS
+    "done", "success", "fail", "skipped", "changed", "new", "near_duplicates", "retried", "recovered", "abandoned",
+)
+
+
+class WorkQueue(ABC):
+    """
+    Base class of the shared work queues of distributed crawls
+
+    A distributed job has one queue of URLs and one set of every URL seen,
+    shared by all workers (see Crawlscraper.run_worker). Workers claim a
+    batch of queued URLs, which is leased to them until they complete it;
+    a lease that runs out (a worker died) puts its URLs back in the
+    queue. Workers that hold URLs longer (slow batches, retries waiting
+    for their backoff) extend their leases. Only the worker holding a
+    URL can complete it. Workers also leave their page counters, so the
+    progress of the job is the sum of its workers' reports.
+
+    A deleted or cancelled job takes no URLs any more: add and claim do
+    nothing and open returns None, so its workers leave it.
+    """
+
+    name = "base"
+
+    def __init__(self, lease: float = LEASE_SECONDS):
+        """
+        Args:
+            lease: Seconds a worker may hold claimed URLs
+        """
+        self.lease = lease
+
+    @abstractmethod
+    def open(self, job_id: str, start_url: str = None):
+        """
+        Register a job, or look up the start URL of a registered one
+
+        Returns:
+            str: Start URL of the job, or None if it is unknown or cancelled
+        """
+
+    @abstractmethod
+    def jobs(self) -> list:
+        """
+        Returns:
+            list: (job_id, start URL) of the jobs not finished yet
+        """
+
+    @abstractmethod
+    def cancel(self, job_id: str) -> bool:
+        """
+        Stop a job that is not finished yet; its workers leave it
+
+        Returns:
+            bool: True if the job was open
+        """
+
+    @abstractmethod
+    def add(self, job_id: str, urls, completed: bool = False) -> int:
+        """
+        Queue the URLs the job has not seen before
+
+        Args:
+            job_id: Unique job identifier
+            urls: Candidate URLs (canonical form)
+            completed: Record the new URLs as done instead of queueing them
+
+        Returns:
+            int: Number of URLs that were new
+        """
+
+    @abstractmethod
+    def claim(self, job_id: str, worker: str, count: int) -> list:
+        """
+        Returns:
+            list: Up to count queued URLs, now leased to the worker
+        """
+
+    @abstractmethod
+    def extend(self, job_id: str, worker: str, urls) -> int:
+        """
+        Renew the lease of URLs the worker still holds (a heartbeat)
+
+        Returns:
+            int: Number of URLs whose lease was renewed
+        """
+
+    @abstractmethod
+    def complete(self, job_id: str, worker: str, urls) -> int:
+        """
+        Release the lease of processed URLs, as far as the worker holds it
+
+        A URL whose lease ran out and went to another worker stays with
+        that worker.
+
+        Returns:
+            int: Number of URLs completed
+        """
+
+    @abstractmethod
+    def counts(self, job_id: str) -> dict:
+        """
+        Returns:
+            dict: Number of "queued", "leased" and "completed" URLs
+        """
+
+    @abstractmethod
+    def finish(self, job_id: str) -> bool:
+        """
+        Returns:
+            bool: True for the one caller that finishes the job
+        """
+
+    @abstractmethod
+    def report(self, job_id: str, worker: str, counters: dict):
+        """Replace the latest counters (and "state") of a worker"""
+
+    @abstractmethod
+    def reports(self, job_id: str) -> dict:
+        """
+        Returns:
+            dict: {worker: counters}, with the time.time() of the report
+                under "timestamp"
+        """
+
+    @abstractmethod
+    def delete(self, job_id: str):
+        """Forget the queue, seen URLs and reports of a job"""
+
+
+class LocalWorkQueue(WorkQueue):
+    """In-memory queue for workers of one process (tests, single host)"""
+
+    name = "local"
+
+    def __init__(self, lease: float = LEASE_SECONDS):
+        super().__init__(lease)
+        self._lock = threading.Lock()
+        self._jobs = {}   # job_id -> state of the job
+
+    def _job(self, job_id: str) -> dict:
+        # Workers of a deleted or cancelled job write to a scratch state
+        # that is thrown away until they notice
+        job = self._jobs.get(job_id)
+        if job is None or job["cancelled"]:
+            return {"seen": set(), "queue": deque(), "leased": {}, "completed": 0, "reports": {}}
+        return job
+
+    def open(self, job_id: str, start_url: str = None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None and start_url is not None:
+                job = self._jobs[job_id] = {
+                    "start_url": start_url, "seen": set(), "queue": deque(),
+                    "leased": {}, "completed": 0, "finished": False, "cancelled": False, "reports": {},
+                }
+            return job["start_url"] if job and not job["cancelled"] else None
+
+    def jobs(self) -> list:
+        with self._lock:
+            return [
+                (job_id, job["start_url"]) for job_id, job in self._jobs.items()
+                if not job["finished"] and not job["cancelled"]
+            ]
+
+    def cancel(self, job_id: str) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["finished"] or job["cancelled"]:
+                return False
+            job["cancelled"] = True
+            return True
+
+    def add(self, job_id: str, urls, completed: bool = False) -> int:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["cancelled"]:
+                return 0
+            added = 0
+            for url in urls:
+                if url not in job["seen"]:
+                    job["seen"].add(url)
+                    added += 1
+                    if completed:
+                        job["completed"] += 1
+                    else:
+                        job["queue"].append(url)
+            return added
+
+    def claim(self, job_id: str, worker: str, count: int) -> list:
+        now = time.monotonic()
+        with self._lock:
+            job = self._job(job_id)
+            for url, (_, until) in list(job["leased"].items()):
+                if until < now:
+                    del job["leased"][url]
+                    job["queue"].append(url)
+            urls = [job["queue"].popleft() for _ in range(min(count, len(job["queue"])))]
+            for url in urls:
+                job["leased"][url] = (worker, now + self.lease)
+            return urls
+
+    def extend(self, job_id: str, worker: str, urls) -> int:
+        until = time.monotonic() + self.lease
+        with self._lock:
+            leased = self._job(job_id)["leased"]
+            held = [url for url in urls if leased.get(url, (None,))[0] == worker]
+            for url in held:
+                leased[url] = (worker, until)
+            return len(held)
+
+    def complete(self, job_id: str, worker: str, urls) -> int:
+        with self._lock:
+            job = self._job(job_id)
+            held = [url for url in urls if job["leased"].get(url, (None,))[0] == worker]
+            for url in held:
+                del job["leased"][url]
+            job["completed"] += len(held)
+            return len(held)
+
+    def counts(self, job_id: str) -> dict:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return {"queued": 0, "leased": 0, "completed": 0}
+            return {"queued": len(job["queue"]), "leased": len(job["leased"]), "completed": job["completed"]}
+
+    def finish(self, job_id: str) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["finished"]:
+                return False
+            job["finished"] = True
+            return True
+
+    def report(self, job_id: str, worker: str, counters: dict):
+        with self._lock:
+            self._job(job_id)["reports"][worker] = {**counters, "timestamp": time.time()}
+
+    def reports(self, job_id: str) -> dict:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return {worker: dict(report) for worker, report in job["reports"].items()} if job else {}
+
+    def delete(self, job_id: str):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    Queue in the shared SQLite database
+
+    Works for worker processes on one host, or on hosts that share the
+    database file. Claims run in an IMMEDIATE transaction, so two workers
+    never lease the same URL.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = None, lease: float = LEASE_SECONDS):
+        """
+        Args:
+            path: Database file (default: the shared store, see get_store)
+            lease: Seconds a worker may hold claimed URLs
+        """
+        super().__init__(lease)
+        self.path = path
+
+    @property
+    def store(self):
+        return get_store(self.path)
+
+    def open(self, job_id: str, start_url: str = None):
+        return self.store.open_work_job(job_id, start_url)[0]
+
+    def jobs(self) -> list:
+        return self.store.list_work_jobs()
+
+    def cancel(self, job_id: str) -> bool:
+        return self.store.cancel_work_job(job_id)
+
+    def add(self, job_id: str, urls, completed: bool = False) -> int:
+        return self.store.add_work_urls(job_id, urls, state=2 if completed else 0)
+
+    def claim(self, job_id: str, worker: str, count: int) -> list:
+        return self.store.claim_work_urls(job_id, worker, count, self.lease)
+
+    def extend(self, job_id: str, worker: str, urls) -> int:
+        return self.store.extend_work_leases(job_id, worker, urls, self.lease)
+
+    def complete(self, job_id: str, worker: str, urls) -> int:
+        return self.store.complete_work_urls(job_id, worker, urls)
+
+    def counts(self, job_id: str) -> dict:
+        return self.store.work_counts(job_id)
+
+    def finish(self, job_id: str) -> bool:
+        return self.store.finish_work_job(job_id)
+
+    def report(self, job_id: str, worker: str, counters: dict):
+        self.store.save_work_report(job_id, worker, counters)
+
+    def reports(self, job_id: str) -> dict:
+        return self.store.load_work_reports(job_id)
+
+    def delete(self, job_id: str):
+        self.store.delete_work_job(job_id)
+
+
+# Queue the URLs ARGV[3..] that job ARGV[1] has not seen (ARGV[2] == "1": record
+# them as completed), unless the job is deleted or cancelled
+ADD_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 0 or redis.call('SISMEMBER', KEYS[2], ARGV[1]) == 1 then
+    return 0
+end
+local added = 0
+for i = 3, #ARGV do
+    if redis.call('SADD', KEYS[3], ARGV[i]) == 1 then
+        if ARGV[2] ~= '1' then
+            redis.call('RPUSH', KEYS[4], ARGV[i])
+        end
+        added = added + 1
+    end
+end
+if ARGV[2] == '1' and added > 0 then
+    redis.call('INCRBY', KEYS[5], added)
+end
+return added
+"""
+
+# Requeue expired leases, then lease up to ARGV[3] URLs to worker ARGV[4], atomically;
+# nothing for a deleted or cancelled job ARGV[5]
+CLAIM_SCRIPT = """
+if redis.call('HEXISTS', KEYS[4], ARGV[5]) == 0 or redis.call('SISMEMBER', KEYS[5], ARGV[5]) == 1 then
+    return {}
+end
+local now, deadline, count = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+for _, url in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)) do
+    redis.call('ZREM', KEYS[2], url)
+    redis.call('HDEL', KEYS[3], url)
+    redis.call('RPUSH', KEYS[1], url)
+end
+local urls = {}
+for i = 1, count do
+    local url = redis.call('LPOP', KEYS[1])
+    if not url then break end
+    redis.call('ZADD', KEYS[2], deadline, url)
+    redis.call('HSET', KEYS[3], url, ARGV[4])
+    urls[#urls + 1] = url
+end
+return urls
+"""
+
+# Move the deadline of the URLs ARGV[3..] that worker ARGV[1] holds to ARGV[2]
+EXTEND_SCRIPT = """
+local extended = 0
+for i = 3, #ARGV do
+    if redis.call('HGET', KEYS[2], ARGV[i]) == ARGV[1] then
+        redis.call('ZADD', KEYS[1], 'XX', ARGV[2], ARGV[i])
+        extended = extended + 1
+    end
+end
+return extended
+"""
+
+# Complete the URLs ARGV[2..] that worker ARGV[1] holds
+COMPLETE_SCRIPT = """
+local completed = 0
+for i = 2, #ARGV do
+    if redis.call('HGET', KEYS[2], ARGV[i]) == ARGV[1] then
+        redis.call('ZREM', KEYS[1], ARGV[i])
+        redis.call('HDEL', KEYS[2], ARGV[i])
+        completed = completed + 1
+    end
+end
+if completed > 0 then
+    redis.call('INCRBY', KEYS[3], completed)
+end
+return completed
+"""
+
+
+class RedisWorkQueue(WorkQueue):
+    """
+    Queue in Redis, for workers on several hosts
+
+    Per job a set of seen URLs, a list of queued URLs, a sorted set of
+    leased URLs by lease deadline, a hash of the worker holding each
+    leased URL and a hash of worker reports. Registered jobs are in one
+    hash, finished and cancelled ones in a set each.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, lease: float = LEASE_SECONDS, prefix: str = "scraper"):
+        """
+        Args:
+            url: Redis URL, e.g. redis://localhost:6379/0
+            lease: Seconds a worker may hold claimed URLs
+            prefix: Prefix of all keys
+
+        Raises:
+            ImportError: If the redis package is not installed
+        """
+        if redis is None:
+            raise ImportError("redis is not installed (pip install redis)")
+        super().__init__(lease)
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._add = self.client.register_script(ADD_SCRIPT)
+        self._claim = self.client.register_script(CLAIM_SCRIPT)
+        self._extend = self.client.register_script(EXTEND_SCRIPT)
+        self._complete = self.client.register_script(COMPLETE_SCRIPT)
+
+    def _key(self, job_id: str, name: str) -> str:
+        return f"{self.prefix}:{job_id}:{name}"
+
+    def open(self, job_id: str, start_url: str = None):
+        if start_url is not None:
+            self.client.hsetnx(f"{self.prefix}:jobs", job_id, start_url)
+        if self.client.sismember(f"{self.prefix}:cancelled", job_id):
+            return None
+        return self.client.hget(f"{self.prefix}:jobs", job_id)
+
+    def jobs(self) -> list:
+        jobs = self.client.hgetall(f"{self.prefix}:jobs")
+        closed = self.client.sunion(f"{self.prefix}:finished", f"{self.prefix}:cancelled")
+        return [(job_id, url) for job_id, url in jobs.items() if job_id not in closed]
+
+    def cancel(self, job_id: str) -> bool:
+        if not self.client.hexists(f"{self.prefix}:jobs", job_id):
+            return False
+        if self.client.sismember(f"{self.prefix}:finished", job_id):
+            return False
+        return self.client.sadd(f"{self.prefix}:cancelled", job_id) == 1
+
+    def add(self, job_id: str, urls, completed: bool = False) -> int:
+        urls = list(urls)
+        if not urls:
+            return 0
+        keys = [
+            f"{self.prefix}:jobs", f"{self.prefix}:cancelled",
+            self._key(job_id, "seen"), self._key(job_id, "queue"), self._key(job_id, "completed"),
+        ]
+        return self._add(keys=keys, args=[job_id, "1" if completed else "0", *urls])
+
+    def claim(self, job_id: str, worker: str, count: int) -> list:
+        now = time.time()
+        keys = [
+            self._key(job_id, "queue"), self._key(job_id, "leased"), self._key(job_id, "holders"),
+            f"{self.prefix}:jobs", f"{self.prefix}:cancelled",
+        ]
+        return self._claim(keys=keys, args=[now, now + self.lease, count, worker, job_id])
+
+    def extend(self, job_id: str, worker: str, urls) -> int:
+        urls = list(urls)
+        if not urls:
+            return 0
+        keys = [self._key(job_id, "leased"), self._key(job_id, "holders")]
+        return self._extend(keys=keys, args=[worker, time.time() + self.lease, *urls])
+
+    def complete(self, job_id: str, worker: str, urls) -> int:
+        urls = list(urls)
+        if not urls:
+            return 0
+        keys = [self._key(job_id, "leased"), self._key(job_id, "holders"), self._key(job_id, "completed")]
+        return self._complete(keys=keys, args=[worker, *urls])
+
+    def counts(self, job_id: str) -> dict:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.llen(self._key(job_id, "queue"))
+        pipe.zcard(self._key(job_id, "leased"))
+        pipe.get(self._key(job_id, "completed"))
+        queued, leased, completed = pipe.execute()
+        return {"queued": queued, "leased": leased, "completed": int(completed or 0)}
+
+    def finish(self, job_id: str) -> bool:
+        return self.client.sadd(f"{self.prefix}:finished", job_id) == 1
+
+    def report(self, job_id: str, worker: str, counters: dict):
+        self.client.hset(self._key(job_id, "reports"), worker, json.dumps({**counters, "timestamp": time.time()}))
+
+    def reports(self, job_id: str) -> dict:
+        return {worker: json.loads(report) for worker, report in self.client.hgetall(self._key(job_id, "reports")).items()}
+
+    def delete(self, job_id: str):
+        self.client.delete(*(self._key(job_id, name) for name in ("seen", "queue", "leased", "holders", "completed", "reports")))
+        self.client.hdel(f"{self.prefix}:jobs", job_id)
+        self.client.srem(f"{self.prefix}:finished", job_id)
+        self.client.srem(f"{self.prefix}:cancelled", job_id)
+
+
+_local = LocalWorkQueue()  # Shared by the API and the workers of this process
+
+
+def get_work_queue(spec: str = None) -> WorkQueue:
+    """
+    Open the work queue named by a backend spec
+
+    Args:
+        spec: "sqlite", "local" or a redis:// URL (default: WORK_QUEUE)
+
+    Returns:
+        WorkQueue: The queue backend
+
+    Raises:
+        ValueError: If the spec names no known backend
+    """
+    spec = spec or WORK_QUEUE
+    if spec == "sqlite":
+        return SQLiteWorkQueue()
+    if spec == "local":
+        return _local
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisWorkQueue(spec)
+    raise ValueError(f"Unknown work queue: {spec}")
+
+
+def aggregate_reports(reports: dict, stale_after: float = LEASE_SECONDS) -> dict:
+    """
+    Progress of a distributed job from the reports of its workers
+
+    Args:
+        reports: {worker: counters} (see WorkQueue.reports)
+        stale_after: Seconds after which a running worker that did not
+            report counts as gone
+
+    Returns:
+        dict: Sum of each page counter, plus "workers" (workers still
+            running) and "reported" (workers that ever reported)
+    """
+    now = time.time()
+    totals = {name: 0 for name in COUNTERS}
+    running = 0
+    for report in reports.values():
+        for name in COUNTERS:
+            totals[name] += report.get(name, 0)
+        if report.get("state") == "running" and now - report.get("timestamp", 0) <= stale_after:
+            running += 1
+    return {**totals, "workers": running, "reported": len(reports)}
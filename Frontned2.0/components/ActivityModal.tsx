@@ -1,4 +1,4 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 
 type ActivityModalProps = { isOpen: boolean; onClose: () => void };
 type ActivityEntry = {
@@ -20,6 +20,8 @@ type ConfirmModalProps = {
 };
 
 const API = "http://127.0.0.1:8000";
+// Wait for a burst of new jobs to settle before reloading the list
+const RELOAD_DELAY = 500;
 
 function ConfirmModal({ isOpen, onCancel, onConfirm }: ConfirmModalProps) {
   if (!isOpen) return null;
@@ -41,8 +43,19 @@ function ConfirmModal({ isOpen, onCancel, onConfirm }: ConfirmModalProps) {
 export default function ActivityModal({ isOpen, onClose }: ActivityModalProps) {
   const [entries, setEntries] = useState<ActivityEntry[]>([]);
   const [error, setError] = useState<string | null>(null);
+  // Job counts of all pages, from the API's running totals
+  const [counts, setCounts] = useState<Record<string, number> | null>(null);
+  const [total, setTotal] = useState<number | null>(null);
   const [sortBy, setSortBy] = useState<"timestamp" | "status">("timestamp");
   const [confirmDelete, setConfirmDelete] = useState<string | null>(null);
+  // Job ids the list shows, and new ones a reload was already scheduled for
+  const shown = useRef<Set<string>>(new Set());
+  const requested = useRef<Set<string>>(new Set());
+  const reloadTimer = useRef<ReturnType<typeof setTimeout> | null>(null);
+
+  useEffect(() => {
+    shown.current = new Set(entries.map((e) => e.job_id));
+  }, [entries]);
 
   const sortedEntries = [...entries].sort((a, b) => {
     if (sortBy === "status") {
@@ -89,7 +102,7 @@ export default function ActivityModal({ isOpen, onClose }: ActivityModalProps) {
   });
 
   // Calculate status counts
-  const statusCounts = entries.reduce((acc, entry) => {
+  const statusCounts = counts ?? entries.reduce((acc, entry) => {
     const status = entry.status.toLowerCase();
     acc[status] = (acc[status] || 0) + 1;
     return acc;
@@ -111,6 +124,8 @@ export default function ActivityModal({ isOpen, onClose }: ActivityModalProps) {
       if (!r.ok) throw new Error("Failed to load activity");
       const json = await r.json();
       setEntries(json.entries ?? []);
+      setCounts(json.counts ?? null);
+      setTotal(json.total ?? null);
       setError(null);
     } catch (err) {
       setError(err instanceof Error ? err.message : String(err));
@@ -121,8 +136,32 @@ export default function ActivityModal({ isOpen, onClose }: ActivityModalProps) {
     if (!isOpen) return;
 
     fetchActivity();
-    const interval = setInterval(fetchActivity, 2000);
-    return () => clearInterval(interval);
+    // Progress is pushed by the API; reload the list only for jobs it does not show yet
+    const source = new EventSource(`${API}/events`);
+    source.addEventListener("progress", (event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      if (data.deleted) {
+        setEntries((prev) => prev.filter((e) => e.job_id !== data.job_id));
+        return;
+      }
+      if (!shown.current.has(data.job_id)) {
+        // One debounced reload per new job, however many events it sends
+        if (requested.current.has(data.job_id)) return;
+        requested.current.add(data.job_id);
+        if (reloadTimer.current) clearTimeout(reloadTimer.current);
+        reloadTimer.current = setTimeout(() => {
+          reloadTimer.current = null;
+          fetchActivity();
+        }, RELOAD_DELAY);
+        return;
+      }
+      setEntries((prev) => prev.map((e) => (e.job_id === data.job_id ? { ...e, ...data } : e)));
+    });
+    return () => {
+      source.close();
+      if (reloadTimer.current) clearTimeout(reloadTimer.current);
+      reloadTimer.current = null;
+    };
   }, [isOpen]);
 
   const handleDeleteClick = (jobId: string) => {
@@ -234,7 +273,7 @@ export default function ActivityModal({ isOpen, onClose }: ActivityModalProps) {
                 Error: {statusCounts.error || 0}
               </span>
               <span style={{ color: "#6b7280", marginLeft: "auto" }}>
-                Total: {entries.length}
+                Total: {total ?? entries.length}
               </span>
             </div>
           )}
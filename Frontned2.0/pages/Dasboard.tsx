@@ -61,7 +61,7 @@ export default function Dashboard() {
     Record<string, ProgressStatus>
   >({});
   const [scrapingStarted, setScrapingStarted] = useState(false);
-  const [pollInterval, setPollInterval] = useState<NodeJS.Timeout | null>(null);
+  const [eventSource, setEventSource] = useState<EventSource | null>(null);
   const [toast, setToast] = useState<string | null>(null);
   const [stuck, setStuck] = useState(false);
   const [outputOpen, setOutputOpen] = useState(false);
@@ -102,12 +102,12 @@ export default function Dashboard() {
   useEffect(() => {
     loadData();
     return () => {
-      if (pollInterval) clearInterval(pollInterval);
+      eventSource?.close();
     };
   }, []);
 
   const handleStart = async () => {
-    if (pollInterval) clearInterval(pollInterval);
+    eventSource?.close();
 
     const res = await fetch(`${API}/start-scrape`, {
       method: "POST",
@@ -134,41 +134,37 @@ export default function Dashboard() {
     showToast("🚀 Scraping started!");
     loadData();
 
-    const interval = setInterval(async () => {
-      let allStopped = true;
-      const updatedMap = { ...newMap };
-
-      for (const url of selected) {
-        const entry = updatedMap[url];
-        try {
-          const r = await fetch(`${API}/scrape-progress/${entry.jobId}`);
-          if (r.ok) {
-            const data = await r.json();
-            updatedMap[url] = { ...entry, ...data };
-            if (!["idle", "done", "stopped"].includes(data.status)) {
-              allStopped = false;
-            }
-          }
-        } catch {
-          /* ignore */
-        }
-
-        if (updatedMap[url].status === "stopped") {
-          setStuck(true);
-        }
+    // One event stream for all started jobs; the API pushes each job's
+    // progress when it changes (at most every half second)
+    const byJob: Record<string, string> = {};
+    jobs.forEach((j: any) => {
+      byJob[j.job_id] = j.url;
+    });
+    const query = jobs.map((j: any) => `job_id=${j.job_id}`).join("&");
+    const source = new EventSource(`${API}/events?${query}`);
+    const latest: Record<string, ProgressStatus> = { ...newMap };
+    const isFinal = (status: string) =>
+      ["idle", "done", "stopped"].includes(status) || status?.startsWith("error");
+
+    source.addEventListener("progress", (event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      const url = byJob[data.job_id];
+      if (!url) return;
+      latest[url] = { ...latest[url], ...data, jobId: data.job_id };
+      if (latest[url].status === "stopped") {
+        setStuck(true);
       }
+      setProgressMap({ ...latest });
 
-      setProgressMap(updatedMap);
-
-      if (allStopped) {
-        clearInterval(interval);
-        setPollInterval(null);
+      if (Object.values(latest).every((entry) => isFinal(entry.status))) {
+        source.close();
+        setEventSource(null);
         setScrapingStarted(false);
         loadData();
       }
-    }, 2000);
+    });
 
-    setPollInterval(interval);
+    setEventSource(source);
   };
 
   const handleStop = () => {
@@ -176,9 +172,9 @@ export default function Dashboard() {
   };
 
   const confirmStop = async () => {
-    if (pollInterval) {
-      clearInterval(pollInterval);
-      setPollInterval(null);
+    if (eventSource) {
+      eventSource.close();
+      setEventSource(null);
     }
 
     try {
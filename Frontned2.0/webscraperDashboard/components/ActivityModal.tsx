@@ -1,4 +1,4 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 
 type ActivityModalProps = { isOpen: boolean; onClose: () => void };
 type ActivityEntry = {
@@ -20,6 +20,8 @@ type ConfirmModalProps = {
 };
 
 const API = "http://127.0.0.1:8000";
+// Wait for a burst of new jobs to settle before reloading the list
+const RELOAD_DELAY = 500;
 
 function ConfirmModal({ isOpen, onCancel, onConfirm }: ConfirmModalProps) {
   if (!isOpen) return null;
@@ -43,6 +45,14 @@ export default function ActivityModal({ isOpen, onClose }: ActivityModalProps) {
   const [error, setError] = useState<string | null>(null);
   const [sortBy, setSortBy] = useState<"timestamp" | "status">("timestamp");
   const [confirmDelete, setConfirmDelete] = useState<string | null>(null);
+  // Job ids the list shows, and new ones a reload was already scheduled for
+  const shown = useRef<Set<string>>(new Set());
+  const requested = useRef<Set<string>>(new Set());
+  const reloadTimer = useRef<ReturnType<typeof setTimeout> | null>(null);
+
+  useEffect(() => {
+    shown.current = new Set(entries.map((e) => e.job_id));
+  }, [entries]);
 
   const sortedEntries = [...entries].sort((a, b) => {
     if (sortBy === "status") {
@@ -114,8 +124,32 @@ export default function ActivityModal({ isOpen, onClose }: ActivityModalProps) {
     if (!isOpen) return;
 
     fetchActivity();
-    const interval = setInterval(fetchActivity, 2000);
-    return () => clearInterval(interval);
+    // Progress is pushed by the API; reload the list only for jobs it does not show yet
+    const source = new EventSource(`${API}/events`);
+    source.addEventListener("progress", (event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      if (data.deleted) {
+        setEntries((prev) => prev.filter((e) => e.job_id !== data.job_id));
+        return;
+      }
+      if (!shown.current.has(data.job_id)) {
+        // One debounced reload per new job, however many events it sends
+        if (requested.current.has(data.job_id)) return;
+        requested.current.add(data.job_id);
+        if (reloadTimer.current) clearTimeout(reloadTimer.current);
+        reloadTimer.current = setTimeout(() => {
+          reloadTimer.current = null;
+          fetchActivity();
+        }, RELOAD_DELAY);
+        return;
+      }
+      setEntries((prev) => prev.map((e) => (e.job_id === data.job_id ? { ...e, ...data } : e)));
+    });
+    return () => {
+      source.close();
+      if (reloadTimer.current) clearTimeout(reloadTimer.current);
+      reloadTimer.current = null;
+    };
   }, [isOpen]);
 
   const handleDeleteClick = (jobId: string) => {